@@ -33,6 +33,7 @@ import django.db.models
 
 import d1_gmn.app.models
 import d1_gmn.app.node_registry
+import d1_gmn.app.resolution
 
 # Actions have a relationship where each action implicitly includes the actions
 # of lower levels. The relationship is as follows:
@@ -184,6 +185,10 @@ def is_allowed(request, level, pid):
     """
     if is_trusted_subject(request):
         return True
+    context = d1_gmn.app.resolution.get_context(request, pid)
+    if context is not None:
+        permission_level = context.get_permission_level(request)
+        return permission_level is not None and permission_level >= level
     return d1_gmn.app.models.Permission.objects.filter(
         sciobj__pid__did=pid,
         subject__subject__in=request.all_subjects_set,
@@ -227,7 +232,10 @@ def assert_allowed(request, level, pid):
     object does not exist.
 
     """
-    if not d1_gmn.app.models.ScienceObject.objects.filter(pid__did=pid).exists():
+    if (
+        d1_gmn.app.resolution.get_context(request, pid) is None
+        and not d1_gmn.app.models.ScienceObject.objects.filter(pid__did=pid).exists()
+    ):
         raise d1_common.types.exceptions.NotFound(
             0,
             'Attempted to perform operation on non-existing object. pid="{}"'.format(
@@ -0,0 +1,226 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Persist checksums calculated from the bytes of science objects.
+
+MNRead.getChecksum() returns a checksum calculated from the object bytes, not the
+checksum declared in the System Metadata. Calculating it requires reading the full
+object, which, for proxy objects, means downloading it from the remote server. Auditors
+call getChecksum() for every object, so GMN stores the calculated checksums in the
+database, where repeated calls find them with a single query.
+
+- The first time a checksum is requested for an object, the checksums for all supported
+  algorithms are calculated in a single pass over the bytes, and stored.
+- Checksums calculated by the ingest upload handler while an object is uploaded are
+  stored when the object is created.
+- Each stored checksum records the URL and size of the object bytes and, for locally
+  stored objects, the modification time of the file. A stored checksum is only used
+  while they match the current state of the bytes, so checksums are recalculated if an
+  object file is replaced, e.g., by diag-restore-sciobj, or a proxy URL is changed.
+- Stored checksums are deleted together with the object.
+
+Checksums for proxy objects are used for as long as the URL is unchanged, as the bytes
+on the remote server cannot be checked without downloading them. Pass ``force=True``
+to recalculate and replace the stored checksums, as required by fixity audits.
+
+"""
+import collections
+import os
+
+import d1_common.checksum
+import d1_common.types.dataoneTypes
+
+import django.conf
+import django.db
+
+import d1_gmn.app.models
+import d1_gmn.app.proxy
+import d1_gmn.app.sciobj_store
+
+# State of the object bytes. mtime is None for proxy objects.
+SciobjState = collections.namedtuple("SciobjState", ["url", "size", "mtime"])
+
+
+def get_checksum_pyxb(sciobj_model, algorithm_str, force=False):
+    """Get a checksum calculated from the bytes of an object.
+
+    Args:
+        sciobj_model: ScienceObject
+        algorithm_str: str
+            A checksum algorithm supported by d1_common.checksum.
+        force: bool
+            True: Calculate the checksum from the object bytes, and replace any stored
+            checksums for the object.
+
+    Returns:
+        Checksum PyXB object.
+
+    """
+    if not force and _is_enabled():
+        checksum_str = get_stored_checksum(sciobj_model, algorithm_str)
+        if checksum_str is not None:
+            return _create_checksum_pyxb(checksum_str, algorithm_str)
+    checksum_dict, state = calculate_checksums(sciobj_model)
+    if _is_enabled():
+        save_checksums(sciobj_model, checksum_dict, state)
+    return _create_checksum_pyxb(checksum_dict[algorithm_str], algorithm_str)
+
+
+def get_stored_checksum(sciobj_model, algorithm_str):
+    """Return the stored checksum for an object, or None if no checksum has been stored
+    for ``algorithm_str`` or the object bytes have changed since it was calculated."""
+    try:
+        checksum_model = d1_gmn.app.models.ScienceObjectChecksum.objects.get(
+            sciobj=sciobj_model, checksum_algorithm__checksum_algorithm=algorithm_str
+        )
+    except d1_gmn.app.models.ScienceObjectChecksum.DoesNotExist:
+        return None
+    if not _is_current(checksum_model, sciobj_model):
+        return None
+    return checksum_model.checksum
+
+
+def calculate_checksums(sciobj_model):
+    """Calculate the checksums for all supported algorithms in a single pass over the
+    bytes of an object.
+
+    Returns:
+        tuple: (checksum_dict, state)
+            checksum_dict: Dict of algorithm to hex digest.
+            state: SciobjState of the bytes that were read.
+
+    """
+    # Algorithms that are aliases, such as "SHA1" and "SHA-1", share a calculator.
+    calculator_dict = {}
+    algorithm_to_calculator_dict = {}
+    for algorithm_str in d1_common.checksum.get_supported_algorithms():
+        calculator_type = d1_common.checksum.DATAONE_TO_PYTHON_CHECKSUM_ALGORITHM_MAP[
+            algorithm_str
+        ]
+        if calculator_type not in calculator_dict:
+            calculator_dict[calculator_type] = calculator_type()
+        algorithm_to_calculator_dict[algorithm_str] = calculator_dict[calculator_type]
+
+    state = _get_state(sciobj_model)
+    size = 0
+    for chunk_bytes in _get_sciobj_iter(sciobj_model):
+        for calculator in calculator_dict.values():
+            calculator.update(chunk_bytes)
+        size += len(chunk_bytes)
+    if state.mtime is None:
+        state = state._replace(size=size)
+
+    return (
+        {k: v.hexdigest() for k, v in algorithm_to_calculator_dict.items()},
+        state,
+    )
+
+
+def save_checksums(sciobj_model, checksum_dict, state=None):
+    """Store checksums for an object, replacing any stored checksums.
+
+    Concurrent calls for the same object, e.g., two first-time getChecksum() calls, do
+    not fail on the unique constraint. Rows that are stored by the other call while
+    this one runs are replaced with the checksums and state passed here.
+
+    Args:
+        sciobj_model: ScienceObject
+        checksum_dict: dict
+            Dict of algorithm to hex digest.
+        state: SciobjState
+            State of the bytes from which the checksums were calculated. By default,
+            the current state of the bytes.
+
+    """
+    if not _is_enabled():
+        return
+    state = state or _get_state(sciobj_model)
+    algorithm_dict = d1_gmn.app.models.checksum_algorithm_dict(checksum_dict)
+    with django.db.transaction.atomic():
+        d1_gmn.app.models.ScienceObjectChecksum.objects.filter(
+            sciobj=sciobj_model
+        ).delete()
+        d1_gmn.app.models.ScienceObjectChecksum.objects.bulk_create(
+            [
+                d1_gmn.app.models.ScienceObjectChecksum(
+                    sciobj=sciobj_model,
+                    checksum_algorithm=algorithm_dict[algorithm_str],
+                    checksum=checksum_str,
+                    url=state.url,
+                    size=state.size,
+                    mtime=state.mtime,
+                )
+                for algorithm_str, checksum_str in checksum_dict.items()
+            ],
+            ignore_conflicts=True,
+        )
+        stored_set = set(
+            d1_gmn.app.models.ScienceObjectChecksum.objects.filter(
+                sciobj=sciobj_model, url=state.url, size=state.size, mtime=state.mtime
+            ).values_list("checksum_algorithm__checksum_algorithm", "checksum")
+        )
+        for algorithm_str, checksum_str in checksum_dict.items():
+            if (algorithm_str, checksum_str) in stored_set:
+                continue
+            d1_gmn.app.models.ScienceObjectChecksum.objects.filter(
+                sciobj=sciobj_model, checksum_algorithm=algorithm_dict[algorithm_str]
+            ).update(
+                checksum=checksum_str,
+                url=state.url,
+                size=state.size,
+                mtime=state.mtime,
+            )
+
+
+# Private
+
+
+def _is_enabled():
+    return django.conf.settings.CHECKSUM_CACHE_ENABLED
+
+
+def _is_current(checksum_model, sciobj_model):
+    if checksum_model.url != sciobj_model.url:
+        return False
+    if d1_gmn.app.proxy.is_proxy_url(sciobj_model.url):
+        return True
+    try:
+        state = _get_state(sciobj_model)
+    except EnvironmentError:
+        return False
+    return checksum_model.size == state.size and checksum_model.mtime == state.mtime
+
+
+def _get_state(sciobj_model):
+    if d1_gmn.app.proxy.is_proxy_url(sciobj_model.url):
+        return SciobjState(sciobj_model.url, sciobj_model.size, None)
+    stat_result = os.stat(
+        d1_gmn.app.sciobj_store.get_abs_sciobj_file_path_by_url(sciobj_model.url)
+    )
+    return SciobjState(sciobj_model.url, stat_result.st_size, stat_result.st_mtime)
+
+
+def _get_sciobj_iter(sciobj_model):
+    if d1_gmn.app.proxy.is_proxy_url(sciobj_model.url):
+        return d1_gmn.app.proxy.get_sciobj_iter_remote(sciobj_model.url)
+    return d1_gmn.app.sciobj_store.get_sciobj_iter_by_url(sciobj_model.url)
+
+
+def _create_checksum_pyxb(checksum_str, algorithm_str):
+    checksum_pyxb = d1_common.types.dataoneTypes.checksum(checksum_str)
+    checksum_pyxb.algorithm = algorithm_str
+    return checksum_pyxb
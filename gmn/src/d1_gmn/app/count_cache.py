@@ -0,0 +1,215 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cache the total number of items in ObjectList and Log results.
+
+MNRead.listObjects() and MNCore.getLogRecords() return the total number of items in
+the filtered result set together with each slice. Counting the items requires a full
+scan of the filtered result set, which is slow on large nodes, especially when an
+access policy filter is applied. Paging clients issue the same count once per slice.
+
+The count is cached in the Django cache under a key that is generated from the
+normalized filter parameters, the API endpoint and the session subjects. Instead of
+tracking which cached counts are affected by a given change, each scope (``object``
+and ``log``) has a generation number that is included in the keys. Incrementing the
+generation invalidates all the counts for the scope.
+
+- Creating, updating, archiving and deleting objects invalidates both scopes.
+- Adding an event log entry other than ``read`` invalidates the ``log`` scope. Read
+  events are logged for most API calls, and invalidating for each of them would keep
+  the ``log`` counts permanently uncached on a busy node. Instead, ``log`` counts are
+  kept for at most ``COUNT_CACHE_LOG_TIMEOUT`` seconds, so totals may omit recent read
+  events for that long.
+
+Invalidation is only visible to all GMN processes if the Django cache is shared
+between them (e.g., Memcached). With the default process local cache, counts may
+remain stale in other processes until they time out, so the default timeout is only a
+few seconds unless the cache is shared. See ``_get_timeout()``.
+
+If ``COUNT_ESTIMATE_FOR_TRUSTED`` is set, requests from trusted subjects receive the
+row estimate from the Postgres query planner instead of an exact count. This is
+nearly free, but the total is approximate, so the end of the result set must be
+detected by the absence of a resumption token (see the slice module).
+
+"""
+import copy
+import hashlib
+import json
+import logging
+
+import d1_common.url
+import d1_common.util
+
+import django.conf
+import django.core.cache
+import django.db
+import django.db.transaction
+
+import d1_gmn.app.auth
+import d1_gmn.app.util
+
+OBJECT_SCOPE = "object"
+LOG_SCOPE = "log"
+
+logger = logging.getLogger(__name__)
+
+
+def get_total(request, query, scope):
+    """Return the total number of items in the filtered result set.
+
+    Args:
+        request: HttpRequest
+            The filter parameters and session subjects are read from the request.
+
+        query: QuerySet
+            Query, with all filters except slicing applied, for which to get the
+            count.
+
+        scope: str
+            ``OBJECT_SCOPE`` or ``LOG_SCOPE``.
+
+    Returns:
+        tuple: ``(total_int, is_estimated_total)``
+
+    """
+    if django.conf.settings.COUNT_ESTIMATE_FOR_TRUSTED and (
+        d1_gmn.app.auth.is_trusted_subject(request)
+    ):
+        estimate_int = _get_estimated_count(query)
+        if estimate_int is not None:
+            return estimate_int, True
+    if not django.conf.settings.COUNT_CACHE_ENABLED:
+        return query.count(), False
+    key_str = _gen_cache_key(request, scope)
+    total_int = django.core.cache.cache.get(key_str)
+    if total_int is None:
+        total_int = query.count()
+        django.core.cache.cache.set(key_str, total_int, _get_timeout(scope))
+        logger.debug('Count cache miss. key="{}" total={}'.format(key_str, total_int))
+    else:
+        logger.debug('Count cache hit. key="{}" total={}'.format(key_str, total_int))
+    return total_int, False
+
+
+def invalidate_object_counts():
+    """Invalidate cached counts for both ObjectList and Log.
+
+    Call when an object is created, updated, archived or deleted.
+
+    """
+    _invalidate(OBJECT_SCOPE)
+    _invalidate(LOG_SCOPE)
+
+
+def invalidate_log_counts():
+    """Invalidate cached counts for Log.
+
+    Call when an event log entry other than ``read`` is added.
+
+    """
+    _invalidate(LOG_SCOPE)
+
+
+# Private
+
+
+def _get_timeout(scope):
+    """Return the number of seconds to keep a cached count.
+
+    If ``COUNT_CACHE_TIMEOUT`` is None, cached counts are kept for an hour if the
+    Django cache is shared between the GMN processes, and for 10 seconds otherwise.
+    Counts for the ``log`` scope are kept for at most ``COUNT_CACHE_LOG_TIMEOUT``
+    seconds, since read events do not invalidate them.
+
+    """
+    timeout_sec = django.conf.settings.COUNT_CACHE_TIMEOUT
+    if timeout_sec is None:
+        timeout_sec = 60 * 60 if d1_gmn.app.util.is_shared_cache() else 10
+    if scope == LOG_SCOPE:
+        timeout_sec = min(timeout_sec, django.conf.settings.COUNT_CACHE_LOG_TIMEOUT)
+    return timeout_sec
+
+
+def _invalidate(scope):
+    """Invalidate now and again when the current transaction commits.
+
+    Invalidating only now would allow a concurrent request to count and cache the
+    state from before the transaction committed.
+
+    """
+    _increment_generation(scope)
+    django.db.transaction.on_commit(lambda: _increment_generation(scope))
+
+
+def _increment_generation(scope):
+    key_str = _gen_generation_key(scope)
+    try:
+        django.core.cache.cache.incr(key_str)
+    except ValueError:
+        # Key does not exist
+        django.core.cache.cache.set(key_str, 1, None)
+
+
+def _get_generation(scope):
+    return django.core.cache.cache.get_or_set(_gen_generation_key(scope), 0, None)
+
+
+def _gen_generation_key(scope):
+    return "count_cache_generation_{}".format(scope)
+
+
+def _gen_cache_key(request, scope):
+    """Generate cache key for the count of items matching the filters in the request.
+
+    The slice parameters are removed, so that all slices of a result set share the
+    count. The path is included since the same parameters may select different items
+    in different API versions and endpoints.
+
+    """
+    url_dict = copy.deepcopy(d1_common.url.parseUrl(request.get_full_path()))
+    for param_name in ("start", "count", "resumptionToken"):
+        url_dict["query"].pop(param_name, None)
+    key_json = d1_common.util.serialize_to_normalized_compact_json(
+        {
+            "url_dict": url_dict,
+            "scope": scope,
+            "generation": _get_generation(scope),
+            "subject": sorted(request.all_subjects_set),
+        }
+    )
+    return "count_cache_{}".format(hashlib.sha256(key_json.encode("utf-8")).hexdigest())
+
+
+def _get_estimated_count(query):
+    """Return the Postgres query planner's estimate for the number of rows the query
+    returns.
+
+    Return None if the estimate is not available, e.g., when not running on Postgres.
+
+    """
+    if django.db.connection.vendor != "postgresql":
+        return None
+    sql_str, param_tup = query.query.sql_with_params()
+    with django.db.connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql_str, param_tup)
+        plan_json = cursor.fetchone()[0]
+    # Depending on the driver version, JSON may or may not already be parsed
+    if isinstance(plan_json, str):
+        plan_json = json.loads(plan_json)
+    estimate_int = int(plan_json[0]["Plan"]["Plan Rows"])
+    logger.debug("Estimated count={}".format(estimate_int))
+    return estimate_int
@@ -32,6 +32,8 @@ return: Filtered query
 return: QuerySet
 
 """
+import d1_common.const
+
 import django.db.models
 import django.db.models.expressions
 
@@ -43,19 +45,37 @@ import d1_gmn.app.views.assert_db
 import d1_gmn.app.views.util
 
 
-def add_access_policy_filter(request, query, column_name):
+def add_access_policy_filter(request, query, sciobj_prefix):
     """Filter records that do not have ``read`` or better access for one or more of the
     session subjects.
 
     Since ``read`` is the lowest access level that a subject can have, this method only
     has to filter on the presence of the subject.
 
+    Most objects are public, so the readable objects are selected as the union of the
+    objects with the denormalized ``is_public`` flag set and the objects for which the
+    remaining session subjects have been explicitly granted access. Each side of the
+    union reads a single index, and the lookup of granted objects only reads the
+    (subject, sciobj) index on the Permission table. If the session has no subjects
+    other than the public subject, only the ``is_public`` flag is checked.
+
+    ``sciobj_prefix`` is the lookup path from the records to the SciObj, such as ``""``
+    for ScienceObject records or ``"sciobj__"`` for EventLog records.
+
     """
-    q = d1_gmn.app.models.Subject.objects.filter(
-        subject__in=request.all_subjects_set
-    ).values("permission__sciobj")
-    filter_arg = "{}__in".format(column_name)
-    return query.filter(**{filter_arg: q})
+    subject_set = request.all_subjects_set - {d1_common.const.SUBJECT_PUBLIC}
+    if not subject_set:
+        return query.filter(**{"{}is_public".format(sciobj_prefix): True})
+    readable_query = (
+        d1_gmn.app.models.ScienceObject.objects.filter(is_public=True)
+        .values("id")
+        .union(
+            d1_gmn.app.models.Permission.objects.filter(
+                subject__subject__in=subject_set
+            ).values("sciobj")
+        )
+    )
+    return query.filter(**{"{}id__in".format(sciobj_prefix): readable_query})
 
 
 def add_redact_annotation(request, query):
@@ -82,6 +102,21 @@ def add_redact_annotation(request, query):
     )
 
 
+def add_values_list_projection(query, field_list):
+    """Return the query as flat tuples holding the values of the fields in
+    ``field_list``.
+
+    Related values are retrieved with joins in the same select statement, so the
+    number of queries required for a page of results does not depend on the number of
+    items in the page. If the query has a ``redact`` annotation, it is added as the last
+    value in each tuple.
+
+    """
+    if "redact" in query.query.annotations:
+        field_list = list(field_list) + ["redact"]
+    return query.values_list(*field_list)
+
+
 def add_replica_filter(request, query):
     param_name = "replicaStatus"
     bool_val = request.GET.get(param_name, True)
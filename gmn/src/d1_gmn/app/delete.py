@@ -21,11 +21,14 @@ import urllib.parse
 
 import django.apps
 
+import d1_gmn.app.count_cache
 import d1_gmn.app.did
+import d1_gmn.app.dimension_cache
 import d1_gmn.app.model_util
 import d1_gmn.app.models
 import d1_gmn.app.revision
 import d1_gmn.app.sciobj_store
+import d1_gmn.app.sysmeta_cache
 
 
 def delete_sciobj(pid):
@@ -51,10 +54,13 @@ def delete_all_from_db():
     # be deleted in any order without breaking constraints.
     for model in django.apps.apps.get_models():
         model.objects.all().delete()
+    d1_gmn.app.dimension_cache.invalidate()
 
 
 def delete_sciobj_from_database(pid):
     sciobj_model = d1_gmn.app.model_util.get_sci_model(pid)
+    # Must be done before the object is removed from the chain.
+    d1_gmn.app.sysmeta_cache.invalidate_chain(pid)
     if d1_gmn.app.did.is_in_revision_chain(sciobj_model):
         d1_gmn.app.revision.cut_from_chain(sciobj_model)
     d1_gmn.app.revision.delete_chain(pid)
@@ -62,3 +68,4 @@ def delete_sciobj_from_database(pid):
     # related info is deleted when deleting the IdNamespace "root".
     d1_gmn.app.models.IdNamespace.objects.filter(did=pid).delete()
     d1_gmn.app.model_util.delete_unused_subjects()
+    d1_gmn.app.count_cache.invalidate_object_counts()
@@ -27,6 +27,7 @@ import d1_gmn.app.models
 import d1_gmn.app.proxy
 import d1_gmn.app.resource_map
 import d1_gmn.app.revision
+import d1_gmn.app.sid_cache
 import d1_gmn.app.views
 
 logger = logging.getLogger(__name__)
@@ -120,6 +121,10 @@ def resolve_sid_v2(did):
     If the DID is a valid PID, return it. If not, try to resolve it as a SID and, if
     successful, return the new PID. Else, raise NotFound exception.
     """
+    # SIDs and PIDs share a namespace, so a DID that is cached as a SID is not a PID.
+    pid = d1_gmn.app.sid_cache.get(did)
+    if pid is not None:
+        return pid
     if is_existing_object(did):
         return did
     elif is_sid(did):
@@ -0,0 +1,290 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In-process cache for rows in small lookup tables.
+
+Subjects, events, IP addresses, user agents, nodes, formats and checksum algorithms are
+stored in separate tables with a unique value column, and are referenced by ID. The
+wrappers in the models module that return the row for a given value are called many
+times per request, and each call issues a ``get_or_create()``. This module maps values
+to model instances in a bounded LRU cache in each process, so that repeated lookups
+do not require database round trips.
+
+- Rows are created with ``get_or_create()``, which handles concurrent creation of the
+  same value in another process or thread through the unique constraint on the value
+  column.
+
+- Model instances are only added to the cache after the transaction in which they were
+  retrieved or created commits. A row that is created in a transaction that is later
+  rolled back is never cached.
+
+- Rows in these tables are only deleted when they are no longer referenced, e.g., by
+  ``model_util.delete_unused_subjects()``. Call ``invalidate()`` after deleting rows.
+  This clears the cache in the current process and increments a generation number in
+  the Django cache, which causes the other processes to clear their caches on their
+  next lookup if the Django cache is shared between processes, e.g., Memcached.
+
+- With a Django cache that is private to each process, other processes would keep
+  deleted rows and fail on the next write that references them. So rows from tables
+  that are created with ``is_deletable`` are only cached if the Django cache is
+  shared.
+
+- The generation number is read from the Django cache at most once per request.
+  Outside of requests, e.g., in management commands, it is read for each lookup.
+
+- If ``DIMENSION_CACHE_PREFILL`` is set, the first lookup for a table loads up to
+  ``DIMENSION_CACHE_SIZE`` rows from the table.
+
+- ``get_or_create_many()`` resolves all the values needed for a batch of writes, such
+  as an import batch, with one query and one bulk insert per table.
+
+"""
+import collections
+import logging
+import threading
+
+import django.conf
+import django.core.cache
+import django.core.signals
+import django.db.transaction
+
+import d1_gmn.app.util
+
+GENERATION_KEY = "dimension_cache_generation"
+
+logger = logging.getLogger(__name__)
+
+_cache_list = []
+_generation_lock = threading.Lock()
+_generation = None
+# is_synced is None outside of requests, and False until the generation number has
+# been read in the current request.
+_request_local = threading.local()
+
+
+class DimensionCache:
+    def __init__(self, model_class, field_name, is_deletable=False):
+        """Cache for the rows of a lookup table.
+
+        Args:
+            model_class: Model
+                Model for a table with a unique value column.
+
+            field_name: str
+                Name of the unique value column.
+
+            is_deletable: bool
+                True if rows may be deleted from the table while GMN is running. Rows
+                are then only cached if the Django cache is shared between processes.
+
+        """
+        self._model_class = model_class
+        self._field_name = field_name
+        self._is_deletable = is_deletable
+        self._lock = threading.Lock()
+        self._model_dict = collections.OrderedDict()
+        self._is_prefilled = False
+        self._counter = collections.Counter()
+        _cache_list.append(self)
+
+    @property
+    def name(self):
+        return self._model_class.__name__
+
+    def get_or_create(self, value_str):
+        """Return the model instance for ``value_str``, creating the row if it does not
+        exist."""
+        if not self.is_enabled():
+            return self._get_or_create_db(value_str)
+        _sync_generation()
+        self._prefill_if_enabled()
+        with self._lock:
+            model = self._model_dict.get(value_str)
+            if model is not None:
+                self._model_dict.move_to_end(value_str)
+                self._counter["hit"] += 1
+                return model
+            self._counter["miss"] += 1
+        model = self._get_or_create_db(value_str)
+        django.db.transaction.on_commit(lambda: self._put(value_str, model))
+        return model
+
+    def get_or_create_many(self, value_iter):
+        """Return a dict that maps each distinct value in ``value_iter`` to its model
+        instance, creating any missing rows with a single bulk insert."""
+        value_set = set(value_iter)
+        model_dict = {}
+        is_enabled = self.is_enabled()
+        if is_enabled:
+            _sync_generation()
+            self._prefill_if_enabled()
+            with self._lock:
+                for value_str in value_set:
+                    model = self._model_dict.get(value_str)
+                    if model is not None:
+                        self._model_dict.move_to_end(value_str)
+                        model_dict[value_str] = model
+                self._counter["hit"] += len(model_dict)
+                self._counter["miss"] += len(value_set) - len(model_dict)
+        db_dict = self._get_or_create_many_db(value_set - model_dict.keys())
+        if is_enabled and db_dict:
+            django.db.transaction.on_commit(lambda: self._put_many(db_dict))
+        model_dict.update(db_dict)
+        return model_dict
+
+    def is_enabled(self):
+        if not django.conf.settings.DIMENSION_CACHE_ENABLED:
+            return False
+        return not self._is_deletable or d1_gmn.app.util.is_shared_cache()
+
+    def clear(self):
+        with self._lock:
+            self._model_dict.clear()
+            self._is_prefilled = False
+
+    def get_stats(self):
+        """Return counters.
+
+        ``hit`` is the number of lookups that were served from the cache. Each avoids
+        a database round trip. With a shared Django cache, reading the generation
+        number costs one cache round trip per request, regardless of the number of
+        hits.
+
+        """
+        with self._lock:
+            return {
+                "size": len(self._model_dict),
+                "hit": self._counter["hit"],
+                "miss": self._counter["miss"],
+            }
+
+    def _get_or_create_db(self, value_str):
+        return self._model_class.objects.get_or_create(
+            **{self._field_name: value_str}
+        )[0]
+
+    def _get_or_create_many_db(self, value_set):
+        if not value_set:
+            return {}
+        model_dict = self._get_many_db(value_set)
+        missing_set = value_set - model_dict.keys()
+        if missing_set:
+            # Rows created concurrently by another process are skipped by the insert
+            # and picked up by the second query.
+            self._model_class.objects.bulk_create(
+                [self._model_class(**{self._field_name: v}) for v in missing_set],
+                ignore_conflicts=True,
+            )
+            model_dict.update(self._get_many_db(missing_set))
+        return model_dict
+
+    def _get_many_db(self, value_set):
+        return {
+            getattr(model, self._field_name): model
+            for model in self._model_class.objects.filter(
+                **{"{}__in".format(self._field_name): value_set}
+            )
+        }
+
+    def _put_many(self, model_dict):
+        for value_str, model in model_dict.items():
+            self._put(value_str, model)
+
+    def _put(self, value_str, model):
+        with self._lock:
+            self._model_dict[value_str] = model
+            self._model_dict.move_to_end(value_str)
+            while len(self._model_dict) > django.conf.settings.DIMENSION_CACHE_SIZE:
+                self._model_dict.popitem(last=False)
+
+    def _prefill_if_enabled(self):
+        if not django.conf.settings.DIMENSION_CACHE_PREFILL or self._is_prefilled:
+            return
+        self._is_prefilled = True
+        model_list = list(
+            self._model_class.objects.order_by("id")[
+                : django.conf.settings.DIMENSION_CACHE_SIZE
+            ]
+        )
+
+        def put_all():
+            for model in model_list:
+                self._put(getattr(model, self._field_name), model)
+
+        django.db.transaction.on_commit(put_all)
+        logger.debug(
+            "Prefilling dimension cache. table={} rows={}".format(
+                self.name, len(model_list)
+            )
+        )
+
+
+def invalidate():
+    """Clear all dimension caches in this process, and cause other processes to clear
+    theirs.
+
+    Call after deleting rows from any of the cached tables.
+
+    """
+    for dimension_cache in _cache_list:
+        dimension_cache.clear()
+    try:
+        django.core.cache.cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Key does not exist
+        django.core.cache.cache.set(GENERATION_KEY, 1, None)
+
+
+def get_stats():
+    """Return counters for all dimension caches in this process.
+
+    Returns:
+        dict: Table name -> dict of counters.
+
+    """
+    return {c.name: c.get_stats() for c in _cache_list}
+
+
+# Private
+
+
+def _sync_generation():
+    """Clear all dimension caches in this process if another process has called
+    ``invalidate()`` since the caches were last synced."""
+    global _generation
+    if getattr(_request_local, "is_synced", None):
+        return
+    generation = django.core.cache.cache.get(GENERATION_KEY, 0)
+    with _generation_lock:
+        if generation != _generation:
+            for dimension_cache in _cache_list:
+                dimension_cache.clear()
+            _generation = generation
+    if getattr(_request_local, "is_synced", None) is False:
+        _request_local.is_synced = True
+
+
+def _on_request_started(**_kwargs):
+    _request_local.is_synced = False
+
+
+def _on_request_finished(**_kwargs):
+    _request_local.is_synced = None
+
+
+django.core.signals.request_started.connect(_on_request_started)
+django.core.signals.request_finished.connect(_on_request_finished)
@@ -23,12 +23,16 @@ MNCore.getLogRecords() and aggregated by CNs.
 """
 import re
 
+import d1_common.date_time
 import d1_common.types.exceptions
 
 import django.conf
 
 import d1_gmn.app.auth
+import d1_gmn.app.count_cache
+import d1_gmn.app.event_log_writer
 import d1_gmn.app.models
+import d1_gmn.app.resolution
 
 
 def create_log_entry(object_model, event, ip_address, user_agent, subject):
@@ -39,6 +43,8 @@ def create_log_entry(object_model, event, ip_address, user_agent, subject):
     event_log_model.user_agent = d1_gmn.app.models.user_agent(user_agent)
     event_log_model.subject = d1_gmn.app.models.subject(subject)
     event_log_model.save()
+    if event != "read":
+        d1_gmn.app.count_cache.invalidate_log_counts()
     return event_log_model
 
 
@@ -47,10 +53,57 @@ def create(pid, request, timestamp=None):
 
 
 def log_read_event(pid, request, timestamp=None):
-    if not _is_ignored_read_event(request):
+    """Log a "read" event.
+
+    Depending on ``EVENT_LOG_WRITE_MODE``, the event may be written after the response
+    has been returned. See the event_log_writer module.
+
+    """
+    if _is_ignored_read_event(request):
+        return
+    if d1_gmn.app.event_log_writer.is_deferred():
+        d1_gmn.app.event_log_writer.submit(
+            d1_gmn.app.event_log_writer.LogEntry(
+                pid,
+                "read",
+                request.META["REMOTE_ADDR"],
+                request.META.get("HTTP_USER_AGENT", "<not provided>"),
+                request.primary_subject_str,
+                timestamp or d1_common.date_time.utc_now(),
+            )
+        )
+    else:
         _log(pid, request, "read", timestamp)
 
 
+def log_read_event_many(pid_list, request):
+    """Log "read" events for multiple objects.
+
+    In deferred mode, the events are submitted one by one, as for ``log_read_event()``.
+    Otherwise, they are written with a single bulk insert.
+
+    """
+    if _is_ignored_read_event(request):
+        return
+    timestamp = d1_common.date_time.utc_now()
+    log_entry_list = [
+        d1_gmn.app.event_log_writer.LogEntry(
+            pid,
+            "read",
+            request.META["REMOTE_ADDR"],
+            request.META.get("HTTP_USER_AGENT", "<not provided>"),
+            request.primary_subject_str,
+            timestamp,
+        )
+        for pid in pid_list
+    ]
+    if d1_gmn.app.event_log_writer.is_deferred():
+        for log_entry in log_entry_list:
+            d1_gmn.app.event_log_writer.submit(log_entry)
+    else:
+        d1_gmn.app.event_log_writer.write_batch(log_entry_list)
+
+
 def log_update_event(pid, request, timestamp=None):
     _log(pid, request, "update", timestamp)
 
@@ -81,10 +134,8 @@ def _log(pid, request, event, timestamp=None):
     sciobj_model = None
     if pid is not None:
         try:
-            sciobj_model = d1_gmn.app.models.ScienceObject.objects.filter(pid__did=pid)[
-                0
-            ]
-        except IndexError:
+            sciobj_model = d1_gmn.app.resolution.get_sciobj_model(request, pid)
+        except d1_gmn.app.models.ScienceObject.DoesNotExist:
             raise d1_common.types.exceptions.ServiceFailure(
                 0,
                 'Attempted to create event log for non-existing object. pid="{}"'.format(
@@ -100,8 +151,8 @@ def _log(pid, request, event, timestamp=None):
         request.primary_subject_str,
     )
 
-    # The datetime is an optional parameter. If it is not provided, a
-    # "auto_now_add=True" value in the the model defaults it to Now. The
+    # The datetime is an optional parameter. If it is not provided, the
+    # "default=timezone.now" value in the model defaults it to Now. The
     # disadvantage to this approach is that we have to update the timestamp in a
     # separate step if we want to set it to anything other than Now.
     if timestamp is not None:
@@ -0,0 +1,400 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Deferred, batched writing of "read" events to the Event Log.
+
+Logging an event synchronously requires looking up the object and the event, IP
+address, user agent and subject rows, and inserting the log entry, all while the client
+waits for the response. For MNRead.get(), MNRead.describe() and MNRead.getChecksum()
+the log write can be a significant part of the response time.
+
+``EVENT_LOG_WRITE_MODE`` selects how "read" events are written:
+
+- ``sync``: Written in the request, as part of the request transaction.
+- ``buffered``: Added to a bounded in-memory queue, which is drained by a background
+  thread in each GMN process. Entries are written with ``bulk_create()`` when
+  ``EVENT_LOG_BATCH_SIZE`` entries have been queued or ``EVENT_LOG_FLUSH_INTERVAL``
+  seconds have passed. Queued entries are lost if the process exits abnormally.
+- ``spool``: Appended to the spool file at ``EVENT_LOG_SPOOL_PATH``, which is drained
+  by the ``process_event_log_spool`` management command. Entries survive process
+  restarts, and also power loss if ``EVENT_LOG_SPOOL_FSYNC`` is set. By default, the
+  spool file is in the private state directory of the SciObj store. The spool and
+  its sidecar files are opened without following symbolic links, and are refused if
+  they are owned by another user or writable by others, so that other local users
+  cannot redirect the writes or inject entries.
+
+Other events are rare and are always written synchronously, so that they are committed
+together with the changes they record.
+
+In each batch, the objects are resolved with a single query, and the event, IP address,
+user agent and subject rows are resolved with one query and one bulk insert per table.
+
+"""
+import atexit
+import collections
+import fcntl
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import iso8601
+
+import d1_common.date_time
+
+import django.conf
+import django.db
+import django.db.transaction
+
+import d1_gmn.app.count_cache
+import d1_gmn.app.models
+import d1_gmn.app.sciobj_store
+
+SYNC_MODE = "sync"
+BUFFERED_MODE = "buffered"
+SPOOL_MODE = "spool"
+
+# Name of the spool file in the private state directory of the SciObj store, used if
+# EVENT_LOG_SPOOL_PATH is not set.
+SPOOL_FILE_NAME = "event_log.spool"
+
+LogEntry = collections.namedtuple(
+    "LogEntry", ["pid", "event", "ip_address", "user_agent", "subject", "timestamp"]
+)
+
+logger = logging.getLogger(__name__)
+
+
+def is_deferred():
+    """Return True if "read" events are written outside of the request."""
+    return django.conf.settings.EVENT_LOG_WRITE_MODE in (BUFFERED_MODE, SPOOL_MODE)
+
+
+def submit(log_entry):
+    """Queue or spool a LogEntry, according to ``EVENT_LOG_WRITE_MODE``."""
+    mode = django.conf.settings.EVENT_LOG_WRITE_MODE
+    if mode == BUFFERED_MODE:
+        _submit_to_queue(log_entry)
+    elif mode == SPOOL_MODE:
+        _append_to_spool(log_entry)
+    else:
+        write_batch([log_entry])
+
+
+def flush():
+    """Write all entries that are currently in the in-memory queue.
+
+    Called by the background thread, at process exit, and can be called directly
+    when entries must be visible immediately, e.g., in tests.
+
+    """
+    while True:
+        log_entry_list = _get_batch(timeout_sec=None)
+        if not log_entry_list:
+            break
+        write_batch(log_entry_list)
+
+
+def write_batch(log_entry_list):
+    """Write a list of LogEntry to the Event Log in a single transaction.
+
+    Entries for objects that no longer exist are skipped.
+
+    Returns:
+        int: Number of entries written.
+
+    """
+    if not log_entry_list:
+        return 0
+    with django.db.transaction.atomic():
+        sciobj_id_dict = dict(
+            d1_gmn.app.models.ScienceObject.objects.filter(
+                pid__did__in={e.pid for e in log_entry_list}
+            ).values_list("pid__did", "id")
+        )
+        event_dict = {
+            event_str: d1_gmn.app.models.event(event_str)
+            for event_str in {e.event for e in log_entry_list}
+        }
+        ip_address_dict = d1_gmn.app.models.ip_address_dict(
+            e.ip_address for e in log_entry_list
+        )
+        user_agent_dict = d1_gmn.app.models.user_agent_dict(
+            e.user_agent for e in log_entry_list
+        )
+        subject_dict = d1_gmn.app.models.subject_dict(e.subject for e in log_entry_list)
+        event_log_model_list = []
+        for log_entry in log_entry_list:
+            sciobj_id = sciobj_id_dict.get(log_entry.pid)
+            if sciobj_id is None:
+                logger.warning(
+                    'Skipped event for non-existing object. pid="{}" event="{}"'.format(
+                        log_entry.pid, log_entry.event
+                    )
+                )
+                continue
+            event_log_model_list.append(
+                d1_gmn.app.models.EventLog(
+                    sciobj_id=sciobj_id,
+                    event=event_dict[log_entry.event],
+                    ip_address=ip_address_dict[log_entry.ip_address],
+                    user_agent=user_agent_dict[log_entry.user_agent],
+                    subject=subject_dict[log_entry.subject],
+                    timestamp=log_entry.timestamp,
+                )
+            )
+        d1_gmn.app.models.EventLog.objects.bulk_create(
+            event_log_model_list, batch_size=django.conf.settings.EVENT_LOG_BATCH_SIZE
+        )
+        if any(e.event != "read" for e in log_entry_list):
+            d1_gmn.app.count_cache.invalidate_log_counts()
+    logger.debug("Wrote event log batch. count={}".format(len(event_log_model_list)))
+    return len(event_log_model_list)
+
+
+def drain_spool(spool_path=None):
+    """Write all entries in the spool file to the Event Log.
+
+    The spool file is first moved aside, so that GMN processes can continue to spool
+    new entries while the old ones are written. If a previous drain was interrupted,
+    the entries that were moved aside then are written first.
+
+    The byte offset of the first entry that has not been written is recorded in a
+    sidecar file after each committed batch, so that an interrupted drain resumes after
+    the last committed batch instead of writing the committed entries again. Only a
+    drain that is interrupted between committing a batch and recording the offset
+    writes that batch again.
+
+    Returns:
+        int: Number of entries written.
+
+    """
+    spool_path = spool_path or get_spool_path()
+    drain_path = spool_path + ".drain"
+    offset_path = drain_path + ".offset"
+    if not os.path.lexists(drain_path):
+        # An offset file without a drain file is left over from a drain that was
+        # interrupted after the drain file was removed.
+        _remove_if_exists(offset_path)
+        try:
+            os.rename(spool_path, drain_path)
+        except FileNotFoundError:
+            return 0
+    with os.fdopen(
+        d1_gmn.app.sciobj_store.open_private_file(drain_path, os.O_RDONLY), "rb"
+    ) as f:
+        # Wait for processes that opened the file before it was moved to complete
+        # their writes.
+        fcntl.lockf(f, fcntl.LOCK_SH)
+        offset_int = _read_drain_offset(offset_path)
+        f.seek(offset_int)
+        total_int = 0
+        log_entry_list = []
+        for line_bytes in f:
+            offset_int += len(line_bytes)
+            log_entry = _decode_log_entry(line_bytes.decode("utf-8", errors="replace"))
+            if log_entry is not None:
+                log_entry_list.append(log_entry)
+            if len(log_entry_list) >= django.conf.settings.EVENT_LOG_BATCH_SIZE:
+                total_int += write_batch(log_entry_list)
+                _write_drain_offset(offset_path, offset_int)
+                log_entry_list = []
+        total_int += write_batch(log_entry_list)
+    os.unlink(drain_path)
+    _remove_if_exists(offset_path)
+    return total_int
+
+
+def get_spool_path():
+    """Return EVENT_LOG_SPOOL_PATH, defaulting to a file in the private state
+    directory of the SciObj store."""
+    return django.conf.settings.EVENT_LOG_SPOOL_PATH or os.path.join(
+        d1_gmn.app.sciobj_store.get_abs_sciobj_var_path(), SPOOL_FILE_NAME
+    )
+
+
+# Private
+
+
+# Buffered mode
+
+_queue = None
+_queue_lock = threading.Lock()
+_flush_thread = None
+_is_atexit_registered = False
+
+
+def _submit_to_queue(log_entry):
+    _ensure_flush_thread()
+    try:
+        _get_queue().put_nowait(log_entry)
+    except queue.Full:
+        # Fall back to writing the entry in the request instead of dropping it.
+        logger.warning("Event log queue is full. Writing entry synchronously")
+        write_batch([log_entry])
+
+
+def _get_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = queue.Queue(maxsize=django.conf.settings.EVENT_LOG_QUEUE_SIZE)
+        return _queue
+
+
+def _ensure_flush_thread():
+    global _flush_thread, _is_atexit_registered
+    with _queue_lock:
+        if _flush_thread is not None and _flush_thread.is_alive():
+            return
+        if not _is_atexit_registered:
+            # Write any entries that are still queued on clean shutdown.
+            atexit.register(flush)
+            _is_atexit_registered = True
+        _flush_thread = threading.Thread(
+            target=_flush_thread_main, name="gmn-event-log-writer", daemon=True
+        )
+        _flush_thread.start()
+
+
+def _flush_thread_main():
+    while True:
+        log_entry_list = _get_batch(
+            timeout_sec=django.conf.settings.EVENT_LOG_FLUSH_INTERVAL
+        )
+        if not log_entry_list:
+            continue
+        try:
+            write_batch(log_entry_list)
+        except Exception:
+            logger.exception(
+                "Unable to write event log batch. Dropped {} entries".format(
+                    len(log_entry_list)
+                )
+            )
+        finally:
+            # The thread has its own database connection.
+            django.db.connection.close()
+
+
+def _get_batch(timeout_sec):
+    """Get up to ``EVENT_LOG_BATCH_SIZE`` entries from the queue.
+
+    Args:
+        timeout_sec: float or None
+            None: Return immediately with the entries that are already queued.
+            float: Wait for the first entry, then wait until the batch is full or the
+            timeout has passed since the first entry was received.
+
+    """
+    q = _get_queue()
+    batch_size = django.conf.settings.EVENT_LOG_BATCH_SIZE
+    log_entry_list = []
+    deadline_ts = None
+    while len(log_entry_list) < batch_size:
+        try:
+            if timeout_sec is None:
+                log_entry = q.get_nowait()
+            elif deadline_ts is None:
+                log_entry = q.get()
+                deadline_ts = time.monotonic() + timeout_sec
+            else:
+                log_entry = q.get(timeout=max(0, deadline_ts - time.monotonic()))
+        except queue.Empty:
+            break
+        log_entry_list.append(log_entry)
+    return log_entry_list
+
+
+# Spool mode
+
+
+def _append_to_spool(log_entry):
+    spool_path = get_spool_path()
+    line_bytes = (_encode_log_entry(log_entry) + "\n").encode("utf-8")
+    while True:
+        fd = d1_gmn.app.sciobj_store.open_private_file(
+            spool_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT
+        )
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+            # The drain may have moved the file after it was opened here. If so, open
+            # the new file instead.
+            try:
+                is_moved = os.fstat(fd).st_ino != os.lstat(spool_path).st_ino
+            except FileNotFoundError:
+                is_moved = True
+            if not is_moved:
+                os.write(fd, line_bytes)
+                if django.conf.settings.EVENT_LOG_SPOOL_FSYNC:
+                    os.fsync(fd)
+                return
+        finally:
+            os.close(fd)
+
+
+def _read_drain_offset(offset_path):
+    try:
+        fd = d1_gmn.app.sciobj_store.open_private_file(offset_path, os.O_RDONLY)
+    except FileNotFoundError:
+        return 0
+    with os.fdopen(fd, "r") as f:
+        return int(f.read())
+
+
+def _write_drain_offset(offset_path, offset_int):
+    """Atomically replace the offset file."""
+    tmp_path = offset_path + ".tmp"
+    with os.fdopen(
+        d1_gmn.app.sciobj_store.open_private_file(
+            tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        ),
+        "w",
+    ) as f:
+        f.write(str(offset_int))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, offset_path)
+
+
+def _remove_if_exists(file_path):
+    try:
+        os.unlink(file_path)
+    except FileNotFoundError:
+        pass
+
+
+def _encode_log_entry(log_entry):
+    return json.dumps(
+        log_entry._replace(timestamp=log_entry.timestamp.isoformat())._asdict()
+    )
+
+
+def _decode_log_entry(line_str):
+    try:
+        entry_dict = json.loads(line_str)
+        entry_dict["timestamp"] = d1_common.date_time.dt_from_iso8601_str(
+            entry_dict["timestamp"]
+        )
+        return LogEntry(**entry_dict)
+    except (ValueError, TypeError, KeyError, iso8601.ParseError):
+        # A partially written line is left if a process is killed while spooling.
+        logger.warning(
+            'Skipped invalid entry in event log spool. line="{}"'.format(line_str)
+        )
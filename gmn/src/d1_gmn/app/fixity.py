@@ -0,0 +1,206 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Verify that the bytes of locally stored objects match their System Metadata.
+
+A fixity check reads the file holding the object bytes, and compares its size and
+checksum with the size and checksum recorded for the object. The result and time of the
+last check are stored for each object in ScienceObjectFixity.
+
+Fixity checks are designed to run continuously in the background on a node that is
+serving requests:
+
+- Reads are throttled by a RateLimiter shared by all the threads performing checks.
+- The kernel is advised that the file is read sequentially and will not be needed again,
+  so that audits do not evict the objects and database pages cached for serving.
+
+"""
+import collections
+import os
+import threading
+import time
+
+import d1_common.checksum
+import d1_common.date_time
+
+import django.conf
+import django.db
+
+import d1_gmn.app.models
+import d1_gmn.app.sciobj_store
+
+STATUS_OK = "ok"
+STATUS_MISSING = "missing"
+STATUS_SIZE_MISMATCH = "size_mismatch"
+STATUS_CHECKSUM_MISMATCH = "checksum_mismatch"
+STATUS_ERROR = "error"
+
+# Values needed for checking an object, as returned by get_sciobj_values_qs().
+SciobjValues = collections.namedtuple(
+    "SciobjValues", ["id", "pid", "url", "checksum", "checksum_algorithm", "size"]
+)
+
+FixityResult = collections.namedtuple(
+    "FixityResult", ["sciobj_id", "pid", "status", "message", "timestamp"]
+)
+
+
+class RateLimiter(object):
+    """Limit the combined rate at which bytes are read by multiple threads.
+
+    Each thread calls consume() with the number of bytes it has read, and is blocked
+    for as long as needed to keep the average rate below ``bytes_per_sec``.
+
+    """
+
+    def __init__(self, bytes_per_sec):
+        self._bytes_per_sec = bytes_per_sec
+        self._lock = threading.Lock()
+        self._next_ts = time.monotonic()
+
+    def consume(self, byte_count):
+        with self._lock:
+            now_ts = time.monotonic()
+            self._next_ts = (
+                max(self._next_ts, now_ts) + byte_count / self._bytes_per_sec
+            )
+            sleep_sec = self._next_ts - now_ts
+        if sleep_sec > 0:
+            time.sleep(sleep_sec)
+
+
+def get_sciobj_values_qs():
+    """Get a queryset that generates the values needed for checking the locally stored
+    objects, ordered by ID.
+
+    Proxy objects are not included. See the audit-proxy-sciobj management command.
+
+    """
+    return (
+        d1_gmn.app.models.ScienceObject.objects.filter(url__istartswith="file:")
+        .order_by("id")
+        .values_list(
+            "id",
+            "pid__did",
+            "url",
+            "checksum",
+            "checksum_algorithm__checksum_algorithm",
+            "size",
+        )
+    )
+
+
+def check_sciobj(sciobj_values, rate_limiter=None):
+    """Check the fixity of a locally stored object.
+
+    Args:
+        sciobj_values: SciobjValues
+        rate_limiter: RateLimiter or None
+
+    Returns:
+        FixityResult
+
+    """
+    try:
+        status_str, message_str = _check_file(
+            d1_gmn.app.sciobj_store.get_abs_sciobj_file_path_by_url(sciobj_values.url),
+            sciobj_values,
+            rate_limiter,
+        )
+    except FileNotFoundError as e:
+        status_str, message_str = STATUS_MISSING, str(e)
+    except EnvironmentError as e:
+        status_str, message_str = STATUS_ERROR, str(e)
+    return FixityResult(
+        sciobj_values.id,
+        sciobj_values.pid,
+        status_str,
+        message_str,
+        d1_common.date_time.utc_now(),
+    )
+
+
+def save_results(result_list):
+    """Store the results of fixity checks, replacing the results of any earlier
+    checks of the same objects."""
+    result_dict = {r.sciobj_id: r for r in result_list}
+    with django.db.transaction.atomic():
+        fixity_list = list(
+            d1_gmn.app.models.ScienceObjectFixity.objects.filter(
+                sciobj_id__in=result_dict
+            )
+        )
+        for fixity_model in fixity_list:
+            result = result_dict.pop(fixity_model.sciobj_id)
+            fixity_model.status = result.status
+            fixity_model.message = result.message
+            fixity_model.timestamp = result.timestamp
+        d1_gmn.app.models.ScienceObjectFixity.objects.bulk_update(
+            fixity_list, ["status", "message", "timestamp"]
+        )
+        d1_gmn.app.models.ScienceObjectFixity.objects.bulk_create(
+            [
+                d1_gmn.app.models.ScienceObjectFixity(
+                    sciobj_id=r.sciobj_id,
+                    status=r.status,
+                    message=r.message,
+                    timestamp=r.timestamp,
+                )
+                for r in result_dict.values()
+            ]
+        )
+
+
+# Private
+
+
+def _check_file(abs_path, sciobj_values, rate_limiter):
+    calculator = d1_common.checksum.get_checksum_calculator_by_dataone_designator(
+        sciobj_values.checksum_algorithm
+    )
+    size = 0
+    with open(abs_path, "rb") as f:
+        _fadvise(f, "POSIX_FADV_SEQUENTIAL")
+        while True:
+            chunk_bytes = f.read(django.conf.settings.NUM_CHUNK_BYTES)
+            if not chunk_bytes:
+                break
+            calculator.update(chunk_bytes)
+            size += len(chunk_bytes)
+            if rate_limiter:
+                rate_limiter.consume(len(chunk_bytes))
+        _fadvise(f, "POSIX_FADV_DONTNEED")
+    if size != sciobj_values.size:
+        return (
+            STATUS_SIZE_MISMATCH,
+            "expected={} actual={}".format(sciobj_values.size, size),
+        )
+    checksum_str = calculator.hexdigest()
+    if checksum_str.lower() != sciobj_values.checksum.lower():
+        return (
+            STATUS_CHECKSUM_MISMATCH,
+            "algorithm={} expected={} actual={}".format(
+                sciobj_values.checksum_algorithm, sciobj_values.checksum, checksum_str
+            ),
+        )
+    return STATUS_OK, None
+
+
+def _fadvise(f, advice_name):
+    """Give the kernel advice about how a file will be accessed, where supported."""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(f.fileno(), 0, 0, getattr(os, advice_name))
@@ -33,6 +33,10 @@ import string
 
 import requests
 
+import d1_scimeta.util
+import d1_scimeta.validate
+
+import d1_common.checksum
 import d1_common.url
 
 import django.apps
@@ -43,6 +47,7 @@ import d1_gmn.app.sciobj_store
 import d1_gmn.app.util
 
 RESOURCE_MAP_CREATE_MODE_LIST = ["block", "open"]
+SCIOBJ_DELIVERY_MODE_LIST = ["stream", "file_wrapper", "x_sendfile", "x_accel_redirect"]
 
 logger = logging.getLogger(__name__)
 
@@ -70,16 +75,23 @@ class Startup(django.apps.AppConfig):
         self._assert_is_type("SCIMETA_VALIDATION_ENABLED", bool)
         self._assert_is_type("SCIMETA_VALIDATION_MAX_SIZE", int)
         self._assert_is_in("SCIMETA_VALIDATION_OVER_SIZE_ACTION", ("reject", "accept"))
+        self._assert_is_type("SCIMETA_VALIDATION_WARM_UP", bool)
+
+        self._assert_is_type("DIMENSION_CACHE_SIZE", int)
+        self._assert_is_in("SCIOBJ_DELIVERY_MODE", SCIOBJ_DELIVERY_MODE_LIST)
 
         if django.conf.settings.UNSAFE_SETTING_WARNINGS:
             self._warn_unsafe_for_prod()
 
         self._check_resource_map_create()
+        self._check_ingest_checksum_algorithms()
 
         if not d1_gmn.app.sciobj_store.is_existing_store():
             self._create_sciobj_store_root()
+        self._check_sysmeta_cache()
 
         self._add_xslt_mimetype()
+        self._warm_up_scimeta_validation()
         self._set_mn_logo()
 
     def _assert_is_type(self, setting_name, valid_type):
@@ -189,6 +201,31 @@ class Startup(django.apps.AppConfig):
                 )
             )
 
+    def _check_ingest_checksum_algorithms(self):
+        self._assert_is_type("INGEST_HEAD_SIZE", int)
+        for algorithm_str in django.conf.settings.INGEST_CHECKSUM_ALGORITHMS:
+            if not d1_common.checksum.is_supported_algorithm(algorithm_str):
+                raise django.core.exceptions.ImproperlyConfigured(
+                    "Configuration error: Invalid INGEST_CHECKSUM_ALGORITHMS setting. "
+                    'valid="{}" current="{}"'.format(
+                        ", ".join(d1_common.checksum.get_supported_algorithms()),
+                        algorithm_str,
+                    )
+                )
+
+    def _warm_up_scimeta_validation(self):
+        if not (
+            django.conf.settings.SCIMETA_VALIDATION_ENABLED
+            and django.conf.settings.SCIMETA_VALIDATION_WARM_UP
+        ):
+            return
+        error_dict = d1_scimeta.validate.warm_up()
+        logger.info(
+            "Compiled SciMeta validation schemas. formats={} errors={}".format(
+                len(d1_scimeta.util.get_supported_format_id_list()), len(error_dict)
+            )
+        )
+
     def _set_secret_key(self):
         try:
             with open(django.conf.settings.SECRET_KEY_PATH, "rb") as f:
@@ -221,6 +258,13 @@ class Startup(django.apps.AppConfig):
             )
         return secret_key_str
 
+    def _check_sysmeta_cache(self):
+        # The sysmeta_cache module depends on the GMN models, which are not yet loaded
+        # when this module is imported.
+        import d1_gmn.app.sysmeta_cache
+
+        d1_gmn.app.sysmeta_cache.check_backend()
+
     def _create_sciobj_store_root(self):
         try:
             d1_gmn.app.sciobj_store.create_store()
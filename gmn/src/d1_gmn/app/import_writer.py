@@ -0,0 +1,175 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Batched database writes for the import management command.
+
+The importer downloads System Metadata and object bytes concurrently, and hands
+completed downloads to a single writer, which calls the functions in this module. Each
+function writes a batch in a single transaction:
+
+- Subject, format, checksum algorithm and node rows referenced by the batch are created
+  with one bulk insert per table before the batch is written, so that the writes for
+  the individual objects find them in the dimension cache.
+- Permission rows for all objects in the batch are created with a single bulk insert.
+- Event Log entries are written with ``event_log_writer.write_batch()``.
+
+The functions are synchronous and must not be called from a running event loop.
+
+"""
+import collections
+import os
+
+import d1_common.date_time
+import d1_common.utils.filesystem
+import d1_common.xml
+
+import django.db.transaction
+
+import d1_gmn.app.event_log_writer
+import d1_gmn.app.models
+import d1_gmn.app.resource_map
+import d1_gmn.app.sciobj_store
+import d1_gmn.app.sysmeta
+
+# A downloaded object, ready to be written to the database.
+#
+# sciobj_url: Location of the object bytes. None for objects in the SciObj store.
+# tmp_path: Path to a temporary file holding the downloaded object bytes. None if the
+# object is a proxy object, or if the bytes were already in the SciObj store.
+SciobjItem = collections.namedtuple(
+    "SciobjItem", ["pid", "sysmeta_pyxb", "sciobj_url", "tmp_path"]
+)
+
+
+def get_existing_pid_set(pid_list):
+    """Return the subset of ``pid_list`` for which there are local objects."""
+    return set(
+        d1_gmn.app.models.ScienceObject.objects.filter(
+            pid__did__in=pid_list
+        ).values_list("pid__did", flat=True)
+    )
+
+
+def write_sciobj_batch(sciobj_item_list):
+    """Create the objects in a single transaction.
+
+    Object bytes that were downloaded to temporary files are moved into the SciObj store
+    before the transaction commits. If the transaction is rolled back, the files remain
+    in the store and are reused by the next attempt.
+
+    Returns:
+        list: PIDs of the Resource Maps in the batch.
+
+    """
+    _create_dimension_rows(sciobj_item_list)
+    resource_map_pid_list = []
+    permission_model_list = []
+    with django.db.transaction.atomic():
+        for item in sciobj_item_list:
+            # The file has already been moved if the object is being retried after a
+            # failed batch.
+            if item.tmp_path is not None and os.path.exists(item.tmp_path):
+                _move_to_store(item.pid, item.tmp_path)
+            d1_gmn.app.sysmeta.create_or_update(
+                item.sysmeta_pyxb, item.sciobj_url, permission_model_list
+            )
+            if d1_gmn.app.resource_map.is_resource_map_sysmeta_pyxb(item.sysmeta_pyxb):
+                d1_gmn.app.resource_map.create_or_update_db(item.sysmeta_pyxb)
+                resource_map_pid_list.append(item.pid)
+        d1_gmn.app.models.Permission.objects.bulk_create(permission_model_list)
+    return resource_map_pid_list
+
+
+def discard_sciobj_item(sciobj_item):
+    """Remove the temporary file of an object that could not be written."""
+    if sciobj_item.tmp_path is not None and os.path.exists(sciobj_item.tmp_path):
+        os.unlink(sciobj_item.tmp_path)
+
+
+def get_missing_member_pid_set():
+    """Return the PIDs of objects that are aggregated by local Resource Maps but are not
+    themselves local objects."""
+    return set(
+        d1_gmn.app.models.ResourceMapMember.objects.filter(
+            did__scienceobject__isnull=True
+        ).values_list("did__did", flat=True)
+    )
+
+
+def write_event_batch(log_entry_pyxb_list):
+    """Write Event Log entries retrieved with getLogRecords() in a single transaction.
+
+    Entries for objects that do not exist locally are skipped.
+
+    Returns:
+        int: Number of entries written.
+
+    """
+    return d1_gmn.app.event_log_writer.write_batch(
+        [
+            d1_gmn.app.event_log_writer.LogEntry(
+                d1_common.xml.get_req_val(log_entry_pyxb.identifier),
+                log_entry_pyxb.event,
+                log_entry_pyxb.ipAddress,
+                log_entry_pyxb.userAgent,
+                log_entry_pyxb.subject.value(),
+                d1_common.date_time.normalize_datetime_to_utc(
+                    log_entry_pyxb.dateLogged
+                ),
+            )
+            for log_entry_pyxb in log_entry_pyxb_list
+        ]
+    )
+
+
+# Private
+
+
+def _create_dimension_rows(sciobj_item_list):
+    subject_set = set()
+    node_set = set()
+    format_set = set()
+    checksum_algorithm_set = set()
+    for item in sciobj_item_list:
+        sysmeta_pyxb = item.sysmeta_pyxb
+        format_set.add(sysmeta_pyxb.formatId)
+        checksum_algorithm_set.add(sysmeta_pyxb.checksum.algorithm)
+        subject_set.add(d1_common.xml.get_req_val(sysmeta_pyxb.rightsHolder))
+        if sysmeta_pyxb.submitter:
+            subject_set.add(d1_common.xml.get_req_val(sysmeta_pyxb.submitter))
+        if sysmeta_pyxb.accessPolicy:
+            for allow_rule in sysmeta_pyxb.accessPolicy.allow:
+                subject_set.update(
+                    d1_common.xml.get_req_val(s) for s in allow_rule.subject
+                )
+        node_set.add(d1_common.xml.get_req_val(sysmeta_pyxb.originMemberNode))
+        node_set.add(d1_common.xml.get_req_val(sysmeta_pyxb.authoritativeMemberNode))
+        for replica_pyxb in sysmeta_pyxb.replica:
+            node_set.add(d1_common.xml.get_req_val(replica_pyxb.replicaMemberNode))
+    # Committed separately, so that the rows are in the dimension cache when the batch
+    # is written. Rows that are left unused if the batch fails are harmless.
+    with django.db.transaction.atomic():
+        d1_gmn.app.models.subject_dict(subject_set)
+        d1_gmn.app.models.node_dict(node_set)
+        d1_gmn.app.models.format_dict(format_set)
+        d1_gmn.app.models.checksum_algorithm_dict(checksum_algorithm_set)
+
+
+def _move_to_store(pid, tmp_path):
+    sciobj_path = d1_gmn.app.sciobj_store.get_abs_sciobj_file_path_by_pid(pid)
+    d1_common.utils.filesystem.create_missing_directories_for_file(sciobj_path)
+    os.replace(tmp_path, sciobj_path)
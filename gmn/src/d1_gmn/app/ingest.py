@@ -0,0 +1,157 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Single pass ingest of science object bytes uploaded in MNStorage.create() and
+MNStorage.update().
+
+By default, Django stores a large upload in a temporary file, after which GMN reads it
+once to verify the checksum, moves it into the SciObj store, and, for Science Metadata,
+reads it again for validation.
+
+This upload handler processes the "object" part of the multipart request while Django
+parses it. Each chunk is:
+
+- Written to a temporary file in the SciObj store filesystem, so that the file can
+  later be moved to its final location with an atomic rename.
+- Passed to checksum calculators for each algorithm in INGEST_CHECKSUM_ALGORITHMS. The
+  System Metadata, which holds the declared algorithm, is sent after the object bytes,
+  so the checksums are calculated for a configured set of algorithms. If the declared
+  algorithm is not in the set, the checksum is calculated from the temporary file.
+- Counted, for verifying the size.
+- Kept in memory, up to INGEST_HEAD_SIZE bytes, so that small Science Metadata
+  objects can be validated without reading them back from disk.
+
+The handler is enabled by listing it first in FILE_UPLOAD_HANDLERS.
+
+"""
+import tempfile
+
+import d1_common.checksum
+
+import django.conf
+import django.core.files.uploadedfile
+import django.core.files.uploadhandler
+
+import d1_gmn.app.sciobj_store
+
+SCIOBJ_FIELD_NAME = "object"
+
+
+class SciobjIngestUploadHandler(django.core.files.uploadhandler.FileUploadHandler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._is_active = False
+        self._file = None
+        self._calculator_dict = None
+        self._head_list = None
+        self._head_size = 0
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self._is_active = field_name == SCIOBJ_FIELD_NAME
+        if not self._is_active:
+            return
+        self._file = tempfile.NamedTemporaryFile(
+            suffix=".upload", dir=d1_gmn.app.sciobj_store.get_abs_sciobj_tmp_path()
+        )
+        self._calculator_dict = {
+            algorithm_str: d1_common.checksum.get_checksum_calculator_by_dataone_designator(
+                algorithm_str
+            )
+            for algorithm_str in django.conf.settings.INGEST_CHECKSUM_ALGORITHMS
+        }
+        self._head_list = []
+        self._head_size = 0
+        raise django.core.files.uploadhandler.StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self._is_active:
+            return raw_data
+        self._file.write(raw_data)
+        for calculator in self._calculator_dict.values():
+            calculator.update(raw_data)
+        if self._head_size < django.conf.settings.INGEST_HEAD_SIZE:
+            self._head_list.append(raw_data)
+        self._head_size += len(raw_data)
+
+    def file_complete(self, file_size):
+        if not self._is_active:
+            return None
+        self._is_active = False
+        self._file.flush()
+        self._file.seek(0)
+        return IngestedUploadedFile(
+            self._file,
+            self.file_name,
+            self.content_type,
+            file_size,
+            self.charset,
+            self.content_type_extra,
+            checksum_dict={k: v.hexdigest() for k, v in self._calculator_dict.items()},
+            head_bytes=(
+                b"".join(self._head_list)
+                if file_size <= django.conf.settings.INGEST_HEAD_SIZE
+                else None
+            ),
+        )
+
+    def upload_interrupted(self):
+        if self._is_active:
+            self._file.close()
+
+
+class IngestedUploadedFile(django.core.files.uploadedfile.UploadedFile):
+    """Uploaded SciObj bytes, stored in a temporary file in the SciObj store
+    filesystem, together with values calculated while the bytes were received.
+
+    The temporary file is deleted when the file is closed, which Django does at the
+    end of the request, unless it has been moved to its final location.
+
+    """
+
+    def __init__(self, *args, checksum_dict, head_bytes, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checksum_dict = checksum_dict
+        self.head_bytes = head_bytes
+
+    def temporary_file_path(self):
+        return self.file.name
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            # The file was moved to its final location.
+            pass
+
+
+def get_checksum(uploaded_file, algorithm_str):
+    """Return the checksum calculated while the upload was received, or None if it was
+    not calculated for ``algorithm_str``."""
+    return getattr(uploaded_file, "checksum_dict", {}).get(algorithm_str)
+
+
+def get_checksum_dict(uploaded_file):
+    """Return a dict of algorithm to checksum for all checksums calculated while the
+    upload was received."""
+    return dict(getattr(uploaded_file, "checksum_dict", {}))
+
+
+def get_sciobj_bytes(uploaded_file):
+    """Return the uploaded bytes if they were kept in memory while the upload was
+    received, else None."""
+    return getattr(uploaded_file, "head_bytes", None)
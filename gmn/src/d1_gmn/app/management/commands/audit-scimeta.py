@@ -0,0 +1,137 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Validate Science Metadata objects in the SciObj store against their schemas.
+
+GMN validates Science Metadata objects when they are created, but objects may have been
+created while validation was disabled, or before a schema was added or updated. This
+command revalidates the locally stored objects for each formatId for which a schema is
+installed.
+
+The objects are validated in parallel by a pool of worker processes. One JSON object is
+written per validated object, one per line, with the PID, formatId, path, validation
+result and error message. A summary with the throughput is logged when done.
+
+By default, all locally stored Science Metadata objects are validated. Validation can
+be restricted to one or more formatIds with --format-id, and to a list of PIDs with
+--pid-path. Proxy objects are skipped.
+
+"""
+import collections
+import sys
+
+import d1_scimeta.batch_validate
+import d1_scimeta.util
+import d1_scimeta.validate
+
+import d1_gmn.app.mgmt_base
+import d1_gmn.app.models
+import d1_gmn.app.proxy
+import d1_gmn.app.sciobj_store
+
+
+class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(__doc__, __name__, *args, **kwargs)
+
+    def add_components(self, parser):
+        self.using_single_instance(parser)
+        self.using_pid_file(parser)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format-id",
+            action="append",
+            default=None,
+            help="Validate only objects with this formatId (can be repeated)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of worker processes (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="File to write JSON lines to (default: stdout)",
+        )
+
+    def handle_serial(self):
+        format_id_list = self._get_format_id_list()
+        self.log.info(
+            "Validating Science Metadata objects. formatIds: {}".format(
+                ", ".join(format_id_list)
+            )
+        )
+        # validate_many() returns results in the same order as the items, so the PIDs
+        # can be matched to the results without holding a map of the full set.
+        pid_deque = collections.deque()
+        result_iter = d1_scimeta.validate.validate_many(
+            self._iter_items(format_id_list, pid_deque), self.opt_dict["workers"]
+        )
+        if self.opt_dict["output"] == "-":
+            summary_dict = self._write_results(result_iter, pid_deque, sys.stdout)
+        else:
+            with open(self.opt_dict["output"], "w") as out_file:
+                summary_dict = self._write_results(result_iter, pid_deque, out_file)
+        d1_scimeta.batch_validate.log_summary(summary_dict)
+
+    def _get_format_id_list(self):
+        format_id_list = self.opt_dict["format_id"] or sorted(
+            d1_scimeta.util.get_supported_format_id_list()
+        )
+        for format_id in format_id_list:
+            if not d1_scimeta.util.is_installed_scimeta_format_id(format_id):
+                raise self.CommandError(
+                    "No schema installed for formatId: {}".format(format_id)
+                )
+        return format_id_list
+
+    def _iter_items(self, format_id_list, pid_deque):
+        sciobj_qs = d1_gmn.app.models.ScienceObject.objects.filter(
+            format__format__in=format_id_list
+        )
+        if self.pid_set:
+            sciobj_qs = sciobj_qs.filter(pid__did__in=self.pid_set)
+        for pid, format_id, url in (
+            sciobj_qs.order_by("id")
+            .values_list("pid__did", "format__format", "url")
+            .iterator()
+        ):
+            if d1_gmn.app.proxy.is_proxy_url(url):
+                self.log.debug("Skipped proxy object. pid={}".format(pid))
+                continue
+            pid_deque.append(pid)
+            yield format_id, d1_gmn.app.sciobj_store.get_abs_sciobj_file_path_by_url(
+                url
+            )
+
+    def _write_results(self, result_iter, pid_deque, out_file):
+        def get_extra_dict(result):
+            pid = pid_deque.popleft()
+            if not result.is_valid:
+                self.log.warning(
+                    "Invalid Science Metadata. pid={} format_id={}".format(
+                        pid, result.format_id
+                    )
+                )
+            return {"pid": pid}
+
+        return d1_scimeta.batch_validate.write_json_lines(
+            result_iter, out_file, get_extra_dict
+        )
@@ -0,0 +1,205 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Check that locally stored Science Objects are available and undamaged in the SciObj
+store.
+
+For each object, the file holding the object bytes is read, and its size and checksum
+are compared with the size and checksum in the System Metadata of the object. The
+result and the time of the check are stored in the database for each object, and
+objects that are missing or damaged are logged as errors.
+
+The command is designed to run continuously or periodically, e.g., via cron, on a node
+that is serving requests:
+
+- Files are read by a bounded pool of threads, and the combined read rate can be limited
+  with --max-mb-per-sec.
+
+- Progress is stored in a checkpoint file after each batch of objects. If the command is
+  interrupted, the next run resumes after the last completed batch. Use --restart to
+  start over from the first object. By default, the checkpoint file is stored in the
+  private state directory of the SciObj store.
+
+- With --min-age-days, objects that have been verified more recently are skipped, so
+  that frequent runs spread the checks over time.
+
+Proxy objects are not checked. See `audit-proxy-sciobj`_.
+
+"""
+import collections
+import concurrent.futures
+import datetime
+import json
+import os
+
+import d1_common.date_time
+import d1_common.utils.progress_tracker
+
+import d1_gmn.app.fixity
+import d1_gmn.app.mgmt_base
+import d1_gmn.app.sciobj_store
+
+
+class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(__doc__, __name__, *args, **kwargs)
+
+    def add_components(self, parser):
+        self.using_single_instance(parser)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of threads reading files (default: 4)",
+        )
+        parser.add_argument(
+            "--max-mb-per-sec",
+            type=float,
+            default=None,
+            help="Limit the combined read rate of all threads (default: no limit)",
+        )
+        parser.add_argument(
+            "--min-age-days",
+            type=float,
+            default=None,
+            help="Skip objects that were verified less than this many days ago",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of results to store in each database transaction",
+        )
+        parser.add_argument(
+            "--checkpoint-path",
+            help="Path to file in which to store progress. Default: A file in the "
+            "private state directory of the SciObj store",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint and start from the first object",
+        )
+
+    def handle_serial(self):
+        if self.tracker:
+            self.audit_all(self.tracker)
+        else:
+            with d1_common.utils.progress_tracker.ProgressTracker(self.log) as tracker:
+                self.audit_all(tracker)
+
+    def audit_all(self, tracker):
+        checkpoint_path = self.get_checkpoint_path()
+        start_id = 0 if self.opt_dict["restart"] else self._load_checkpoint()
+        if start_id:
+            self.log.info("Resuming after checkpoint. sciobj_id={}".format(start_id))
+
+        sciobj_qs = self._get_sciobj_qs(start_id)
+        total_count = sciobj_qs.count()
+        self.log.info("Number of SciObj to check: {}".format(total_count))
+
+        audit_tracker = tracker.tracker("Checking SciObj fixity", total_count)
+        result_list = []
+        for result in self._check_all(sciobj_qs):
+            audit_tracker.step()
+            if result.status == d1_gmn.app.fixity.STATUS_OK:
+                audit_tracker.event("Verified")
+            else:
+                audit_tracker.event(
+                    "Failed: {}".format(result.status),
+                    'pid="{}" {}'.format(result.pid, result.message),
+                    is_error=True,
+                )
+            result_list.append(result)
+            if len(result_list) >= self.opt_dict["batch_size"]:
+                self._save_batch(result_list)
+                result_list = []
+        if result_list:
+            self._save_batch(result_list)
+        audit_tracker.completed()
+
+        if os.path.exists(checkpoint_path):
+            os.unlink(checkpoint_path)
+
+    def _get_sciobj_qs(self, start_id):
+        sciobj_qs = d1_gmn.app.fixity.get_sciobj_values_qs().filter(id__gt=start_id)
+        if self.opt_dict["min_age_days"] is not None:
+            sciobj_qs = sciobj_qs.exclude(
+                scienceobjectfixity__timestamp__gte=d1_common.date_time.utc_now()
+                - datetime.timedelta(days=self.opt_dict["min_age_days"])
+            )
+        return sciobj_qs
+
+    def _check_all(self, sciobj_qs):
+        """Check objects in a bounded pool of threads, and yield the results in the
+        order of the queryset, so that the checkpoint can be advanced past each
+        result."""
+        rate_limiter = (
+            d1_gmn.app.fixity.RateLimiter(self.opt_dict["max_mb_per_sec"] * 1024 ** 2)
+            if self.opt_dict["max_mb_per_sec"]
+            else None
+        )
+        worker_count = self.opt_dict["workers"]
+        with concurrent.futures.ThreadPoolExecutor(worker_count) as executor:
+            pending_deque = collections.deque()
+            for values_tup in sciobj_qs.iterator():
+                pending_deque.append(
+                    executor.submit(
+                        d1_gmn.app.fixity.check_sciobj,
+                        d1_gmn.app.fixity.SciobjValues(*values_tup),
+                        rate_limiter,
+                    )
+                )
+                if len(pending_deque) >= 2 * worker_count:
+                    yield pending_deque.popleft().result()
+            while pending_deque:
+                yield pending_deque.popleft().result()
+
+    def _save_batch(self, result_list):
+        d1_gmn.app.fixity.save_results(result_list)
+        self._save_checkpoint(result_list[-1].sciobj_id)
+
+    def _load_checkpoint(self):
+        checkpoint_path = self.get_checkpoint_path()
+        try:
+            with os.fdopen(
+                d1_gmn.app.sciobj_store.open_private_file(checkpoint_path, os.O_RDONLY)
+            ) as f:
+                return json.load(f)["sciobj_id"]
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError, KeyError) as e:
+            raise self.CommandError(
+                'Invalid checkpoint file. Use --restart to start over. path="{}" '
+                'error="{}"'.format(checkpoint_path, str(e))
+            )
+
+    def _save_checkpoint(self, sciobj_id):
+        # Write to a temporary file and rename, so that the checkpoint is not lost if
+        # the command is interrupted while writing.
+        checkpoint_path = self.get_checkpoint_path()
+        tmp_path = checkpoint_path + ".tmp"
+        with os.fdopen(
+            d1_gmn.app.sciobj_store.open_private_file(
+                tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+            ),
+            "w",
+        ) as f:
+            json.dump({"sciobj_id": sciobj_id}, f)
+        os.replace(tmp_path, checkpoint_path)
@@ -55,32 +55,52 @@ the source MN without using a certificate.
 After the certificate provided by GMN is accepted by the source MN, GMN is authenticated
 on the source MN for the subject(s) contained in the certificate. If no certificate was
 provided, only objects and APIs that are available to the public user are accessible.
+
+The import runs as a pipeline of stages connected by bounded queues, so that a slow
+stage holds back the stages before it instead of letting work accumulate in memory:
+
+- The PIDs of the objects to import are read from the source MN or the PID file. PIDs
+  of objects that already exist locally are removed with one query per batch.
+- Concurrent fetchers, limited by ``--max-concurrent``, retrieve the System Metadata and
+  object bytes. Object bytes are downloaded to temporary files in the SciObj store.
+- A single writer creates the objects in the database in batches of ``--batch-size``,
+  with one transaction per batch. If a batch fails, its objects are written one by one,
+  so that only the objects causing the failure are skipped.
+
+Event Logs are imported in the same way, after all objects have been imported.
+
+Database access runs in a dedicated thread, so that it does not block the downloads in
+the event loop.
+
+The import can be resumed after it has been interrupted, by running it again with the
+same arguments. Objects that were committed by the interrupted run are skipped. Progress
+through the Event Logs is stored as an offset into the getLogRecords() result in a
+checkpoint file. By default, the checkpoint file is kept in the private state directory
+of the SciObj store. Use ``--checkpoint-path`` to select another location and
+``--restart`` to ignore the checkpoint file.
 """
 import asyncio
+import collections
+import concurrent.futures
+import json
 import logging
+import os
+import tempfile
 
-import d1_common.date_time
-import d1_common.type_conversions
-import d1_common.types.dataoneTypes
 import d1_common.types.exceptions
-import d1_common.utils.filesystem
-import d1_common.utils.progress_tracker
-import d1_common.utils.ulog
 import d1_common.xml
 
 import django.conf
-import django.core.management.base
-import django.db.transaction
+import django.db
 
 import d1_gmn.app.delete
-import d1_gmn.app.did
-import d1_gmn.app.event_log
+import d1_gmn.app.import_writer
 import d1_gmn.app.mgmt_base
-import d1_gmn.app.model_util
 import d1_gmn.app.models
-import d1_gmn.app.resource_map
 import d1_gmn.app.sciobj_store
-import d1_gmn.app.sysmeta
+
+SCIOBJ_STAGE = "sciobj"
+EVENT_STAGE = "event"
 
 
 class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
@@ -90,6 +110,8 @@ class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
         self.log_records_arg_dict = None
         self.sciobj_tracker = None
         self.event_tracker = None
+        self.event_offset = 0
+        self.db_executor = None
 
     def add_components(self, parser):
         self.using_single_instance(parser)
@@ -132,13 +154,64 @@ class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
             action="store_true",
             help="Recursively import all nested objects in Resource Maps",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of objects or Event Log entries to write in each database "
+            "transaction",
+        )
+        parser.add_argument(
+            "--queue-size",
+            type=int,
+            default=1000,
+            help="Max number of items waiting between the stages of the import",
+        )
+        parser.add_argument(
+            "--checkpoint-path",
+            help="Path to file in which to store progress. Default: A file in the "
+            "private state directory of the SciObj store",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore the checkpoint and start from the beginning",
+        )
 
     async def handle_async(self):
         # Suppress debug output from async_client
         logging.getLogger("d1_client.aio.async_client").setLevel(logging.ERROR)
 
+        self.db_executor = concurrent.futures.ThreadPoolExecutor(1)
+        try:
+            await self.import_all()
+        finally:
+            await self.run_db(django.db.connections.close_all)
+            self.db_executor.shutdown()
+
+    async def import_all(self):
+        if self.opt_dict["restart"] or self.opt_dict["clear"]:
+            self.delete_checkpoint()
+        stage_str, event_offset = self.load_checkpoint()
+
+        if stage_str is None:
+            await self.run_db(self.prepare_db)
+            self.save_checkpoint(SCIOBJ_STAGE)
+            stage_str = SCIOBJ_STAGE
+        else:
+            self.log.info("Resuming after checkpoint. stage={}".format(stage_str))
+
+        if stage_str == SCIOBJ_STAGE:
+            if not self.opt_dict["only_log"]:
+                await self.sciobj_import_all()
+            self.save_checkpoint(EVENT_STAGE)
+
+        await self.event_import_all(event_offset)
+        self.delete_checkpoint()
+
+    def prepare_db(self):
         if not self.is_db_empty() and not self.opt_dict["force"]:
-            raise django.core.management.base.CommandError(
+            raise self.CommandError(
                 "There are already local objects or Event Logs in the DB. "
                 "Use --force to import anyway. "
                 "Use --clear to delete local objects and Event Logs from DB. "
@@ -152,70 +225,146 @@ class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
                 d1_gmn.app.delete.delete_all_from_db()
                 self.log.info("Cleared objects and Event Logs from DB")
 
-        if not self.opt_dict["only_log"]:
-            if self.opt_dict["pid_path"]:
-                await self.sciobj_import_by_pid_list()
-            else:
-                await self.sciobj_import_all()
-            await self.await_all()
-            self.sciobj_tracker.completed()
+    async def run_db(self, func, *arg_list):
+        """Run a function that accesses the database in the database thread."""
+        return await asyncio.get_event_loop().run_in_executor(
+            self.db_executor, func, *arg_list
+        )
 
-        await self.event_import_all()
-        await self.await_all()
-        self.event_tracker.completed()
+    async def run_stages(self, *coro_list):
+        """Run the stages of a pipeline concurrently.
+
+        If a stage fails, the other stages are cancelled, so that they do not wait
+        forever on a queue that is no longer being filled or drained.
+
+        """
+        task_list = [asyncio.ensure_future(coro) for coro in coro_list]
+        try:
+            await asyncio.gather(*task_list)
+        finally:
+            for task in task_list:
+                task.cancel()
 
     # SciObj
 
     async def sciobj_import_all(self):
-        """Import all SciObj on remote MN."""
-        self.log.info("Starting SciObj import")
-        total_count = await self.async_object_list_iter.total
+        """Import all SciObj on remote MN, or the SciObj in the PID file."""
+        if self.opt_dict["pid_path"]:
+            self.log.info("Starting SciObj import from PID file")
+            total_count = len(self.pid_set)
+            if not total_count:
+                self.log.error("Aborted: Loaded empty list from file")
+                return
+            await self.sciobj_import(
+                "Importing SciObj by PID list file",
+                self.iter_pids(self.pid_set),
+                total_count,
+            )
+        else:
+            self.log.info("Starting SciObj import")
+            total_count = await self.async_object_list_iter.total
+            await self.sciobj_import(
+                "Importing SciObj", self.iter_object_list_pids(), total_count
+            )
+
+        if self.opt_dict["deep"]:
+            await self.sciobj_import_aggregated()
+
+    async def sciobj_import_aggregated(self):
+        """Import the objects aggregated by the imported Resource Maps, until there
+        are no more new Resource Maps."""
+        attempted_pid_set = set()
+        while True:
+            member_pid_set = (
+                await self.run_db(d1_gmn.app.import_writer.get_missing_member_pid_set)
+                - attempted_pid_set
+            )
+            if not member_pid_set:
+                break
+            attempted_pid_set.update(member_pid_set)
+            await self.sciobj_import(
+                "Importing aggregated SciObj",
+                self.iter_pids(member_pid_set),
+                len(member_pid_set),
+            )
+
+    async def sciobj_import(self, tracker_name, pid_aiter, total_count):
         self.log.info("Number of SciObj to import: {}".format(total_count))
-        self.sciobj_tracker = self.tracker.tracker("Importing SciObj", total_count)
+        self.sciobj_tracker = self.tracker.tracker(tracker_name, total_count)
+        pid_queue = asyncio.Queue(self.opt_dict["queue_size"])
+        item_queue = asyncio.Queue(self.opt_dict["queue_size"])
+        fetcher_count = self.opt_dict["max_concurrent"]
+
+        async def produce():
+            await self.sciobj_queue_pids(pid_aiter, pid_queue)
+            for _ in range(fetcher_count):
+                await pid_queue.put(None)
+
+        async def fetch():
+            await asyncio.gather(
+                *[
+                    self.sciobj_fetch_worker(pid_queue, item_queue)
+                    for _ in range(fetcher_count)
+                ]
+            )
+            await item_queue.put(None)
+
+        await self.run_stages(produce(), fetch(), self.sciobj_write_worker(item_queue))
+        self.sciobj_tracker.completed()
+
+    async def iter_object_list_pids(self):
         async for object_info_pyxb in self.async_object_list_iter:
-            pid = object_info_pyxb.identifier.value()
-            await self.add_task(self.sciobj_import_pid(pid))
-
-    async def sciobj_import_by_pid_list(self):
-        """Import SciObj specified by PID list file."""
-        self.log.info("Starting SciObj import from PID file")
-        pid_list = self.load_set_from_file(self.opt_dict["pid_path"])
-        total_count = len(pid_list)
-        self.log.info("Number of SciObj to import: {}".format(total_count))
-        if not total_count:
-            self.log.error("Aborted: Loaded empty list from file")
+            yield d1_common.xml.get_req_val(object_info_pyxb.identifier)
+
+    async def iter_pids(self, pid_iter):
+        for pid in pid_iter:
+            yield pid
+
+    async def sciobj_queue_pids(self, pid_aiter, pid_queue):
+        """Queue the PIDs of the objects that do not already exist locally."""
+        pid_list = []
+        async for pid in pid_aiter:
+            pid_list.append(pid)
+            if len(pid_list) >= self.opt_dict["batch_size"]:
+                await self.sciobj_queue_new_pids(pid_list, pid_queue)
+                pid_list = []
+        await self.sciobj_queue_new_pids(pid_list, pid_queue)
+
+    async def sciobj_queue_new_pids(self, pid_list, pid_queue):
+        if not pid_list:
             return
-        self.sciobj_tracker = self.tracker.tracker(
-            "Importing SciObj by PID list file", total_count
+        existing_pid_set = await self.run_db(
+            d1_gmn.app.import_writer.get_existing_pid_set, pid_list
         )
         for pid in pid_list:
-            await self.add_task(self.sciobj_import_pid(pid))
+            if pid in existing_pid_set:
+                self.sciobj_tracker.step()
+                self.sciobj_tracker.event(
+                    "Skipped object import: Local object already exists",
+                    'pid="{}"'.format(pid),
+                )
+            else:
+                await pid_queue.put(pid)
 
-    async def sciobj_import_pid(self, pid):
-        """Import SciObj SysMeta and bytes"""
-        self.log.debug("Starting import of SciObj: {}".format(pid))
-        self.sciobj_tracker.step()
-        if d1_gmn.app.did.is_existing_object(pid):
-            self.sciobj_tracker.event(
-                "Skipped object import: Local object already exists",
-                'pid="{}"'.format(pid),
-            )
-            return
+    async def sciobj_fetch_worker(self, pid_queue, item_queue):
+        while True:
+            pid = await pid_queue.get()
+            if pid is None:
+                return
+            self.log.debug("Starting import of SciObj: {}".format(pid))
+            sciobj_item = await self.sciobj_fetch(pid)
+            if sciobj_item is None:
+                self.sciobj_tracker.step()
+            else:
+                await item_queue.put(sciobj_item)
 
-        with django.db.transaction.atomic():
-            await self.sciobj_download_and_create(pid)
+    async def sciobj_fetch(self, pid):
+        """Retrieve the SysMeta and bytes of an object.
 
-        if self.opt_dict["deep"]:
-            if d1_gmn.app.did.is_resource_map_db(pid):
-                for (
-                    member_pid
-                ) in d1_gmn.app.resource_map.get_resource_map_members_by_map(pid):
-                    await self.sciobj_import_pid(member_pid)
-                    self.sciobj_tracker.event(
-                        "Imported aggregated SciObj", 'pid="{}"'.format(pid)
-                    )
+        Returns:
+            SciobjItem, or None if the object could not be retrieved.
 
-    async def sciobj_download_and_create(self, pid):
+        """
         try:
             sysmeta_pyxb = await self.async_d1_client.get_system_metadata(pid)
         except d1_common.types.exceptions.DataONEException as e:
@@ -232,25 +381,20 @@ class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
                 "Skipped object download: Proxy object",
                 'pid="{}" sciobj_url="{}"'.format(pid, sciobj_url),
             )
-        else:
-            try:
-                await self.sciobj_download_bytes_to_store(pid)
-            except d1_common.types.exceptions.DataONEException as e:
-                self.sciobj_tracker.event(
-                    "SciObj import failed: MNRead.get() returned error",
-                    'pid="{}" error="{}"'.format(pid, e.friendly_format()),
-                    is_error=True,
-                )
-                return
-            sciobj_url = d1_gmn.app.sciobj_store.get_rel_sciobj_file_url_by_pid(pid)
-
-        d1_gmn.app.sysmeta.create_or_update(sysmeta_pyxb, sciobj_url)
-
-        if d1_gmn.app.resource_map.is_resource_map_sysmeta_pyxb(sysmeta_pyxb):
-            d1_gmn.app.resource_map.create_or_update_db(sysmeta_pyxb)
-            self.sciobj_tracker.event("Processed Resource Map", 'pid="{}"'.format(pid))
+            return d1_gmn.app.import_writer.SciobjItem(
+                pid, sysmeta_pyxb, sciobj_url, None
+            )
 
-        self.sciobj_tracker.event("Imported SciObj", 'pid="{}"'.format(pid))
+        try:
+            tmp_path = await self.sciobj_download_bytes_to_tmp(pid)
+        except d1_common.types.exceptions.DataONEException as e:
+            self.sciobj_tracker.event(
+                "SciObj import failed: MNRead.get() returned error",
+                'pid="{}" error="{}"'.format(pid, e.friendly_format()),
+                is_error=True,
+            )
+            return
+        return d1_gmn.app.import_writer.SciobjItem(pid, sysmeta_pyxb, None, tmp_path)
 
     async def sciobj_get_proxy_location(self, pid):
         """If object is a proxy, return the proxy location URL.
@@ -264,18 +408,86 @@ class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
             # Workaround for older GMNs that return 500 instead of 404 for describe()
             pass
 
-    async def sciobj_download_bytes_to_store(self, pid):
+    async def sciobj_download_bytes_to_tmp(self, pid):
+        """Download the object bytes to a temporary file in the SciObj store.
+
+        The writer moves the file into place when the object is created, so that
+        interrupted downloads never leave partial files at the object location.
+
+        Returns:
+            str: Path to the temporary file, or None if the object bytes are already
+            in the SciObj store.
+
+        """
         if d1_gmn.app.sciobj_store.is_existing_sciobj_file(pid):
             self.sciobj_tracker.event(
                 "Skipped object bytes download: File already in local SciObj store",
                 'pid="{}"'.format(pid),
             )
             return
+        with tempfile.NamedTemporaryFile(
+            suffix=".import",
+            dir=d1_gmn.app.sciobj_store.get_abs_sciobj_tmp_path(),
+            delete=False,
+        ) as tmp_file:
+            try:
+                await self.async_d1_client.get(tmp_file, pid)
+            except Exception:
+                os.unlink(tmp_file.name)
+                raise
+        return tmp_file.name
+
+    async def sciobj_write_worker(self, item_queue):
+        sciobj_item_list = []
+        while True:
+            sciobj_item = await item_queue.get()
+            if sciobj_item is not None:
+                sciobj_item_list.append(sciobj_item)
+            if sciobj_item_list and (
+                sciobj_item is None
+                or len(sciobj_item_list) >= self.opt_dict["batch_size"]
+            ):
+                await self.sciobj_write(sciobj_item_list)
+                sciobj_item_list = []
+            if sciobj_item is None:
+                return
 
-        with d1_gmn.app.sciobj_store.open_sciobj_file_by_pid_ctx(
-            pid, write=True
-        ) as sciobj_file:
-            await self.async_d1_client.get(sciobj_file, pid)
+    async def sciobj_write(self, sciobj_item_list):
+        """Write a batch of objects in a single transaction.
+
+        If the transaction fails, the objects are written one by one, so that only the
+        objects that cause the failure are skipped.
+
+        """
+        try:
+            resource_map_pid_list = await self.run_db(
+                d1_gmn.app.import_writer.write_sciobj_batch, sciobj_item_list
+            )
+        except Exception as e:
+            if len(sciobj_item_list) > 1:
+                self.log.debug(
+                    "Batch failed. Writing objects one by one. error={}".format(str(e))
+                )
+                for sciobj_item in sciobj_item_list:
+                    await self.sciobj_write([sciobj_item])
+                return
+            sciobj_item = sciobj_item_list[0]
+            self.log.exception("SciObj import failed with error:")
+            d1_gmn.app.import_writer.discard_sciobj_item(sciobj_item)
+            self.sciobj_tracker.step()
+            self.sciobj_tracker.event(
+                "SciObj import failed: Unable to create local object",
+                'pid="{}" error="{}"'.format(sciobj_item.pid, str(e)),
+                is_error=True,
+            )
+            return
+        for sciobj_item in sciobj_item_list:
+            self.sciobj_tracker.step()
+            self.sciobj_tracker.event(
+                "Imported SciObj", 'pid="{}"'.format(sciobj_item.pid)
+            )
+        for pid in resource_map_pid_list:
+            self.sciobj_tracker.event("Processed Resource Map", 'pid="{}"'.format(pid))
 
     def get_list_objects_arg_dict(self):
         """Create a dict of arguments that will be passed to listObjects().
@@ -295,39 +507,101 @@ class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
 
     # Event Logs
 
-    async def event_import_all(self):
-        """Import all events on remote MN."""
+    async def event_import_all(self, event_offset):
+        """Import all events on remote MN.
+
+        Events before {event_offset} in the getLogRecords() result were imported
+        before the checkpoint, and are not retrieved again.
+
+        """
         self.log.info("Starting Event Log import")
         total_count = await self.async_event_log_iter.total
         self.log.info("Number of events to import: {}".format(total_count))
         self.event_tracker = self.tracker.tracker("Importing Event Logs", total_count)
-        async for log_entry_pyxb in self.async_event_log_iter:
-            await self.add_task(self.event_import_entry(log_entry_pyxb))
-
-    async def event_import_entry(self, log_entry_pyxb):
-        self.event_tracker.step()
-        pid = d1_common.xml.get_req_val(log_entry_pyxb.identifier)
-        if not d1_gmn.app.did.is_existing_object(pid):
+        self.event_offset = event_offset
+        if event_offset:
+            self.event_tracker.step(event_offset)
             self.event_tracker.event(
-                "Skipped Event Log: Local object does not exist", 'pid="{}"'.format(pid)
+                "Skipped Event Log: Before checkpoint", count_int=event_offset
             )
-            return
+        entry_queue = asyncio.Queue(self.opt_dict["queue_size"])
 
-        with django.db.transaction.atomic():
+        async def produce():
+            async for log_entry_pyxb in self.iter_log_entries(
+                event_offset, total_count
+            ):
+                await entry_queue.put(log_entry_pyxb)
+            await entry_queue.put(None)
 
-            event_log_model = d1_gmn.app.event_log.create_log_entry(
-                d1_gmn.app.model_util.get_sci_model(pid),
-                log_entry_pyxb.event,
-                log_entry_pyxb.ipAddress,
-                log_entry_pyxb.userAgent,
-                log_entry_pyxb.subject.value(),
-            )
-            event_log_model.timestamp = d1_common.date_time.normalize_datetime_to_utc(
-                log_entry_pyxb.dateLogged
-            )
-            event_log_model.save()
+        await self.run_stages(produce(), self.event_write_worker(entry_queue))
+        self.event_tracker.completed()
+
+    async def iter_log_entries(self, start_idx, total_count):
+        """Yield the events on remote MN in getLogRecords() order, starting at
+        {start_idx}.
 
-        self.event_tracker.event("Imported Event", 'pid="{}"'.format(pid))
+        The events are yielded in order, so that the number of events that have been
+        imported is also the offset at which to resume. Up to ``--max-concurrent``
+        pages are retrieved ahead of the page that is being yielded.
+
+        """
+        page_size = self.async_event_log_iter.page_size
+        arg_dict = self.async_event_log_iter.list_arg_dict
+        page_start_iter = iter(range(start_idx, total_count, page_size))
+        page_future_deque = collections.deque()
+        try:
+            while True:
+                for page_start_idx in page_start_iter:
+                    page_future_deque.append(
+                        asyncio.ensure_future(
+                            self.async_d1_client.get_log_records(
+                                start=page_start_idx, count=page_size, **arg_dict
+                            )
+                        )
+                    )
+                    if len(page_future_deque) >= self.opt_dict["max_concurrent"]:
+                        break
+                if not page_future_deque:
+                    return
+                log_pyxb = await page_future_deque.popleft()
+                for log_entry_pyxb in log_pyxb.logEntry:
+                    yield log_entry_pyxb
+        finally:
+            for page_future in page_future_deque:
+                page_future.cancel()
+
+    async def event_write_worker(self, entry_queue):
+        log_entry_pyxb_list = []
+        while True:
+            log_entry_pyxb = await entry_queue.get()
+            if log_entry_pyxb is not None:
+                log_entry_pyxb_list.append(log_entry_pyxb)
+            if log_entry_pyxb_list and (
+                log_entry_pyxb is None
+                or len(log_entry_pyxb_list) >= self.opt_dict["batch_size"]
+            ):
+                await self.event_write(log_entry_pyxb_list)
+                log_entry_pyxb_list = []
+            if log_entry_pyxb is None:
+                return
+
+    async def event_write(self, log_entry_pyxb_list):
+        """Write a batch of events in a single transaction, then record the offset of
+        the next event in the checkpoint file."""
+        written_count = await self.run_db(
+            d1_gmn.app.import_writer.write_event_batch, log_entry_pyxb_list
+        )
+        self.event_offset += len(log_entry_pyxb_list)
+        self.save_checkpoint(EVENT_STAGE, self.event_offset)
+        for _ in log_entry_pyxb_list:
+            self.event_tracker.step()
+        self.event_tracker.event("Imported Event", count_int=written_count)
+        skipped_count = len(log_entry_pyxb_list) - written_count
+        if skipped_count:
+            self.event_tracker.event(
+                "Skipped Event Log: Local object does not exist",
+                count_int=skipped_count,
+            )
 
     def get_log_records_arg_dict(self):
         """Create a dict of arguments that will be passed to getLogRecords().
@@ -345,3 +619,51 @@ class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
             arg_dict["nodeId"] = django.conf.settings.NODE_IDENTIFIER
         self.log.debug("getLogRecords args: {}".format(arg_dict))
         return arg_dict
+
+    # Checkpoint
+
+    def load_checkpoint(self):
+        """Load the checkpoint file.
+
+        Returns:
+            tuple: (stage_str, event_offset)
+                stage_str: SCIOBJ_STAGE, EVENT_STAGE, or None if there is no checkpoint.
+                event_offset: Number of events at the start of the getLogRecords()
+                result that have been imported.
+
+        """
+        checkpoint_path = self.get_checkpoint_path()
+        try:
+            with os.fdopen(
+                d1_gmn.app.sciobj_store.open_private_file(checkpoint_path, os.O_RDONLY)
+            ) as f:
+                checkpoint_dict = json.load(f)
+            return checkpoint_dict["stage"], int(checkpoint_dict["event_offset"])
+        except FileNotFoundError:
+            return None, 0
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise self.CommandError(
+                'Invalid checkpoint file. Use --restart to start over. path="{}" '
+                'error="{}"'.format(checkpoint_path, str(e))
+            )
+
+    def save_checkpoint(self, stage_str, event_offset=0):
+        # Write to a temporary file and rename, so that the checkpoint is not lost if
+        # the command is interrupted while writing.
+        checkpoint_path = self.get_checkpoint_path()
+        tmp_path = checkpoint_path + ".tmp"
+        with os.fdopen(
+            d1_gmn.app.sciobj_store.open_private_file(
+                tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+            ),
+            "w",
+        ) as f:
+            json.dump({"stage": stage_str, "event_offset": event_offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, checkpoint_path)
+
+    def delete_checkpoint(self):
+        checkpoint_path = self.get_checkpoint_path()
+        if os.path.lexists(checkpoint_path):
+            os.unlink(checkpoint_path)
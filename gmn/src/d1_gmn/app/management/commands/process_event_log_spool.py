@@ -0,0 +1,50 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Write spooled "read" events to the Event Log.
+
+This command should run periodically, typically via cron, when GMN is configured with
+EVENT_LOG_WRITE_MODE = "spool". It can also be run manually as required.
+
+In spool mode, GMN appends "read" events to the file at EVENT_LOG_SPOOL_PATH instead of
+writing them to the database while the client waits. This drains the spool file and
+writes the events to the Event Log in batches of EVENT_LOG_BATCH_SIZE.
+
+"""
+import d1_gmn.app.event_log_writer
+import d1_gmn.app.mgmt_base
+
+
+class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(__doc__, __name__, *args, **kwargs)
+
+    def add_components(self, parser):
+        self.using_single_instance(parser)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--spool-path",
+            help="Path to the spool file. Default: EVENT_LOG_SPOOL_PATH, or the spool "
+            "file in the private state directory of the SciObj store",
+        )
+
+    def handle_serial(self):
+        total_int = d1_gmn.app.event_log_writer.drain_spool(
+            self.opt_dict["spool_path"]
+        )
+        self.log.info("Wrote {} spooled events to the Event Log".format(total_int))
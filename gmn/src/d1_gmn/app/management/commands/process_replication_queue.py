@@ -24,8 +24,28 @@ CNs call MNReplication.replicate() to request the creation of replicas. GMN queu
 requests and processes them asynchronously. This command iterates over the requests and
 attempts to create the replicas.
 
+Replicas are downloaded concurrently by a pool of worker threads, so that the time
+required for draining a large queue is limited by bandwidth rather than by the latency
+of each request:
+
+- The Node list is retrieved from the CN once per run, and a client, with its pool of
+  persistent connections, is kept for each source Member Node.
+- Each worker retrieves the System Metadata from the CN and streams the object bytes
+  from the source Member Node to a temporary file in the SciObj store, verifying the
+  size and checksum while the bytes are received.
+- The database rows for each replica are created by the main thread, after which the
+  temporary file is moved into place with an atomic rename.
+- The CN is notified of completed and failed replications with
+  CNReplication.setReplicationStatus() in concurrent batches, after the local changes
+  have been committed.
+
 """
+import concurrent.futures
+import os
+import tempfile
+import threading
 
+import d1_common.checksum
 import d1_common.types.exceptions
 import d1_common.utils.filesystem
 import d1_common.utils.ulog
@@ -49,31 +69,78 @@ import d1_gmn.app.sysmeta
 class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
     def __init__(self, *args, **kwargs):
         super().__init__(__doc__, __name__, *args, **kwargs)
+        self.cn_client = None
+        self.node_base_url_dict = None
+        self.mn_client_dict = {}
+        self.mn_client_lock = threading.Lock()
+        self.pending_status_list = []
 
     def add_components(self, parser):
         self.using_single_instance(parser)
-        self.using_
-        self.cn_client = self.create_cn_client()
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=django.conf.settings.REPLICATION_WORKER_COUNT,
+            help="Number of replicas to download concurrently",
+        )
+        parser.add_argument(
+            "--status-batch-size",
+            type=int,
+            default=100,
+            help="Number of replication status updates to send to the CN in each batch",
+        )
 
     def handle_serial(self):
+        self.cn_client = self.create_cn_client()
         self.process_replication_queue()
 
     def process_replication_queue(self):
-        queue_queryset = d1_gmn.app.models.ReplicationQueue.objects.filter(
-            local_replica__info__status__status="queued"
-        ).order_by("local_replica__info__timestamp", "local_replica__pid__did")
-        if not len(queue_queryset):
+        queue_list = list(
+            d1_gmn.app.models.ReplicationQueue.objects.filter(
+                local_replica__info__status__status="queued"
+            )
+            .select_related("local_replica__pid", "local_replica__info__member_node")
+            .order_by("local_replica__info__timestamp", "local_replica__pid__did")
+        )
+        if not queue_list:
             self.log.debug("No replication requests to process")
             return
-        for queue_model in queue_queryset:
-            self.process_replication_request(queue_model)
+        self.node_base_url_dict = self.get_node_base_url_dict()
+        worker_count = self.opt_dict["workers"]
+        # Status updates have their own pool, so that they are not queued behind the
+        # pending downloads.
+        status_executor = concurrent.futures.ThreadPoolExecutor(worker_count)
+        with concurrent.futures.ThreadPoolExecutor(worker_count) as executor:
+            # Only the downloads run in the workers. Database access is kept in the
+            # main thread.
+            future_dict = {
+                executor.submit(
+                    self.download_replica,
+                    queue_model.local_replica.pid.did,
+                    queue_model.local_replica.info.member_node.urn,
+                ): queue_model
+                for queue_model in queue_list
+            }
+            for future in concurrent.futures.as_completed(future_dict):
+                self.process_replication_request(future_dict[future], future)
+                if len(self.pending_status_list) >= self.opt_dict["status_batch_size"]:
+                    self.send_cn_request_status_batch(status_executor)
+        self.send_cn_request_status_batch(status_executor)
+        status_executor.shutdown()
         self.remove_completed_requests_from_queue()
 
-    def process_replication_request(self, queue_model):
+    def process_replication_request(self, queue_model, download_future):
         self.log.info("-" * 100)
         self.log.info("Processing PID: {}".format(queue_model.local_replica.pid.did))
         try:
-            self.replicate(queue_model)
+            sysmeta_pyxb, tmp_path = download_future.result()
+            try:
+                self.replicate(queue_model, sysmeta_pyxb, tmp_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
         except Exception as e:
             self.log.exception("Replication failed with exception:")
             num_failed_attempts = self.inc_and_get_failed_attempts(queue_model)
@@ -102,13 +169,12 @@ class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
                     else None,
                 )
 
-    def replicate(self, queue_model):
+    def replicate(self, queue_model, sysmeta_pyxb, tmp_path):
         with django.db.transaction.atomic():
-            sysmeta_pyxb = self.get_system_metadata(queue_model)
             self.set_origin(queue_model, sysmeta_pyxb)
-            sciobj_bytestream = self.get_sciobj_bytestream(queue_model)
-            self.create_replica(sysmeta_pyxb, sciobj_bytestream)
-            self.update_request_status(queue_model, "completed")
+            self.create_replica(sysmeta_pyxb, tmp_path)
+            self.update_local_request_status(queue_model, "completed")
+        self.queue_cn_request_status(queue_model, "completed")
 
     def set_origin(self, queue_model, sysmeta_pyxb):
         if sysmeta_pyxb.originMemberNode is None:
@@ -132,19 +198,43 @@ class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
 
     def update_request_status(self, queue_model, status_str, dataone_error=None):
         self.update_local_request_status(queue_model, status_str)
-        self.update_cn_request_status(queue_model, status_str, dataone_error)
+        self.queue_cn_request_status(queue_model, status_str, dataone_error)
 
     def update_local_request_status(self, queue_model, status_str):
         d1_gmn.app.models.update_replica_status(
             queue_model.local_replica.info, status_str
         )
 
-    def update_cn_request_status(self, queue_model, status_str, dataone_error=None):
+    def queue_cn_request_status(self, queue_model, status_str, dataone_error=None):
+        self.pending_status_list.append(
+            (queue_model.local_replica.pid.did, status_str, dataone_error)
+        )
+
+    def send_cn_request_status_batch(self, executor):
+        """Send the queued status updates to the CN concurrently.
+
+        The local status has already been committed, so a failed update is logged and
+        not retried here.
+
+        """
+        status_list, self.pending_status_list = self.pending_status_list, []
+        future_dict = {
+            executor.submit(self.update_cn_request_status, *status_tup): status_tup
+            for status_tup in status_list
+        }
+        for future in concurrent.futures.as_completed(future_dict):
+            try:
+                future.result()
+            except Exception as e:
+                pid, status_str, dataone_error = future_dict[future]
+                self.log.warning(
+                    "Unable to update replication status on CN. "
+                    'pid="{}" status="{}" error="{}"'.format(pid, status_str, str(e))
+                )
+
+    def update_cn_request_status(self, pid, status_str, dataone_error=None):
         self.cn_client.setReplicationStatus(
-            queue_model.local_replica.pid.did,
-            django.conf.settings.NODE_IDENTIFIER,
-            status_str,
-            dataone_error,
+            pid, django.conf.settings.NODE_IDENTIFIER, status_str, dataone_error
         )
 
     def remove_completed_requests_from_queue(self):
@@ -160,39 +250,79 @@ class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
             try_count=1,
         )
 
-    def get_system_metadata(self, queue_model):
-        pid = queue_model.local_replica.pid.did
-        self.log.debug("Calling CNRead.getSystemMetadata() pid={}".format(pid))
-        return self.cn_client.getSystemMetadata(pid)
-
-    def get_sciobj_bytestream(self, queue_model):
-        source_node_base_url = self.resolve_source_node_id_to_base_url(
-            queue_model.local_replica.info.member_node.urn
-        )
-        mn_client = d1_client.mnclient.MemberNodeClient(
-            base_url=source_node_base_url,
+    def create_mn_client(self, base_url):
+        # Streaming is enabled so that the object bytes are not buffered in memory.
+        return d1_client.mnclient.MemberNodeClient(
+            base_url=base_url,
             cert_pem_path=django.conf.settings.CLIENT_CERT_PATH,
             cert_key_path=django.conf.settings.CLIENT_CERT_PRIVATE_KEY_PATH,
             try_count=1,
+            use_stream=True,
         )
-        return self.open_sciobj_bytestream_on_member_node(
-            mn_client, queue_model.local_replica.pid.did
-        )
+
+    def get_mn_client(self, source_node):
+        """Get the client for a source Member Node, creating it on first use.
+
+        Called from the workers. The clients are shared, so that connections to each
+        Member Node are reused for all the replicas retrieved from it.
+
+        """
+        base_url = self.resolve_source_node_id_to_base_url(source_node)
+        with self.mn_client_lock:
+            if base_url not in self.mn_client_dict:
+                self.mn_client_dict[base_url] = self.create_mn_client(base_url)
+            return self.mn_client_dict[base_url]
+
+    def download_replica(self, pid, source_node):
+        """Retrieve the System Metadata and object bytes for a replica.
+
+        Called from the workers. Does not access the database.
+
+        Returns:
+            tuple: (sysmeta_pyxb, tmp_path)
+                tmp_path: Path to a temporary file in the SciObj store, holding the
+                verified object bytes.
+
+        """
+        sysmeta_pyxb = self.get_system_metadata(pid)
+        mn_client = self.get_mn_client(source_node)
+        sciobj_bytestream = self.open_sciobj_bytestream_on_member_node(mn_client, pid)
+        with tempfile.NamedTemporaryFile(
+            suffix=".replica",
+            dir=d1_gmn.app.sciobj_store.get_abs_sciobj_tmp_path(),
+            delete=False,
+        ) as tmp_file:
+            try:
+                self.store_and_verify_science_object_bytes(
+                    sysmeta_pyxb, sciobj_bytestream, tmp_file
+                )
+            except Exception:
+                os.unlink(tmp_file.name)
+                raise
+            finally:
+                sciobj_bytestream.close()
+        return sysmeta_pyxb, tmp_file.name
+
+    def get_system_metadata(self, pid):
+        self.log.debug("Calling CNRead.getSystemMetadata() pid={}".format(pid))
+        return self.cn_client.getSystemMetadata(pid)
 
     def resolve_source_node_id_to_base_url(self, source_node):
-        node_list = self.get_node_list()
-        discovered_nodes = []
-        for node in node_list.node:
-            discovered_node_id = d1_common.xml.get_req_val(node.identifier)
-            discovered_nodes.append(discovered_node_id)
-            if discovered_node_id == source_node:
-                return node.baseURL
-        raise self.CommandError(
-            "Unable to resolve Source Node ID. "
-            'source_node="{}", discovered_nodes="{}"'.format(
-                source_node, ", ".join(discovered_nodes)
+        try:
+            return self.node_base_url_dict[source_node]
+        except KeyError:
+            raise self.CommandError(
+                "Unable to resolve Source Node ID. "
+                'source_node="{}", discovered_nodes="{}"'.format(
+                    source_node, ", ".join(self.node_base_url_dict)
+                )
             )
-        )
+
+    def get_node_base_url_dict(self):
+        return {
+            d1_common.xml.get_req_val(node.identifier): node.baseURL
+            for node in self.get_node_list().node
+        }
 
     def get_node_list(self):
         return self.cn_client.listNodes()
@@ -200,7 +330,7 @@ class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
     def open_sciobj_bytestream_on_member_node(self, mn_client, pid):
         return mn_client.getReplica(pid)
 
-    def create_replica(self, sysmeta_pyxb, sciobj_bytestream):
+    def create_replica(self, sysmeta_pyxb, tmp_path):
         """GMN handles replicas differently from native objects, with the main
         differences being related to handling of restrictions related to revision chains
         and SIDs.
@@ -215,7 +345,7 @@ class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
         self.check_and_create_replica_revision(sysmeta_pyxb, "obsoletedBy")
         sciobj_url = d1_gmn.app.sciobj_store.get_rel_sciobj_file_url_by_pid(pid)
         sciobj_model = d1_gmn.app.sysmeta.create_or_update(sysmeta_pyxb, sciobj_url)
-        self.store_science_object_bytes(pid, sciobj_bytestream)
+        self.move_science_object_bytes(pid, tmp_path)
         d1_gmn.app.event_log.create_log_entry(
             sciobj_model, "create", "0.0.0.0", "[replica]", "[replica]"
         )
@@ -230,14 +360,44 @@ class Command(d1_gmn.app.mgmt_base.GMNCommandBase):
     def create_replica_revision_reference(self, pid):
         d1_gmn.app.models.replica_revision_chain_reference(pid)
 
-    def store_science_object_bytes(self, pid, sciobj_bytestream):
+    def store_and_verify_science_object_bytes(
+        self, sysmeta_pyxb, sciobj_bytestream, sciobj_file
+    ):
+        """Write the object bytes to a file while verifying the size and checksum
+        against the System Metadata."""
+        algorithm_str = sysmeta_pyxb.checksum.algorithm
+        calculator = d1_common.checksum.get_checksum_calculator_by_dataone_designator(
+            algorithm_str
+        )
+        size = 0
+        for chunk in sciobj_bytestream.iter_content(
+            chunk_size=django.conf.settings.NUM_CHUNK_BYTES
+        ):
+            sciobj_file.write(chunk)
+            calculator.update(chunk)
+            size += len(chunk)
+        pid = d1_common.xml.get_req_val(sysmeta_pyxb.identifier)
+        if size != sysmeta_pyxb.size:
+            raise d1_common.types.exceptions.ServiceFailure(
+                0,
+                "Size of replica does not match System Metadata. "
+                'pid="{}" expected={} received={}'.format(pid, sysmeta_pyxb.size, size),
+            )
+        checksum_str = calculator.hexdigest()
+        expected_checksum_str = d1_common.xml.get_req_val(sysmeta_pyxb.checksum)
+        if checksum_str.lower() != expected_checksum_str.lower():
+            raise d1_common.types.exceptions.ServiceFailure(
+                0,
+                "Checksum of replica does not match System Metadata. "
+                'pid="{}" algorithm="{}" expected="{}" received="{}"'.format(
+                    pid, algorithm_str, expected_checksum_str, checksum_str
+                ),
+            )
+
+    def move_science_object_bytes(self, pid, tmp_path):
         sciobj_path = d1_gmn.app.sciobj_store.get_abs_sciobj_file_path_by_pid(pid)
         d1_common.utils.filesystem.create_missing_directories_for_file(sciobj_path)
-        with open(sciobj_path, "wb") as f:
-            for chunk in sciobj_bytestream.iter_content(
-                chunk_size=django.conf.settings.NUM_CHUNK_BYTES
-            ):
-                f.write(chunk)
+        os.replace(tmp_path, sciobj_path)
 
     def assert_is_pid_of_local_unprocessed_replica(self, pid):
         if not d1_gmn.app.did.is_unprocessed_local_replica(pid):
@@ -62,6 +62,7 @@ import django.db
 import d1_gmn.app.middleware.session_cert
 import d1_gmn.app.model_util
 import d1_gmn.app.models
+import d1_gmn.app.sciobj_store
 
 DEFAULT_TIMEOUT_SEC = 0
 DEFAULT_PAGE_SIZE = 1000
@@ -606,6 +607,20 @@ class GMNCommandBase(django.core.management.base.BaseCommand):
     def is_db_empty(self):
         return not d1_gmn.app.models.IdNamespace.objects.exists()
 
+    def get_checkpoint_path(self):
+        """Return the path of the checkpoint file for commands that store progress.
+
+        The path is set with ``--checkpoint-path``. By default, the checkpoint is stored
+        in the private state directory of the SciObj store, so that other local users
+        cannot plant a checkpoint or redirect writes to it. Open the file with
+        ``d1_gmn.app.sciobj_store.open_private_file()``.
+
+        """
+        return self.opt_dict.get("checkpoint_path") or os.path.join(
+            d1_gmn.app.sciobj_store.get_abs_sciobj_var_path(),
+            "{}.checkpoint".format(self.command_name),
+        )
+
     def assert_path_is_dir(self, dir_path):
         if not os.path.isdir(dir_path):
             raise django.core.management.base.CommandError(
@@ -18,7 +18,8 @@
 """Response handler middleware.
 
 Serialize DataONE response objects according to Accept header and set header (Size and
-Content-Type) accordingly.
+Content-Type) accordingly. ObjectList and Log results are streamed directly from
+database rows by the xml_stream module.
 
 """
 
@@ -27,11 +28,9 @@ import logging
 import d1_common.const
 import d1_common.date_time
 import d1_common.types.exceptions
-import d1_common.xml
 
 import django.conf
 import django.db
-import django.db.models
 import django.http
 import django.http.response
 import django.urls
@@ -39,6 +38,7 @@ import django.urls.base
 
 import d1_gmn.app.views.slice
 import d1_gmn.app.views.util
+import d1_gmn.app.xml_stream
 
 
 class ResponseHandler:
@@ -98,127 +98,74 @@ class ResponseHandler:
         return response
 
     def _serialize_object(self, request, view_result):
-        response = django.http.HttpResponse()
+        """Stream ObjectList or Log XML directly from database rows.
+
+        The view returns a query that has been projected to flat rows with the fields
+        required by the xml_stream module. The rows are streamed from a database
+        iterator, so the page is never held in memory.
+
+        The headers and the root element are sent before the rows, so the number of
+        rows in the page, and the last row, are retrieved first, each with a query that
+        is limited to the page. The sort fields are the first two columns in each row,
+        so the position of the last item in the slice, and the latest date in the slice,
+        are taken from the last row.
+
+        """
         name_to_func_map = {
-            "object_list": (self._generate_object_list, ["modified_timestamp", "id"]),
-            "object_list_json": (
-                self._generate_object_field_json,
-                ["modified_timestamp", "id"],
-            ),
-            "log": (self._generate_log_records, ["timestamp", "id"]),
+            "object_list": (d1_gmn.app.xml_stream.generate_object_list, "objectList"),
+            "log": (d1_gmn.app.xml_stream.generate_log, "log"),
         }
-        d1_type_generator, sort_field_list = name_to_func_map[view_result["type"]]
-        d1_type_pyxb = d1_type_generator(
-            request, view_result["query"], view_result["start"], view_result["total"]
-        )
-        d1_type_latest_date = self._latest_date(
-            view_result["query"], sort_field_list[0]
-        )
+        xml_generator, type_name = name_to_func_map[view_result["type"]]
+        query = view_result["query"]
+        row_count = query.count()
+        last_ts_tup = tuple(query[row_count - 1][:2]) if row_count else None
         d1_gmn.app.views.slice.cache_add_last_in_slice(
             request,
-            view_result["query"],
             view_result["start"],
+            row_count,
             view_result["total"],
-            sort_field_list,
+            last_ts_tup,
         )
-        response.write(
-            d1_common.xml.serialize_for_transport(
-                d1_type_pyxb,
-                xslt_url=django.urls.base.reverse("home_xslt")
-                # d1_gmn.app.util.get_static_path('xslt/xhtml_grid.xsl')
+        response = django.http.StreamingHttpResponse(
+            xml_generator(
+                query.iterator(),
+                row_count,
+                view_result["start"],
+                view_result["total"],
+                self._get_namespace_uri(request, type_name),
+                xslt_url=django.urls.base.reverse("home_xslt"),
             )
         )
-        self._set_headers(response, d1_type_latest_date, response.tell())
+        d1_gmn.app.views.slice.add_resumption_token_header(
+            response,
+            view_result["start"],
+            row_count,
+            view_result["total"],
+            last_ts_tup,
+            view_result.get("is_estimated_total", False),
+        )
+        self._set_headers(response, last_ts_tup[0] if last_ts_tup else None)
         return response
 
-    def _generate_object_list(self, request, db_query, start, total):
-        objectList = d1_gmn.app.views.util.dataoneTypes(request).objectList()
-        for row in db_query:
-            objectInfo = d1_gmn.app.views.util.dataoneTypes(request).ObjectInfo()
-            objectInfo.identifier = row.pid.did
-            objectInfo.formatId = row.format.format
-            checksum = d1_gmn.app.views.util.dataoneTypes(request).Checksum(
-                row.checksum
-            )
-            checksum.algorithm = row.checksum_algorithm.checksum_algorithm
-            objectInfo.checksum = checksum
-            objectInfo.dateSysMetadataModified = d1_common.date_time.normalize_datetime_to_utc(
-                row.modified_timestamp
-            )
-            objectInfo.size = row.size
-            objectList.objectInfo.append(objectInfo)
-        objectList.start = start
-        objectList.count = len(objectList.objectInfo)
-        objectList.total = total
-        return objectList
-
-    def _generate_object_field_json(self, request, db_query, start, total):
-        objectList = d1_gmn.app.views.util.dataoneTypes(request).objectList()
-        for row in db_query:
-            objectInfo = d1_gmn.app.views.util.dataoneTypes(request).ObjectInfo()
-            objectInfo.identifier = row.pid.did
-            objectInfo.formatId = row.format.format
-            checksum = d1_gmn.app.views.util.dataoneTypes(request).Checksum(
-                row.checksum
-            )
-            checksum.algorithm = row.checksum_algorithm.checksum_algorithm
-            objectInfo.checksum = checksum
-            objectInfo.dateSysMetadataModified = d1_common.date_time.normalize_datetime_to_utc(
-                d1_common.date_time.row.modified_timestamp
-            )
-            objectInfo.size = row.size
-            objectList.objectInfo.append(objectInfo)
-        objectList.start = start
-        objectList.count = len(objectList.objectInfo)
-        objectList.total = total
-        return objectList
-
-    def _generate_log_records(self, request, db_query, start, total):
-        log = d1_gmn.app.views.util.dataoneTypes(request).log()
-        for row in db_query:
-            logEntry = d1_gmn.app.views.util.dataoneTypes(request).LogEntry()
-            logEntry.entryId = str(row.id)
-            logEntry.identifier = row.sciobj.pid.did
-            # Redact ipAddress and subject on records for which client has only "read"
-            # access.
-            if getattr(row, "redact", False):
-                logEntry.ipAddress = "<NotAuthorized>"
-                logEntry.subject = "<NotAuthorized>"
-            else:
-                logEntry.ipAddress = row.ip_address.ip_address
-                logEntry.subject = row.subject.subject
-            logEntry.userAgent = row.user_agent.user_agent
-            logEntry.event = row.event.event
-            logEntry.dateLogged = d1_common.date_time.normalize_datetime_to_utc(
-                row.timestamp
-            )
-            logEntry.nodeIdentifier = django.conf.settings.NODE_IDENTIFIER
-            log.logEntry.append(logEntry)
-        log.start = start
-        log.count = len(log.logEntry)
-        log.total = total
-        return log
+    def _get_namespace_uri(self, request, type_name):
+        """Get the namespace of the root element from the PyXB binding for the API
+        version of the request.
+
+        """
+        return (
+            getattr(d1_gmn.app.views.util.dataoneTypes(request), type_name)
+            .name()
+            .namespaceURI()
+        )
 
     def _http_response_with_identifier_type(self, request, pid):
         pid_pyxb = d1_gmn.app.views.util.dataoneTypes(request).identifier(pid)
         pid_xml = pid_pyxb.toxml("utf-8")
         return django.http.HttpResponse(pid_xml, d1_common.const.CONTENT_TYPE_XML)
 
-    def _set_headers(self, response, content_modified_timestamp, content_length):
+    def _set_headers(self, response, content_modified_timestamp):
         if content_modified_timestamp is not None:
             response["Last-Modified"] = d1_common.date_time.normalize_datetime_to_utc(
                 content_modified_timestamp
             )
-        response["Content-Length"] = str(content_length)
         response["Content-Type"] = d1_common.const.CONTENT_TYPE_XML
-
-    def _latest_date(self, query, datetime_field_name):
-        """Given a QuerySet and the name of field containing datetimes, return the
-        latest (most recent) date.
-
-        Return None if QuerySet is empty.
-
-        """
-        return list(
-            query.aggregate(django.db.models.Max(datetime_field_name)).values()
-        )[0]
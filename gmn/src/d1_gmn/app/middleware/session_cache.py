@@ -0,0 +1,129 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In-process cache for subjects extracted from client certificates and JWTs.
+
+Extracting the subjects from a certificate requires parsing the PEM and the
+SubjectInfo XML, and extracting the subject from a JWT requires verifying its
+signature. Clients such as harvesters typically send many requests with the same
+certificate or JWT, so the extracted subjects are cached in a bounded LRU cache in
+each process.
+
+- The cache key is a SHA-256 digest of the certificate or JWT, so the credentials
+  themselves are not held in the cache.
+
+- An entry is only used until the certificate's "Not After" date or the JWT's "exp"
+  claim, and for at most ``SESSION_CACHE_MAX_AGE`` seconds.
+
+- Only successful extractions are cached. Invalid certificates and JWTs are processed
+  in full on each request.
+
+"""
+import collections
+import datetime
+import hashlib
+import threading
+
+import d1_common.date_time
+
+import django.conf
+
+_lock = threading.Lock()
+_cache_dict = collections.OrderedDict()
+_counter = collections.Counter()
+
+
+def get(kind_str, credential, create_func):
+    """Get cached subjects for a credential, creating them if not cached.
+
+    Args:
+        kind_str: str
+            Type of credential, e.g., "cert" or "jwt". Included in the cache key.
+
+        credential: str or bytes
+            PEM encoded certificate or Base64 encoded JWT.
+
+        create_func: func(credential) -> (value, expire_dt)
+            Called on cache miss. ``value`` is the value to cache and return, or None
+            if the credential is invalid, in which case nothing is cached.
+            ``expire_dt`` is a timezone aware datetime after which the credential is
+            no longer valid, or None if it does not expire.
+
+    Returns:
+        The cached or newly created value.
+
+    """
+    if not django.conf.settings.SESSION_CACHE_ENABLED:
+        return create_func(credential)[0]
+    key_str = _get_key(kind_str, credential)
+    now_dt = d1_common.date_time.utc_now()
+    with _lock:
+        entry_tup = _cache_dict.get(key_str)
+        if entry_tup is not None:
+            value, expire_dt = entry_tup
+            if now_dt < expire_dt:
+                _cache_dict.move_to_end(key_str)
+                _counter["hit"] += 1
+                return value
+            del _cache_dict[key_str]
+            _counter["expired"] += 1
+        _counter["miss"] += 1
+    value, expire_dt = create_func(credential)
+    if value is None:
+        return None
+    max_expire_dt = now_dt + datetime.timedelta(
+        seconds=django.conf.settings.SESSION_CACHE_MAX_AGE
+    )
+    if expire_dt is None or expire_dt > max_expire_dt:
+        expire_dt = max_expire_dt
+    with _lock:
+        _cache_dict[key_str] = value, expire_dt
+        _cache_dict.move_to_end(key_str)
+        while len(_cache_dict) > django.conf.settings.SESSION_CACHE_SIZE:
+            _cache_dict.popitem(last=False)
+    return value
+
+
+def clear():
+    with _lock:
+        _cache_dict.clear()
+        _counter.clear()
+
+
+def get_stats():
+    """Return counters for the session cache in this process.
+
+    ``hit`` is the number of requests for which the certificate or JWT did not have to
+    be parsed and validated.
+
+    """
+    with _lock:
+        return {
+            "size": len(_cache_dict),
+            "hit": _counter["hit"],
+            "miss": _counter["miss"],
+            "expired": _counter["expired"],
+        }
+
+
+# Private
+
+
+def _get_key(kind_str, credential):
+    if isinstance(credential, str):
+        credential = credential.encode("utf-8")
+    return "{}:{}".format(kind_str, hashlib.sha256(credential).hexdigest())
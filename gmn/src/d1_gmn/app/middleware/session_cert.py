@@ -31,9 +31,13 @@ to that user (as designated in the Subject DN).
 """
 
 import d1_common.cert.subjects
+import d1_common.cert.x509
 import d1_common.const
+import d1_common.date_time
 import d1_common.types.exceptions
 
+import d1_gmn.app.middleware.session_cache
+
 
 def get_subjects(request):
     """Get all subjects in the certificate.
@@ -60,11 +64,25 @@ def get_authenticated_subjects(cert_pem):
     """Return primary subject and set of equivalents authenticated by certificate.
 
     - ``cert_pem`` can be str or bytes
+    - The subjects are cached until the certificate expires.
 
     """
+    primary_str, equivalent_set = d1_gmn.app.middleware.session_cache.get(
+        "cert", cert_pem, _extract_subjects
+    )
+    # Callers may modify the set.
+    return primary_str, set(equivalent_set)
+
+
+def _extract_subjects(cert_pem):
     if isinstance(cert_pem, str):
         cert_pem = cert_pem.encode("utf-8")
-    return d1_common.cert.subjects.extract_subjects(cert_pem)
+    cert_obj = d1_common.cert.x509.deserialize_pem(cert_pem)
+    primary_str, equivalent_set = d1_common.cert.subjects.extract_subjects(cert_pem)
+    return (
+        (primary_str, frozenset(equivalent_set)),
+        d1_common.date_time.cast_naive_datetime_to_tz(cert_obj.not_valid_after),
+    )
 
 
 def _is_certificate_provided(request):
@@ -24,10 +24,13 @@ import ssl
 
 import d1_common.cert.jwt
 import d1_common.cert.x509
+import d1_common.date_time
 
 import django.conf
 import django.core.cache
 
+import d1_gmn.app.middleware.session_cache
+
 log = logging.getLogger(__name__)
 
 
@@ -40,9 +43,10 @@ def validate_jwt_and_get_subject_list(request):
             "ignoring included JWT."
         )
         return []
-    return [
-        d1_common.cert.jwt.get_subject_with_local_validation(_get_jwt_header(request))
-    ]
+    subject_str = d1_gmn.app.middleware.session_cache.get(
+        "jwt", _get_jwt_header(request), _validate_jwt
+    )
+    return [] if subject_str is None else [subject_str]
 
 
 def _has_jwt_header(request):
@@ -53,6 +57,33 @@ def _get_jwt_header(request):
     return request.META["Authorization"]
 
 
+def _validate_jwt(jwt_bu64):
+    """Validate the JWT against the CN certificate.
+
+    Returns:
+        2-tuple: The subject and the expiration time of the JWT, or (None, None) if the
+        JWT could not be validated.
+
+    """
+    if isinstance(jwt_bu64, str):
+        jwt_bu64 = jwt_bu64.encode("utf-8")
+    cn_cert_obj = _get_cn_cert()
+    if cn_cert_obj is None:
+        return None, None
+    try:
+        jwt_dict = d1_common.cert.jwt.validate_and_decode(jwt_bu64, cn_cert_obj)
+    except d1_common.cert.jwt.JwtException as e:
+        d1_common.cert.jwt.log_jwt_bu64_info(log.error, str(e), jwt_bu64)
+        return None, None
+    if "sub" not in jwt_dict:
+        d1_common.cert.jwt.log_jwt_dict_info(log.error, 'Missing "sub" key', jwt_dict)
+        return None, None
+    expire_dt = (
+        d1_common.date_time.dt_from_ts(jwt_dict["exp"]) if "exp" in jwt_dict else None
+    )
+    return jwt_dict["sub"], expire_dt
+
+
 def _get_cn_cert():
     """Get the public TLS/SSL X.509 certificate from the root CN of the DataONE
     environment. The certificate is used for validating the signature of the JWTs.
@@ -0,0 +1,20 @@
+# Generated by Django 2.2 on 2019-10-15 12:00
+
+from django.db import migrations
+from django.db import models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [('app', '0019_auto_20190418_1512')]
+
+    operations = [
+        migrations.AlterField(
+            model_name='eventlog',
+            name='timestamp',
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        )
+    ]
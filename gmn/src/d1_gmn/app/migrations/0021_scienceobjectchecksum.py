@@ -0,0 +1,51 @@
+# Generated by Django 2.2 on 2019-10-20 12:00
+
+from django.db import migrations
+from django.db import models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [('app', '0020_auto_20191015_1200')]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScienceObjectChecksum',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('checksum', models.CharField(max_length=128)),
+                ('url', models.CharField(max_length=1024)),
+                ('size', models.BigIntegerField()),
+                ('mtime', models.FloatField(null=True)),
+                (
+                    'timestamp',
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    'checksum_algorithm',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='app.ScienceObjectChecksumAlgorithm',
+                    ),
+                ),
+                (
+                    'sciobj',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='app.ScienceObject',
+                    ),
+                ),
+            ],
+            options={'unique_together': {('sciobj', 'checksum_algorithm')}},
+        )
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2 on 2019-10-22 12:00
+
+from django.db import migrations
+from django.db import models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [('app', '0021_scienceobjectchecksum')]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScienceObjectFixity',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('status', models.CharField(db_index=True, max_length=32)),
+                ('message', models.TextField(null=True)),
+                ('timestamp', models.DateTimeField(db_index=True)),
+                (
+                    'sciobj',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='app.ScienceObject',
+                    ),
+                ),
+            ],
+        )
+    ]
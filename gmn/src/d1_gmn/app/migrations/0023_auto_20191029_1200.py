@@ -0,0 +1,32 @@
+# Generated by Django 2.2 on 2019-10-29 12:00
+
+from django.db import migrations
+from django.db import models
+
+
+def set_is_public(apps, schema_editor):
+    ScienceObject = apps.get_model('app', 'ScienceObject')
+    Permission = apps.get_model('app', 'Permission')
+    ScienceObject.objects.filter(
+        id__in=Permission.objects.filter(subject__subject='public').values('sciobj')
+    ).update(is_public=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [('app', '0022_scienceobjectfixity')]
+
+    operations = [
+        migrations.AddField(
+            model_name='scienceobject',
+            name='is_public',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddIndex(
+            model_name='permission',
+            index=models.Index(
+                fields=['subject', 'sciobj'], name='app_permiss_subject_21b025_idx'
+            ),
+        ),
+        migrations.RunPython(set_is_public, migrations.RunPython.noop),
+    ]
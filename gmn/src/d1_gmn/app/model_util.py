@@ -28,6 +28,7 @@ django.core.exceptions.AppRegistryNotReady: Apps aren't loaded yet.
 import logging
 
 import d1_gmn.app
+import d1_gmn.app.dimension_cache
 import d1_gmn.app.models
 
 logger = logging.getLogger(__name__)
@@ -111,3 +112,4 @@ def delete_unused_subjects():
         logging.debug("  {}".format(s.subject))
 
     query.delete()
+    d1_gmn.app.dimension_cache.invalidate()
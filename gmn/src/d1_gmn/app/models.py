@@ -37,8 +37,10 @@ Django automatically creates:
 import d1_common.date_time
 
 import django.db.models
+import django.utils.timezone
 
 import d1_gmn.app.did
+import d1_gmn.app.dimension_cache
 
 
 class IdNamespace(django.db.models.Model):
@@ -54,8 +56,15 @@ class Node(django.db.models.Model):
     urn = django.db.models.CharField(max_length=64, unique=True)
 
 
+_node_cache = d1_gmn.app.dimension_cache.DimensionCache(Node, "urn")
+
+
 def node(node_urn):
-    return Node.objects.get_or_create(urn=node_urn)[0]
+    return _node_cache.get_or_create(node_urn)
+
+
+def node_dict(node_urn_iter):
+    return _node_cache.get_or_create_many(node_urn_iter)
 
 
 # ------------------------------------------------------------------------------
@@ -67,8 +76,17 @@ class Subject(django.db.models.Model):
     subject = django.db.models.CharField(max_length=1024, unique=True)
 
 
+_subject_cache = d1_gmn.app.dimension_cache.DimensionCache(
+    Subject, "subject", is_deletable=True
+)
+
+
 def subject(subject_str):
-    return Subject.objects.get_or_create(subject=subject_str)[0]
+    return _subject_cache.get_or_create(subject_str)
+
+
+def subject_dict(subject_str_iter):
+    return _subject_cache.get_or_create_many(subject_str_iter)
 
 
 # ------------------------------------------------------------------------------
@@ -80,10 +98,17 @@ class ScienceObjectChecksumAlgorithm(django.db.models.Model):
     checksum_algorithm = django.db.models.CharField(max_length=32, unique=True)
 
 
+_checksum_algorithm_cache = d1_gmn.app.dimension_cache.DimensionCache(
+    ScienceObjectChecksumAlgorithm, "checksum_algorithm"
+)
+
+
 def checksum_algorithm(checksum_algorithm_str):
-    return ScienceObjectChecksumAlgorithm.objects.get_or_create(
-        checksum_algorithm=checksum_algorithm_str
-    )[0]
+    return _checksum_algorithm_cache.get_or_create(checksum_algorithm_str)
+
+
+def checksum_algorithm_dict(checksum_algorithm_str_iter):
+    return _checksum_algorithm_cache.get_or_create_many(checksum_algorithm_str_iter)
 
 
 # ------------------------------------------------------------------------------
@@ -96,8 +121,15 @@ class ScienceObjectFormat(django.db.models.Model):
 
 
 # noinspection PyShadowingBuiltins
+_format_cache = d1_gmn.app.dimension_cache.DimensionCache(ScienceObjectFormat, "format")
+
+
 def format(format_str):
-    return ScienceObjectFormat.objects.get_or_create(format=format_str)[0]
+    return _format_cache.get_or_create(format_str)
+
+
+def format_dict(format_str_iter):
+    return _format_cache.get_or_create_many(format_str_iter)
 
 
 # ------------------------------------------------------------------------------
@@ -145,6 +177,9 @@ class ScienceObject(django.db.models.Model):
     )
     is_archived = django.db.models.BooleanField(db_index=True)
     # Internal fields (not used in System Metadata)
+    # True if the access policy grants the "public" subject read or better. Kept in
+    # sync with the Permission rows by the sysmeta module.
+    is_public = django.db.models.BooleanField(db_index=True, default=False)
     url = django.db.models.CharField(max_length=1024, unique=True)
 
     class Meta:
@@ -155,6 +190,52 @@ class ScienceObject(django.db.models.Model):
         indexes = [django.db.models.Index(fields=["modified_timestamp", "id"])]
 
 
+# ------------------------------------------------------------------------------
+# Calculated checksums
+# ------------------------------------------------------------------------------
+
+
+class ScienceObjectChecksum(django.db.models.Model):
+    """Checksum calculated from the bytes of an object.
+
+    See the checksum_cache module.
+
+    """
+
+    sciobj = django.db.models.ForeignKey(ScienceObject, django.db.models.CASCADE)
+    checksum_algorithm = django.db.models.ForeignKey(
+        ScienceObjectChecksumAlgorithm, django.db.models.CASCADE
+    )
+    checksum = django.db.models.CharField(max_length=128)
+    # State of the object bytes at the time the checksum was calculated. The mtime is
+    # only set for locally stored objects.
+    url = django.db.models.CharField(max_length=1024)
+    size = django.db.models.BigIntegerField()
+    mtime = django.db.models.FloatField(null=True)
+    timestamp = django.db.models.DateTimeField(default=django.utils.timezone.now)
+
+    class Meta:
+        unique_together = ("sciobj", "checksum_algorithm")
+
+
+# ------------------------------------------------------------------------------
+# Fixity audit
+# ------------------------------------------------------------------------------
+
+
+class ScienceObjectFixity(django.db.models.Model):
+    """Result of the last fixity check of a locally stored object.
+
+    See the fixity module.
+
+    """
+
+    sciobj = django.db.models.OneToOneField(ScienceObject, django.db.models.CASCADE)
+    status = django.db.models.CharField(max_length=32, db_index=True)
+    message = django.db.models.TextField(null=True)
+    timestamp = django.db.models.DateTimeField(db_index=True)
+
+
 # ------------------------------------------------------------------------------
 # MediaType
 # ------------------------------------------------------------------------------
@@ -354,6 +435,9 @@ class Event(django.db.models.Model):
     event = django.db.models.CharField(max_length=128, unique=True)
 
 
+_event_cache = d1_gmn.app.dimension_cache.DimensionCache(Event, "event")
+
+
 def event(event_str):
     # In v2.0, events are no longer restricted to this set. However, GMN still only
     # records these types of events, so we'll leave it in while that remains the case.
@@ -366,23 +450,37 @@ def event(event_str):
         "synchronization_failed",
         "replication_failed",
     ], 'Invalid event type. event="{}"'.format(event_str)
-    return Event.objects.get_or_create(event=event_str)[0]
+    return _event_cache.get_or_create(event_str)
 
 
 class IpAddress(django.db.models.Model):
     ip_address = django.db.models.CharField(max_length=32, unique=True)
 
 
+_ip_address_cache = d1_gmn.app.dimension_cache.DimensionCache(IpAddress, "ip_address")
+
+
 def ip_address(ip_address_str):
-    return IpAddress.objects.get_or_create(ip_address=ip_address_str)[0]
+    return _ip_address_cache.get_or_create(ip_address_str)
+
+
+def ip_address_dict(ip_address_str_iter):
+    return _ip_address_cache.get_or_create_many(ip_address_str_iter)
 
 
 class UserAgent(django.db.models.Model):
     user_agent = django.db.models.CharField(max_length=1024, unique=True)
 
 
+_user_agent_cache = d1_gmn.app.dimension_cache.DimensionCache(UserAgent, "user_agent")
+
+
 def user_agent(user_agent_str):
-    return UserAgent.objects.get_or_create(user_agent=user_agent_str)[0]
+    return _user_agent_cache.get_or_create(user_agent_str)
+
+
+def user_agent_dict(user_agent_str_iter):
+    return _user_agent_cache.get_or_create_many(user_agent_str_iter)
 
 
 class EventLog(django.db.models.Model):
@@ -394,7 +492,11 @@ class EventLog(django.db.models.Model):
     ip_address = django.db.models.ForeignKey(IpAddress, django.db.models.CASCADE)
     user_agent = django.db.models.ForeignKey(UserAgent, django.db.models.CASCADE)
     subject = django.db.models.ForeignKey(Subject, django.db.models.CASCADE)
-    timestamp = django.db.models.DateTimeField(auto_now_add=True, db_index=True)
+    # Not auto_now_add, which would override the timestamps of entries that are
+    # written in batches by the event_log_writer module.
+    timestamp = django.db.models.DateTimeField(
+        default=django.utils.timezone.now, db_index=True
+    )
 
     class Meta:
         # The slice module must be updated if ordering is modified
@@ -457,6 +559,11 @@ class Permission(django.db.models.Model):
     subject = django.db.models.ForeignKey(Subject, django.db.models.CASCADE)
     level = django.db.models.PositiveSmallIntegerField()
 
+    class Meta:
+        # Covers the subject to object lookup in the access policy filter without
+        # reading the table rows.
+        indexes = [django.db.models.Index(fields=["subject", "sciobj"])]
+
 
 class WhitelistForCreateUpdateDelete(django.db.models.Model):
     subject = django.db.models.OneToOneField(Subject, django.db.models.CASCADE)
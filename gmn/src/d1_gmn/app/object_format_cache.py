@@ -22,6 +22,42 @@ import d1_common.object_format_cache
 
 import django.conf
 
+# Media types and filename extensions of formats that are already compressed, and do
+# not benefit from further compression when stored in zip archives.
+INCOMPRESSIBLE_MEDIA_TYPE_SET = {
+    "application/gzip",
+    "application/x-7z-compressed",
+    "application/x-bzip2",
+    "application/x-gzip",
+    "application/x-rar-compressed",
+    "application/x-xz",
+    "application/zip",
+    "audio/mpeg",
+    "audio/ogg",
+    "image/gif",
+    "image/jp2",
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+}
+INCOMPRESSIBLE_MEDIA_TYPE_PREFIX_TUP = ("video/",)
+INCOMPRESSIBLE_EXT_SET = {
+    ".7z",
+    ".bz2",
+    ".gif",
+    ".gz",
+    ".jp2",
+    ".jpeg",
+    ".jpg",
+    ".mp3",
+    ".mp4",
+    ".png",
+    ".rar",
+    ".tgz",
+    ".xz",
+    ".zip",
+}
+
 if django.conf.settings.STAND_ALONE:
     object_format_list_cache = d1_common.object_format_cache.ObjectFormatListCache(
         cache_refresh_period=None
@@ -42,3 +78,17 @@ def get_content_type(format_id):
     return object_format_list_cache.get_content_type(
         format_id, d1_common.const.CONTENT_TYPE_OCTET_STREAM
     )
+
+
+def is_compressible(format_id):
+    """Return False if objects of the format are known to be already compressed.
+
+    Unknown formats are assumed to be compressible.
+
+    """
+    media_type = (get_content_type(format_id) or "").lower()
+    return not (
+        media_type in INCOMPRESSIBLE_MEDIA_TYPE_SET
+        or media_type.startswith(INCOMPRESSIBLE_MEDIA_TYPE_PREFIX_TUP)
+        or get_filename_extension(format_id, "").lower() in INCOMPRESSIBLE_EXT_SET
+    )
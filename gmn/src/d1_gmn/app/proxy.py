@@ -15,11 +15,28 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-"""Proxy mode."""
+"""Proxy mode.
+
+Requests to the servers holding proxy objects are sent through a ``requests.Session``
+per upstream server (scheme, host and port). The sessions are created on first use and
+kept for the lifetime of the process, so connections are reused across requests
+instead of paying for a new TCP and TLS handshake for each read. Each session has a
+connection pool of PROXY_MODE_POOL_SIZE connections, and retries failed connections and
+502, 503 and 504 responses with exponential backoff.
+
+Latency and error counters are kept per upstream server, and shown on the home page.
+
+"""
 import base64
+import threading
+import time
+import urllib.parse
 
-import django.conf
 import requests
+import requests.adapters
+import urllib3.util.retry
+
+import django.conf
 
 import d1_common.const
 import d1_common.types
@@ -27,26 +44,184 @@ import d1_common.types.exceptions
 import d1_common.url
 
 
-def get_sciobj_iter_remote(url):
+def get_sciobj_iter_remote(url, range_tup=None):
+    """Stream the bytes of a proxy object from the remote server.
+
+    Args:
+        range_tup: (first_byte, last_byte) or None
+            If provided, only the bytes in the inclusive range are returned. The range
+            is forwarded to the remote server. If the server ignores the range and
+            returns the full object, the range is extracted locally.
+
+    """
+    header_dict = _mk_header_dict()
+    if range_tup is not None:
+        header_dict["Range"] = "bytes={}-{}".format(*range_tup)
     try:
-        response = requests.get(
-            url,
-            stream=True,
-            headers=_mk_header_dict(),
-            timeout=django.conf.settings.PROXY_MODE_STREAM_TIMEOUT,
-        )
+        response = get(url, headers=header_dict)
     except requests.RequestException as e:
         raise d1_common.types.exceptions.ServiceFailure(
             0, 'Unable to open proxy object for streaming. error="{}"'.format(str(e))
         )
     else:
-        return response.iter_content(chunk_size=django.conf.settings.NUM_CHUNK_BYTES)
+        chunk_iter = _gen_chunks(response)
+        if range_tup is not None and response.status_code != 206:
+            return _slice_iter(chunk_iter, range_tup)
+        return chunk_iter
+
+
+def get(url, **kwargs):
+    """Send a streaming GET request to an upstream server through the pooled session
+    for the server, and record latency and errors for the server.
+
+    The caller must consume the response body, or close the response, to return the
+    connection to the pool.
+
+    Args:
+        url: str
+        **kwargs: Passed to ``requests.Session.get()``.
+
+    Returns:
+        requests.Response
+
+    Raises:
+        requests.RequestException
+
+    """
+    origin_str = _get_origin(url)
+    session = _get_session(origin_str)
+    kwargs.setdefault("timeout", django.conf.settings.PROXY_MODE_STREAM_TIMEOUT)
+    if not django.conf.settings.PROXY_MODE_KEEP_ALIVE:
+        kwargs["headers"] = dict(kwargs.get("headers") or {}, Connection="close")
+    start_ts = time.monotonic()
+    try:
+        response = session.get(url, stream=True, **kwargs)
+    except requests.RequestException:
+        _record(origin_str, time.monotonic() - start_ts, is_error=True)
+        raise
+    _record(
+        origin_str, time.monotonic() - start_ts, is_error=response.status_code >= 400
+    )
+    return response
 
 
 def is_proxy_url(url):
     return d1_common.url.isHttpOrHttps(url)
 
 
+def get_stats():
+    """Return counters for the upstream servers that have been accessed by this process.
+
+    ``latency_avg_ms`` and ``latency_max_ms`` are the times taken to receive the
+    response headers, including any retries.
+
+    Returns:
+        dict: Upstream server -> dict of counters.
+
+    """
+    with _lock:
+        return {
+            origin_str: {
+                "request": stats_dict["request"],
+                "error": stats_dict["error"],
+                "latency_avg_ms": int(
+                    stats_dict["latency_sum"] / stats_dict["request"] * 1000
+                ),
+                "latency_max_ms": int(stats_dict["latency_max"] * 1000),
+            }
+            for origin_str, stats_dict in _stats_dict.items()
+        }
+
+
+def close_sessions():
+    """Close the pooled sessions and clear the counters."""
+    with _lock:
+        for session in _session_dict.values():
+            session.close()
+        _session_dict.clear()
+        _stats_dict.clear()
+
+
+# Private
+
+_lock = threading.Lock()
+_session_dict = {}
+_stats_dict = {}
+
+
+def _get_origin(url):
+    url_split = urllib.parse.urlsplit(url)
+    return "{}://{}".format(url_split.scheme.lower(), url_split.netloc.lower())
+
+
+def _get_session(origin_str):
+    with _lock:
+        session = _session_dict.get(origin_str)
+        if session is None:
+            session = _session_dict[origin_str] = _create_session()
+        return session
+
+
+def _create_session():
+    retry = urllib3.util.retry.Retry(
+        total=django.conf.settings.PROXY_MODE_MAX_RETRIES,
+        backoff_factor=django.conf.settings.PROXY_MODE_RETRY_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        raise_on_status=False,
+    )
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=django.conf.settings.PROXY_MODE_POOL_SIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _record(origin_str, latency_sec, is_error):
+    with _lock:
+        stats_dict = _stats_dict.setdefault(
+            origin_str,
+            {"request": 0, "error": 0, "latency_sum": 0.0, "latency_max": 0.0},
+        )
+        stats_dict["request"] += 1
+        stats_dict["error"] += int(is_error)
+        stats_dict["latency_sum"] += latency_sec
+        stats_dict["latency_max"] = max(stats_dict["latency_max"], latency_sec)
+
+
+def _gen_chunks(response):
+    """Generate the chunks of a response body.
+
+    The response is closed when the body has been read, or when the generator is
+    closed, so that the connection is released back to the pool.
+
+    """
+    try:
+        yield from response.iter_content(
+            chunk_size=django.conf.settings.NUM_CHUNK_BYTES
+        )
+    finally:
+        response.close()
+
+
+def _slice_iter(chunk_iter, range_tup):
+    """Generate the bytes in an inclusive (first_byte, last_byte) range of a stream of
+    chunks."""
+    first_byte, last_byte = range_tup
+    pos = 0
+    for chunk_bytes in chunk_iter:
+        chunk_end = pos + len(chunk_bytes)
+        if chunk_end > first_byte:
+            yield chunk_bytes[max(0, first_byte - pos) : last_byte + 1 - pos]
+        if chunk_end > last_byte:
+            break
+        pos = chunk_end
+
+
 def _mk_header_dict():
     header_dict = {"User-Agent": d1_common.const.USER_AGENT}
     if django.conf.settings.PROXY_MODE_BASIC_AUTH_ENABLED:
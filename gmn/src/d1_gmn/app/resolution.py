@@ -0,0 +1,111 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Request scoped resolution of the object that a view operates on.
+
+A call such as MNRead.get() uses the object in several steps: SID resolution,
+authorization, the view itself, the response headers and the Event Log. The
+``resolve_sid`` view decorator resolves the object once, together with the related rows
+used by the later steps, and stores it in a ResolutionContext on the request. The later
+steps get the object and the permission level of the session subjects through this
+module, and fall back to querying the database if the request has no context for the
+object.
+
+Only the object that was resolved for the request is held, and it reflects the
+database at the time of resolution. Views that modify the object must not use it after
+the modification.
+
+"""
+import django.db.models
+
+import d1_gmn.app.models
+
+# Sentinel for a permission level that has not yet been retrieved. None is a valid
+# permission level, meaning that the session subjects have no permissions.
+_UNSET = object()
+
+
+class ResolutionContext(object):
+    """The object resolved for a request."""
+
+    def __init__(self, pid, sciobj_model):
+        self.pid = pid
+        self.sciobj_model = sciobj_model
+        self._permission_level = _UNSET
+
+    def get_permission_level(self, request):
+        """Return the highest permission level held by the session subjects for the
+        object, or None if they hold no permissions.
+
+        Trusted subjects are not taken into account. The level is retrieved with a
+        single query on first use.
+
+        """
+        if self._permission_level is _UNSET:
+            self._permission_level = d1_gmn.app.models.Permission.objects.filter(
+                sciobj=self.sciobj_model, subject__subject__in=request.all_subjects_set
+            ).aggregate(django.db.models.Max("level"))["level__max"]
+        return self._permission_level
+
+
+def query_sciobj(pid):
+    """Return the ScienceObject for ``pid`` with the related rows used by the views,
+    response headers and Event Log, or None if there is no object for ``pid``."""
+    return (
+        d1_gmn.app.models.ScienceObject.objects.select_related(
+            "pid",
+            "pid__chainmember_pid__chain__sid",
+            "format",
+            "checksum_algorithm",
+            "obsoletes",
+            "obsoleted_by",
+        )
+        .filter(pid__did=pid)
+        .first()
+    )
+
+
+def set_context(request, pid, sciobj_model):
+    request.resolution_context = ResolutionContext(pid, sciobj_model)
+
+
+def get_context(request, pid):
+    """Return the ResolutionContext for ``pid`` if the object was resolved for the
+    request, else None."""
+    context = getattr(request, "resolution_context", None)
+    if context is not None and context.pid == pid:
+        return context
+    return None
+
+
+def get_sciobj_model(request, pid):
+    """Return the ScienceObject for ``pid``, reusing the one resolved for the request if
+    available.
+
+    Raises:
+        ScienceObject.DoesNotExist
+
+    """
+    context = get_context(request, pid)
+    if context is not None:
+        return context.sciobj_model
+    sciobj_model = query_sciobj(pid)
+    if sciobj_model is None:
+        raise d1_gmn.app.models.ScienceObject.DoesNotExist(
+            'Object does not exist. pid="{}"'.format(pid)
+        )
+    return sciobj_model
@@ -15,14 +15,26 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-"""Utilities for manipulating revision chains in the database."""
+"""Utilities for manipulating revision chains in the database.
+
+The head PIDs to which SIDs resolve are cached by the sid_cache module. Functions that
+modify chains must invalidate the SIDs of the chains they modify.
+
+"""
 
 import d1_common.types.exceptions
 
+import django.db
+
 import d1_gmn.app
 import d1_gmn.app.did
 import d1_gmn.app.model_util
 import d1_gmn.app.models
+import d1_gmn.app.sid_cache
+
+# Upper bound for the number of revisions that are traversed when searching for the
+# head of a chain. Only reached if the obsoletedBy references form a cycle.
+MAX_CHAIN_TRAVERSAL = 100000
 
 
 def create_or_update_chain(pid, sid, obsoletes_pid, obsoleted_by_pid):
@@ -32,11 +44,15 @@ def create_or_update_chain(pid, sid, obsoletes_pid, obsoleted_by_pid):
     else:
         _add_sciobj(pid, sid, obsoletes_pid, obsoleted_by_pid)
     _update_sid_to_last_existing_pid_map(pid)
+    _invalidate_sid_cache_by_pid(pid)
 
 
 def delete_chain(pid):
     pid_to_chain_model = d1_gmn.app.models.ChainMember.objects.get(pid__did=pid)
     chain_model = pid_to_chain_model.chain
+    d1_gmn.app.sid_cache.invalidate(
+        d1_gmn.app.did.get_did_by_foreign_key(chain_model.sid)
+    )
     pid_to_chain_model.delete()
     if not d1_gmn.app.models.ChainMember.objects.filter(chain=chain_model).exists():
         if chain_model.sid:
@@ -79,10 +95,20 @@ def cut_from_chain(sciobj_model):
         old_pid = sciobj_model.obsoleted_by.did
         _cut_embedded_from_chain(sciobj_model)
     _update_sid_to_last_existing_pid_map(old_pid)
+    _invalidate_sid_cache_by_pid(old_pid)
 
 
 def get_all_pid_by_sid(sid):
-    return [c.pid.did for c in _get_all_chain_member_queryset_by_sid(sid)]
+    """Return the PIDs of all objects in the chain with the ``sid``.
+
+    Return an empty list if there is no chain with the ``sid``.
+
+    """
+    return list(
+        d1_gmn.app.models.ChainMember.objects.filter(chain__sid__did=sid).values_list(
+            "pid__did", flat=True
+        )
+    )
 
 
 # def set_revision(pid, obsoletes_pid=None, obsoleted_by_pid=None):
@@ -98,7 +124,28 @@ def resolve_sid(sid):
     - ``sid`` is verified to exist. E.g., with d1_gmn.app.views.asserts.is_sid().
 
     """
-    return d1_gmn.app.models.Chain.objects.get(sid__did=sid).head_pid.did
+    pid = d1_gmn.app.sid_cache.get(sid)
+    if pid is None:
+        pid = d1_gmn.app.models.Chain.objects.values_list(
+            "head_pid__did", flat=True
+        ).get(sid__did=sid)
+        d1_gmn.app.sid_cache.put(sid, pid)
+    return pid
+
+
+def get_sid_by_model(sciobj_model):
+    """Return the SID for the chain to which the object belongs, or None if the chain
+    has no SID.
+
+    Does not query the database if the chain was joined in with
+    ``select_related("pid__chainmember_pid__chain__sid")``.
+
+    """
+    try:
+        chain_member_model = sciobj_model.pid.chainmember_pid
+    except d1_gmn.app.models.ChainMember.DoesNotExist:
+        return None
+    return d1_gmn.app.did.get_did_by_foreign_key(chain_member_model.chain.sid)
 
 
 def get_sid_by_pid(pid):
@@ -260,7 +307,7 @@ def _assert_sid_is_in_chain(sid, pid):
         )
 
 
-def _find_head_or_latest_connected(pid, last_pid=None):
+def _find_head_or_latest_connected(pid):
     """Find latest existing sciobj that can be reached by walking towards the head from
     ``pid``
 
@@ -268,14 +315,56 @@ def _find_head_or_latest_connected(pid, last_pid=None):
     and head exists, return the head. If chain ends in a dangling obsoletedBy, return
     the last existing object.
 
+    On Postgres and SQLite, the chain is walked with a single recursive query.
+    Otherwise, it is walked with one query per revision.
+
     """
-    try:
-        sci_model = d1_gmn.app.model_util.get_sci_model(pid)
-    except d1_gmn.app.models.ScienceObject.DoesNotExist:
-        return last_pid
-    if sci_model.obsoleted_by is None:
-        return pid
-    return _find_head_or_latest_connected(sci_model.obsoleted_by.did, pid)
+    if django.db.connection.vendor in ("postgresql", "sqlite"):
+        return _find_head_or_latest_connected_cte(pid)
+    return _find_head_or_latest_connected_iter(pid)
+
+
+def _find_head_or_latest_connected_cte(pid):
+    sql_str = """
+        WITH RECURSIVE walk (pid_id, obsoleted_by_id, depth) AS (
+            SELECT s.pid_id, s.obsoleted_by_id, 0
+            FROM {sciobj} s JOIN {did} d ON d.id = s.pid_id
+            WHERE d.did = %s
+            UNION ALL
+            SELECT s.pid_id, s.obsoleted_by_id, w.depth + 1
+            FROM walk w JOIN {sciobj} s ON s.pid_id = w.obsoleted_by_id
+            WHERE w.depth < %s
+        )
+        SELECT d.did
+        FROM walk w JOIN {did} d ON d.id = w.pid_id
+        ORDER BY w.depth DESC
+        LIMIT 1
+    """.format(
+        sciobj=d1_gmn.app.models.ScienceObject._meta.db_table,
+        did=d1_gmn.app.models.IdNamespace._meta.db_table,
+    )
+    with django.db.connection.cursor() as cursor:
+        cursor.execute(sql_str, [pid, MAX_CHAIN_TRAVERSAL])
+        row_tup = cursor.fetchone()
+    return row_tup[0] if row_tup else None
+
+
+def _find_head_or_latest_connected_iter(pid):
+    last_pid = None
+    for _ in range(MAX_CHAIN_TRAVERSAL + 1):
+        # Empty if the object does not exist, [None] if it is the head.
+        obsoleted_by_list = list(
+            d1_gmn.app.models.ScienceObject.objects.filter(pid__did=pid).values_list(
+                "obsoleted_by__did", flat=True
+            )
+        )
+        if not obsoleted_by_list:
+            break
+        last_pid = pid
+        pid = obsoleted_by_list[0]
+        if pid is None:
+            break
+    return last_pid
 
 
 def _get_chain_by_pid(pid):
@@ -343,6 +432,14 @@ def _create_chain(pid, sid):
 #     return _create_chain(pid, None)
 
 
+def _invalidate_sid_cache_by_pid(pid):
+    chain_model = _get_chain_by_pid(pid)
+    if chain_model:
+        d1_gmn.app.sid_cache.invalidate(
+            d1_gmn.app.did.get_did_by_foreign_key(chain_model.sid)
+        )
+
+
 def _map_sid_to_pid(chain_model, sid, pid):
     if sid is not None:
         chain_model.sid = d1_gmn.app.did.get_or_create_did(sid)
@@ -350,12 +447,6 @@ def _map_sid_to_pid(chain_model, sid, pid):
     chain_model.save()
 
 
-def _get_all_chain_member_queryset_by_sid(sid):
-    return d1_gmn.app.models.ChainMember.objects.filter(
-        chain=d1_gmn.app.models.Chain.objects.get(sid__did=sid)
-    )
-
-
 def _get_all_chain_member_queryset_by_chain(chain_model):
     return d1_gmn.app.models.ChainMember.objects.filter(chain=chain_model)
 
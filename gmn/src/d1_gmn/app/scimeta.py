@@ -27,10 +27,13 @@ import django.conf
 import d1_gmn.app.sciobj_store
 
 
-def assert_valid(sysmeta_pyxb, pid):
+def assert_valid(sysmeta_pyxb, pid, sciobj_bytes=None):
     """Validate file at {sciobj_path} against schema selected via formatId and raise
     InvalidRequest if invalid.
 
+    If ``sciobj_bytes`` is provided, it must hold the object bytes, which are then
+    validated instead of reading the file.
+
     Validation is only performed when:
 
     - SciMeta validation is enabled
@@ -57,11 +60,13 @@ def assert_valid(sysmeta_pyxb, pid):
                 ),
             )
 
-    with d1_gmn.app.sciobj_store.open_sciobj_file_by_pid_ctx(pid) as sciobj_file:
-        try:
-            d1_scimeta.validate.assert_valid(sysmeta_pyxb.formatId, sciobj_file.read())
-        except d1_scimeta.util.SciMetaError as e:
-            raise d1_common.types.exceptions.InvalidRequest(0, str(e))
+    if sciobj_bytes is None:
+        with d1_gmn.app.sciobj_store.open_sciobj_file_by_pid_ctx(pid) as sciobj_file:
+            sciobj_bytes = sciobj_file.read()
+    try:
+        d1_scimeta.validate.assert_valid(sysmeta_pyxb.formatId, sciobj_bytes)
+    except d1_scimeta.util.SciMetaError as e:
+        raise d1_common.types.exceptions.InvalidRequest(0, str(e))
 
 
 def _is_validation_enabled():
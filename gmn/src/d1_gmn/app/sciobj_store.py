@@ -30,6 +30,7 @@ import contextlib
 import hashlib
 import os
 import re
+import stat
 
 import d1_common.iter
 import d1_common.iter.stream
@@ -40,6 +41,7 @@ import d1_common.utils.filesystem
 import d1_common.utils.ulog
 
 import django.conf
+import django.core.exceptions
 
 import d1_gmn
 
@@ -53,6 +55,13 @@ SCIOBJ_JSON_NAME = "gmn_object_store.json"
 # that are relative to the path set in settings.OBJECT_STORE_PATH.
 RELATIVE_PATH_MAGIC_HOST_STR = "gmn-object-store"
 
+# Directory below the root of the SciObj store that holds temporary files.
+SCIOBJ_TMP_DIR_NAME = "tmp"
+
+# Directory below the root of the SciObj store that holds private state files, such as
+# the Event Log spool and the checkpoints of management commands.
+SCIOBJ_VAR_DIR_NAME = "var"
+
 # Default location
 
 
@@ -112,6 +121,22 @@ def get_sciobj_iter_by_url(sciobj_url):
     return d1_common.iter.stream.StreamIterator(open_sciobj_file_by_path(abs_path))
 
 
+def get_sciobj_range_iter_by_url(sciobj_url, range_tup):
+    """Generate the bytes in an inclusive (first_byte, last_byte) range of a SciObj."""
+    first_byte, last_byte = range_tup
+    remaining_int = last_byte - first_byte + 1
+    with open_sciobj_file_by_path(get_abs_sciobj_file_path_by_url(sciobj_url)) as f:
+        f.seek(first_byte)
+        while remaining_int > 0:
+            chunk_bytes = f.read(
+                min(remaining_int, django.conf.settings.NUM_CHUNK_BYTES)
+            )
+            if not chunk_bytes:
+                break
+            remaining_int -= len(chunk_bytes)
+            yield chunk_bytes
+
+
 def get_sciobj_byte_iterator_by_url(sciobj_url):
     with open_sciobj_file_by_pid(
         get_abs_sciobj_file_path_by_url(sciobj_url)
@@ -199,6 +224,90 @@ def get_abs_sciobj_store_path():
     return django.conf.settings.OBJECT_STORE_PATH
 
 
+def get_abs_sciobj_tmp_path():
+    """Get the absolute local path to the directory for temporary files in the default
+    SciObj store.
+
+    - Files in the directory are on the same filesystem as the SciObj files, so they
+      can be moved to their final locations with an atomic rename.
+    - The directory is created if it does not exist.
+
+    """
+    tmp_path = os.path.join(get_abs_sciobj_store_path(), SCIOBJ_TMP_DIR_NAME)
+    d1_common.utils.filesystem.create_missing_directories_for_dir(tmp_path)
+    return tmp_path
+
+
+def get_abs_sciobj_var_path():
+    """Get the absolute local path to the directory for private state files in the
+    default SciObj store.
+
+    - The directory is created with mode 0700 if it does not exist.
+    - Raises ImproperlyConfigured if the directory is not private to the GMN user.
+
+    """
+    var_path = os.path.join(get_abs_sciobj_store_path(), SCIOBJ_VAR_DIR_NAME)
+    prepare_private_dir(var_path)
+    return var_path
+
+
+def prepare_private_dir(dir_path):
+    """Create the directory with mode 0700 if it does not exist, and check that it is
+    a directory that is owned by the current user and not writable by others.
+
+    Raises:
+        ImproperlyConfigured: The directory cannot be used safely.
+
+    """
+    os.makedirs(dir_path, mode=0o700, exist_ok=True)
+    stat_result = os.lstat(dir_path)
+    if (
+        not stat.S_ISDIR(stat_result.st_mode)
+        or stat_result.st_uid != os.geteuid()
+        or stat_result.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+    ):
+        raise django.core.exceptions.ImproperlyConfigured(
+            "Configuration error: Path must be a directory that is owned by the GMN "
+            "user and not writable by group or others. "
+            'path="{}" mode="{:o}" uid={}'.format(
+                dir_path, stat.S_IMODE(stat_result.st_mode), stat_result.st_uid
+            )
+        )
+
+
+def open_private_file(file_path, flags, mode=0o600):
+    """Open a file that must be private to the GMN user, and return the file
+    descriptor.
+
+    Symbolic links are not followed, and files that are owned by another user or are
+    writable by group or others are refused, so that other local users cannot redirect
+    writes to other files or inject content.
+
+    Raises:
+        OSError: The file cannot be opened or is not private. PermissionError if the
+        file is owned by another user or is writable by others.
+
+    """
+    fd = os.open(file_path, flags | os.O_NOFOLLOW, mode)
+    try:
+        stat_result = os.fstat(fd)
+        if (
+            not stat.S_ISREG(stat_result.st_mode)
+            or stat_result.st_uid != os.geteuid()
+            or stat_result.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+        ):
+            raise PermissionError(
+                "Refused to open file that is not private to the GMN user. "
+                'path="{}" mode="{:o}" uid={}'.format(
+                    file_path, stat.S_IMODE(stat_result.st_mode), stat_result.st_uid
+                )
+            )
+    except Exception:
+        os.close(fd)
+        raise
+    return fd
+
+
 def assert_sciobj_store_exists():
     if not is_existing_store():
         raise d1_common.types.exceptions.ServiceFailure(
@@ -257,6 +366,23 @@ def get_abs_sciobj_file_path_by_url(file_url):
     return m.group(2)
 
 
+def get_rel_sciobj_file_path_by_url(file_url):
+    """Get the path to the file holding an object's bytes, relative to the root of the
+    default SciObj store.
+
+    - Return None if the object is stored in a custom location outside of the default
+      SciObj store.
+
+    """
+    m = re.match(r"file://(.*?)/(.*)", file_url, re.IGNORECASE)
+    if m.group(1) == RELATIVE_PATH_MAGIC_HOST_STR:
+        return m.group(2)
+    rel_path = os.path.relpath(m.group(2), get_abs_sciobj_store_path())
+    if rel_path.startswith(os.pardir):
+        return None
+    return rel_path
+
+
 # SciObj store versioning
 
 
@@ -79,6 +79,13 @@ LOG_IGNORE_SUBJECT = []
 LOG_IGNORE_TRUSTED_SUBJECT = True
 LOG_IGNORE_NODE_SUBJECT = True
 
+EVENT_LOG_WRITE_MODE = "sync"
+EVENT_LOG_QUEUE_SIZE = 10000
+EVENT_LOG_BATCH_SIZE = 500
+EVENT_LOG_FLUSH_INTERVAL = 5.0
+EVENT_LOG_SPOOL_PATH = None
+EVENT_LOG_SPOOL_FSYNC = False
+
 CLIENT_CERT_PATH = "/var/local/dataone/certs/client/client_cert.pem"
 CLIENT_CERT_PRIVATE_KEY_PATH = (
     "/var/local/dataone/certs/client/client_key_nopassword.pem"
@@ -86,6 +93,9 @@ CLIENT_CERT_PRIVATE_KEY_PATH = (
 
 OBJECT_STORE_PATH = "/var/local/dataone/gmn_object_store"
 
+SCIOBJ_DELIVERY_MODE = "stream"
+SCIOBJ_ACCEL_REDIRECT_LOCATION = "/gmn_object_store/"
+
 NODE_REPLICATE = False
 
 REPLICATION_MAXOBJECTSIZE = -1
@@ -93,6 +103,7 @@ REPLICATION_SPACEALLOCATED = 10 * 1024 ** 3
 REPLICATION_ALLOWEDNODE = ()
 REPLICATION_ALLOWEDOBJECTFORMAT = ()
 REPLICATION_MAX_ATTEMPTS = 24
+REPLICATION_WORKER_COUNT = 4
 REPLICATION_ALLOW_ONLY_PUBLIC = False
 
 SYSMETA_REFRESH_MAX_ATTEMPTS = 24
@@ -113,11 +124,16 @@ RESOURCE_MAP_CREATE = "block"
 SCIMETA_VALIDATION_ENABLED = True
 SCIMETA_VALIDATION_MAX_SIZE = 100 * 1024 ** 2
 SCIMETA_VALIDATION_OVER_SIZE_ACTION = "reject"
+SCIMETA_VALIDATION_WARM_UP = False
 
 PROXY_MODE_BASIC_AUTH_ENABLED = False
 PROXY_MODE_BASIC_AUTH_USERNAME = ""
 PROXY_MODE_BASIC_AUTH_PASSWORD = ""
 PROXY_MODE_STREAM_TIMEOUT = 30
+PROXY_MODE_POOL_SIZE = 10
+PROXY_MODE_KEEP_ALIVE = True
+PROXY_MODE_MAX_RETRIES = 3
+PROXY_MODE_RETRY_BACKOFF = 0.5
 
 # Fallback origin to use if the CGI environment does not contain HTTP_ORIGIN.
 CORS_DEFAULT_ORIGIN = "https://search.dataone.org"
@@ -125,6 +141,41 @@ CORS_DEFAULT_ORIGIN = "https://search.dataone.org"
 MAX_XML_DOCUMENT_SIZE = 10 * 1024 ** 2
 NUM_CHUNK_BYTES = 1024 ** 2
 MAX_SLICE_ITEMS = 5000
+MAX_RANGE_COUNT = 16
+PACKAGE_SYSMETA_BATCH_SIZE = 100
+PACKAGE_PREFETCH_BYTES = 8 * 1024 ** 2
+SYSMETA_BULK_BATCH_SIZE = 100
+
+COUNT_CACHE_ENABLED = True
+COUNT_CACHE_TIMEOUT = None
+COUNT_CACHE_LOG_TIMEOUT = 60
+COUNT_ESTIMATE_FOR_TRUSTED = False
+
+SYSMETA_CACHE_BACKEND = "lru"
+SYSMETA_CACHE_LRU_SIZE = 1000
+SYSMETA_CACHE_TIMEOUT = 60 * 60
+SYSMETA_CACHE_FILE_PATH = None
+
+SID_CACHE_ENABLED = None
+SID_CACHE_TIMEOUT = 60
+
+DIMENSION_CACHE_ENABLED = True
+DIMENSION_CACHE_SIZE = 10000
+DIMENSION_CACHE_PREFILL = False
+
+SESSION_CACHE_ENABLED = True
+SESSION_CACHE_SIZE = 1000
+SESSION_CACHE_MAX_AGE = 60 * 60
+
+FILE_UPLOAD_HANDLERS = [
+    "d1_gmn.app.ingest.SciobjIngestUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+INGEST_CHECKSUM_ALGORITHMS = ["MD5", "SHA-1"]
+INGEST_HEAD_SIZE = 1024 ** 2
+
+CHECKSUM_CACHE_ENABLED = True
 
 # Serving of static files, such as images
 
@@ -0,0 +1,96 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cache the head PID to which each SID resolves.
+
+SIDs are resolved for every v2 API call that addresses an object by its SID, and
+resolving a SID requires first checking that the DID is not a PID, then looking up the
+chain. This module caches the resolved head PID in the Django cache, keyed on the SID.
+
+The head of a chain only changes when the chain is modified, so the revision module
+invalidates the SID of a chain whenever the chain is created, updated, cut or deleted.
+As in the count_cache module, the SID is invalidated now and again when the current
+transaction commits, so that a concurrent request cannot cache the head from before
+the transaction committed.
+
+Invalidation is only visible to all GMN processes if the Django cache is shared
+between them (e.g., Memcached). With a process local cache, a SID may resolve to the
+previous head in other processes for up to ``SID_CACHE_TIMEOUT`` seconds after the
+chain is modified. So, by default, the cache is only enabled if the Django cache is
+shared.
+
+"""
+import hashlib
+import logging
+
+import django.conf
+import django.core.cache
+import django.db.transaction
+
+import d1_gmn.app.util
+
+logger = logging.getLogger(__name__)
+
+
+def get(sid):
+    """Return the cached head PID for ``sid``, or None if not cached."""
+    if not _is_enabled():
+        return None
+    pid = django.core.cache.cache.get(_gen_cache_key(sid))
+    if pid is None:
+        logger.debug('SID cache miss. sid="{}"'.format(sid))
+    else:
+        logger.debug('SID cache hit. sid="{}" pid="{}"'.format(sid, pid))
+    return pid
+
+
+def put(sid, pid):
+    """Cache ``pid`` as the head PID for ``sid``."""
+    if not _is_enabled():
+        return
+    django.core.cache.cache.set(
+        _gen_cache_key(sid), pid, django.conf.settings.SID_CACHE_TIMEOUT
+    )
+
+
+def invalidate(sid):
+    """Invalidate the cached head PID for ``sid``.
+
+    Does nothing if ``sid`` is None, so that it can be called with the SID of a chain
+    that does not have a SID.
+
+    """
+    if sid is None:
+        return
+    key_str = _gen_cache_key(sid)
+    django.core.cache.cache.delete(key_str)
+    django.db.transaction.on_commit(lambda: django.core.cache.cache.delete(key_str))
+
+
+# Private
+
+
+def _is_enabled():
+    is_enabled = django.conf.settings.SID_CACHE_ENABLED
+    if is_enabled is None:
+        return d1_gmn.app.util.is_shared_cache()
+    return is_enabled
+
+
+def _gen_cache_key(sid):
+    # SIDs can contain characters that are not valid in Memcached keys.
+    return "sid_cache_{}".format(hashlib.sha1(sid.encode("utf-8")).hexdigest())
@@ -22,6 +22,7 @@
 - Query the database for System Metadata properties.
 
 """
+import collections
 import os
 
 import pyxb
@@ -37,17 +38,20 @@ import d1_common.utils.ulog
 import d1_common.wrap.access_policy
 import d1_common.xml
 
+import django.db.models
 import django.urls
 import django.urls.base
 
 import d1_gmn.app
 import d1_gmn.app.auth
+import d1_gmn.app.count_cache
 import d1_gmn.app.did
 import d1_gmn.app.model_util
 import d1_gmn.app.models
 import d1_gmn.app.object_format_cache
 import d1_gmn.app.revision
 import d1_gmn.app.sciobj_store
+import d1_gmn.app.sysmeta_cache
 import d1_gmn.app.views.util
 
 
@@ -81,7 +85,7 @@ def deserialize(xml_str):
     return d1_gmn.app.views.util.deserialize(xml_str)
 
 
-def create_or_update(sysmeta_pyxb, sciobj_url=None):
+def create_or_update(sysmeta_pyxb, sciobj_url=None, permission_model_list=None):
     """Create or update database representation of a System Metadata object and closely
     related internal state.
 
@@ -95,6 +99,12 @@ def create_or_update(sysmeta_pyxb, sciobj_url=None):
             - If not passed on update, the sciobj location remains unchanged
             - If passed on update, the sciobj location is updated
 
+        permission_model_list: list
+            - If not passed, the Permission rows for the access policy are saved
+            - If passed, the Permission rows are appended to the list instead of being
+              saved, so that the caller can insert the rows for many objects with a
+              single ``bulk_create()``
+
     Preconditions:
 
         - All values in ``sysmeta_pyxb`` must be valid for the operation being performed
@@ -106,9 +116,12 @@ def create_or_update(sysmeta_pyxb, sciobj_url=None):
     if sciobj_url is None:
         sciobj_url = d1_gmn.app.sciobj_store.get_rel_sciobj_file_url_by_pid(pid)
 
+    # Rows related to a new object do not have to be compared with existing rows.
+    is_new = False
     try:
         sci_model = d1_gmn.app.model_util.get_sci_model(pid)
     except d1_gmn.app.models.ScienceObject.DoesNotExist:
+        is_new = True
         sci_model = d1_gmn.app.models.ScienceObject()
         sci_model.pid = d1_gmn.app.did.get_or_create_did(pid)
         sci_model.url = sciobj_url
@@ -122,18 +135,23 @@ def create_or_update(sysmeta_pyxb, sciobj_url=None):
     sci_model.save()
 
     if _has_media_type_pyxb(sysmeta_pyxb):
-        _media_type_pyxb_to_model(sci_model, sysmeta_pyxb)
+        _media_type_pyxb_to_model(sci_model, sysmeta_pyxb, is_new)
 
-    _access_policy_pyxb_to_model(sci_model, sysmeta_pyxb)
+    _access_policy_pyxb_to_model(
+        sci_model, sysmeta_pyxb, is_new, permission_model_list
+    )
 
     if _has_replication_policy_pyxb(sysmeta_pyxb):
-        _replication_policy_pyxb_to_model(sci_model, sysmeta_pyxb)
+        _replication_policy_pyxb_to_model(sci_model, sysmeta_pyxb, is_new)
 
     replica_pyxb_to_model(sci_model, sysmeta_pyxb)
     revision_pyxb_to_model(sci_model, sysmeta_pyxb, pid)
 
     sci_model.save()
 
+    d1_gmn.app.count_cache.invalidate_object_counts()
+    d1_gmn.app.sysmeta_cache.invalidate_chain(pid)
+
     return sci_model
 
 
@@ -180,12 +198,120 @@ def update_modified_timestamp(pid):
     _update_modified_timestamp(sci_model)
 
 
+def update_is_public():
+    """Set the ``is_public`` flag of all objects from their Permission rows.
+
+    The flag is maintained by create_or_update(). This is only required after
+    Permission rows have been written by other means, such as by loading a fixture.
+
+    """
+    public_sciobj_query = d1_gmn.app.models.Permission.objects.filter(
+        subject__subject=d1_common.const.SUBJECT_PUBLIC
+    ).values("sciobj")
+    sciobj_query = d1_gmn.app.models.ScienceObject.objects
+    sciobj_query.filter(id__in=public_sciobj_query).update(is_public=True)
+    sciobj_query.exclude(id__in=public_sciobj_query).update(is_public=False)
+
+
 def model_to_pyxb(pid):
-    return _model_to_pyxb(pid)
+    return model_to_pyxb_many([pid])[0]
 
 
-def _model_to_pyxb(pid):
-    sciobj_model = d1_gmn.app.model_util.get_sci_model(pid)
+def model_to_pyxb_many(pid_list):
+    """Generate System Metadata PyXB objects for multiple objects.
+
+    All the required database rows are retrieved with a fixed number of queries,
+    regardless of the number of objects and the number of permissions, replicas, etc,
+    for each object.
+
+    Args:
+        pid_list: list of str
+            PIDs of existing objects.
+
+    Returns:
+        list of PyXB SystemMetadata: In the same order as ``pid_list``.
+
+    Raises:
+        ScienceObject.DoesNotExist: One or more of the PIDs are not for existing
+        objects.
+
+    """
+    sciobj_model_dict = {
+        sciobj_model.pid.did: sciobj_model
+        for sciobj_model in _query_sciobj_for_pyxb().filter(pid__did__in=pid_list)
+    }
+    missing_pid_list = [pid for pid in pid_list if pid not in sciobj_model_dict]
+    if missing_pid_list:
+        raise d1_gmn.app.models.ScienceObject.DoesNotExist(
+            'Object does not exist. pid="{}"'.format('", "'.join(missing_pid_list))
+        )
+    return [_model_to_pyxb(sciobj_model_dict[pid]) for pid in pid_list]
+
+
+def _query_sciobj_for_pyxb():
+    """Return a query that retrieves ScienceObject models together with all the related
+    rows required for generating System Metadata.
+
+    Many-to-one and one-to-one relations are joined in the main select. Each of the
+    one-to-many relations are retrieved for all the objects in a single additional
+    query. The prefetched querysets are ordered as required in the System Metadata, so
+    the ``*_model_to_pyxb()`` functions can use ``all()`` on the related managers.
+
+    """
+    return d1_gmn.app.models.ScienceObject.objects.select_related(
+        "pid",
+        "pid__chainmember_pid__chain__sid",
+        "format",
+        "checksum_algorithm",
+        "submitter",
+        "rights_holder",
+        "origin_member_node",
+        "authoritative_member_node",
+        "obsoletes",
+        "obsoleted_by",
+        "replicationpolicy",
+    ).prefetch_related(
+        django.db.models.Prefetch(
+            "mediatype_set",
+            queryset=d1_gmn.app.models.MediaType.objects.prefetch_related(
+                django.db.models.Prefetch(
+                    "mediatypeproperty_set",
+                    queryset=d1_gmn.app.models.MediaTypeProperty.objects.order_by(
+                        "name", "value"
+                    ),
+                )
+            ),
+        ),
+        django.db.models.Prefetch(
+            "permission_set",
+            queryset=d1_gmn.app.models.Permission.objects.select_related(
+                "subject"
+            ).order_by("subject", "level"),
+        ),
+        django.db.models.Prefetch(
+            "replicationpolicy__preferredmembernode_set",
+            queryset=d1_gmn.app.models.PreferredMemberNode.objects.select_related(
+                "node"
+            ).order_by("node__urn"),
+        ),
+        django.db.models.Prefetch(
+            "replicationpolicy__blockedmembernode_set",
+            queryset=d1_gmn.app.models.BlockedMemberNode.objects.select_related(
+                "node"
+            ).order_by("node__urn"),
+        ),
+        django.db.models.Prefetch(
+            "remotereplica_set",
+            queryset=d1_gmn.app.models.RemoteReplica.objects.select_related(
+                "info__member_node", "info__status"
+            ).order_by("info__timestamp", "info__member_node__urn"),
+        ),
+    )
+
+
+def _model_to_pyxb(sciobj_model):
+    """Generate System Metadata PyXB from a ScienceObject model retrieved with
+    ``_query_sciobj_for_pyxb()``."""
     sysmeta_pyxb = _base_model_to_pyxb(sciobj_model)
     if _has_media_type_db(sciobj_model):
         sysmeta_pyxb.mediaType = _media_type_model_to_pyxb(sciobj_model)
@@ -248,13 +374,15 @@ def _base_model_to_pyxb(sciobj_model):
         sciobj_model.obsoleted_by
     )
     base_pyxb.archived = sciobj_model.is_archived
-    base_pyxb.seriesId = d1_gmn.app.revision.get_sid_by_pid(sciobj_model.pid.did)
+    base_pyxb.seriesId = d1_gmn.app.revision.get_sid_by_model(sciobj_model)
     return base_pyxb
 
 
 def _update_modified_timestamp(sci_model):
     sci_model.modified_timestamp = d1_common.date_time.utc_now()
     sci_model.save()
+    d1_gmn.app.count_cache.invalidate_object_counts()
+    d1_gmn.app.sysmeta_cache.invalidate(sci_model.pid.did)
 
 
 # ------------------------------------------------------------------------------
@@ -274,16 +402,43 @@ def _has_media_type_pyxb(sysmeta_pyxb):
     return hasattr(sysmeta_pyxb, "mediaType") and sysmeta_pyxb.mediaType is not None
 
 
-def _media_type_pyxb_to_model(sci_model, sysmeta_pyxb):
-    _delete_existing_media_type(sysmeta_pyxb)
-    media_type_model = _insert_media_type_name_row(sci_model, sysmeta_pyxb.mediaType)
-    _insert_media_type_property_rows(media_type_model, sysmeta_pyxb.mediaType)
-
-
-def _delete_existing_media_type(sysmeta_pyxb):
-    d1_gmn.app.models.MediaType.objects.filter(
-        sciobj__pid__did=d1_common.xml.get_req_val(sysmeta_pyxb.identifier)
-    ).delete()
+def _media_type_pyxb_to_model(sci_model, sysmeta_pyxb, is_new):
+    """Update the MediaType and MediaTypeProperty rows for the object to match
+    ``sysmeta_pyxb``, only writing the rows that differ."""
+    media_type_pyxb = sysmeta_pyxb.mediaType
+    media_type_model_list = (
+        []
+        if is_new
+        else list(
+            sci_model.mediatype_set.order_by("id").prefetch_related(
+                "mediatypeproperty_set"
+            )
+        )
+    )
+    if media_type_model_list:
+        media_type_model = media_type_model_list[0]
+        _delete_models(d1_gmn.app.models.MediaType, media_type_model_list[1:])
+        if media_type_model.name != media_type_pyxb.name:
+            media_type_model.name = media_type_pyxb.name
+            media_type_model.save(update_fields=["name"])
+        property_model_list = list(media_type_model.mediatypeproperty_set.all())
+    else:
+        media_type_model = _insert_media_type_name_row(sci_model, media_type_pyxb)
+        property_model_list = []
+    delete_model_list, create_key_list = _diff_rows(
+        property_model_list,
+        [(p.name, d1_common.xml.get_req_val(p)) for p in media_type_pyxb.property_],
+        lambda m: (m.name, m.value),
+    )
+    _delete_models(d1_gmn.app.models.MediaTypeProperty, delete_model_list)
+    d1_gmn.app.models.MediaTypeProperty.objects.bulk_create(
+        [
+            d1_gmn.app.models.MediaTypeProperty(
+                media_type=media_type_model, name=name, value=value
+            )
+            for name, value in create_key_list
+        ]
+    )
 
 
 def _insert_media_type_name_row(sci_model, media_type_pyxb):
@@ -294,26 +449,16 @@ def _insert_media_type_name_row(sci_model, media_type_pyxb):
     return media_type_model
 
 
-def _insert_media_type_property_rows(media_type_model, media_type_pyxb):
-    for p in media_type_pyxb.property_:
-        media_type_property_model = d1_gmn.app.models.MediaTypeProperty(
-            media_type=media_type_model, name=p.name, value=d1_common.xml.get_req_val(p)
-        )
-        media_type_property_model.save()
-
-
 def _has_media_type_db(sciobj_model):
-    return d1_gmn.app.models.MediaType.objects.filter(sciobj=sciobj_model).exists()
+    return bool(sciobj_model.mediatype_set.all())
 
 
 def _media_type_model_to_pyxb(sciobj_model):
-    media_type_model = d1_gmn.app.models.MediaType.objects.get(sciobj=sciobj_model)
+    media_type_model = sciobj_model.mediatype_set.all()[0]
     media_type_pyxb = d1_common.types.dataoneTypes.MediaType()
     media_type_pyxb.name = media_type_model.name
 
-    for media_type_property_model in d1_gmn.app.models.MediaTypeProperty.objects.filter(
-        media_type=media_type_model
-    ).order_by("name", "value"):
+    for media_type_property_model in media_type_model.mediatypeproperty_set.all():
         media_type_property_pyxb = d1_common.types.dataoneTypes.MediaTypeProperty(
             media_type_property_model.value, name=media_type_property_model.name
         )
@@ -327,49 +472,94 @@ def _media_type_model_to_pyxb(sciobj_model):
 # ------------------------------------------------------------------------------
 
 
-def _access_policy_pyxb_to_model(sci_model, sysmeta_pyxb):
+def _access_policy_pyxb_to_model(
+    sci_model, sysmeta_pyxb, is_new, permission_model_list=None
+):
     """Create or update the database representation of the sysmeta_pyxb access policy.
 
     If called without an access policy, any existing permissions on the object
     are removed and the access policy for the rights holder is recreated.
 
+    The existing Permission rows for the object are compared with the access policy,
+    and only the rows that differ are deleted, updated or created, each with a single
+    query.
+
     Preconditions:
       - Subject has changePermission for object.
 
     Postconditions:
       - The Permission and related tables contain the new access policy.
+      - ``sci_model.is_public`` is set if the policy grants access to the public
+        subject. The caller saves ``sci_model``.
 
     Notes:
       - There can be multiple rules in a policy and each rule can contain multiple
         subjects. So there are two ways that the same subject can be specified multiple
         times in a policy. If this happens, multiple, conflicting action levels may be
-        provided for the subject. This is handled by checking for an existing row for
-        the subject for this object and updating it if it contains a lower action
-        level. The end result is that there is one row for each combination of subject
-        and object, and this row contains the highest action level.
+        provided for the subject. This is handled by keeping only the highest action
+        level for the subject. The end result is that there is one row for each
+        combination of subject and object, and this row contains the highest action
+        level.
 
     """
-    _delete_existing_access_policy(sysmeta_pyxb)
-    # Add changePermission for rights holder.
-    allow_rights_holder = d1_common.types.dataoneTypes.AccessRule()
-    permission = d1_common.types.dataoneTypes.Permission(
-        d1_gmn.app.auth.CHANGEPERMISSION_STR
-    )
-    allow_rights_holder.permission.append(permission)
-    allow_rights_holder.subject.append(
-        d1_common.xml.get_req_val(sysmeta_pyxb.rightsHolder)
+    level_dict = _get_level_dict(sysmeta_pyxb)
+    sci_model.is_public = d1_common.const.SUBJECT_PUBLIC in level_dict
+    existing_model_list = (
+        []
+        if is_new
+        else d1_gmn.app.models.Permission.objects.filter(
+            sciobj=sci_model
+        ).select_related("subject")
     )
-    top_level = _get_highest_level_action_for_rule(allow_rights_holder)
-    _insert_permission_rows(sci_model, allow_rights_holder, top_level)
-    # Create db entries for all subjects for which permissions have been granted.
+    delete_model_list = []
+    update_model_list = []
+    for permission_model in existing_model_list:
+        # Removing the subject from the dict also causes any duplicate rows for the
+        # subject to be deleted.
+        level = level_dict.pop(permission_model.subject.subject, None)
+        if level is None:
+            delete_model_list.append(permission_model)
+        elif permission_model.level != level:
+            permission_model.level = level
+            update_model_list.append(permission_model)
+    _delete_models(d1_gmn.app.models.Permission, delete_model_list)
+    if update_model_list:
+        d1_gmn.app.models.Permission.objects.bulk_update(update_model_list, ["level"])
+    subject_model_dict = d1_gmn.app.models.subject_dict(level_dict)
+    create_model_list = [
+        d1_gmn.app.models.Permission(
+            sciobj=sci_model, subject=subject_model_dict[subject_str], level=level
+        )
+        for subject_str, level in level_dict.items()
+    ]
+    if permission_model_list is None:
+        d1_gmn.app.models.Permission.objects.bulk_create(create_model_list)
+    else:
+        permission_model_list.extend(create_model_list)
+
+
+def _get_level_dict(sysmeta_pyxb):
+    """Return a dict that maps each subject in the access policy to the highest access
+    level granted to the subject.
+
+    The rights holder always has changePermission.
+
+    """
+    rights_holder_str = d1_common.xml.get_req_val(sysmeta_pyxb.rightsHolder)
+    level_dict = {rights_holder_str: d1_gmn.app.auth.CHANGEPERMISSION_LEVEL}
     if _has_access_policy_pyxb(sysmeta_pyxb):
         for allow_rule in sysmeta_pyxb.accessPolicy.allow:
             top_level = _get_highest_level_action_for_rule(allow_rule)
-            _insert_permission_rows(sci_model, allow_rule, top_level)
+            for s in allow_rule.subject:
+                subject_str = d1_common.xml.get_req_val(s)
+                level_dict[subject_str] = max(
+                    level_dict.get(subject_str, top_level), top_level
+                )
+    return level_dict
 
 
 def _has_access_policy_db(sciobj_model):
-    return d1_gmn.app.models.Permission.objects.filter(sciobj=sciobj_model).exists()
+    return bool(sciobj_model.permission_set.all())
 
 
 def _has_access_policy_pyxb(sysmeta_pyxb):
@@ -378,12 +568,6 @@ def _has_access_policy_pyxb(sysmeta_pyxb):
     )
 
 
-def _delete_existing_access_policy(sysmeta_pyxb):
-    d1_gmn.app.models.Permission.objects.filter(
-        sciobj__pid__did=d1_common.xml.get_req_val(sysmeta_pyxb.identifier)
-    ).delete()
-
-
 def _get_highest_level_action_for_rule(allow_rule):
     top_level = 0
     for permission in allow_rule.permission:
@@ -393,21 +577,9 @@ def _get_highest_level_action_for_rule(allow_rule):
     return top_level
 
 
-def _insert_permission_rows(sci_model, allow_rule, top_level):
-    for s in allow_rule.subject:
-        permission_model = d1_gmn.app.models.Permission(
-            sciobj=sci_model,
-            subject=d1_gmn.app.models.subject(d1_common.xml.get_req_val(s)),
-            level=top_level,
-        )
-        permission_model.save()
-
-
 def _access_policy_model_to_pyxb(sciobj_model):
     access_policy_pyxb = d1_common.types.dataoneTypes.AccessPolicy()
-    for permission_model in d1_gmn.app.models.Permission.objects.filter(
-        sciobj=sciobj_model
-    ).order_by("subject", "level", "sciobj__pid__did"):
+    for permission_model in sciobj_model.permission_set.all():
         # Skip implicit permissions for rightsHolder.
         if permission_model.subject.subject == sciobj_model.rights_holder.subject:
             continue
@@ -434,57 +606,96 @@ def _access_policy_model_to_pyxb(sciobj_model):
 # </replicationPolicy>
 
 
-def _replication_policy_pyxb_to_model(sciobj_model, sysmeta_pyxb):
-    _delete_existing_replication_policy(sciobj_model)
-
-    replication_policy_model = d1_gmn.app.models.ReplicationPolicy()
-    replication_policy_model.sciobj = sciobj_model
-    replication_policy_model.replication_is_allowed = d1_common.xml.get_opt_attr(
-        sysmeta_pyxb.replicationPolicy,
+def _replication_policy_pyxb_to_model(sciobj_model, sysmeta_pyxb, is_new):
+    """Update the ReplicationPolicy row and the preferred and blocked Member Node rows
+    for the object to match ``sysmeta_pyxb``, only writing the rows that differ."""
+    replication_policy_pyxb = sysmeta_pyxb.replicationPolicy
+    replication_is_allowed = d1_common.xml.get_opt_attr(
+        replication_policy_pyxb,
         "replicationAllowed",
         d1_common.const.DEFAULT_REPLICATION_ALLOWED,
     )
-    replication_policy_model.desired_number_of_replicas = d1_common.xml.get_opt_attr(
-        sysmeta_pyxb.replicationPolicy,
+    desired_number_of_replicas = d1_common.xml.get_opt_attr(
+        replication_policy_pyxb,
         "numberReplicas",
         d1_common.const.DEFAULT_NUMBER_OF_REPLICAS,
     )
 
-    replication_policy_model.save()
-
-    def add(node_ref_pyxb, rep_node_model):
-        for rep_node_urn in node_ref_pyxb:
-            # node_urn_model = d1_gmn.app.models.Node.objects.get_or_create(
-            #   urn=rep_node_urn.value()
-            # )[0]
-            node_urn_model = d1_gmn.app.models.node(
-                d1_common.xml.get_req_val(rep_node_urn)
-            )
-            rep_node_obj = rep_node_model()
-            rep_node_obj.node = node_urn_model
-            rep_node_obj.replication_policy = replication_policy_model
-            rep_node_obj.save()
+    replication_policy_model = (
+        None
+        if is_new
+        else d1_gmn.app.models.ReplicationPolicy.objects.filter(
+            sciobj=sciobj_model
+        ).first()
+    )
+    is_new_policy = replication_policy_model is None
+    if is_new_policy:
+        replication_policy_model = d1_gmn.app.models.ReplicationPolicy(
+            sciobj=sciobj_model,
+            replication_is_allowed=replication_is_allowed,
+            desired_number_of_replicas=desired_number_of_replicas,
+        )
+        replication_policy_model.save()
+    elif (
+        replication_policy_model.replication_is_allowed != replication_is_allowed
+        or replication_policy_model.desired_number_of_replicas
+        != desired_number_of_replicas
+    ):
+        replication_policy_model.replication_is_allowed = replication_is_allowed
+        replication_policy_model.desired_number_of_replicas = (
+            desired_number_of_replicas
+        )
+        replication_policy_model.save(
+            update_fields=["replication_is_allowed", "desired_number_of_replicas"]
+        )
 
-    add(
-        sysmeta_pyxb.replicationPolicy.preferredMemberNode,
+    _replication_node_pyxb_to_model(
+        replication_policy_model,
         d1_gmn.app.models.PreferredMemberNode,
+        replication_policy_pyxb.preferredMemberNode,
+        is_new_policy,
     )
-    add(
-        sysmeta_pyxb.replicationPolicy.blockedMemberNode,
+    _replication_node_pyxb_to_model(
+        replication_policy_model,
         d1_gmn.app.models.BlockedMemberNode,
+        replication_policy_pyxb.blockedMemberNode,
+        is_new_policy,
     )
 
     return replication_policy_model
 
 
-def _has_replication_policy_db(sciobj_model):
-    return d1_gmn.app.models.ReplicationPolicy.objects.filter(
-        sciobj=sciobj_model
-    ).exists()
+def _replication_node_pyxb_to_model(
+    replication_policy_model, rep_node_model, node_ref_pyxb, is_new_policy
+):
+    existing_model_list = (
+        []
+        if is_new_policy
+        else list(
+            rep_node_model.objects.filter(
+                replication_policy=replication_policy_model
+            ).select_related("node")
+        )
+    )
+    delete_model_list, create_urn_list = _diff_rows(
+        existing_model_list,
+        [d1_common.xml.get_req_val(v) for v in node_ref_pyxb],
+        lambda m: m.node.urn,
+    )
+    _delete_models(rep_node_model, delete_model_list)
+    node_model_dict = d1_gmn.app.models.node_dict(create_urn_list)
+    rep_node_model.objects.bulk_create(
+        [
+            rep_node_model(
+                node=node_model_dict[urn], replication_policy=replication_policy_model
+            )
+            for urn in create_urn_list
+        ]
+    )
 
 
-def _delete_existing_replication_policy(sciobj_model):
-    d1_gmn.app.models.ReplicationPolicy.objects.filter(sciobj=sciobj_model).delete()
+def _has_replication_policy_db(sciobj_model):
+    return hasattr(sciobj_model, "replicationpolicy")
 
 
 def _has_replication_policy_pyxb(sysmeta_pyxb):
@@ -495,9 +706,7 @@ def _has_replication_policy_pyxb(sysmeta_pyxb):
 
 
 def _replication_policy_model_to_pyxb(sciobj_model):
-    replication_policy_model = d1_gmn.app.models.ReplicationPolicy.objects.get(
-        sciobj=sciobj_model
-    )
+    replication_policy_model = sciobj_model.replicationpolicy
     replication_policy_pyxb = d1_common.types.dataoneTypes.ReplicationPolicy()
     replication_policy_pyxb.replicationAllowed = (
         replication_policy_model.replication_is_allowed
@@ -506,17 +715,18 @@ def _replication_policy_model_to_pyxb(sciobj_model):
         replication_policy_model.desired_number_of_replicas
     )
 
-    def add(rep_pyxb, rep_node_model):
-        for rep_node in rep_node_model.objects.filter(
-            replication_policy=replication_policy_model
-        ).order_by("node__urn"):
+    def add(rep_pyxb, rep_node_manager):
+        for rep_node in rep_node_manager.all():
             rep_pyxb.append(rep_node.node.urn)
 
     add(
         replication_policy_pyxb.preferredMemberNode,
-        d1_gmn.app.models.PreferredMemberNode,
+        replication_policy_model.preferredmembernode_set,
+    )
+    add(
+        replication_policy_pyxb.blockedMemberNode,
+        replication_policy_model.blockedmembernode_set,
     )
-    add(replication_policy_pyxb.blockedMemberNode, d1_gmn.app.models.BlockedMemberNode)
 
     return replication_policy_pyxb
 
@@ -563,9 +773,7 @@ def _register_remote_replica(sciobj_model, replica_pyxb):
 
 def replica_model_to_pyxb(sciobj_model):
     replica_pyxb_list = []
-    for replica_model in d1_gmn.app.models.RemoteReplica.objects.filter(
-        sciobj=sciobj_model
-    ).order_by("info__timestamp", "info__member_node__urn"):
+    for replica_model in sciobj_model.remotereplica_set.all():
         replica_pyxb = d1_common.types.dataoneTypes.Replica()
         replica_pyxb.replicaMemberNode = replica_model.info.member_node.urn
         replica_pyxb.replicationStatus = replica_model.info.status.status
@@ -574,3 +782,40 @@ def replica_model_to_pyxb(sciobj_model):
         )
         replica_pyxb_list.append(replica_pyxb)
     return replica_pyxb_list
+
+
+# ------------------------------------------------------------------------------
+# Row diff
+# ------------------------------------------------------------------------------
+
+
+def _diff_rows(model_list, key_list, get_key):
+    """Compare the existing rows for a repeating System Metadata element with the
+    values in the new System Metadata.
+
+    Rows are matched by key, and the order of the rows is not significant, as the rows
+    are ordered when they are read.
+
+    Args:
+        model_list: list of models for the existing rows
+        key_list: list of keys, one for each row in the new System Metadata
+        get_key: func that returns the key of a model
+
+    Returns:
+        tuple: (list of models to delete, list of keys for which to create rows)
+
+    """
+    create_counter = collections.Counter(key_list)
+    delete_model_list = []
+    for model in model_list:
+        key = get_key(model)
+        if create_counter[key]:
+            create_counter[key] -= 1
+        else:
+            delete_model_list.append(model)
+    return delete_model_list, list(create_counter.elements())
+
+
+def _delete_models(model_class, model_list):
+    if model_list:
+        model_class.objects.filter(id__in=[m.id for m in model_list]).delete()
@@ -0,0 +1,396 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cache serialized System Metadata.
+
+MNRead.getSystemMetadata() is called repeatedly for the same objects by CN
+synchronization and indexing. Each call generates the System Metadata PyXB object from
+the database, serializes it and converts it to the API version of the request. This
+module caches the final v1 and v2 XML documents.
+
+Each cached document is stored together with the version of the object for which it
+was generated. The version is the ``serial_version`` and ``modified_timestamp`` of the
+object, together with the references that make up the revision chain fields,
+``obsoletes``, ``obsoletedBy`` and the SID of the chain. These are retrieved with a
+single, indexed query for each lookup. The chain fields change without a change in
+``serial_version`` when the chain is modified, e.g., when an adjacent object is deleted
+or a SID is set. A cached document is only used if its version matches the current
+version, so a stale document is never returned, even if the cache is private to each
+process and the invalidation happened in another process.
+
+Cached documents are also invalidated explicitly, to free the space they use:
+
+- Creating or updating an object invalidates all members of its revision chain.
+- Updating the modified timestamp, e.g., when archiving an object, invalidates the
+  object.
+- Deleting an object invalidates all members of its revision chain.
+
+Backends are selected with ``SYSMETA_CACHE_BACKEND``:
+
+- ``lru``: In-process LRU cache holding up to ``SYSMETA_CACHE_LRU_SIZE`` documents.
+  Explicit invalidations are only visible in the process in which they occur.
+- ``django``: The default Django cache (``CACHES``). Invalidations are visible in all
+  processes if the Django cache is shared, e.g., Memcached.
+- ``file``: Files in the ``SYSMETA_CACHE_FILE_PATH`` directory, by default a
+  directory in the SciObj store. Shared by all processes on the server, and persists
+  over restarts.
+- ``None``: Caching is disabled.
+
+"""
+import collections
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+import d1_common.utils.filesystem
+
+import django.conf
+import django.core.cache
+import django.db.transaction
+
+import d1_gmn.app.models
+import d1_gmn.app.sciobj_store
+
+V1_API = "v1"
+V2_API = "v2"
+
+# Directory below the root of the SciObj store that holds the files of the ``file``
+# backend if SYSMETA_CACHE_FILE_PATH is not set.
+FILE_BACKEND_DIR_NAME = "sysmeta_cache"
+
+logger = logging.getLogger(__name__)
+
+
+def get(pid, api_ver, generate_func):
+    """Return serialized System Metadata for the object, from cache if available.
+
+    Args:
+        pid: str
+            PID of an existing object.
+
+        api_ver: str
+            ``V1_API`` or ``V2_API``.
+
+        generate_func: func()
+            Called without arguments on cache miss. Must return the XML document as
+            bytes.
+
+    Returns:
+        bytes: System Metadata XML document.
+
+    """
+    backend = _get_backend()
+    if backend is None:
+        return generate_func()
+    version_str = _get_version(pid)
+    key_str = _gen_cache_key(pid, api_ver)
+    cached_tup = backend.get(key_str)
+    if cached_tup is not None and cached_tup[0] == version_str:
+        _stats.inc("hit")
+        logger.debug('SysMeta cache hit. pid="{}" api="{}"'.format(pid, api_ver))
+        return cached_tup[1]
+    _stats.inc("miss")
+    logger.debug('SysMeta cache miss. pid="{}" api="{}"'.format(pid, api_ver))
+    sysmeta_xml = generate_func()
+    backend.set(key_str, (version_str, sysmeta_xml))
+    return sysmeta_xml
+
+
+def invalidate(pid):
+    """Invalidate cached System Metadata for the object.
+
+    Invalidates now and again when the current transaction commits, so that a
+    concurrent request cannot cache the state from before the transaction committed.
+
+    """
+    _invalidate_pid_list([pid])
+
+
+def invalidate_chain(pid):
+    """Invalidate cached System Metadata for all objects in the revision chain of which
+    the object is a member.
+
+    The seriesId, obsoletes and obsoletedBy fields of an object depend on the other
+    objects in the chain.
+
+    """
+    pid_list = list(
+        d1_gmn.app.models.ChainMember.objects.filter(
+            chain__chainmember__pid__did=pid
+        ).values_list("pid__did", flat=True)
+    )
+    _invalidate_pid_list(pid_list or [pid])
+
+
+def check_backend():
+    """Create the selected backend, so that configuration errors are raised on
+    startup.
+
+    Raises:
+        ImproperlyConfigured: The backend cannot be used.
+
+    """
+    _get_backend()
+
+
+def clear():
+    """Remove all cached System Metadata and reset the counters."""
+    backend = _get_backend()
+    if backend is not None:
+        backend.clear()
+    _stats.reset()
+
+
+def get_stats():
+    """Return the number of cache hits and misses for this process.
+
+    Returns:
+        dict: ``{'backend': str, 'hit': int, 'miss': int}``
+
+    """
+    stats_dict = _stats.get_dict()
+    stats_dict["backend"] = str(django.conf.settings.SYSMETA_CACHE_BACKEND)
+    return stats_dict
+
+
+# Private
+
+
+def _invalidate_pid_list(pid_list):
+    backend = _get_backend()
+    if backend is None:
+        return
+
+    def delete_all():
+        for pid in pid_list:
+            for api_ver in (V1_API, V2_API):
+                backend.delete(_gen_cache_key(pid, api_ver))
+
+    delete_all()
+    django.db.transaction.on_commit(delete_all)
+
+
+def _get_version(pid):
+    """Return a string that changes whenever the System Metadata of the object may
+    have changed.
+
+    The obsoletes, obsoletedBy and SID references are included by the IDs of their
+    IdNamespace rows. An ID is only reused for the same DID, so the same IDs always
+    yield the same chain fields.
+
+    """
+    (
+        serial_version,
+        modified_timestamp,
+        obsoletes_id,
+        obsoleted_by_id,
+        sid_id,
+    ) = (
+        d1_gmn.app.models.ScienceObject.objects.filter(pid__did=pid)
+        .values_list(
+            "serial_version",
+            "modified_timestamp",
+            "obsoletes_id",
+            "obsoleted_by_id",
+            "pid__chainmember_pid__chain__sid_id",
+        )
+        .get()
+    )
+    return " ".join(
+        "-" if v is None else str(v)
+        for v in (
+            serial_version,
+            modified_timestamp.isoformat(),
+            obsoletes_id,
+            obsoleted_by_id,
+            sid_id,
+        )
+    )
+
+
+def _gen_cache_key(pid, api_ver):
+    return "sysmeta_cache_{}_{}".format(
+        api_ver, hashlib.sha256(pid.encode("utf-8")).hexdigest()
+    )
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counter = collections.Counter()
+
+    def inc(self, name):
+        with self._lock:
+            self._counter[name] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counter.clear()
+
+    def get_dict(self):
+        with self._lock:
+            return {"hit": self._counter["hit"], "miss": self._counter["miss"]}
+
+
+class _LruBackend:
+    def __init__(self, max_size):
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._cache_dict = collections.OrderedDict()
+
+    def get(self, key_str):
+        with self._lock:
+            try:
+                self._cache_dict.move_to_end(key_str)
+            except KeyError:
+                return None
+            return self._cache_dict[key_str]
+
+    def set(self, key_str, value):
+        with self._lock:
+            self._cache_dict[key_str] = value
+            self._cache_dict.move_to_end(key_str)
+            while len(self._cache_dict) > self._max_size:
+                self._cache_dict.popitem(last=False)
+
+    def delete(self, key_str):
+        with self._lock:
+            self._cache_dict.pop(key_str, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache_dict.clear()
+
+
+class _DjangoBackend:
+    def get(self, key_str):
+        return django.core.cache.cache.get(key_str)
+
+    def set(self, key_str, value):
+        django.core.cache.cache.set(
+            key_str, value, django.conf.settings.SYSMETA_CACHE_TIMEOUT
+        )
+
+    def delete(self, key_str):
+        django.core.cache.cache.delete(key_str)
+
+    def clear(self):
+        # The Django cache does not support removing only the keys with a given
+        # prefix.
+        django.core.cache.cache.clear()
+
+
+class _FileBackend:
+    """Store each cached value in a separate file.
+
+    Each file holds a single line plain text header with the version of the object,
+    followed by the XML document. Files are written to a temporary file and renamed
+    into place, so readers in other processes never see partially written files.
+
+    The root directory is created with mode 0700. To prevent other local users from
+    planting files, the backend refuses to use a directory that is owned by another
+    user or is writable by group or others.
+
+    """
+
+    def __init__(self, root_path):
+        self._root_path = root_path
+        d1_gmn.app.sciobj_store.prepare_private_dir(root_path)
+
+    def get(self, key_str):
+        try:
+            with open(self._get_path(key_str), "rb") as f:
+                header_str = f.readline().decode("ascii")
+                sysmeta_xml = f.read()
+            if not header_str.endswith("\n"):
+                return None
+            return header_str[:-1], sysmeta_xml
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key_str, value):
+        version_str, sysmeta_xml = value
+        file_path = self._get_path(key_str)
+        d1_common.utils.filesystem.create_missing_directories_for_file(file_path)
+        dir_path = os.path.dirname(file_path)
+        with tempfile.NamedTemporaryFile(dir=dir_path, delete=False) as f:
+            f.write("{}\n".format(version_str).encode("ascii"))
+            f.write(sysmeta_xml)
+        os.replace(f.name, file_path)
+
+    def delete(self, key_str):
+        try:
+            os.unlink(self._get_path(key_str))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for dir_path, _, file_name_list in os.walk(self._root_path):
+            for file_name in file_name_list:
+                if file_name.startswith("sysmeta_cache_"):
+                    os.unlink(os.path.join(dir_path, file_name))
+
+    def _get_path(self, key_str):
+        # Spread the files over subdirectories named by the first two characters of
+        # the PID hash.
+        return os.path.join(self._root_path, key_str[-2:], key_str)
+
+
+def _get_file_path():
+    """Return SYSMETA_CACHE_FILE_PATH, defaulting to a directory in the SciObj
+    store."""
+    return django.conf.settings.SYSMETA_CACHE_FILE_PATH or os.path.join(
+        django.conf.settings.OBJECT_STORE_PATH, FILE_BACKEND_DIR_NAME
+    )
+
+
+_stats = _Stats()
+_backend_dict = {}
+_backend_lock = threading.Lock()
+
+
+def _get_backend():
+    """Return the backend selected in settings, or None if caching is disabled.
+
+    Backends are created on first use, and recreated if the settings change.
+
+    """
+    backend_name = django.conf.settings.SYSMETA_CACHE_BACKEND
+    if backend_name is None:
+        return None
+    with _backend_lock:
+        settings_tup = (
+            backend_name,
+            django.conf.settings.SYSMETA_CACHE_LRU_SIZE,
+            _get_file_path(),
+        )
+        if settings_tup not in _backend_dict:
+            _backend_dict.clear()
+            _backend_dict[settings_tup] = _create_backend(*settings_tup)
+        return _backend_dict[settings_tup]
+
+
+def _create_backend(backend_name, lru_size, file_path):
+    if backend_name == "lru":
+        return _LruBackend(lru_size)
+    elif backend_name == "django":
+        return _DjangoBackend()
+    elif backend_name == "file":
+        return _FileBackend(file_path)
+    raise ValueError('Invalid SYSMETA_CACHE_BACKEND. backend="{}"'.format(backend_name))
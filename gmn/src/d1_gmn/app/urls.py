@@ -203,6 +203,14 @@ urlpatterns = [
         kwargs={"allowed_method_list": ["GET"]},
         name="get_object_list_json",
     ),
+    # Versioned, so that the System Metadata matches the API version, and so that the
+    # endpoint can be reached with the DataONE clients.
+    django.urls.re_path(
+        r"^v[12]/gmn/meta/?$",
+        d1_gmn.app.views.gmn.get_sysmeta_bulk,
+        kwargs={"allowed_method_list": ["GET", "POST"]},
+        name="get_sysmeta_bulk",
+    ),
     django.urls.re_path(
         r"^gmn/echo/session/?$",
         d1_gmn.app.views.gmn.echo_session,
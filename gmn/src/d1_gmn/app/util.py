@@ -25,6 +25,7 @@ import traceback
 import d1_common
 import d1_common.const
 
+import django.conf
 import django.templatetags.static
 import django.http
 
@@ -90,3 +91,15 @@ def create_http_echo_response(request):
 def get_static_path(rel_path):
     return django.templatetags.static.static(rel_path)
 
+
+def is_shared_cache():
+    """Return True if the default Django cache is shared between GMN processes.
+
+    The local memory and dummy cache backends are private to each process, so cache
+    invalidations in one process are not seen by the others.
+
+    """
+    return django.conf.settings.CACHES["default"]["BACKEND"] not in (
+        "django.core.cache.backends.locmem.LocMemCache",
+        "django.core.cache.backends.dummy.DummyCache",
+    )
@@ -23,17 +23,14 @@ These directly return a DataONE Exception to the client if a test condition is n
 
 import contextlib
 
-import requests
-
 import d1_common.date_time
 import d1_common.types
 import d1_common.types.exceptions
 import d1_common.url
 
-import django.conf
-
 import d1_gmn.app
 import d1_gmn.app.did
+import d1_gmn.app.proxy
 
 # def is_unused(did):
 #   """Assert that the ``did`` is currently unused and so is available to be
@@ -195,11 +192,7 @@ def url_is_http_or_https(url):
 
 def url_is_retrievable(url):
     try:
-        with contextlib.closing(
-            requests.get(
-                url, stream=True, timeout=django.conf.settings.PROXY_MODE_STREAM_TIMEOUT
-            )
-        ) as r:
+        with contextlib.closing(d1_gmn.app.proxy.get(url)) as r:
             r.raise_for_status()
             for _ in r.iter_content(chunk_size=1):
                 return True
@@ -29,6 +29,7 @@ import d1_common.xml
 
 import d1_gmn.app
 import d1_gmn.app.did
+import d1_gmn.app.ingest
 import d1_gmn.app.model_util
 import d1_gmn.app.revision
 
@@ -176,10 +177,15 @@ def _has_correct_file_size(request, sysmeta_pyxb):
 
 
 def _is_correct_checksum(request, sysmeta_pyxb):
-    checksum_calculator = d1_common.checksum.get_checksum_calculator_by_dataone_designator(
-        sysmeta_pyxb.checksum.algorithm
+    # Use the checksum calculated while the upload was received, if available.
+    checksum_str = d1_gmn.app.ingest.get_checksum(
+        request.FILES["object"], sysmeta_pyxb.checksum.algorithm
     )
-    checksum_str = calculate_checksum(request, checksum_calculator)
+    if checksum_str is None:
+        checksum_calculator = d1_common.checksum.get_checksum_calculator_by_dataone_designator(
+            sysmeta_pyxb.checksum.algorithm
+        )
+        checksum_str = calculate_checksum(request, checksum_calculator)
     if sysmeta_pyxb.checksum.value().lower() != checksum_str.lower():
         raise d1_common.types.exceptions.InvalidSystemMetadata(
             0,
@@ -24,7 +24,9 @@ import d1_common.xml
 import django.conf
 import django.core.files.move
 
+import d1_gmn.app.checksum_cache
 import d1_gmn.app.event_log
+import d1_gmn.app.ingest
 import d1_gmn.app.resource_map
 import d1_gmn.app.scimeta
 import d1_gmn.app.sciobj_store
@@ -66,14 +68,24 @@ def create_sciobj(request, sysmeta_pyxb):
     else:
         sciobj_url = d1_gmn.app.sciobj_store.get_rel_sciobj_file_url_by_pid(pid)
 
+    checksum_dict = {}
+
     if not _is_proxy_sciobj(request):
         if d1_gmn.app.resource_map.is_resource_map_sysmeta_pyxb(sysmeta_pyxb):
             _create_resource_map(pid, request, sysmeta_pyxb, sciobj_url)
         else:
             _save_sciobj_bytes_from_request(request, pid)
-            d1_gmn.app.scimeta.assert_valid(sysmeta_pyxb, pid)
+            d1_gmn.app.scimeta.assert_valid(
+                sysmeta_pyxb,
+                pid,
+                d1_gmn.app.ingest.get_sciobj_bytes(request.FILES["object"]),
+            )
+            checksum_dict = d1_gmn.app.ingest.get_checksum_dict(request.FILES["object"])
 
-    d1_gmn.app.sysmeta.create_or_update(sysmeta_pyxb, sciobj_url)
+    sciobj_model = d1_gmn.app.sysmeta.create_or_update(sysmeta_pyxb, sciobj_url)
+
+    if checksum_dict:
+        d1_gmn.app.checksum_cache.save_checksums(sciobj_model, checksum_dict)
 
     d1_gmn.app.event_log.create(
         d1_common.xml.get_req_val(sysmeta_pyxb.identifier),
@@ -126,6 +138,9 @@ def _save_sciobj_bytes_from_request(request, pid):
     location. Django automatically handles this when using the file related fields in
     the models, but GMN is not using those, so has to do it manually here.
 
+    Uploads received by the ingest upload handler are stored in a temporary file in the
+    SciObj store filesystem, so the move is an atomic rename.
+
     """
     sciobj_path = d1_gmn.app.sciobj_store.get_abs_sciobj_file_path_by_pid(pid)
     if hasattr(request.FILES["object"], "temporary_file_path"):
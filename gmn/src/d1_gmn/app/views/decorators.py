@@ -27,6 +27,7 @@ import django.conf
 
 import d1_gmn.app.auth
 import d1_gmn.app.did
+import d1_gmn.app.resolution
 import d1_gmn.app.revision
 import d1_gmn.app.views.assert_db
 import d1_gmn.app.views.util
@@ -44,6 +45,9 @@ def resolve_sid(f):
     - For v2 calls, if DID is a valid PID, return it. If not, try to resolve it as a
       SID and, if successful, return the new PID. Else, raise NotFound exception.
 
+    The resolved object is stored in a ResolutionContext on the request, for reuse by
+    the permission decorators, the view and the Event Log. See the resolution module.
+
     """
 
     @functools.wraps(f)
@@ -55,12 +59,21 @@ def resolve_sid(f):
 
 
 def resolve_sid_func(request, did):
-    if d1_gmn.app.views.util.is_v1_api(request):
-        return d1_gmn.app.did.resolve_sid_v1(did)
+    # The common case, a PID for an existing object, is resolved with a single query.
+    sciobj_model = d1_gmn.app.resolution.query_sciobj(did)
+    if sciobj_model is not None:
+        pid = did
+    elif d1_gmn.app.views.util.is_v1_api(request):
+        pid = d1_gmn.app.did.resolve_sid_v1(did)
     elif d1_gmn.app.views.util.is_v2_api(request):
-        return d1_gmn.app.did.resolve_sid_v2(did)
+        pid = d1_gmn.app.did.resolve_sid_v2(did)
     else:
         assert False, "Unable to determine API version"
+    if sciobj_model is None:
+        sciobj_model = d1_gmn.app.resolution.query_sciobj(pid)
+    if sciobj_model is not None:
+        d1_gmn.app.resolution.set_context(request, pid, sciobj_model)
+    return pid
 
 
 def decode_did(f):
@@ -18,6 +18,8 @@
 """REST call handlers for DataONE Member Node APIs."""
 
 import logging
+import posixpath
+import urllib.parse
 import uuid
 
 import d1_common.checksum
@@ -32,6 +34,8 @@ import django.conf
 import django.http
 
 import d1_gmn.app.auth
+import d1_gmn.app.checksum_cache
+import d1_gmn.app.count_cache
 import d1_gmn.app.db_filter
 import d1_gmn.app.delete
 import d1_gmn.app.did
@@ -41,6 +45,7 @@ import d1_gmn.app.models
 import d1_gmn.app.node
 import d1_gmn.app.object_format_cache
 import d1_gmn.app.proxy
+import d1_gmn.app.resolution
 import d1_gmn.app.sciobj_store
 import d1_gmn.app.sysmeta
 import d1_gmn.app.util
@@ -51,6 +56,7 @@ import d1_gmn.app.views.decorators
 import d1_gmn.app.views.headers
 import d1_gmn.app.views.slice
 import d1_gmn.app.views.util
+import d1_gmn.app.xml_stream
 
 # ==============================================================================
 # Secondary dispatchers (resolve on HTTP method)
@@ -129,7 +135,7 @@ def get_log(request):
     query = d1_gmn.app.models.EventLog.objects.all().order_by("timestamp", "id")
     if not d1_gmn.app.auth.is_trusted_subject(request):
         query = d1_gmn.app.db_filter.add_access_policy_filter(
-            request, query, "sciobj__id"
+            request, query, "sciobj__"
         )
         query = d1_gmn.app.db_filter.add_redact_annotation(request, query)
     query = d1_gmn.app.db_filter.add_datetime_filter(
@@ -151,15 +157,21 @@ def get_log(request):
         )
     else:
         assert False, "Unable to determine API version"
-    total_int = query.count()
+    total_int, is_estimated_total = d1_gmn.app.count_cache.get_total(
+        request, query, d1_gmn.app.count_cache.LOG_SCOPE
+    )
     query, start, count = d1_gmn.app.views.slice.add_slice_filter(
-        request, query, total_int
+        request, query, total_int, is_estimated_total
+    )
+    query = d1_gmn.app.db_filter.add_values_list_projection(
+        query, d1_gmn.app.xml_stream.LOG_FIELD_LIST
     )
     return {
         "query": query,
         "start": start,
         "count": count,
         "total": total_int,
+        "is_estimated_total": is_estimated_total,
         "type": "log",
     }
 
@@ -181,26 +193,161 @@ def get_node(request):
 @d1_gmn.app.views.decorators.resolve_sid
 @d1_gmn.app.views.decorators.read_permission
 def get_object(request, pid):
-    """MNRead.get(session, did) → OctetStream."""
-    # TODO: Replace all ScienceObject.objects.get() with d1_gmn.app.model_util.get_sci_model()
-    sciobj = d1_gmn.app.models.ScienceObject.objects.get(pid__did=pid)
+    """MNRead.get(session, did) → OctetStream.
+
+    Supports conditional and partial GET (RFC 7232 and 7233):
+
+    - If-None-Match / If-Modified-Since: 304 Not Modified if the client has the current
+      version. The ETag is derived from the stored checksum.
+    - Range / If-Range: 206 Partial Content with one or more byte ranges. 416 Range
+      Not Satisfiable if none of the ranges overlap the object.
+
+    Read events are only logged when object bytes are returned.
+
+    """
+    sciobj = d1_gmn.app.resolution.get_sciobj_model(request, pid)
+    if d1_gmn.app.views.headers.is_not_modified(request, sciobj):
+        response = django.http.HttpResponseNotModified()
+        d1_gmn.app.views.headers.add_not_modified_headers_to_response(response, sciobj)
+        return response
+    range_list = d1_gmn.app.views.headers.get_requested_range_list(request, sciobj)
+    if range_list == []:
+        response = django.http.HttpResponse(status=416)
+        d1_gmn.app.views.headers.add_unsatisfiable_range_headers_to_response(
+            response, sciobj
+        )
+        return response
     content_type_str = d1_gmn.app.object_format_cache.get_content_type(
         sciobj.format.format
     )
     # Return local or proxy SciObj bytes
-    response = django.http.StreamingHttpResponse(
-        _get_sciobj_iter(sciobj), content_type_str
-    )
-    d1_gmn.app.views.headers.add_sciobj_properties_headers_to_response(response, sciobj)
+    if range_list is None:
+        response = _create_sciobj_response(request, sciobj, content_type_str)
+    elif len(range_list) == 1:
+        response = django.http.StreamingHttpResponse(
+            _get_sciobj_iter(sciobj, range_list[0]), content_type_str, status=206
+        )
+        d1_gmn.app.views.headers.add_sciobj_properties_headers_to_response(
+            response, sciobj
+        )
+        d1_gmn.app.views.headers.add_content_range_headers_to_response(
+            response, sciobj, range_list[0]
+        )
+    else:
+        response = _create_multipart_range_response(
+            sciobj, range_list, content_type_str
+        )
+    d1_gmn.app.views.headers.add_range_headers_to_response(response, sciobj)
     d1_gmn.app.event_log.log_read_event(pid, request)
     return response
 
 
-def _get_sciobj_iter(sciobj):
-    if d1_gmn.app.proxy.is_proxy_url(sciobj.url):
-        return d1_gmn.app.proxy.get_sciobj_iter_remote(sciobj.url)
+def _create_sciobj_response(request, sciobj, content_type_str):
+    """Create a 200 OK response holding the full object.
+
+    Locally stored objects are delivered as set in SCIOBJ_DELIVERY_MODE. In the
+    "x_sendfile" and "x_accel_redirect" modes, the response has no body, and the web
+    server in front of GMN sends the file and sets Content-Length. If the request
+    included a Range header that was not honored, e.g., because of an If-Range
+    mismatch, the object is streamed by GMN so that the web server does not apply the
+    range.
+
+    """
+    delivery_mode = django.conf.settings.SCIOBJ_DELIVERY_MODE
+    rel_path = None
+    if (
+        delivery_mode == "stream"
+        or d1_gmn.app.proxy.is_proxy_url(sciobj.url)
+        or "HTTP_RANGE" in request.META
+    ):
+        delivery_mode = "stream"
+    elif delivery_mode == "x_accel_redirect":
+        rel_path = d1_gmn.app.sciobj_store.get_rel_sciobj_file_path_by_url(sciobj.url)
+        if rel_path is None:
+            # Objects stored outside of the default SciObj store are not below the
+            # internal location.
+            delivery_mode = "stream"
+
+    if delivery_mode == "stream":
+        response = django.http.StreamingHttpResponse(
+            _get_sciobj_iter(sciobj), content_type_str
+        )
+    elif delivery_mode == "file_wrapper":
+        response = django.http.FileResponse(
+            d1_gmn.app.sciobj_store.open_sciobj_file_by_path(
+                d1_gmn.app.sciobj_store.get_abs_sciobj_file_path_by_url(sciobj.url)
+            ),
+            content_type=content_type_str,
+        )
+        # Used if the WSGI server does not provide wsgi.file_wrapper.
+        response.block_size = django.conf.settings.NUM_CHUNK_BYTES
+    elif delivery_mode == "x_sendfile":
+        response = django.http.HttpResponse(content_type=content_type_str)
+        response[
+            "X-Sendfile"
+        ] = d1_gmn.app.sciobj_store.get_abs_sciobj_file_path_by_url(sciobj.url)
     else:
+        response = django.http.HttpResponse(content_type=content_type_str)
+        response["X-Accel-Redirect"] = urllib.parse.quote(
+            posixpath.join(
+                django.conf.settings.SCIOBJ_ACCEL_REDIRECT_LOCATION, rel_path
+            )
+        )
+    d1_gmn.app.views.headers.add_sciobj_properties_headers_to_response(response, sciobj)
+    if delivery_mode in ("x_sendfile", "x_accel_redirect"):
+        del response["Content-Length"]
+    return response
+
+
+def _get_sciobj_iter(sciobj, range_tup=None):
+    if d1_gmn.app.proxy.is_proxy_url(sciobj.url):
+        return d1_gmn.app.proxy.get_sciobj_iter_remote(sciobj.url, range_tup)
+    elif range_tup is None:
         return d1_gmn.app.sciobj_store.get_sciobj_iter_by_url(sciobj.url)
+    else:
+        return d1_gmn.app.sciobj_store.get_sciobj_range_iter_by_url(
+            sciobj.url, range_tup
+        )
+
+
+def _create_multipart_range_response(sciobj, range_list, content_type_str):
+    """Create a 206 Partial Content response with a multipart/byteranges body holding
+    the requested ranges."""
+    boundary_str = uuid.uuid4().hex
+    part_header_list = [
+        "\r\n--{}\r\n{}".format(
+            boundary_str,
+            d1_gmn.app.views.headers.format_multipart_range_header(
+                range_tup, sciobj.size, content_type_str
+            ),
+        ).encode("utf-8")
+        for range_tup in range_list
+    ]
+    closing_bytes = "\r\n--{}--\r\n".format(boundary_str).encode("utf-8")
+
+    def generate_parts():
+        for part_header_bytes, range_tup in zip(part_header_list, range_list):
+            yield part_header_bytes
+            yield from _get_sciobj_iter(sciobj, range_tup)
+        yield closing_bytes
+
+    response = django.http.StreamingHttpResponse(
+        generate_parts(),
+        "multipart/byteranges; boundary={}".format(boundary_str),
+        status=206,
+    )
+    d1_gmn.app.views.headers.add_sciobj_properties_headers_to_response(response, sciobj)
+    # The properties headers describe the full object. Replace the ones that
+    # describe the body.
+    response["Content-Type"] = "multipart/byteranges; boundary={}".format(
+        boundary_str
+    )
+    response["Content-Length"] = str(
+        sum(len(b) for b in part_header_list)
+        + sum(last - first + 1 for first, last in range_list)
+        + len(closing_bytes)
+    )
+    return response
 
 
 @d1_gmn.app.views.decorators.decode_did
@@ -220,7 +367,7 @@ def get_meta(request, pid):
 @d1_gmn.app.views.decorators.read_permission
 def head_object(request, pid):
     """MNRead.describe(session, did) → DescribeResponse."""
-    sciobj = d1_gmn.app.models.ScienceObject.objects.get(pid__did=pid)
+    sciobj = d1_gmn.app.resolution.get_sciobj_model(request, pid)
     response = django.http.HttpResponse()
     d1_gmn.app.views.headers.add_sciobj_properties_headers_to_response(response, sciobj)
     d1_gmn.app.event_log.log_read_event(pid, request)
@@ -254,10 +401,13 @@ def get_checksum(request, pid):
             ),
         )
 
-    sciobj_model = d1_gmn.app.models.ScienceObject.objects.get(pid__did=pid)
-    sciobj_iter = _get_sciobj_iter(sciobj_model)
-    checksum_obj = d1_common.checksum.create_checksum_object_from_iterator(
-        sciobj_iter, algorithm
+    # Checksums are calculated once and stored. A vendor specific extension forces
+    # recalculation from the object bytes, for fixity audits.
+    sciobj_model = d1_gmn.app.resolution.get_sciobj_model(request, pid)
+    checksum_obj = d1_gmn.app.checksum_cache.get_checksum_pyxb(
+        sciobj_model,
+        algorithm,
+        force="HTTP_VENDOR_GMN_RECALCULATE_CHECKSUM" in request.META,
     )
     # Log the access of this object.
     # TODO: look into log type other than 'read'
@@ -326,7 +476,7 @@ def post_error(request):
 def get_replica(request, pid):
     """MNReplication.getReplica(session, did) → OctetStream."""
     _assert_node_is_authorized(request, pid)
-    sciobj = d1_gmn.app.models.ScienceObject.objects.get(pid__did=pid)
+    sciobj = d1_gmn.app.resolution.get_sciobj_model(request, pid)
     content_type_str = d1_gmn.app.object_format_cache.get_content_type(
         sciobj.format.format
     )
@@ -15,16 +15,38 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-"""MNPackage.getPackage(session, packageType, id) → OctetStream."""
+"""MNPackage.getPackage(session, packageType, id) → OctetStream.
+
+The package is generated while it is streamed to the client:
+
+- The members are described to the BagIt stream using the values in a single query for
+  their ScienceObject rows. Checksums of the generated System Metadata documents are
+  calculated by the BagIt stream as the documents are streamed.
+- System Metadata documents are generated for PACKAGE_SYSMETA_BATCH_SIZE members at a
+  time, as the stream reaches them.
+- While the bytes of one member are streamed, the next member is opened and the first
+  PACKAGE_PREFETCH_BYTES of it are read in a background thread. This hides the latency
+  of opening files on network storage, and of connecting to remote servers for proxy
+  objects. When the response is closed, including when the client disconnects or a
+  member fails, the background thread is stopped and any opened members are closed.
+- Members in formats that are already compressed, such as images and zip files, are
+  stored without compression.
+
+"""
+import concurrent.futures
+
 import d1_common.bagit
-import d1_common.checksum
 import d1_common.const
-import d1_common.iter.bytes
 import d1_common.types.exceptions
+import d1_common.xml
 
+import django.conf
 import django.http
 
-import d1_gmn.app.model_util
+import d1_gmn.app.models
+import d1_gmn.app.object_format_cache
+import d1_gmn.app.proxy
+import d1_gmn.app.resolution
 import d1_gmn.app.resource_map
 import d1_gmn.app.sciobj_store
 import d1_gmn.app.sysmeta
@@ -52,12 +74,13 @@ def _get_package(request, pid, package_type):
             ),
         )
     pid_list = d1_gmn.app.resource_map.get_resource_map_members(pid)
-    sciobj_info_list = _create_sciobj_info_list(request, pid_list)
+    sciobj_info_list, sciobj_prefetcher = _create_sciobj_info_list(request, pid_list)
     bagit_file = d1_common.bagit.create_bagit_stream(pid, sciobj_info_list)
     response = django.http.StreamingHttpResponse(
-        bagit_file, content_type="application/zip"
+        _gen_package_stream(bagit_file, sciobj_prefetcher),
+        content_type="application/zip",
     )
-    sciobj_model = d1_gmn.app.model_util.get_sci_model(pid)
+    sciobj_model = d1_gmn.app.resolution.get_sciobj_model(request, pid)
     d1_gmn.app.views.headers.add_bagit_zip_properties_headers_to_response(
         response, sciobj_model
     )
@@ -65,42 +88,194 @@ def _get_package(request, pid, package_type):
 
 
 def _create_sciobj_info_list(request, pid_list):
+    """Create the info dicts for the package members.
+
+    No object bytes are read, and no System Metadata is generated, until the BagIt
+    stream reaches each member.
+
+    Returns:
+        tuple: (list of info dicts, _SciobjPrefetcher for the members)
+
+    """
+    sciobj_model_list = _get_member_sciobj_model_list(pid_list)
+    sysmeta_loader = _SysmetaLoader(request, [m.pid.did for m in sciobj_model_list])
+    sciobj_prefetcher = _SciobjPrefetcher([m.url for m in sciobj_model_list])
     sciobj_info_list = []
-    for pid in pid_list:
-        # Skip any sciobj which are aggregated by the package but do not exist locally.
-        # TODO: Handle proxy sciobj.
-        if not d1_gmn.app.sciobj_store.is_existing_sciobj_file(pid):
-            continue
-        sciobj_model = d1_gmn.app.model_util.get_sci_model(pid)
-        sciobj_info_list.append(_create_sciobj_info_dict(sciobj_model))
-        sciobj_info_list.append(_create_sysmeta_info_dict(request, sciobj_model))
-    return sciobj_info_list
-
-
-def _create_sciobj_info_dict(sciobj_model):
+    for i, sciobj_model in enumerate(sciobj_model_list):
+        file_name = d1_gmn.app.sysmeta.get_filename(sciobj_model)
+        sciobj_info_list.append(
+            _create_sciobj_info_dict(
+                sciobj_model, file_name, sciobj_prefetcher.gen_sciobj_iter(i)
+            )
+        )
+        sciobj_info_list.append(
+            _create_sysmeta_info_dict(
+                sciobj_model, file_name, sysmeta_loader.gen_sysmeta_iter(i)
+            )
+        )
+    return sciobj_info_list, sciobj_prefetcher
+
+
+def _gen_package_stream(bagit_file, sciobj_prefetcher):
+    """Generate the zip stream.
+
+    Django closes this generator when the response is closed, so the prefetcher is
+    closed whether or not the stream was completed.
+
+    """
+    try:
+        yield from bagit_file
+    finally:
+        sciobj_prefetcher.close()
+
+
+def _get_member_sciobj_model_list(pid_list):
+    """Get the ScienceObject models of the members, in the order of ``pid_list``.
+
+    Members that are aggregated by the package but do not exist locally are skipped.
+    Proxy objects are included.
+
+    """
+    pid_list = list(pid_list)
+    sciobj_model_dict = {
+        sciobj_model.pid.did: sciobj_model
+        for sciobj_model in d1_gmn.app.models.ScienceObject.objects.filter(
+            pid__did__in=pid_list
+        ).select_related("pid", "format", "checksum_algorithm")
+    }
+    return [
+        sciobj_model_dict[pid]
+        for pid in pid_list
+        if pid in sciobj_model_dict and _is_available(sciobj_model_dict[pid])
+    ]
+
+
+def _is_available(sciobj_model):
+    if d1_gmn.app.proxy.is_proxy_url(sciobj_model.url):
+        return True
+    return d1_gmn.app.sciobj_store.is_existing_sciobj_file(sciobj_model.pid.did)
+
+
+def _create_sciobj_info_dict(sciobj_model, file_name, sciobj_iter):
     return {
         "pid": sciobj_model.pid.did,
-        "filename": d1_gmn.app.sysmeta.get_filename(sciobj_model),
-        "iter": d1_gmn.app.sciobj_store.get_sciobj_iter_by_pid(sciobj_model.pid.did),
+        "filename": file_name,
+        "iter": sciobj_iter,
         "checksum": sciobj_model.checksum,
         "checksum_algorithm": sciobj_model.checksum_algorithm.checksum_algorithm,
+        "compress": d1_gmn.app.object_format_cache.is_compressible(
+            sciobj_model.format.format
+        ),
     }
 
 
-def _create_sysmeta_info_dict(request, sciobj_model):
-    sysmeta_iter = _create_sysmeta_iterator(request, sciobj_model.pid.did)
+def _create_sysmeta_info_dict(sciobj_model, file_name, sysmeta_iter):
     return {
         "pid": sciobj_model.pid.did,
-        "filename": "{}.sysmeta.xml".format(
-            d1_gmn.app.sysmeta.get_filename(sciobj_model)
-        ),
+        "filename": "{}.sysmeta.xml".format(file_name),
         "iter": sysmeta_iter,
-        "checksum": d1_common.checksum.calculate_checksum_on_iterator(sysmeta_iter),
+        # Calculated by the BagIt stream
+        "checksum": None,
         "checksum_algorithm": d1_common.const.DEFAULT_CHECKSUM_ALGORITHM,
     }
 
 
-def _create_sysmeta_iterator(request, pid):
-    return d1_common.iter.bytes.BytesIterator(
-        d1_gmn.app.views.util.generate_sysmeta_xml_matching_api_version(request, pid)
-    )
+class _SysmetaLoader(object):
+    """Generate the System Metadata documents for the members in batches, as the BagIt
+    stream reaches them."""
+
+    def __init__(self, request, pid_list):
+        self._request = request
+        self._pid_list = pid_list
+        self._sysmeta_pyxb_dict = {}
+
+    def gen_sysmeta_iter(self, member_idx):
+        pid = self._pid_list[member_idx]
+        if pid not in self._sysmeta_pyxb_dict:
+            self._load_batch(member_idx)
+        yield d1_gmn.app.views.util.serialize_sysmeta_matching_api_version(
+            self._request, self._sysmeta_pyxb_dict.pop(pid)
+        )
+
+    def _load_batch(self, member_idx):
+        batch_size = django.conf.settings.PACKAGE_SYSMETA_BATCH_SIZE
+        batch_pid_list = self._pid_list[member_idx : member_idx + batch_size]
+        for sysmeta_pyxb in d1_gmn.app.sysmeta.model_to_pyxb_many(batch_pid_list):
+            pid = d1_common.xml.get_req_val(sysmeta_pyxb.identifier)
+            self._sysmeta_pyxb_dict[pid] = sysmeta_pyxb
+
+
+class _SciobjPrefetcher(object):
+    """Generate the bytes of the members, opening the next member and reading the
+    first part of it in a background thread while the current member is streamed."""
+
+    def __init__(self, url_list):
+        self._url_list = url_list
+        self._executor = concurrent.futures.ThreadPoolExecutor(1)
+        self._future_dict = {}
+        self._sciobj_iter_dict = {}
+
+    def gen_sciobj_iter(self, member_idx):
+        future = self._future_dict.pop(member_idx, None) or self._submit(member_idx)
+        if member_idx + 1 < len(self._url_list):
+            self._future_dict[member_idx + 1] = self._submit(member_idx + 1)
+        else:
+            self._executor.shutdown(wait=False)
+        head_list, sciobj_iter = future.result()
+        self._sciobj_iter_dict[member_idx] = sciobj_iter
+        try:
+            yield from head_list
+            yield from sciobj_iter
+        finally:
+            self._sciobj_iter_dict.pop(member_idx, None)
+            sciobj_iter.close()
+
+    def close(self):
+        """Stop the background thread and close the members that have been opened but
+        not fully streamed."""
+        for future in self._future_dict.values():
+            # A member that is already being opened cannot be cancelled. Wait for it,
+            # so that it can be closed.
+            if not future.cancel() and future.exception() is None:
+                future.result()[1].close()
+        self._future_dict.clear()
+        self._executor.shutdown()
+        for sciobj_iter in self._sciobj_iter_dict.values():
+            sciobj_iter.close()
+        self._sciobj_iter_dict.clear()
+
+    def _submit(self, member_idx):
+        return self._executor.submit(_open_sciobj, self._url_list[member_idx])
+
+
+def _open_sciobj(sciobj_url):
+    """Open a member and read up to PACKAGE_PREFETCH_BYTES of it.
+
+    Returns:
+        tuple: (list of bytes chunks that have been read, generator for the rest)
+
+    """
+    sciobj_iter = _gen_sciobj_chunks(sciobj_url)
+    head_list = []
+    head_size = 0
+    while head_size < django.conf.settings.PACKAGE_PREFETCH_BYTES:
+        chunk_bytes = next(sciobj_iter, None)
+        if chunk_bytes is None:
+            break
+        head_list.append(chunk_bytes)
+        head_size += len(chunk_bytes)
+    return head_list, sciobj_iter
+
+
+def _gen_sciobj_chunks(sciobj_url):
+    """Generate the bytes of a member.
+
+    The file or proxy response is closed when the generator is closed, or when the
+    member has been read.
+
+    """
+    if d1_gmn.app.proxy.is_proxy_url(sciobj_url):
+        yield from d1_gmn.app.proxy.get_sciobj_iter_remote(sciobj_url)
+    else:
+        with d1_gmn.app.sciobj_store.get_sciobj_iter_by_url(sciobj_url) as sciobj_iter:
+            yield from sciobj_iter
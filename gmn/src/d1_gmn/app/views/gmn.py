@@ -20,12 +20,20 @@
 import d1_common
 import d1_common.const
 import d1_common.util
+import d1_common.types.exceptions
 import d1_common.utils.ulog
 
+import django.conf
 import django.http
 
+import d1_gmn.app.auth
+import d1_gmn.app.db_filter
+import d1_gmn.app.event_log
+import d1_gmn.app.models
+import d1_gmn.app.sysmeta
 import d1_gmn.app.sysmeta_extract
 import d1_gmn.app.util
+import d1_gmn.app.views.assert_db
 import d1_gmn.app.views.decorators
 import d1_gmn.app.views.util
 
@@ -59,6 +67,54 @@ def get_object_list_json(request):
     )
 
 
+def get_sysmeta_bulk(request):
+    """gmn.getSystemMetadataBulk(session, pid ...) → SystemMetadataNdjson
+
+    gmn.getSystemMetadataBulk(session[, fromDate][, toDate][, formatId]
+    [, identifier][, replicaStatus][, start=0][, count=1000]) → SystemMetadataNdjson
+
+    GMN specific API for retrieving the System Metadata for many objects in a single
+    call.
+
+    The objects are selected either by a list of PIDs, passed in ``pid`` URL query
+    parameters or, for long lists, in ``pid`` fields in a multipart POST, or by the same
+    filters as MNRead.listObjects(). SIDs are not resolved in the list of PIDs.
+
+    The response is streamed as newline delimited JSON, with one line per object, in
+    the order in which the objects were selected. Each line holds either the System
+    Metadata document for the API version in the URL, or the name of the DataONE
+    exception that MNRead.getSystemMetadata() would have raised for the object:
+
+        {"pid": "<pid>", "sysmeta": "<System Metadata XML>"}
+        {"pid": "<pid>", "error": "NotAuthorized", "description": "<description>"}
+
+    Access is checked for each object in the list of PIDs. Access to the filtered
+    selection is controlled by settings.PUBLIC_OBJECT_LIST, as for listObjects().
+
+    """
+    if request.method == "POST":
+        d1_gmn.app.views.assert_db.post_has_mime_parts(request, (("field", "pid"),))
+        pid_list = request.POST.getlist("pid")
+    else:
+        pid_list = request.GET.getlist("pid")
+    if pid_list:
+        if len(pid_list) > django.conf.settings.MAX_SLICE_ITEMS:
+            raise d1_common.types.exceptions.InvalidRequest(
+                0,
+                "Too many PIDs requested. requested={} max={}".format(
+                    len(pid_list), django.conf.settings.MAX_SLICE_ITEMS
+                ),
+            )
+    else:
+        if not django.conf.settings.PUBLIC_OBJECT_LIST:
+            d1_gmn.app.views.decorators.trusted(request)
+        result_dict = d1_gmn.app.views.util.query_object_list(request, "sysmeta_bulk")
+        pid_list = list(result_dict["query"].values_list("pid__did", flat=True))
+    return django.http.StreamingHttpResponse(
+        _gen_sysmeta_ndjson(request, pid_list), d1_common.const.CONTENT_TYPE_NDJSON
+    )
+
+
 def echo_session(request):
     return django.http.HttpResponse(
         d1_common.util.serialize_to_normalized_pretty_json(
@@ -70,3 +126,64 @@ def echo_session(request):
 
 def echo_request(request):
     return d1_gmn.app.util.create_http_echo_response(request)
+
+
+# Private
+
+
+def _gen_sysmeta_ndjson(request, pid_list):
+    """Generate the response lines, creating the System Metadata documents for
+    SYSMETA_BULK_BATCH_SIZE objects at a time as the stream reaches them."""
+    batch_size = django.conf.settings.SYSMETA_BULK_BATCH_SIZE
+    for i in range(0, len(pid_list), batch_size):
+        yield from _gen_sysmeta_ndjson_batch(request, pid_list[i : i + batch_size])
+
+
+def _gen_sysmeta_ndjson_batch(request, pid_list):
+    existing_pid_set, readable_pid_set = _get_existing_and_readable_pid_sets(
+        request, pid_list
+    )
+    readable_pid_list = [pid for pid in pid_list if pid in readable_pid_set]
+    sysmeta_pyxb_dict = dict(
+        zip(
+            readable_pid_list,
+            d1_gmn.app.sysmeta.model_to_pyxb_many(readable_pid_list),
+        )
+    )
+    d1_gmn.app.event_log.log_read_event_many(list(sysmeta_pyxb_dict), request)
+    for pid in pid_list:
+        if pid in sysmeta_pyxb_dict:
+            sysmeta_xml = d1_gmn.app.views.util.serialize_sysmeta_matching_api_version(
+                request, sysmeta_pyxb_dict[pid]
+            )
+            line_dict = {"pid": pid, "sysmeta": sysmeta_xml}
+        elif pid in existing_pid_set:
+            line_dict = {
+                "pid": pid,
+                "error": "NotAuthorized",
+                "description": 'Operation is denied. level="read", '
+                'pid="{}", session_subjects="{}"'.format(
+                    pid, d1_gmn.app.auth.format_session_subjects(request)
+                ),
+            }
+        else:
+            line_dict = {
+                "pid": pid,
+                "error": "NotFound",
+                "description": "Attempted to perform operation on non-existing "
+                'object. pid="{}"'.format(pid),
+            }
+        yield d1_common.util.serialize_to_normalized_compact_json(line_dict) + "\n"
+
+
+def _get_existing_and_readable_pid_sets(request, pid_list):
+    query = d1_gmn.app.models.ScienceObject.objects.filter(pid__did__in=pid_list)
+    existing_pid_set = set(query.values_list("pid__did", flat=True))
+    if d1_gmn.app.auth.is_trusted_subject(request):
+        return existing_pid_set, existing_pid_set
+    readable_pid_set = set(
+        d1_gmn.app.db_filter.add_access_policy_filter(request, query, "").values_list(
+            "pid__did", flat=True
+        )
+    )
+    return existing_pid_set, readable_pid_set
@@ -16,13 +16,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 """Read and write HTTP Headers."""
+import calendar
 import os
+import re
 
 import d1_common.const
 import d1_common.date_time
 import d1_common.url
 
 import django.conf
+import django.utils.http
 
 import d1_gmn.app
 import d1_gmn.app.object_format_cache
@@ -38,6 +41,128 @@ def add_sciobj_properties_headers_to_response(response, sciobj_model):
     _add_sciobj_custom_dataone(response, sciobj_model)
 
 
+def add_range_headers_to_response(response, sciobj_model):
+    """Advertise support for conditional and partial GET.
+
+    Only for MNRead.get(), which is the only API call that honors the Range and
+    conditional request headers.
+
+    """
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = get_etag(sciobj_model)
+
+
+def add_not_modified_headers_to_response(response, sciobj_model):
+    """Add the headers that must be repeated in a 304 Not Modified response."""
+    _add_standard(response, sciobj_model)
+    response["ETag"] = get_etag(sciobj_model)
+
+
+def add_content_range_headers_to_response(response, sciobj_model, range_tup):
+    """Adjust the SciObj properties headers for a 206 Partial Content response with a
+    single range.
+
+    Must be called after ``add_sciobj_properties_headers_to_response()``.
+
+    """
+    first_byte, last_byte = range_tup
+    response["Content-Range"] = _format_content_range(range_tup, sciobj_model.size)
+    response["Content-Length"] = str(last_byte - first_byte + 1)
+
+
+def add_unsatisfiable_range_headers_to_response(response, sciobj_model):
+    """Add headers for a 416 Range Not Satisfiable response."""
+    add_http_date(response)
+    response["Content-Range"] = "bytes */{}".format(sciobj_model.size)
+
+
+def get_etag(sciobj_model):
+    """Return a strong entity tag derived from the stored checksum of the SciObj.
+
+    The checksum is calculated over the SciObj bytes, so it changes if and only if
+    the bytes change.
+
+    """
+    return django.utils.http.quote_etag(
+        "{}-{}".format(
+            sciobj_model.checksum_algorithm.checksum_algorithm, sciobj_model.checksum
+        )
+    )
+
+
+def is_not_modified(request, sciobj_model):
+    """Return True if the conditional headers in the request show that the client
+    already has the current version of the SciObj.
+
+    As required by RFC 7232, If-Modified-Since is ignored if If-None-Match is present.
+
+    """
+    if_none_match_str = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match_str is not None:
+        etag_list = django.utils.http.parse_etags(if_none_match_str)
+        return "*" in etag_list or _strip_weak(get_etag(sciobj_model)) in [
+            _strip_weak(etag) for etag in etag_list
+        ]
+    if_modified_since_str = request.META.get("HTTP_IF_MODIFIED_SINCE")
+    if if_modified_since_str is not None:
+        since_ts = django.utils.http.parse_http_date_safe(if_modified_since_str)
+        if since_ts is not None:
+            return _get_modified_ts(sciobj_model) <= since_ts
+    return False
+
+
+def get_requested_range_list(request, sciobj_model):
+    """Return the byte ranges requested in the Range header.
+
+    Returns:
+        None: The full SciObj should be returned. This is the case if there is no
+        Range header, if the header cannot be parsed or uses a unit other than bytes,
+        if If-Range does not match the current version of the SciObj, or if too many
+        ranges were requested.
+
+        list of (first_byte, last_byte) tuples: The ranges to return, with inclusive
+        positions clamped to the size of the SciObj. Empty if none of the ranges can be
+        satisfied.
+
+    """
+    range_str = request.META.get("HTTP_RANGE")
+    if range_str is None or not _is_if_range_match(request, sciobj_model):
+        return None
+    m = re.match(r"\s*bytes\s*=\s*(.+)$", range_str, re.IGNORECASE)
+    if not m:
+        return None
+    size = sciobj_model.size
+    range_list = []
+    for spec_str in m.group(1).split(","):
+        m = re.match(r"\s*(\d*)\s*-\s*(\d*)\s*$", spec_str)
+        if not m or not (m.group(1) or m.group(2)):
+            return None
+        if m.group(1):
+            first_byte = int(m.group(1))
+            last_byte = int(m.group(2)) if m.group(2) else size - 1
+            if last_byte < first_byte:
+                return None
+        else:
+            # Suffix range: The last N bytes.
+            first_byte = max(0, size - int(m.group(2)))
+            last_byte = size - 1
+            if not int(m.group(2)):
+                continue
+        if first_byte >= size:
+            continue
+        range_list.append((first_byte, min(last_byte, size - 1)))
+    if len(range_list) > django.conf.settings.MAX_RANGE_COUNT:
+        return None
+    return range_list
+
+
+def format_multipart_range_header(range_tup, size, content_type_str):
+    """Return the header section for one part of a multipart/byteranges response."""
+    return "Content-Type: {}\r\nContent-Range: {}\r\n\r\n".format(
+        content_type_str, _format_content_range(range_tup, size)
+    )
+
+
 def add_bagit_zip_properties_headers_to_response(response, sciobj_model):
     """Add headers for dynamically generated BagIt ZIP files to response.
 
@@ -86,6 +211,37 @@ def _add_standard(response, sciobj_model):
     )
 
 
+def _format_content_range(range_tup, size):
+    return "bytes {}-{}/{}".format(range_tup[0], range_tup[1], size)
+
+
+def _strip_weak(etag_str):
+    return etag_str[2:] if etag_str.startswith("W/") else etag_str
+
+
+def _get_modified_ts(sciobj_model):
+    """Return the modified timestamp as whole seconds since the epoch, the resolution
+    of HTTP dates."""
+    return calendar.timegm(
+        d1_common.date_time.normalize_datetime_to_utc(
+            sciobj_model.modified_timestamp
+        ).utctimetuple()
+    )
+
+
+def _is_if_range_match(request, sciobj_model):
+    """Return True if there is no If-Range header, or if it holds the current ETag
+    or Last-Modified date of the SciObj. If-Range requires strong comparison."""
+    if_range_str = request.META.get("HTTP_IF_RANGE")
+    if if_range_str is None:
+        return True
+    if_range_str = if_range_str.strip()
+    if if_range_str.startswith('"') or if_range_str.startswith("W/"):
+        return if_range_str == get_etag(sciobj_model)
+    since_ts = django.utils.http.parse_http_date_safe(if_range_str)
+    return since_ts is not None and since_ts == _get_modified_ts(sciobj_model)
+
+
 def _add_sciobj_standard(response, sciobj_model):
     response["Content-Length"] = str(sciobj_model.size)
     response["Content-Type"] = d1_gmn.app.object_format_cache.get_content_type(
@@ -114,7 +270,7 @@ def _add_custom_dataone(response, sciobj_model):
         response["DataONE-Obsoletes"] = sciobj_model.obsoletes.did
     if sciobj_model.obsoleted_by:
         response["DataONE-ObsoletedBy"] = sciobj_model.obsoleted_by.did
-    sid = d1_gmn.app.revision.get_sid_by_pid(sciobj_model.pid.did)
+    sid = d1_gmn.app.revision.get_sid_by_model(sciobj_model)
     if sid:
         response["DataONE-SeriesId"] = sid
 
@@ -29,6 +29,8 @@ import platform
 import sys
 import xml.etree.ElementTree
 
+import d1_scimeta.validate
+
 import d1_common.const
 import d1_common.date_time
 import d1_common.types.exceptions
@@ -40,7 +42,11 @@ import django.http
 import django.shortcuts
 import django.urls.base
 
+import d1_gmn.app.dimension_cache
+import d1_gmn.app.middleware.session_cache
 import d1_gmn.app.models
+import d1_gmn.app.proxy
+import d1_gmn.app.sysmeta_cache
 
 
 def root(request):
@@ -139,6 +145,11 @@ def get_context_dict():
         "sciobjCountByFormat": get_object_count_by_format(),
         "description": django.conf.settings.NODE_DESCRIPTION,
         "mnLogoUrl": django.conf.settings.NODE_LOGO_URL,
+        "sysmetaCacheStats": d1_gmn.app.sysmeta_cache.get_stats(),
+        "dimensionCacheStats": d1_gmn.app.dimension_cache.get_stats(),
+        "sessionCacheStats": d1_gmn.app.middleware.session_cache.get_stats(),
+        "scimetaSchemaCacheStats": d1_scimeta.validate.get_schema_cache_stats(),
+        "proxyUpstreamStats": d1_gmn.app.proxy.get_stats(),
     }
 
 
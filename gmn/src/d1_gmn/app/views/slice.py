@@ -15,13 +15,38 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-"""Handle slicing / paging of multi-page result set."""
+"""Handle slicing / paging of multi-page result set.
 
+Slices can be selected in two ways:
+
+- By ``start`` and ``count``, as specified in the DataONE API. GMN remembers the
+  position of the last item in each returned slice in the Django cache, so that the
+  next slice can usually be found without scanning the result set up to ``start``. If
+  the cache entry is not available, for instance because the next request was
+  handled by another worker process, GMN falls back to ``OFFSET <start> LIMIT
+  <count>``, which becomes slow for large values of ``start``.
+
+- By ``resumptionToken``, a GMN extension. Each slice that is not the last slice in
+  the result set is returned with a ``DataONE-GMN-ResumptionToken`` header holding an
+  opaque token that encodes the position of the last item in the slice. Passing the
+  token back in the ``resumptionToken`` query parameter selects the next slice with a
+  keyset (cursor) filter on the ``(timestamp, id)`` composite index. The cost of
+  retrieving a slice is then independent of its position in the result set, and of
+  the state of the cache.
+
+The total number of items in the result set is provided by the count_cache module.
+
+"""
+
+import base64
+import binascii
 import copy
 import hashlib
+import json
 import logging
 
 import d1_common.const
+import d1_common.date_time
 import d1_common.types
 import d1_common.types.exceptions
 import d1_common.url
@@ -35,23 +60,42 @@ import django.db.models
 # import logging
 
 
-def add_slice_filter(request, query, total_int):
+RESUMPTION_TOKEN_PARAM = "resumptionToken"
+RESUMPTION_TOKEN_HEADER = "DataONE-GMN-ResumptionToken"
+
+
+def add_slice_filter(request, query, total_int, is_estimated_total=False):
+    """Add filters that select the requested slice of the result set.
+
+    If ``is_estimated_total`` is True, ``total_int`` is only an approximation, so it is
+    not used for validating or adjusting the slice.
+
+    """
     url_dict = d1_common.url.parseUrl(request.get_full_path())
-    start_int = _get_and_assert_slice_param(url_dict, "start", 0)
     count_int = _get_and_assert_slice_param(
         url_dict, "count", d1_common.const.DEFAULT_SLICE_SIZE
     )
-    _assert_valid_start(start_int, count_int, total_int)
-    count_int = _adjust_count_if_required(start_int, count_int, total_int)
+    token_str = url_dict["query"].get(RESUMPTION_TOKEN_PARAM, None)
+    if token_str is not None:
+        start_int, last_ts_tup = _decode_resumption_token(token_str)
+    else:
+        start_int = _get_and_assert_slice_param(url_dict, "start", 0)
+        last_ts_tup = None
+    if is_estimated_total:
+        count_int = min(count_int, django.conf.settings.MAX_SLICE_ITEMS)
+    else:
+        _assert_valid_start(start_int, count_int, total_int)
+        count_int = _adjust_count_if_required(start_int, count_int, total_int)
     authn_subj_list = _get_authenticated_subj_list(request)
     logging.debug(
-        "Adding slice filter. start={} count={} total={} subj={}".format(
-            start_int, count_int, total_int, ",".join(authn_subj_list)
+        "Adding slice filter. start={} count={} total={} subj={} token={}".format(
+            start_int, count_int, total_int, ",".join(authn_subj_list), token_str
         )
     )
-    last_ts_tup = _cache_get_last_in_slice(
-        url_dict, start_int, total_int, authn_subj_list
-    )
+    if last_ts_tup is None:
+        last_ts_tup = _cache_get_last_in_slice(
+            url_dict, start_int, total_int, authn_subj_list
+        )
     if last_ts_tup:
         query = _add_fast_slice_filter(query, last_ts_tup, count_int)
     else:
@@ -59,21 +103,38 @@ def add_slice_filter(request, query, total_int):
     return query, start_int, count_int
 
 
-def cache_add_last_in_slice(request, query, start_int, total_int, sort_field_list):
-    """"""
+def cache_add_last_in_slice(request, start_int, count_int, total_int, last_ts_tup):
+    """Remember the position of the last item in the slice, so that the next slice can
+    be selected with a keyset filter if the client requests it by ``start``."""
     url_dict = d1_common.url.parseUrl(request.get_full_path())
     authn_subj_list = _get_authenticated_subj_list(request)
     key_str = _gen_cache_key_for_slice(
-        url_dict, start_int + query.count(), total_int, authn_subj_list
-    )
-    last_model = query[query.count() - 1] if query.count() else None
-    last_ts_tup = (
-        tuple([getattr(last_model, f) for f in sort_field_list]) if last_model else None
+        url_dict, start_int + count_int, total_int, authn_subj_list
     )
     django.core.cache.cache.set(key_str, last_ts_tup)
     logging.debug('Cache set. key="{}" last={}'.format(key_str, last_ts_tup))
 
 
+def add_resumption_token_header(
+    response, start_int, count_int, total_int, last_ts_tup, is_estimated_total=False
+):
+    """Add a header holding a token that selects the slice following the current one.
+
+    No header is added if the current slice is the last slice in the result set. If
+    the total is estimated, the end of the result set is only known when an empty
+    slice is returned.
+
+    """
+    next_start_int = start_int + count_int
+    if last_ts_tup is None:
+        return
+    if not is_estimated_total and next_start_int >= total_int:
+        return
+    response[RESUMPTION_TOKEN_HEADER] = _encode_resumption_token(
+        next_start_int, last_ts_tup
+    )
+
+
 # Private
 
 
@@ -171,6 +232,64 @@ def _add_fallback_slice_filter(query, start_int, count_int, total_int):
         return query[start_int : start_int + count_int]
 
 
+def _encode_resumption_token(start_int, last_ts_tup):
+    """Encode the position of the next slice to an opaque, URL safe token."""
+    last_timestamp, last_id = last_ts_tup
+    token_json = d1_common.util.serialize_to_normalized_compact_json(
+        {
+            "start": start_int,
+            "timestamp": d1_common.date_time.to_iso8601_utc(
+                d1_common.date_time.normalize_datetime_to_utc(last_timestamp)
+            ),
+            "id": last_id,
+        }
+    )
+    return base64.urlsafe_b64encode(token_json.encode("utf-8")).decode("ascii")
+
+
+def _decode_resumption_token(token_str):
+    """Decode a token created by ``_encode_resumption_token()``.
+
+    Returns:
+        tuple: ``(start_int, (last_timestamp, last_id))``
+
+    Raises:
+        InvalidRequest: The token is not valid.
+
+    """
+    try:
+        token_dict = json.loads(
+            base64.urlsafe_b64decode(token_str.encode("ascii")).decode("utf-8")
+        )
+        start_int = int(token_dict["start"])
+        last_id = int(token_dict["id"])
+        last_timestamp = d1_common.date_time.dt_from_iso8601_str(
+            token_dict["timestamp"]
+        )
+    except (
+        ValueError,
+        TypeError,
+        KeyError,
+        UnicodeError,
+        binascii.Error,
+        d1_common.date_time.iso8601.ParseError,
+    ) as e:
+        raise d1_common.types.exceptions.InvalidRequest(
+            0,
+            'Invalid resumption token. {}="{}" error="{}"'.format(
+                RESUMPTION_TOKEN_PARAM, token_str, str(e)
+            ),
+        )
+    if start_int < 0:
+        raise d1_common.types.exceptions.InvalidRequest(
+            0,
+            'Invalid resumption token. {}="{}"'.format(
+                RESUMPTION_TOKEN_PARAM, token_str
+            ),
+        )
+    return start_int, (last_timestamp, last_id)
+
+
 def _cache_get_last_in_slice(url_dict, start_int, total_int, authn_subj_list):
     """Return None if cache entry does not exist."""
     key_str = _gen_cache_key_for_slice(url_dict, start_int, total_int, authn_subj_list)
@@ -219,6 +338,7 @@ def _gen_cache_key_for_slice(url_dict, start_int, total_int, authn_subj_list):
     key_url_dict = copy.deepcopy(url_dict)
     key_url_dict["query"].pop("start", None)
     key_url_dict["query"].pop("count", None)
+    key_url_dict["query"].pop(RESUMPTION_TOKEN_PARAM, None)
     key_json = d1_common.util.serialize_to_normalized_compact_json(
         {
             "url_dict": key_url_dict,
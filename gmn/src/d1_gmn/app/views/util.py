@@ -34,11 +34,14 @@ import django.http
 
 import d1_gmn.app
 import d1_gmn.app.auth
+import d1_gmn.app.count_cache
 import d1_gmn.app.db_filter
 import d1_gmn.app.did
 import d1_gmn.app.models
 import d1_gmn.app.sysmeta
+import d1_gmn.app.sysmeta_cache
 import d1_gmn.app.views.slice
+import d1_gmn.app.xml_stream
 
 
 def dataoneTypes(request):
@@ -119,7 +122,23 @@ def assert_xml_file_is_under_size_limit(xml_file):
 
 
 def generate_sysmeta_xml_matching_api_version(request, pid):
-    sysmeta_pyxb = d1_gmn.app.sysmeta.model_to_pyxb(pid)
+    """Return serialized System Metadata for the API version of the request.
+
+    Serialized documents are cached by the sysmeta_cache module.
+
+    """
+    return d1_gmn.app.sysmeta_cache.get(
+        pid,
+        d1_gmn.app.sysmeta_cache.V1_API
+        if is_v1_api(request)
+        else d1_gmn.app.sysmeta_cache.V2_API,
+        lambda: serialize_sysmeta_matching_api_version(
+            request, d1_gmn.app.sysmeta.model_to_pyxb(pid)
+        ),
+    )
+
+
+def serialize_sysmeta_matching_api_version(request, sysmeta_pyxb):
     sysmeta_xml_str = d1_gmn.app.sysmeta.serialize(sysmeta_pyxb)
     if is_v1_api(request):
         return d1_common.type_conversions.str_to_v1_str(sysmeta_xml_str)
@@ -140,7 +159,7 @@ def query_object_list(request, type_name):
         .order_by("modified_timestamp", "id")
     )
     if not d1_gmn.app.auth.is_trusted_subject(request):
-        query = d1_gmn.app.db_filter.add_access_policy_filter(request, query, "id")
+        query = d1_gmn.app.db_filter.add_access_policy_filter(request, query, "")
     query = d1_gmn.app.db_filter.add_datetime_filter(
         request, query, "modified_timestamp", "fromDate", "gte"
     )
@@ -161,15 +180,22 @@ def query_object_list(request, type_name):
                 request, query, "pid__did", "identifier"
             )
     query = d1_gmn.app.db_filter.add_replica_filter(request, query)
-    total_int = query.count()
+    total_int, is_estimated_total = d1_gmn.app.count_cache.get_total(
+        request, query, d1_gmn.app.count_cache.OBJECT_SCOPE
+    )
     query, start, count = d1_gmn.app.views.slice.add_slice_filter(
-        request, query, total_int
+        request, query, total_int, is_estimated_total
     )
+    if type_name == "object_list":
+        query = d1_gmn.app.db_filter.add_values_list_projection(
+            query, d1_gmn.app.xml_stream.OBJECT_LIST_FIELD_LIST
+        )
     return {
         "query": query,
         "start": start,
         "count": count,
         "total": total_int,
+        "is_estimated_total": is_estimated_total,
         "type": type_name,
     }
 
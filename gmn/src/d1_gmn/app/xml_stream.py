@@ -0,0 +1,246 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Stream DataONE ObjectList and Log XML documents directly from database rows.
+
+Building the documents as PyXB objects and serializing them with
+``d1_common.xml.serialize_for_transport()`` requires the complete PyXB object, the
+complete DOM and the complete serialized document to be in memory at the same time.
+The generators in this module instead write the XML directly from flat rows, as
+returned by iterating over a ``QuerySet.values_list()``, and yield the document in
+chunks, suitable for a ``StreamingHttpResponse``. Only the rows in the current chunk
+are held in memory. The number of rows is written in the root element, so it must be
+known before the rows are read.
+
+The generated documents are byte for byte identical to the ones created via PyXB. This
+includes the namespace prefix, the order of attributes, the escaping of character
+data and the formatting of dates.
+
+"""
+import itertools
+
+import d1_common.date_time
+
+import django.conf
+
+NS_PREFIX = "ns1"
+
+# Columns required for each ObjectInfo and LogEntry element. The generators index the
+# rows by these positions.
+OBJECT_LIST_FIELD_LIST = [
+    "modified_timestamp",
+    "id",
+    "pid__did",
+    "format__format",
+    "checksum",
+    "checksum_algorithm__checksum_algorithm",
+    "size",
+]
+
+LOG_FIELD_LIST = [
+    "timestamp",
+    "id",
+    "sciobj__pid__did",
+    "ip_address__ip_address",
+    "user_agent__user_agent",
+    "subject__subject",
+    "event__event",
+]
+
+REDACTED_STR = "<NotAuthorized>"
+
+
+def generate_object_list(row_iter, count, start, total, namespace_uri, xslt_url=None):
+    """Generate an ObjectList XML document.
+
+    Args:
+        row_iter: iterable of tuples
+            Rows with the columns in ``OBJECT_LIST_FIELD_LIST``.
+
+        count: int
+            Number of rows. At most ``count`` rows are read from ``row_iter``.
+
+    Yields:
+        bytes: Sections of the UTF-8 encoded XML document.
+
+    """
+    writer = _ChunkWriter()
+    yield from writer.write_all(
+        _gen_root_start("objectList", count, start, total, namespace_uri, xslt_url)
+    )
+    for (
+        modified_timestamp,
+        _,
+        did,
+        format_id,
+        checksum,
+        checksum_algorithm,
+        size,
+    ) in itertools.islice(row_iter, count):
+        yield from writer.write_all(
+            [
+                "<objectInfo>",
+                _gen_text_element("identifier", did),
+                _gen_text_element("formatId", format_id),
+                '<checksum algorithm="',
+                escape(checksum_algorithm),
+                '">',
+                escape(checksum),
+                "</checksum>",
+                _gen_text_element(
+                    "dateSysMetadataModified", format_xsd_datetime(modified_timestamp)
+                ),
+                _gen_text_element("size", str(size)),
+                "</objectInfo>",
+            ]
+        )
+    yield from writer.write_all(_gen_root_end("objectList", count))
+    yield from writer.flush()
+
+
+def generate_log(row_iter, count, start, total, namespace_uri, xslt_url=None):
+    """Generate a Log XML document.
+
+    Args:
+        row_iter: iterable of tuples
+            Rows with the columns in ``LOG_FIELD_LIST``, optionally followed by a bool
+            column that is True for rows in which ``ipAddress`` and ``subject`` must be
+            redacted.
+
+        count: int
+            Number of rows. At most ``count`` rows are read from ``row_iter``.
+
+    Yields:
+        bytes: Sections of the UTF-8 encoded XML document.
+
+    """
+    writer = _ChunkWriter()
+    node_id_element = _gen_text_element(
+        "nodeIdentifier", django.conf.settings.NODE_IDENTIFIER
+    )
+    yield from writer.write_all(
+        _gen_root_start("log", count, start, total, namespace_uri, xslt_url)
+    )
+    for row in itertools.islice(row_iter, count):
+        (
+            timestamp,
+            entry_id,
+            did,
+            ip_address,
+            user_agent,
+            subject,
+            event,
+        ) = row[: len(LOG_FIELD_LIST)]
+        if len(row) > len(LOG_FIELD_LIST) and row[len(LOG_FIELD_LIST)]:
+            ip_address = REDACTED_STR
+            subject = REDACTED_STR
+        yield from writer.write_all(
+            [
+                "<logEntry>",
+                _gen_text_element("entryId", str(entry_id)),
+                _gen_text_element("identifier", did),
+                _gen_text_element("ipAddress", ip_address),
+                _gen_text_element("userAgent", user_agent),
+                _gen_text_element("subject", subject),
+                _gen_text_element("event", event),
+                _gen_text_element("dateLogged", format_xsd_datetime(timestamp)),
+                node_id_element,
+                "</logEntry>",
+            ]
+        )
+    yield from writer.write_all(_gen_root_end("log", count))
+    yield from writer.flush()
+
+
+def escape(s):
+    """Escape character data in the same way as ``xml.dom.minidom``, which is used by
+    PyXB for serialization."""
+    return (
+        s.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace('"', "&quot;")
+        .replace(">", "&gt;")
+    )
+
+
+def format_xsd_datetime(dt):
+    """Format datetime in the same way as PyXB formats ``xs:dateTime``.
+
+    The datetime is adjusted to UTC and trailing zeros are removed from the fraction.
+
+    """
+    dt = d1_common.date_time.normalize_datetime_to_utc(dt)
+    iso_str = dt.replace(tzinfo=None).isoformat()
+    if "." in iso_str:
+        iso_str = iso_str.rstrip("0")
+    return iso_str + "Z"
+
+
+# Private
+
+
+class _ChunkWriter:
+    """Collect sections of the document and release them in chunks of at least
+    ``NUM_CHUNK_BYTES`` bytes."""
+
+    def __init__(self):
+        self._part_list = []
+        self._part_len = 0
+
+    def write_all(self, str_list):
+        for s in str_list:
+            self._part_list.append(s)
+            self._part_len += len(s)
+        if self._part_len >= django.conf.settings.NUM_CHUNK_BYTES:
+            yield from self.flush()
+
+    def flush(self):
+        if self._part_list:
+            chunk_bytes = "".join(self._part_list).encode("utf-8")
+            self._part_list = []
+            self._part_len = 0
+            yield chunk_bytes
+
+
+def _gen_root_start(type_name, count, start, total, namespace_uri, xslt_url):
+    str_list = ['<?xml version="1.0" encoding="utf-8"?>']
+    if xslt_url:
+        str_list.append(
+            '<?xml-stylesheet type="text/xsl" href="{}"?>'.format(xslt_url)
+        )
+    str_list.append(
+        '<{}:{} count="{}" start="{}" total="{}" xmlns:{}="{}"'.format(
+            NS_PREFIX,
+            type_name,
+            count,
+            start,
+            total,
+            NS_PREFIX,
+            escape(namespace_uri),
+        )
+    )
+    # Empty documents are serialized with a self-closing root element
+    str_list.append(">" if count else "/>")
+    return str_list
+
+
+def _gen_root_end(type_name, count):
+    return ["</{}:{}>".format(NS_PREFIX, type_name)] if count else []
+
+
+def _gen_text_element(tag_str, text_str):
+    return "<{0}>{1}</{0}>".format(tag_str, escape(text_str))
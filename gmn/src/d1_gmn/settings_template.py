@@ -242,6 +242,50 @@ LOG_IGNORE_TRUSTED_SUBJECT = True
 # - Do not apply this filter.
 LOG_IGNORE_NODE_SUBJECT = True
 
+# How to write "read" events to the Event Log. This is a tradeoff between the
+# latency of MNRead.get(), MNRead.describe() and MNRead.getChecksum() and the
+# durability of the logged events. Other events are always written in the
+# request.
+# "sync" (default):
+# - Write each event in the request, in the same transaction as the request.
+# "buffered":
+# - Queue events in memory and write them in batches from a background thread in
+#   each GMN process. Queued events are lost if a process exits abnormally.
+# "spool":
+# - Append events to the file at EVENT_LOG_SPOOL_PATH. The events are written to
+#   the Event Log by the process_event_log_spool management command, which
+#   should be run periodically, e.g., via cron.
+EVENT_LOG_WRITE_MODE = "sync"
+
+# Maximum number of events to hold in the in-memory queue in "buffered" mode. If
+# the queue is full, events are written in the request.
+EVENT_LOG_QUEUE_SIZE = 10000
+
+# Maximum number of events to write in a single batch.
+EVENT_LOG_BATCH_SIZE = 500
+
+# Maximum number of seconds to hold queued events in "buffered" mode before
+# writing them.
+EVENT_LOG_FLUSH_INTERVAL = 5.0
+
+# Path to the spool file for "spool" mode. The directory must exist and be
+# writable by the GMN processes and the process_event_log_spool command. Do not
+# use a world writable directory such as /tmp or /var/tmp. GMN refuses to use a
+# spool file that is a symbolic link, is owned by another user or is writable by
+# group or others.
+# None (default):
+# - Use "var/event_log.spool" in the SciObj store (OBJECT_STORE_PATH). The "var"
+#   directory is created with mode 0700.
+EVENT_LOG_SPOOL_PATH = None
+
+# Flush each spooled event to disk before returning the response.
+# False (default):
+# - Spooled events survive restarts of GMN, but may be lost on power loss.
+# True:
+# - Spooled events also survive power loss, at the cost of one disk flush per
+#   event.
+EVENT_LOG_SPOOL_FSYNC = False
+
 # ==============================================================================
 
 # Path to the client side certificate that GMN uses when initiating TLS/SSL
@@ -261,6 +305,31 @@ CLIENT_CERT_PRIVATE_KEY_PATH = (
 # default.
 OBJECT_STORE_PATH = "/var/local/dataone/gmn_object_store"
 
+# How the bytes of locally stored science objects are delivered by MNRead.get().
+# Authorization, conditional GET and event logging are always handled by GMN.
+# "stream" (default): GMN reads the object and streams it to the client in
+#   NUM_CHUNK_BYTES chunks.
+# "file_wrapper": GMN passes the open file to the WSGI server, which can send it
+#   with sendfile() without copying the bytes through Python. Supported by
+#   mod_wsgi (with WSGIEnableSendfile On), Gunicorn and uWSGI.
+# "x_sendfile": GMN returns an X-Sendfile header with the absolute path to the
+#   file, and the web server sends the file. Requires Apache with mod_xsendfile,
+#   configured with XSendFile On and XSendFilePath set to OBJECT_STORE_PATH.
+# "x_accel_redirect": GMN returns an X-Accel-Redirect header with the path to
+#   the file below SCIOBJ_ACCEL_REDIRECT_LOCATION, and nginx sends the file.
+#   Requires an internal nginx location that is aliased to OBJECT_STORE_PATH.
+# Responses for byte ranges, and for objects that are proxied from remote URLs,
+# are always streamed by GMN.
+SCIOBJ_DELIVERY_MODE = "stream"
+
+# Internal nginx location that is aliased to OBJECT_STORE_PATH. Only used when
+# SCIOBJ_DELIVERY_MODE is "x_accel_redirect". E.g.:
+#   location /gmn_object_store/ {
+#     internal;
+#     alias /var/local/dataone/gmn_object_store/;
+#   }
+SCIOBJ_ACCEL_REDIRECT_LOCATION = "/gmn_object_store/"
+
 # Enable this node to be used as a replication target.
 # True:
 # - DataONE can use this node to store replicas of science objects.
@@ -297,6 +366,12 @@ REPLICATION_ALLOWEDOBJECTFORMAT = ()
 # to be retried for 24 hours.
 REPLICATION_MAX_ATTEMPTS = 24
 
+# The number of replicas to download concurrently when processing the
+# replication queue. Connections to the CN and to each source Member Node are
+# reused by all downloads. Can be overridden with the --workers argument of the
+# process_replication_queue management command.
+REPLICATION_WORKER_COUNT = 4
+
 # Accept only public objects for replication
 # True:
 # - This node will deny any replication requests for access controlled objects.
@@ -474,6 +549,18 @@ SCIMETA_VALIDATION_MAX_SIZE = 100 * 1024 ** 2
 #   synchronization.
 SCIMETA_VALIDATION_OVER_SIZE_ACTION = "reject"
 
+# The XML Schemas used for SciMeta validation are compiled on first use for each
+# format, and kept in memory for the lifetime of the GMN process. Compiling a
+# schema, such as for EML or ISO 19139, can take much longer than validating a
+# document.
+# False (default):
+# - Compile the schema for a format when the first SciMeta object of that format
+#   is received by the process
+# True:
+# - Compile the schemas for all supported formats when the GMN process starts.
+#   This increases startup time and memory usage.
+SCIMETA_VALIDATION_WARM_UP = False
+
 # GMN implements a vendor specific extension for MNStorage.create(). Instead of
 # providing an object for GMN to manage, the object can be left empty and the URL of the
 # object on a 3rd party server be provided instead. In that case, GMN will stream the
@@ -498,6 +585,18 @@ PROXY_MODE_BASIC_AUTH_USERNAME = ""
 PROXY_MODE_BASIC_AUTH_PASSWORD = ""
 PROXY_MODE_STREAM_TIMEOUT = 30
 
+# Connections to the servers holding proxy objects are pooled and reused. Each GMN
+# process keeps a pool of up to PROXY_MODE_POOL_SIZE connections per remote server.
+# Set PROXY_MODE_KEEP_ALIVE to False to close each connection after use instead.
+# Failed connections and 502, 503 and 504 responses are retried up to
+# PROXY_MODE_MAX_RETRIES times, waiting PROXY_MODE_RETRY_BACKOFF * 2^(retry - 1)
+# seconds between attempts. Request and error counts and latencies for each remote
+# server are shown on the GMN home page.
+PROXY_MODE_POOL_SIZE = 10
+PROXY_MODE_KEEP_ALIVE = True
+PROXY_MODE_MAX_RETRIES = 3
+PROXY_MODE_RETRY_BACKOFF = 0.5
+
 # As the XML documents holding the DataONE types, such as SystemMetadata, must
 # be in memory while being deserialized and parsed, we limit the size that can
 # be handled. The default limit is set much higher than the expected size of any
@@ -518,6 +617,198 @@ NUM_CHUNK_BYTES = 1024 ** 2
 # and server.
 MAX_SLICE_ITEMS = 5000
 
+# The maximum number of byte ranges that can be requested in the Range header of a
+# single MNRead.get() call. If more ranges are requested, the Range header is
+# ignored and the full object is returned.
+MAX_RANGE_COUNT = 16
+
+# MNPackage.getPackage() generates the System Metadata documents for this many
+# package members at a time, as the package is streamed to the client.
+PACKAGE_SYSMETA_BATCH_SIZE = 100
+
+# While the bytes of one package member are streamed by MNPackage.getPackage(), the
+# next member is opened and up to this many bytes of it are read in a background
+# thread. Each package download holds at most this many prefetched bytes in memory.
+# E.g.: 8 MiB = 8 * 1024**2 (default)
+PACKAGE_PREFETCH_BYTES = 8 * 1024 ** 2
+
+# The GMN bulk System Metadata endpoint, /v2/gmn/meta, generates the System Metadata
+# documents for this many objects at a time, as the response is streamed to the
+# client. Each batch is retrieved with a fixed number of database queries.
+SYSMETA_BULK_BATCH_SIZE = 100
+
+# Cache the total number of items returned with each page of results from
+# MNRead.listObjects() and MNCore.getLogRecords(). Counting the items requires a
+# full scan of the filtered result set, which is slow on large nodes. Cached
+# counts are invalidated when objects are created, updated, archived or deleted,
+# and when events other than "read" are logged. Invalidation is only visible in
+# all GMN processes if the Django cache (CACHES) is shared between processes,
+# e.g., Memcached. Otherwise, counts may be stale for up to COUNT_CACHE_TIMEOUT
+# seconds.
+# True (default):
+# - Cache counts
+# False:
+# - Count the items for each page
+COUNT_CACHE_ENABLED = True
+
+# Maximum number of seconds to keep a cached count. With a process local cache,
+# such as the default LocMemCache, other processes may use a stale count until it
+# times out, which can cause valid "start" values to be rejected and pages to be
+# truncated.
+# None (default):
+# - 1 hour if CACHES is shared between the GMN processes, e.g., Memcached
+# - 10 seconds if CACHES is local to each process
+# E.g.: 1 hour = 60 * 60
+COUNT_CACHE_TIMEOUT = None
+
+# Maximum number of seconds to keep a cached count for MNCore.getLogRecords().
+# Read events do not invalidate cached counts, since they are logged for most API
+# calls, so totals may omit read events that were logged within this time.
+# E.g.: 1 minute = 60 (default)
+COUNT_CACHE_LOG_TIMEOUT = 60
+
+# Return the row count estimated by the Postgres query planner instead of an
+# exact count when MNRead.listObjects() and MNCore.getLogRecords() are called
+# by trusted subjects. Estimates are nearly free, but may be far from the actual
+# number of items. Paging clients must then detect the end of the result set by
+# the absence of the DataONE-GMN-ResumptionToken header instead of by the total.
+# False (default):
+# - Return exact counts
+# True:
+# - Return estimated counts to trusted subjects
+COUNT_ESTIMATE_FOR_TRUSTED = False
+
+# Cache the serialized System Metadata returned by MNRead.getSystemMetadata().
+# Cached documents are only used while the serialVersion,
+# dateSysMetadataModified, obsoletes, obsoletedBy and seriesId of the object are
+# unchanged. These are checked in the database for each call, so changes made in
+# other GMN processes are seen even if the cache is not shared.
+# "lru" (default):
+# - Cache in memory in each GMN process. Holds up to SYSMETA_CACHE_LRU_SIZE
+#   documents per process.
+# "django":
+# - Cache in the Django cache (CACHES). Shared between processes if the Django
+#   cache is shared, e.g., Memcached. Documents expire after
+#   SYSMETA_CACHE_TIMEOUT seconds.
+# "file":
+# - Cache in files under SYSMETA_CACHE_FILE_PATH. Shared between processes and
+#   persists over restarts.
+# None:
+# - Generate System Metadata from the database for each call
+SYSMETA_CACHE_BACKEND = "lru"
+
+# Maximum number of documents to hold in each process with the "lru" backend.
+# A document typically uses a few KiB.
+SYSMETA_CACHE_LRU_SIZE = 1000
+
+# Maximum number of seconds to keep a document with the "django" backend.
+# E.g.: 1 hour = 60 * 60 (default)
+SYSMETA_CACHE_TIMEOUT = 60 * 60
+
+# Path to the directory in which to store documents with the "file" backend. The
+# directory is created with mode 0700 if it doesn't exist. GMN refuses to start if
+# the directory is owned by another user or is writable by group or others. Do not
+# use a directory under a world writable location such as /tmp or /var/tmp.
+# None (default):
+# - Use the "sysmeta_cache" directory in the SciObj store (OBJECT_STORE_PATH)
+SYSMETA_CACHE_FILE_PATH = None
+
+# Cache the PID of the head of the revision chain to which each SID resolves.
+# Cached SIDs are invalidated when their revision chains are modified.
+# Invalidation is only visible in all GMN processes if the Django cache (CACHES) is
+# shared between processes, e.g., Memcached. Otherwise, a SID may resolve to the
+# previous head in other processes for up to SID_CACHE_TIMEOUT seconds.
+# None (default):
+# - Cache resolved SIDs if CACHES is shared between the GMN processes
+# True:
+# - Cache resolved SIDs
+# False:
+# - Resolve SIDs in the database for each call
+SID_CACHE_ENABLED = None
+
+# Maximum number of seconds to keep a resolved SID. Increase if the Django cache
+# is shared between the GMN processes.
+# E.g.: 1 minute = 60 (default)
+SID_CACHE_TIMEOUT = 60
+
+# Cache rows from the subject, event, IP address, user agent, node, format and
+# checksum algorithm lookup tables in each GMN process, so that repeated lookups
+# of the same values do not require database round trips. Rows are only cached
+# after the transaction that read or created them has committed. Subjects are
+# deleted when they are no longer referenced, so they are only cached if the
+# Django cache (CACHES) is shared between processes, e.g., Memcached.
+# True (default):
+# - Cache lookups
+# False:
+# - Look up values in the database each time they are used
+DIMENSION_CACHE_ENABLED = True
+
+# Maximum number of rows to cache for each lookup table in each process.
+DIMENSION_CACHE_SIZE = 10000
+
+# Load up to DIMENSION_CACHE_SIZE rows into the cache on the first lookup in each
+# table, instead of caching rows as they are used.
+# False (default):
+# - Cache rows as they are used
+# True:
+# - Load rows on first use of each table
+DIMENSION_CACHE_PREFILL = False
+
+# Cache the subjects extracted from client side certificates and JWTs in each GMN
+# process, so that the certificate does not have to be parsed and the JWT
+# signature does not have to be verified for each request. Entries are used until
+# the certificate or JWT expires, or for at most SESSION_CACHE_MAX_AGE seconds.
+# True (default):
+# - Cache the subjects
+# False:
+# - Extract the subjects for each request
+SESSION_CACHE_ENABLED = True
+
+# Maximum number of certificates and JWTs for which to cache subjects in each
+# process.
+SESSION_CACHE_SIZE = 1000
+
+# Maximum number of seconds to use cached subjects.
+# E.g.: 1 hour = 60 * 60 (default)
+SESSION_CACHE_MAX_AGE = 60 * 60
+
+# Upload handlers for multipart requests. By default, the bytes of science
+# objects received in MNStorage.create() and MNStorage.update() are processed in
+# a single pass while they are received: They are written to a temporary file in
+# the object store, from which they are moved into place with an atomic rename,
+# and checksums are calculated at the same time. To use the Django defaults, in
+# which the bytes are read again for checksum verification, remove the first
+# entry.
+FILE_UPLOAD_HANDLERS = [
+    "d1_gmn.app.ingest.SciobjIngestUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+
+# Checksum algorithms to calculate while science objects are uploaded. The
+# System Metadata that declares the algorithm is received after the object
+# bytes, so the checksums must be calculated for all algorithms that may be
+# declared. If the declared algorithm is not in the list, the object is read
+# again to calculate the checksum.
+INGEST_CHECKSUM_ALGORITHMS = ["MD5", "SHA-1"]
+
+# Objects up to this size are also held in memory while they are uploaded, so
+# that Science Metadata can be validated without reading it back from disk.
+# E.g.: 1 MiB = 1024**2 (default)
+INGEST_HEAD_SIZE = 1024 ** 2
+
+# Store the checksums returned by MNRead.getChecksum() in the database. The
+# checksums for all supported algorithms are calculated in a single pass over
+# the object bytes the first time a checksum is requested, or while the object
+# is uploaded, and are recalculated if the object bytes change. Clients can
+# force recalculation by adding a VENDOR-GMN-RECALCULATE-CHECKSUM header to the
+# request.
+# True (default):
+# - Calculate checksums once and store them
+# False:
+# - Calculate the checksum from the object bytes in each call
+CHECKSUM_CACHE_ENABLED = True
+
 # Postgres database connection.
 d1_common.util.nested_update(
     DATABASES,
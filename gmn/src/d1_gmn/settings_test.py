@@ -83,6 +83,20 @@ PROXY_MODE_STREAM_TIMEOUT = 30
 MAX_XML_DOCUMENT_SIZE = 10 * 1024 ** 2
 NUM_CHUNK_BYTES = 1024 ** 2
 MAX_SLICE_ITEMS = 5000
+MAX_RANGE_COUNT = 16
+
+COUNT_CACHE_ENABLED = True
+COUNT_CACHE_TIMEOUT = 60 * 60
+COUNT_ESTIMATE_FOR_TRUSTED = False
+
+SYSMETA_CACHE_BACKEND = "lru"
+SYSMETA_CACHE_LRU_SIZE = 1000
+SYSMETA_CACHE_TIMEOUT = 60 * 60
+SYSMETA_CACHE_FILE_PATH = None
+
+DIMENSION_CACHE_ENABLED = True
+DIMENSION_CACHE_SIZE = 10000
+DIMENSION_CACHE_PREFILL = False
 
 # mk_db_fixture:
 # - Uses DATABASES.default
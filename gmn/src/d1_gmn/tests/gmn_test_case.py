@@ -37,6 +37,7 @@ import traceback
 
 import django
 import django.conf
+import django.core.cache
 import django.core.management
 import django.db
 import django.test
@@ -52,9 +53,14 @@ import requests
 import pytest
 
 import d1_gmn.app
+import d1_gmn.app.count_cache
+import d1_gmn.app.dimension_cache
+import d1_gmn.app.middleware.session_cache
 import d1_gmn.app.models
 import d1_gmn.app.revision
 import d1_gmn.app.sciobj_store
+import d1_gmn.app.sysmeta
+import d1_gmn.app.sysmeta_cache
 import d1_gmn.app.views.internal
 import d1_gmn.tests
 import d1_gmn.tests.gmn_mock
@@ -192,6 +198,8 @@ def django_load_db_fixture(rel_json_fixture_path, db_key=DEFAULT_DB_KEY):
     )
     fixture_file_path = d1_test.test_files.get_abs_test_file_path(rel_json_fixture_path)
     django.core.management.call_command("loaddata", fixture_file_path, database=db_key)
+    # Fixtures written before the is_public flag was added do not include it.
+    d1_gmn.app.sysmeta.update_is_public()
     django_commit_and_close(db_key)
 
 
@@ -276,6 +284,12 @@ class GMNTestCase(d1_test.d1_test_case.D1TestCase):
         """Run for each test method that derives from GMNTestCase."""
         # logger.error('GMNTestCase.setup_method()')
         d1_test.mock_api.django_client.add_callback(MOCK_GMN_BASE_URL)
+        # Each test starts with a fresh database, so values cached by previous tests,
+        # such as result set counts, are invalid.
+        django.core.cache.cache.clear()
+        d1_gmn.app.sysmeta_cache.clear()
+        d1_gmn.app.dimension_cache.invalidate()
+        d1_gmn.app.middleware.session_cache.clear()
         # d1_test.mock_api.get.add_callback(d1_test.d1_test_case.MOCK_BASE_URL)
         self.client_v1 = d1_client.mnclient_1_2.MemberNodeClient_1_2(MOCK_GMN_BASE_URL)
         self.client_v2 = d1_client.mnclient_2_0.MemberNodeClient_2_0(MOCK_GMN_BASE_URL)
@@ -487,6 +501,8 @@ class GMNTestCase(d1_test.d1_test_case.D1TestCase):
             "completed", "urn:node:testReplicaSource"
         )
         d1_gmn.app.models.local_replica(pid, replica_info_model)
+        # The replica is added without going through the regular create path.
+        d1_gmn.app.count_cache.invalidate_object_counts()
 
     def call_d1_client(self, api_func, *arg_list, **arg_dict):
         """Issue d1_client calls under a mocked GMN authentication and authorization
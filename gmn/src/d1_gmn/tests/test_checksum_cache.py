@@ -0,0 +1,167 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test persisted checksums for MNRead.getChecksum()."""
+import os
+import unittest.mock
+
+import responses
+
+import d1_common.checksum
+
+import django.db.models
+import django.test
+
+import d1_gmn.app.checksum_cache
+import d1_gmn.app.models
+import d1_gmn.app.sciobj_store
+import d1_gmn.tests.gmn_mock
+import d1_gmn.tests.gmn_test_case
+
+import d1_test.d1_test_case
+
+
+@d1_test.d1_test_case.reproducible_random_decorator("TestChecksumCache")
+class TestChecksumCache(d1_gmn.tests.gmn_test_case.GMNTestCase):
+    def _get_checksum(self, client, pid, algorithm_str, vendor_specific=None):
+        with unittest.mock.patch.object(
+            d1_gmn.app.checksum_cache,
+            "calculate_checksums",
+            wraps=d1_gmn.app.checksum_cache.calculate_checksums,
+        ) as mock_calculate:
+            checksum_pyxb = client.getChecksum(pid, algorithm_str, vendor_specific)
+        return checksum_pyxb, mock_calculate.call_count
+
+    def _replace_sciobj_bytes(self, pid, sciobj_bytes):
+        sciobj_path = d1_gmn.app.sciobj_store.get_abs_sciobj_file_path_by_pid(pid)
+        stat_result = os.stat(sciobj_path)
+        with open(sciobj_path, "wb") as f:
+            f.write(sciobj_bytes)
+        # Ensure that the mtime changes on filesystems with coarse timestamps.
+        os.utime(sciobj_path, (stat_result.st_atime, stat_result.st_mtime + 10))
+
+    @responses.activate
+    def test_1000(self, gmn_client_v1_v2):
+        """getChecksum(): Checksums calculated during the upload are returned without
+        reading the object."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(gmn_client_v1_v2)
+            checksum_pyxb, calculate_count = self._get_checksum(
+                gmn_client_v1_v2, pid, "MD5"
+            )
+        assert calculate_count == 0
+        assert d1_common.checksum.are_checksums_equal(
+            checksum_pyxb,
+            d1_common.checksum.create_checksum_object_from_bytes(sciobj_bytes, "MD5"),
+        )
+
+    @responses.activate
+    def test_1010(self, gmn_client_v1_v2):
+        """getChecksum(): Checksums for all algorithms are calculated in one pass the
+        first time an uncached algorithm is requested, then returned from the DB."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(gmn_client_v1_v2)
+            checksum_pyxb, calculate_count = self._get_checksum(
+                gmn_client_v1_v2, pid, "SHA1"
+            )
+            assert calculate_count == 1
+            checksum_pyxb, calculate_count = self._get_checksum(
+                gmn_client_v1_v2, pid, "SHA1"
+            )
+            assert calculate_count == 0
+        sciobj_model = d1_gmn.app.models.ScienceObject.objects.get(pid__did=pid)
+        assert sorted(
+            sciobj_model.scienceobjectchecksum_set.values_list(
+                "checksum_algorithm__checksum_algorithm", flat=True
+            )
+        ) == sorted(d1_common.checksum.get_supported_algorithms())
+
+    @responses.activate
+    def test_1020(self, gmn_client_v1_v2):
+        """getChecksum(): Stored checksums are not used after the object bytes are
+        replaced."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(gmn_client_v1_v2)
+            self._replace_sciobj_bytes(pid, b"replaced")
+            checksum_pyxb, calculate_count = self._get_checksum(
+                gmn_client_v1_v2, pid, "MD5"
+            )
+        assert calculate_count == 1
+        assert d1_common.checksum.are_checksums_equal(
+            checksum_pyxb,
+            d1_common.checksum.create_checksum_object_from_bytes(b"replaced", "MD5"),
+        )
+
+    @responses.activate
+    def test_1030(self, gmn_client_v1_v2):
+        """getChecksum(): VENDOR-GMN-RECALCULATE-CHECKSUM forces recalculation."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(gmn_client_v1_v2)
+            checksum_pyxb, calculate_count = self._get_checksum(
+                gmn_client_v1_v2,
+                pid,
+                "MD5",
+                {"VENDOR-GMN-RECALCULATE-CHECKSUM": "true"},
+            )
+        assert calculate_count == 1
+
+    @responses.activate
+    def test_1040(self, gmn_client_v1_v2):
+        """getChecksum(): Checksums are calculated for each call when the checksum
+        cache is disabled."""
+        with django.test.override_settings(CHECKSUM_CACHE_ENABLED=False):
+            with d1_gmn.tests.gmn_mock.disable_auth():
+                pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(
+                    gmn_client_v1_v2
+                )
+                for _ in range(2):
+                    checksum_pyxb, calculate_count = self._get_checksum(
+                        gmn_client_v1_v2, pid, "MD5"
+                    )
+                    assert calculate_count == 1
+        assert not d1_gmn.app.models.ScienceObjectChecksum.objects.exists()
+
+    @responses.activate
+    def test_1050(self, gmn_client_v1_v2):
+        """save_checksums(): Rows stored by a concurrent call for the same object are
+        replaced instead of violating the unique constraint."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(gmn_client_v1_v2)
+        sciobj_model = d1_gmn.app.models.ScienceObject.objects.get(pid__did=pid)
+        checksum_dict, state = d1_gmn.app.checksum_cache.calculate_checksums(
+            sciobj_model
+        )
+        d1_gmn.app.checksum_cache.save_checksums(
+            sciobj_model, {k: "stale" for k in checksum_dict}, state._replace(size=0)
+        )
+        # Simulate rows stored by another call after this call deleted the old rows.
+        with unittest.mock.patch.object(django.db.models.QuerySet, "delete"):
+            d1_gmn.app.checksum_cache.save_checksums(
+                sciobj_model, checksum_dict, state
+            )
+        assert (
+            dict(
+                sciobj_model.scienceobjectchecksum_set.values_list(
+                    "checksum_algorithm__checksum_algorithm", "checksum"
+                )
+            )
+            == checksum_dict
+        )
+        assert (
+            d1_gmn.app.checksum_cache.get_stored_checksum(sciobj_model, "MD5")
+            == checksum_dict["MD5"]
+        )
@@ -0,0 +1,149 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test the in-process cache for rows in small lookup tables.
+
+The tests run inside a transaction that is never committed, so on-commit callbacks,
+which add rows to the cache, are run explicitly with captureOnCommitCallbacks().
+
+"""
+import unittest.mock
+
+import django.core.cache
+import django.core.signals
+import django.db
+import django.test
+import django.test.utils
+
+import d1_gmn.app.dimension_cache
+import d1_gmn.app.models
+import d1_gmn.app.util
+import d1_gmn.tests.gmn_test_case
+
+import d1_test.d1_test_case
+
+
+@d1_test.d1_test_case.reproducible_random_decorator("TestDimensionCache")
+class TestDimensionCache(d1_gmn.tests.gmn_test_case.GMNTestCase):
+    def _get_query_count(self, func, *args):
+        with django.test.utils.CaptureQueriesContext(django.db.connection) as ctx:
+            func(*args)
+        return len(ctx.captured_queries)
+
+    def test_1000(self):
+        """user_agent(): Cached after commit. Cached lookup does not query the DB."""
+        with django.test.TestCase.captureOnCommitCallbacks(execute=True):
+            user_agent_model = d1_gmn.app.models.user_agent("test_dimension_cache_ua")
+        assert self._get_query_count(
+            d1_gmn.app.models.user_agent, "test_dimension_cache_ua"
+        ) == 0
+        assert (
+            d1_gmn.app.models.user_agent("test_dimension_cache_ua") is user_agent_model
+        )
+        stats_dict = d1_gmn.app.dimension_cache.get_stats()["UserAgent"]
+        assert stats_dict["miss"] == 1
+        assert stats_dict["hit"] == 2
+
+    def test_1010(self):
+        """user_agent(): Not cached if the transaction does not commit."""
+        d1_gmn.app.models.user_agent("test_dimension_cache_ua")
+        assert self._get_query_count(
+            d1_gmn.app.models.user_agent, "test_dimension_cache_ua"
+        ) > 0
+
+    def test_1020(self):
+        """invalidate(): Clears the cache."""
+        with django.test.TestCase.captureOnCommitCallbacks(execute=True):
+            d1_gmn.app.models.event("read")
+        d1_gmn.app.dimension_cache.invalidate()
+        assert self._get_query_count(d1_gmn.app.models.event, "read") > 0
+
+    def test_1030(self):
+        """DIMENSION_CACHE_PREFILL: First lookup loads existing rows."""
+        ip_address_list = list(
+            d1_gmn.app.models.IpAddress.objects.values_list("ip_address", flat=True)[
+                :10
+            ]
+        )
+        with django.test.override_settings(DIMENSION_CACHE_PREFILL=True):
+            with django.test.TestCase.captureOnCommitCallbacks(execute=True):
+                d1_gmn.app.models.ip_address(ip_address_list[0])
+            for ip_address_str in ip_address_list:
+                assert (
+                    self._get_query_count(d1_gmn.app.models.ip_address, ip_address_str)
+                    == 0
+                )
+
+    def test_1040(self):
+        """user_agent_dict(): Missing rows are created with a bulk insert, and all rows
+        are cached after commit."""
+        user_agent_list = ["test_dimension_cache_ua_{}".format(i) for i in range(10)]
+        d1_gmn.app.models.user_agent(user_agent_list[0])
+        assert (
+            self._get_query_count(d1_gmn.app.models.user_agent_dict, user_agent_list)
+            <= 3
+        )
+        with django.test.TestCase.captureOnCommitCallbacks(execute=True):
+            user_agent_dict = d1_gmn.app.models.user_agent_dict(user_agent_list)
+        assert sorted(user_agent_dict) == sorted(user_agent_list)
+        assert all(
+            user_agent_dict[s].user_agent == s and user_agent_dict[s].id
+            for s in user_agent_list
+        )
+        assert (
+            self._get_query_count(d1_gmn.app.models.user_agent_dict, user_agent_list)
+            == 0
+        )
+
+    def test_1050(self):
+        """subject(): Subjects can be deleted, so they are not cached if the Django
+        cache is private to each process."""
+        with django.test.TestCase.captureOnCommitCallbacks(execute=True):
+            d1_gmn.app.models.subject("test_dimension_cache_subj")
+        assert self._get_query_count(
+            d1_gmn.app.models.subject, "test_dimension_cache_subj"
+        ) > 0
+        assert d1_gmn.app.dimension_cache.get_stats()["Subject"]["size"] == 0
+
+    def test_1060(self):
+        """subject(): Subjects are cached if the Django cache is shared."""
+        with unittest.mock.patch.object(
+            d1_gmn.app.util, "is_shared_cache", return_value=True
+        ):
+            with django.test.TestCase.captureOnCommitCallbacks(execute=True):
+                subject_model = d1_gmn.app.models.subject("test_dimension_cache_subj")
+            assert self._get_query_count(
+                d1_gmn.app.models.subject, "test_dimension_cache_subj"
+            ) == 0
+            assert (
+                d1_gmn.app.models.subject("test_dimension_cache_subj") is subject_model
+            )
+
+    def test_1070(self):
+        """The generation number is read from the Django cache once per request."""
+        with django.test.TestCase.captureOnCommitCallbacks(execute=True):
+            d1_gmn.app.models.event("read")
+        django.core.signals.request_started.send(sender=self.__class__)
+        try:
+            with unittest.mock.patch.object(
+                django.core.cache.cache, "get", wraps=django.core.cache.cache.get
+            ) as get_mock:
+                for _ in range(3):
+                    d1_gmn.app.models.event("read")
+            assert get_mock.call_count == 1
+        finally:
+            django.core.signals.request_finished.send(sender=self.__class__)
@@ -0,0 +1,161 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test deferred, batched writing of "read" events to the Event Log."""
+import datetime
+import os
+import stat
+import unittest.mock
+
+import pytest
+
+import django.test
+
+import d1_common.date_time
+
+import d1_gmn.app.event_log_writer
+import d1_gmn.app.models
+import d1_gmn.tests.gmn_test_case
+
+import d1_test.d1_test_case
+
+
+@d1_test.d1_test_case.reproducible_random_decorator("TestEventLogWriter")
+class TestEventLogWriter(d1_gmn.tests.gmn_test_case.GMNTestCase):
+    def _create_log_entry_list(self, n_entries):
+        ts = d1_common.date_time.create_utc_datetime(2001, 2, 3, 4, 5, 6)
+        return [
+            d1_gmn.app.event_log_writer.LogEntry(
+                pid,
+                "read",
+                "10.0.0.{}".format(i),
+                "test_event_log_writer",
+                "subj{}".format(i % 2),
+                ts + datetime.timedelta(seconds=i),
+            )
+            for i, pid in enumerate(self.get_random_pid_sample(n_entries))
+        ]
+
+    def _get_written_list(self):
+        return list(
+            d1_gmn.app.models.EventLog.objects.filter(
+                user_agent__user_agent="test_event_log_writer"
+            )
+            .order_by("timestamp")
+            .values_list("sciobj__pid__did", "ip_address__ip_address", "timestamp")
+        )
+
+    def _to_expected_list(self, log_entry_list):
+        return [(e.pid, e.ip_address, e.timestamp) for e in log_entry_list]
+
+    def test_1000(self):
+        """write_batch(): Entries are written with their original timestamps. Entries
+        for non-existing objects are skipped."""
+        log_entry_list = self._create_log_entry_list(10)
+        unknown_entry = log_entry_list[0]._replace(pid="_invalid_pid_")
+        assert (
+            d1_gmn.app.event_log_writer.write_batch(log_entry_list + [unknown_entry])
+            == 10
+        )
+        assert self._get_written_list() == self._to_expected_list(log_entry_list)
+
+    def test_1010(self):
+        """Buffered mode: Entries are written when the queue is flushed."""
+        log_entry_list = self._create_log_entry_list(5)
+        with django.test.override_settings(EVENT_LOG_WRITE_MODE="buffered"):
+            # The background thread uses a separate database connection, which does
+            # not see the test transaction.
+            with unittest.mock.patch.object(
+                d1_gmn.app.event_log_writer, "_ensure_flush_thread"
+            ):
+                for log_entry in log_entry_list:
+                    d1_gmn.app.event_log_writer.submit(log_entry)
+                assert not self._get_written_list()
+                d1_gmn.app.event_log_writer.flush()
+        assert self._get_written_list() == self._to_expected_list(log_entry_list)
+
+    def test_1020(self, tmpdir):
+        """Spool mode: Entries are written by the process_event_log_spool management
+        command."""
+        log_entry_list = self._create_log_entry_list(5)
+        spool_path = str(tmpdir.join("event_log.spool"))
+        with django.test.override_settings(
+            EVENT_LOG_WRITE_MODE="spool", EVENT_LOG_SPOOL_PATH=spool_path
+        ):
+            for log_entry in log_entry_list:
+                d1_gmn.app.event_log_writer.submit(log_entry)
+            assert not self._get_written_list()
+            self.call_management_command(
+                "process_event_log_spool", "--spool-path", spool_path
+            )
+        assert self._get_written_list() == self._to_expected_list(log_entry_list)
+        assert not os.path.exists(spool_path)
+
+    def test_1030(self, tmpdir):
+        """Spool mode: A drain that is interrupted after committing a batch resumes
+        after that batch, without writing its entries again."""
+        log_entry_list = self._create_log_entry_list(5)
+        spool_path = str(tmpdir.join("event_log.spool"))
+        write_batch = d1_gmn.app.event_log_writer.write_batch
+        call_list = []
+
+        def fail_on_second_call(batch_list):
+            call_list.append(batch_list)
+            if len(call_list) == 2:
+                raise Exception("Interrupted")
+            return write_batch(batch_list)
+
+        with django.test.override_settings(
+            EVENT_LOG_WRITE_MODE="spool",
+            EVENT_LOG_SPOOL_PATH=spool_path,
+            EVENT_LOG_BATCH_SIZE=2,
+        ):
+            for log_entry in log_entry_list:
+                d1_gmn.app.event_log_writer.submit(log_entry)
+            with unittest.mock.patch.object(
+                d1_gmn.app.event_log_writer, "write_batch", fail_on_second_call
+            ):
+                with pytest.raises(Exception, match="Interrupted"):
+                    d1_gmn.app.event_log_writer.drain_spool()
+            assert self._get_written_list() == self._to_expected_list(
+                log_entry_list[:2]
+            )
+            assert d1_gmn.app.event_log_writer.drain_spool() == 3
+        assert self._get_written_list() == self._to_expected_list(log_entry_list)
+        assert not os.listdir(str(tmpdir))
+
+    def test_1040(self, tmpdir):
+        """Spool mode: A symbolic link planted at the spool path is not followed."""
+        target_path = str(tmpdir.join("target"))
+        spool_path = str(tmpdir.join("event_log.spool"))
+        os.symlink(target_path, spool_path)
+        with django.test.override_settings(
+            EVENT_LOG_WRITE_MODE="spool", EVENT_LOG_SPOOL_PATH=spool_path
+        ):
+            with pytest.raises(OSError):
+                d1_gmn.app.event_log_writer.submit(self._create_log_entry_list(1)[0])
+        assert not os.path.exists(target_path)
+
+    def test_1050(self, tmpdir):
+        """Spool mode: The spool file defaults to the private state directory of the
+        SciObj store."""
+        with django.test.override_settings(
+            EVENT_LOG_SPOOL_PATH=None, OBJECT_STORE_PATH=str(tmpdir)
+        ):
+            spool_path = d1_gmn.app.event_log_writer.get_spool_path()
+        assert os.path.dirname(spool_path) == str(tmpdir.join("var"))
+        assert stat.S_IMODE(os.stat(os.path.dirname(spool_path)).st_mode) == 0o700
@@ -0,0 +1,84 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test the SCIOBJ_DELIVERY_MODE settings for MNRead.get()."""
+import responses
+
+import django.test
+
+import d1_gmn.app.sciobj_store
+import d1_gmn.tests.gmn_mock
+import d1_gmn.tests.gmn_test_case
+
+import d1_test.d1_test_case
+
+
+@d1_test.d1_test_case.reproducible_random_decorator("TestGetDelivery")
+class TestGetDelivery(d1_gmn.tests.gmn_test_case.GMNTestCase):
+    def _create_and_get(self, client, delivery_mode, header_dict=None):
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(client)
+            with django.test.override_settings(SCIOBJ_DELIVERY_MODE=delivery_mode):
+                response = client.GET(["object", pid], headers=header_dict or {})
+        return pid, sciobj_bytes, response
+
+    @responses.activate
+    def test_1000(self, gmn_client_v1_v2):
+        """file_wrapper: Full object is returned."""
+        pid, sciobj_bytes, response = self._create_and_get(
+            gmn_client_v1_v2, "file_wrapper"
+        )
+        assert response.status_code == 200
+        assert response.content == sciobj_bytes
+        assert "ETag" in response.headers
+
+    @responses.activate
+    def test_1010(self, gmn_client_v1_v2):
+        """x_sendfile: Response holds the absolute path to the object and no body."""
+        pid, sciobj_bytes, response = self._create_and_get(
+            gmn_client_v1_v2, "x_sendfile"
+        )
+        assert response.status_code == 200
+        assert response.content == b""
+        assert response.headers[
+            "X-Sendfile"
+        ] == d1_gmn.app.sciobj_store.get_abs_sciobj_file_path_by_pid(pid)
+        assert "Content-Disposition" in response.headers
+
+    @responses.activate
+    def test_1020(self, gmn_client_v1_v2):
+        """x_accel_redirect: Response holds the path to the object below the internal
+        location."""
+        pid, sciobj_bytes, response = self._create_and_get(
+            gmn_client_v1_v2, "x_accel_redirect"
+        )
+        assert response.status_code == 200
+        assert response.content == b""
+        assert response.headers["X-Accel-Redirect"] == (
+            "/gmn_object_store/"
+            + d1_gmn.app.sciobj_store.get_rel_sciobj_file_path(pid)
+        )
+
+    @responses.activate
+    def test_1030(self, gmn_client_v1_v2):
+        """x_sendfile: Range requests are streamed by GMN."""
+        pid, sciobj_bytes, response = self._create_and_get(
+            gmn_client_v1_v2, "x_sendfile", {"Range": "bytes=0-9"}
+        )
+        assert response.status_code == 206
+        assert response.content == sciobj_bytes[:10]
+        assert "X-Sendfile" not in response.headers
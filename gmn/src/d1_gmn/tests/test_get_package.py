@@ -20,6 +20,7 @@
 """Test MNPackage.getPackage()"""
 import io
 import tempfile
+import unittest.mock
 import zipfile
 
 import freezegun
@@ -29,6 +30,11 @@ import responses
 import d1_common.bagit
 import d1_common.types.exceptions
 
+import django.test
+
+import d1_gmn.app.models
+import d1_gmn.app.sciobj_store
+import d1_gmn.app.views.get_package
 import d1_gmn.tests.gmn_test_case
 
 import d1_test.d1_test_case
@@ -112,3 +118,55 @@ class TestGetPackage(d1_gmn.tests.gmn_test_case.GMNTestCase):
         assert "zip" in response.headers["Content-Disposition"].lower()
         assert "Content-Length" not in response.headers
         self.sample.assert_equals(response.headers, "bagit_headers")
+
+    @responses.activate
+    def test_1040(self, gmn_client_v2):
+        """MNPackage.getPackage(): Members in already compressed formats are stored
+        without compression."""
+        pid_list = []
+        for format_id in ["text/tsv", "video/x-ms-wmv"]:
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(
+                gmn_client_v2, fileName=format_id.replace("/", "_"), formatId=format_id
+            )
+            pid_list.append(pid)
+        ore_pid = self.create_resource_map(gmn_client_v2, pid_list)
+        response = self.call_d1_client(gmn_client_v2.getPackage, ore_pid)
+        bagit_zip = zipfile.ZipFile(io.BytesIO(response.content))
+        compress_type_dict = {
+            o.filename.split("/")[-1]: o.compress_type for o in bagit_zip.filelist
+        }
+        assert compress_type_dict["text_tsv.tsv"] == zipfile.ZIP_DEFLATED
+        assert compress_type_dict["video_x-ms-wmv.wmv"] == zipfile.ZIP_STORED
+        assert compress_type_dict["video_x-ms-wmv.wmv.sysmeta.xml"] == (
+            zipfile.ZIP_DEFLATED
+        )
+
+    @responses.activate
+    def test_1050(self, gmn_client_v2):
+        """MNPackage.getPackage(): Closing the prefetcher while a member is being
+        streamed closes the streamed member and the prefetched member."""
+        pid_list = self.create_multiple_objects(gmn_client_v2, 3)
+        url_list = [
+            d1_gmn.app.models.ScienceObject.objects.get(pid__did=pid).url
+            for pid in pid_list
+        ]
+        file_list = []
+        open_sciobj_file_by_path = d1_gmn.app.sciobj_store.open_sciobj_file_by_path
+
+        def open_and_record(*arg_list, **arg_dict):
+            f = open_sciobj_file_by_path(*arg_list, **arg_dict)
+            file_list.append(f)
+            return f
+
+        with unittest.mock.patch.object(
+            d1_gmn.app.sciobj_store,
+            "open_sciobj_file_by_path",
+            side_effect=open_and_record,
+        ), django.test.override_settings(PACKAGE_PREFETCH_BYTES=1):
+            sciobj_prefetcher = d1_gmn.app.views.get_package._SciobjPrefetcher(
+                url_list
+            )
+            next(sciobj_prefetcher.gen_sciobj_iter(0))
+            sciobj_prefetcher.close()
+        assert len(file_list) == 2
+        assert all(f.closed for f in file_list)
@@ -0,0 +1,150 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test Range and conditional GET support in MNRead.get()."""
+import email.parser
+import email.policy
+
+import responses
+
+import d1_gmn.tests.gmn_mock
+import d1_gmn.tests.gmn_test_case
+
+import d1_test.d1_test_case
+
+
+@d1_test.d1_test_case.reproducible_random_decorator("TestGetRange")
+class TestGetRange(d1_gmn.tests.gmn_test_case.GMNTestCase):
+    def _create_and_get(self, client, header_dict):
+        pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(client)
+        response = client.GET(["object", pid], headers=header_dict)
+        return response, sciobj_bytes
+
+    @responses.activate
+    def test_1000(self, gmn_client_v1_v2):
+        """get(): Single range returns 206 with the requested bytes."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            response, sciobj_bytes = self._create_and_get(
+                gmn_client_v1_v2, {"Range": "bytes=10-19"}
+            )
+        assert response.status_code == 206
+        assert response.content == sciobj_bytes[10:20]
+        assert response.headers["Content-Range"] == "bytes 10-19/{}".format(
+            len(sciobj_bytes)
+        )
+        assert response.headers["Content-Length"] == "10"
+
+    @responses.activate
+    def test_1010(self, gmn_client_v1_v2):
+        """get(): Suffix and open ended ranges."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            response, sciobj_bytes = self._create_and_get(
+                gmn_client_v1_v2, {"Range": "bytes=-5"}
+            )
+            assert response.content == sciobj_bytes[-5:]
+            response, sciobj_bytes = self._create_and_get(
+                gmn_client_v1_v2, {"Range": "bytes=5-"}
+            )
+            assert response.content == sciobj_bytes[5:]
+
+    @responses.activate
+    def test_1020(self, gmn_client_v1_v2):
+        """get(): Multiple ranges return a multipart/byteranges body."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            response, sciobj_bytes = self._create_and_get(
+                gmn_client_v1_v2, {"Range": "bytes=0-3,8-11"}
+            )
+        assert response.status_code == 206
+        assert int(response.headers["Content-Length"]) == len(response.content)
+        msg = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            "Content-Type: {}\r\n\r\n".format(response.headers["Content-Type"]).encode(
+                "utf-8"
+            )
+            + response.content
+        )
+        assert [p.get_content() for p in msg.iter_parts()] == [
+            sciobj_bytes[0:4],
+            sciobj_bytes[8:12],
+        ]
+
+    @responses.activate
+    def test_1030(self, gmn_client_v1_v2):
+        """get(): Unsatisfiable range returns 416."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            response, sciobj_bytes = self._create_and_get(
+                gmn_client_v1_v2, {"Range": "bytes=100000000-"}
+            )
+        assert response.status_code == 416
+        assert response.headers["Content-Range"] == "bytes */{}".format(
+            len(sciobj_bytes)
+        )
+
+    @responses.activate
+    def test_1040(self, gmn_client_v1_v2):
+        """get(): If-Range with a non-matching ETag returns the full object."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            response, sciobj_bytes = self._create_and_get(
+                gmn_client_v1_v2, {"Range": "bytes=0-3", "If-Range": '"stale"'}
+            )
+        assert response.status_code == 200
+        assert response.content == sciobj_bytes
+
+    @responses.activate
+    def test_1050(self, gmn_client_v1_v2):
+        """get(): If-None-Match with the current ETag returns 304."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(gmn_client_v1_v2)
+            etag_str = gmn_client_v1_v2.GET(["object", pid]).headers["ETag"]
+            response = gmn_client_v1_v2.GET(
+                ["object", pid], headers={"If-None-Match": etag_str}
+            )
+            assert response.status_code == 304
+            assert response.headers["ETag"] == etag_str
+            response = gmn_client_v1_v2.GET(
+                ["object", pid], headers={"If-None-Match": '"stale"'}
+            )
+            assert response.status_code == 200
+
+    @responses.activate
+    def test_1060(self, gmn_client_v1_v2):
+        """get(): If-Modified-Since at or after the modified date returns 304."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(gmn_client_v1_v2)
+            last_modified_str = gmn_client_v1_v2.GET(["object", pid]).headers[
+                "Last-Modified"
+            ]
+            response = gmn_client_v1_v2.GET(
+                ["object", pid], headers={"If-Modified-Since": last_modified_str}
+            )
+            assert response.status_code == 304
+            response = gmn_client_v1_v2.GET(
+                ["object", pid],
+                headers={"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"},
+            )
+            assert response.status_code == 200
+
+    @responses.activate
+    def test_1070(self, gmn_client_v1_v2):
+        """Accept-Ranges is only returned by get(), which honors Range, and not by
+        describe()."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(gmn_client_v1_v2)
+            response = gmn_client_v1_v2.GET(["object", pid])
+            assert response.headers["Accept-Ranges"] == "bytes"
+            response = gmn_client_v1_v2.HEAD(["object", pid])
+            assert "Accept-Ranges" not in response.headers
+            assert "ETag" not in response.headers
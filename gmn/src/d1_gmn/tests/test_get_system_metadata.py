@@ -25,14 +25,22 @@ import responses
 import d1_common.checksum
 import d1_common.system_metadata
 import d1_common.types.exceptions
+import d1_common.xml
 
+import django.db
+import django.test.utils
+
+import d1_gmn.app.models
+import d1_gmn.app.sysmeta
 import d1_gmn.tests.gmn_mock
 import d1_gmn.tests.gmn_test_case
 
+import d1_test.d1_test_case
 import d1_test.instance_generator.identifier
 import d1_test.instance_generator.sciobj
 
 
+@d1_test.d1_test_case.reproducible_random_decorator("TestGetSystemMetadata")
 class TestGetSystemMetadata(d1_gmn.tests.gmn_test_case.GMNTestCase):
     @responses.activate
     def test_1000(self):
@@ -93,3 +101,72 @@ class TestGetSystemMetadata(d1_gmn.tests.gmn_test_case.GMNTestCase):
             assert d1_common.system_metadata.are_equivalent_pyxb(
                 orig_sysmeta_pyxb, recv_sysmeta_pyxb, ignore_filename=True
             )
+
+    def test_1020(self):
+        """model_to_pyxb_many(): Returns the same System Metadata as model_to_pyxb(), in
+        the order of the PID list."""
+        pid_list = self.get_random_pid_sample(20)
+        many_pyxb_list = d1_gmn.app.sysmeta.model_to_pyxb_many(pid_list)
+        assert [
+            d1_common.xml.serialize_for_transport(v) for v in many_pyxb_list
+        ] == [
+            d1_common.xml.serialize_for_transport(
+                d1_gmn.app.sysmeta.model_to_pyxb(pid)
+            )
+            for pid in pid_list
+        ]
+
+    def test_1030(self):
+        """model_to_pyxb_many(): Query count does not depend on the number of
+        objects."""
+
+        def get_query_count(pid_list):
+            with django.test.utils.CaptureQueriesContext(django.db.connection) as ctx:
+                d1_gmn.app.sysmeta.model_to_pyxb_many(pid_list)
+            return len(ctx.captured_queries)
+
+        pid_list = self.get_random_pid_sample(20)
+        assert get_query_count(pid_list[:1]) == get_query_count(pid_list)
+
+    def test_1040(self):
+        """model_to_pyxb_many(): Non-existing PID raises DoesNotExist."""
+        pid_list = self.get_random_pid_sample(2) + ["_invalid_pid_"]
+        with pytest.raises(d1_gmn.app.models.ScienceObject.DoesNotExist):
+            d1_gmn.app.sysmeta.model_to_pyxb_many(pid_list)
+
+    @responses.activate
+    def test_1050(self):
+        """getSystemMetadataBulk(): Returns the same System Metadata as
+        getSystemMetadata(), in the order of the PID list, and NotFound for unknown
+        PIDs."""
+        pid_list = self.get_random_pid_sample(5) + ["_invalid_pid_"]
+        result_list = list(
+            self.call_d1_client(self.client_v2.getSystemMetadataBulk, pid_list)
+        )
+        assert [pid for pid, _ in result_list] == pid_list
+        for pid, result in result_list[:-1]:
+            assert d1_common.system_metadata.are_equivalent_pyxb(
+                result, self.call_d1_client(self.client_v2.getSystemMetadata, pid)
+            )
+        assert isinstance(result_list[-1][1], d1_common.types.exceptions.NotFound)
+
+    @responses.activate
+    def test_1060(self, gmn_client_v2):
+        """getSystemMetadataBulk(): Access is checked for each object."""
+        public_pid = self.create_obj(gmn_client_v2)[0]
+        private_pid = self.create_obj(gmn_client_v2, permission_list=None)[0]
+        result_dict = dict(
+            self.call_d1_client(
+                gmn_client_v2.getSystemMetadataBulk,
+                [public_pid, private_pid],
+                session_subj_list=["subj1"],
+                trusted_subj_list=None,
+                disable_auth=False,
+            )
+        )
+        assert d1_common.xml.get_req_val(result_dict[public_pid].identifier) == (
+            public_pid
+        )
+        assert isinstance(
+            result_dict[private_pid], d1_common.types.exceptions.NotAuthorized
+        )
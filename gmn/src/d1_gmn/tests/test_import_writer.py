@@ -0,0 +1,115 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test batched database writes for the import management command."""
+import os
+import tempfile
+
+import responses
+
+import d1_common.date_time
+import d1_common.system_metadata
+import d1_common.types.dataoneTypes
+
+import d1_gmn.app.import_writer
+import d1_gmn.app.models
+import d1_gmn.app.sciobj_store
+import d1_gmn.tests.gmn_test_case
+
+import d1_test.d1_test_case
+
+
+@d1_test.d1_test_case.reproducible_random_decorator("TestImportWriter")
+class TestImportWriter(d1_gmn.tests.gmn_test_case.GMNTestCase):
+    def _create_sciobj_item_list(self, client, n_items):
+        item_list = []
+        for _ in range(n_items):
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.generate_sciobj_with_defaults(
+                client
+            )
+            with tempfile.NamedTemporaryFile(
+                dir=d1_gmn.app.sciobj_store.get_abs_sciobj_tmp_path(), delete=False
+            ) as tmp_file:
+                tmp_file.write(sciobj_bytes)
+            item_list.append(
+                (
+                    sciobj_bytes,
+                    d1_gmn.app.import_writer.SciobjItem(
+                        pid, sysmeta_pyxb, None, tmp_file.name
+                    ),
+                )
+            )
+        return item_list
+
+    def _create_log_entry_pyxb(self, entry_id, pid):
+        log_entry_pyxb = d1_common.types.dataoneTypes.logEntry()
+        log_entry_pyxb.entryId = entry_id
+        log_entry_pyxb.identifier = pid
+        log_entry_pyxb.ipAddress = "10.0.0.1"
+        log_entry_pyxb.userAgent = "test_import_writer"
+        log_entry_pyxb.subject = "subj1"
+        log_entry_pyxb.event = "read"
+        log_entry_pyxb.dateLogged = d1_common.date_time.create_utc_datetime(
+            2001, 2, 3, 4, 5, 6
+        )
+        log_entry_pyxb.nodeIdentifier = "urn:node:test_import_writer"
+        return log_entry_pyxb
+
+    @responses.activate
+    def test_1000(self, gmn_client_v2):
+        """write_sciobj_batch(): Objects are created with their System Metadata, and
+        the object bytes are moved into the SciObj store."""
+        item_list = self._create_sciobj_item_list(gmn_client_v2, 3)
+        d1_gmn.app.import_writer.write_sciobj_batch([item for _, item in item_list])
+        for sciobj_bytes, item in item_list:
+            assert not os.path.exists(item.tmp_path)
+            recv_sciobj_bytes, recv_sysmeta_pyxb = self.get_obj(gmn_client_v2, item.pid)
+            assert recv_sciobj_bytes == sciobj_bytes
+            assert d1_common.system_metadata.are_equivalent_pyxb(
+                item.sysmeta_pyxb, recv_sysmeta_pyxb, ignore_filename=True
+            )
+
+    @responses.activate
+    def test_1010(self, gmn_client_v2):
+        """get_existing_pid_set(): Returns only the PIDs of local objects."""
+        item_list = self._create_sciobj_item_list(gmn_client_v2, 2)
+        d1_gmn.app.import_writer.write_sciobj_batch([item_list[0][1]])
+        assert d1_gmn.app.import_writer.get_existing_pid_set(
+            [item.pid for _, item in item_list]
+        ) == {item_list[0][1].pid}
+        d1_gmn.app.import_writer.discard_sciobj_item(item_list[1][1])
+        assert not os.path.exists(item_list[1][1].tmp_path)
+
+    @responses.activate
+    def test_1020(self, gmn_client_v2):
+        """write_event_batch(): Events for local objects are written with their
+        original timestamps. Events for unknown objects are skipped."""
+        pid = self.get_random_pid_sample(1)[0]
+        assert (
+            d1_gmn.app.import_writer.write_event_batch(
+                [
+                    self._create_log_entry_pyxb("1", pid),
+                    self._create_log_entry_pyxb("2", "unknown_pid"),
+                ]
+            )
+            == 1
+        )
+        assert list(
+            d1_gmn.app.models.EventLog.objects.filter(
+                user_agent__user_agent="test_import_writer"
+            ).values_list("sciobj__pid__did", "timestamp")
+        ) == [(pid, d1_common.date_time.create_utc_datetime(2001, 2, 3, 4, 5, 6))]
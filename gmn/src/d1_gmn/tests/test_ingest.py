@@ -0,0 +1,123 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test single pass ingest of uploaded science object bytes."""
+import hashlib
+import io
+import os
+
+import pytest
+import responses
+
+import d1_common.checksum
+import d1_common.types.exceptions
+
+import django.core.files.uploadhandler
+import django.test
+
+import d1_gmn.app.ingest
+import d1_gmn.app.sciobj_store
+import d1_gmn.tests.gmn_mock
+import d1_gmn.tests.gmn_test_case
+
+import d1_test.d1_test_case
+
+
+@d1_test.d1_test_case.reproducible_random_decorator("TestIngest")
+class TestIngest(d1_gmn.tests.gmn_test_case.GMNTestCase):
+    def _ingest(self, chunk_list):
+        handler = d1_gmn.app.ingest.SciobjIngestUploadHandler()
+        with pytest.raises(django.core.files.uploadhandler.StopFutureHandlers):
+            handler.new_file("object", "content.bin", "application/octet-stream", None)
+        start_int = 0
+        for chunk_bytes in chunk_list:
+            assert handler.receive_data_chunk(chunk_bytes, start_int) is None
+            start_int += len(chunk_bytes)
+        return handler.file_complete(start_int)
+
+    def test_1000(self):
+        """SciobjIngestUploadHandler: Checksums are calculated and small objects are
+        kept in memory while the upload is received."""
+        chunk_list = [b"a" * 10, b"b" * 20]
+        uploaded_file = self._ingest(chunk_list)
+        sciobj_bytes = b"".join(chunk_list)
+        assert uploaded_file.size == len(sciobj_bytes)
+        assert d1_gmn.app.ingest.get_checksum(
+            uploaded_file, "MD5"
+        ) == hashlib.md5(sciobj_bytes).hexdigest()
+        assert d1_gmn.app.ingest.get_checksum(
+            uploaded_file, "SHA-1"
+        ) == hashlib.sha1(sciobj_bytes).hexdigest()
+        assert d1_gmn.app.ingest.get_checksum(uploaded_file, "SHA-256") is None
+        assert d1_gmn.app.ingest.get_sciobj_bytes(uploaded_file) == sciobj_bytes
+        assert os.path.dirname(
+            uploaded_file.temporary_file_path()
+        ) == d1_gmn.app.sciobj_store.get_abs_sciobj_tmp_path()
+        assert uploaded_file.read() == sciobj_bytes
+        uploaded_file.close()
+        assert not os.path.exists(uploaded_file.temporary_file_path())
+
+    def test_1010(self):
+        """SciobjIngestUploadHandler: Objects above INGEST_HEAD_SIZE are not kept in
+        memory."""
+        with django.test.override_settings(INGEST_HEAD_SIZE=16):
+            uploaded_file = self._ingest([b"a" * 10, b"b" * 10])
+        assert d1_gmn.app.ingest.get_sciobj_bytes(uploaded_file) is None
+        uploaded_file.close()
+
+    def test_1020(self):
+        """SciobjIngestUploadHandler: Other file fields are passed to the next
+        handler."""
+        handler = d1_gmn.app.ingest.SciobjIngestUploadHandler()
+        handler.new_file("sysmeta", "sysmeta.xml", "text/xml", None)
+        assert handler.receive_data_chunk(b"<a/>", 0) == b"<a/>"
+        assert handler.file_complete(4) is None
+
+    @responses.activate
+    def test_1030(self, gmn_client_v1_v2):
+        """MNStorage.create(): Object is moved into place from the temporary file, and
+        no temporary files remain."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.generate_sciobj_with_defaults(
+                gmn_client_v1_v2
+            )
+            gmn_client_v1_v2.create(pid, io.BytesIO(sciobj_bytes), sysmeta_pyxb)
+        with d1_gmn.app.sciobj_store.open_sciobj_file_by_pid_ctx(pid) as sciobj_file:
+            assert sciobj_file.read() == sciobj_bytes
+        assert not os.listdir(d1_gmn.app.sciobj_store.get_abs_sciobj_tmp_path())
+
+    @responses.activate
+    def test_1040(self, gmn_client_v1_v2):
+        """MNStorage.create(): Checksum for an algorithm that is not calculated during
+        the upload is verified by reading the object."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.generate_sciobj_with_defaults(
+                gmn_client_v1_v2
+            )
+            sysmeta_pyxb.checksum = d1_common.checksum.create_checksum_object_from_bytes(
+                sciobj_bytes, "SHA-256"
+            )
+            with django.test.override_settings(INGEST_CHECKSUM_ALGORITHMS=["MD5"]):
+                gmn_client_v1_v2.create(pid, io.BytesIO(sciobj_bytes), sysmeta_pyxb)
+                sysmeta_pyxb.checksum = d1_common.checksum.create_checksum_object_from_bytes(
+                    b"invalid", "SHA-256"
+                )
+                pid = "{}_invalid".format(pid)
+                sysmeta_pyxb.identifier = pid
+                sysmeta_pyxb.seriesId = None
+                with pytest.raises(d1_common.types.exceptions.InvalidSystemMetadata):
+                    gmn_client_v1_v2.create(pid, io.BytesIO(sciobj_bytes), sysmeta_pyxb)
@@ -31,6 +31,7 @@ import responses
 import d1_common
 import d1_common.types.exceptions
 
+import d1_gmn.app.models
 import d1_gmn.tests.gmn_mock
 import d1_gmn.tests.gmn_test_case
 
@@ -205,3 +206,43 @@ class TestListObjects(d1_gmn.tests.gmn_test_case.GMNTestCase):
                 "replica_status_filter",
                 gmn_client_v1_v2,
             )
+
+    @responses.activate
+    def test_1130(self, gmn_client_v1_v2):
+        """MNRead.listObjects(): The cached total is invalidated when an object is
+        created."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            n_obj_1 = self.get_total_objects(gmn_client_v1_v2)
+            assert self.get_total_objects(gmn_client_v1_v2) == n_obj_1
+            self.create_obj(gmn_client_v1_v2)
+            assert self.get_total_objects(gmn_client_v1_v2) == n_obj_1 + 1
+
+    @responses.activate
+    def test_1140(self, gmn_client_v1_v2):
+        """listObjects(): Access policy filter: Subject receives public objects and
+        objects for which they have been explicitly granted access."""
+        public_pid, _, _, _ = self.create_obj(
+            gmn_client_v1_v2, permission_list=[(["public"], ["read"])]
+        )
+        granted_pid, _, _, _ = self.create_obj(
+            gmn_client_v1_v2, permission_list=[(["lo_subj_1"], ["read"])]
+        )
+        private_pid, _, _, _ = self.create_obj(
+            gmn_client_v1_v2, permission_list=[(["lo_subj_2"], ["write"])]
+        )
+        assert d1_gmn.app.models.ScienceObject.objects.get(
+            pid__did=public_pid
+        ).is_public
+        assert not d1_gmn.app.models.ScienceObject.objects.get(
+            pid__did=granted_pid
+        ).is_public
+        with d1_gmn.tests.gmn_mock.set_auth_context(
+            session_subj_list=["lo_subj_1"], trusted_subj_list=[]
+        ):
+            for pid, is_listed in (
+                (public_pid, True),
+                (granted_pid, True),
+                (private_pid, False),
+            ):
+                object_list_pyxb = gmn_client_v1_v2.listObjects(identifier=pid)
+                assert len(object_list_pyxb.objectInfo) == int(is_listed)
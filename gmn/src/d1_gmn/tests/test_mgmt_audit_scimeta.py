@@ -0,0 +1,77 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test the "audit-scimeta" management command."""
+import io
+import json
+import tempfile
+
+import responses
+
+import django.test
+
+import d1_gmn.tests.gmn_mock
+import d1_gmn.tests.gmn_test_case
+
+import d1_test.d1_test_case
+import d1_test.instance_generator.identifier
+import d1_test.instance_generator.system_metadata
+
+FORMAT_ID = "eml://ecoinformatics.org/eml-2.1.1"
+
+
+@d1_test.d1_test_case.reproducible_random_decorator("TestMgmtAuditSciMeta")
+class TestMgmtAuditSciMeta(d1_gmn.tests.gmn_test_case.GMNTestCase):
+    def _create_scimeta(self, client, xml_str):
+        pid = d1_test.instance_generator.identifier.generate_pid("PID_SCIMETA_")
+        sysmeta_pyxb = d1_test.instance_generator.system_metadata.generate_from_file(
+            client,
+            io.BytesIO(xml_str.encode("utf-8")),
+            {"identifier": pid, "formatId": FORMAT_ID, "replica": None},
+        )
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            client.create(pid, io.BytesIO(xml_str.encode("utf-8")), sysmeta_pyxb)
+        return pid
+
+    @responses.activate
+    def test_1000(self, gmn_client_v2):
+        """audit-scimeta: Writes a JSON line with the validation result for each
+        Science Metadata object."""
+        valid_pid = self._create_scimeta(
+            gmn_client_v2, self.test_files.load_xml_to_str("scimeta_eml_valid.xml")
+        )
+        with django.test.override_settings(SCIMETA_VALIDATION_ENABLED=False):
+            invalid_pid = self._create_scimeta(
+                gmn_client_v2,
+                self.test_files.load_xml_to_str("scimeta_eml_invalid_1.xml"),
+            )
+        with tempfile.NamedTemporaryFile("r") as out_file:
+            self.call_management_command(
+                "audit-scimeta",
+                "--format-id",
+                FORMAT_ID,
+                "--workers",
+                "1",
+                "--output",
+                out_file.name,
+            )
+            result_dict = {
+                d["pid"]: d for d in (json.loads(line) for line in out_file)
+            }
+        assert result_dict[valid_pid]["is_valid"]
+        assert not result_dict[invalid_pid]["is_valid"]
+        assert "unexpectedElement" in result_dict[invalid_pid]["error"]
@@ -0,0 +1,142 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test the "audit-sciobj-fixity" management command."""
+import json
+import os
+import tempfile
+
+import pytest
+import responses
+
+import django.core.management
+import django.test
+
+import d1_gmn.app.fixity
+import d1_gmn.app.models
+import d1_gmn.app.sciobj_store
+import d1_gmn.tests.gmn_mock
+import d1_gmn.tests.gmn_test_case
+
+import d1_test.d1_test_case
+
+
+@d1_test.d1_test_case.reproducible_random_decorator("TestMgmtAuditSciobjFixity")
+class TestMgmtAuditSciobjFixity(d1_gmn.tests.gmn_test_case.GMNTestCase):
+    def _create_objects(self, client, count):
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            return [self.create_obj(client)[0] for _ in range(count)]
+
+    def _audit(self, checkpoint_path, *arg_list):
+        self.call_management_command(
+            "audit-sciobj-fixity",
+            "--checkpoint-path",
+            checkpoint_path,
+            "--batch-size",
+            "1",
+            *arg_list
+        )
+
+    def _get_status_dict(self):
+        return dict(
+            d1_gmn.app.models.ScienceObjectFixity.objects.values_list(
+                "sciobj__pid__did", "status"
+            )
+        )
+
+    @responses.activate
+    def test_1000(self, gmn_client_v2):
+        """audit-sciobj-fixity: Records the result of the check for each object."""
+        ok_pid, damaged_pid, missing_pid = self._create_objects(gmn_client_v2, 3)
+        with open(
+            d1_gmn.app.sciobj_store.get_abs_sciobj_file_path_by_pid(damaged_pid), "ab"
+        ) as f:
+            f.write(b"damaged")
+        os.unlink(d1_gmn.app.sciobj_store.get_abs_sciobj_file_path_by_pid(missing_pid))
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            checkpoint_path = os.path.join(tmp_dir_path, "checkpoint")
+            self._audit(checkpoint_path, "--max-mb-per-sec", "100")
+            assert not os.path.exists(checkpoint_path)
+        assert self._get_status_dict() == {
+            ok_pid: d1_gmn.app.fixity.STATUS_OK,
+            damaged_pid: d1_gmn.app.fixity.STATUS_SIZE_MISMATCH,
+            missing_pid: d1_gmn.app.fixity.STATUS_MISSING,
+        }
+
+    @responses.activate
+    def test_1010(self, gmn_client_v2):
+        """audit-sciobj-fixity: Resumes after the object in the checkpoint file."""
+        pid_list = self._create_objects(gmn_client_v2, 3)
+        sciobj_id = d1_gmn.app.models.ScienceObject.objects.get(pid__did=pid_list[0]).id
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            checkpoint_path = os.path.join(tmp_dir_path, "checkpoint")
+            with open(checkpoint_path, "w") as f:
+                json.dump({"sciobj_id": sciobj_id}, f)
+            self._audit(checkpoint_path)
+        assert sorted(self._get_status_dict()) == sorted(pid_list[1:])
+
+    @responses.activate
+    def test_1020(self, gmn_client_v2):
+        """audit-sciobj-fixity: Objects verified within --min-age-days are skipped."""
+        pid_list = self._create_objects(gmn_client_v2, 2)
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            checkpoint_path = os.path.join(tmp_dir_path, "checkpoint")
+            self._audit(checkpoint_path)
+            timestamp_list = list(
+                d1_gmn.app.models.ScienceObjectFixity.objects.order_by(
+                    "sciobj_id"
+                ).values_list("timestamp", flat=True)
+            )
+            self._audit(checkpoint_path, "--min-age-days", "1")
+        assert (
+            list(
+                d1_gmn.app.models.ScienceObjectFixity.objects.order_by(
+                    "sciobj_id"
+                ).values_list("timestamp", flat=True)
+            )
+            == timestamp_list
+        )
+        assert len(timestamp_list) == len(pid_list)
+
+    @responses.activate
+    def test_1030(self, gmn_client_v2):
+        """audit-sciobj-fixity: A checkpoint file that is writable by others is
+        refused, so that other users cannot make the audit skip objects."""
+        self._create_objects(gmn_client_v2, 1)
+        with tempfile.TemporaryDirectory() as tmp_dir_path:
+            checkpoint_path = os.path.join(tmp_dir_path, "checkpoint")
+            with open(checkpoint_path, "w") as f:
+                json.dump({"sciobj_id": 2 ** 31}, f)
+            os.chmod(checkpoint_path, 0o666)
+            with pytest.raises(
+                django.core.management.CommandError, match="Invalid checkpoint"
+            ):
+                self._audit(checkpoint_path)
+        assert not self._get_status_dict()
+
+    def test_1040(self, tmpdir):
+        """get_checkpoint_path(): Defaults to the private state directory of the SciObj
+        store."""
+        command = django.core.management.load_command_class(
+            "d1_gmn.app", "audit-sciobj-fixity"
+        )
+        command.opt_dict = {"checkpoint_path": None}
+        with django.test.override_settings(OBJECT_STORE_PATH=str(tmpdir)):
+            checkpoint_path = command.get_checkpoint_path()
+        assert checkpoint_path == str(
+            tmpdir.join("var", "audit-sciobj-fixity.checkpoint")
+        )
@@ -0,0 +1,97 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test the "process_replication_queue" management command."""
+import io
+import unittest.mock
+
+import pytest
+
+import d1_common.types.dataoneTypes
+import d1_common.types.exceptions
+
+import d1_gmn.app.management.commands.process_replication_queue
+import d1_gmn.tests.gmn_test_case
+
+import d1_test.d1_test_case
+
+
+@d1_test.d1_test_case.reproducible_random_decorator("TestMgmtProcessReplicationQueue")
+class TestMgmtProcessReplicationQueue(d1_gmn.tests.gmn_test_case.GMNTestCase):
+    def _create_command(self):
+        return d1_gmn.app.management.commands.process_replication_queue.Command()
+
+    def _create_bytestream(self, sciobj_bytes):
+        return unittest.mock.Mock(
+            iter_content=lambda chunk_size: iter(
+                [sciobj_bytes[:10], sciobj_bytes[10:]]
+            )
+        )
+
+    def _create_node_list(self, node_tup_list):
+        node_list_pyxb = d1_common.types.dataoneTypes.nodeList()
+        for node_id, base_url in node_tup_list:
+            node_pyxb = d1_common.types.dataoneTypes.node()
+            node_pyxb.identifier = node_id
+            node_pyxb.baseURL = base_url
+            node_list_pyxb.node.append(node_pyxb)
+        return node_list_pyxb
+
+    def test_1000(self, gmn_client_v2):
+        """store_and_verify_science_object_bytes(): Bytes matching the System Metadata
+        are written to the file."""
+        pid, sid, sciobj_bytes, sysmeta_pyxb = self.generate_sciobj_with_defaults(
+            gmn_client_v2
+        )
+        sciobj_file = io.BytesIO()
+        self._create_command().store_and_verify_science_object_bytes(
+            sysmeta_pyxb, self._create_bytestream(sciobj_bytes), sciobj_file
+        )
+        assert sciobj_file.getvalue() == sciobj_bytes
+
+    def test_1010(self, gmn_client_v2):
+        """store_and_verify_science_object_bytes(): Bytes not matching the checksum in
+        the System Metadata raise ServiceFailure."""
+        pid, sid, sciobj_bytes, sysmeta_pyxb = self.generate_sciobj_with_defaults(
+            gmn_client_v2
+        )
+        damaged_bytes = bytes([sciobj_bytes[0] ^ 0xFF]) + sciobj_bytes[1:]
+        with pytest.raises(
+            d1_common.types.exceptions.ServiceFailure, match="Checksum of replica"
+        ):
+            self._create_command().store_and_verify_science_object_bytes(
+                sysmeta_pyxb, self._create_bytestream(damaged_bytes), io.BytesIO()
+            )
+
+    def test_1020(self):
+        """get_mn_client(): The Node list is retrieved once, and a client is created
+        once for each source Member Node."""
+        command = self._create_command()
+        command.cn_client = unittest.mock.Mock()
+        command.cn_client.listNodes.return_value = self._create_node_list(
+            [
+                ("urn:node:A", "https://a.example.org/mn"),
+                ("urn:node:B", "https://b.example.org/mn"),
+            ]
+        )
+        command.node_base_url_dict = command.get_node_base_url_dict()
+        client_a = command.get_mn_client("urn:node:A")
+        assert command.get_mn_client("urn:node:A") is client_a
+        assert command.get_mn_client("urn:node:B") is not client_a
+        assert command.cn_client.listNodes.call_count == 1
+        with pytest.raises(command.CommandError, match="Unable to resolve"):
+            command.get_mn_client("urn:node:C")
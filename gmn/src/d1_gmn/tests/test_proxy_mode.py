@@ -186,3 +186,22 @@ class TestProxyMode(d1_gmn.tests.gmn_test_case.GMNTestCase):
         user_str, pw_str = self.decode_basic_auth(auth_str)
         assert user_str == AUTH_USERNAME
         assert pw_str == AUTH_PASSWORD
+
+    @responses.activate
+    def test_1080(self):
+        """get_sciobj_iter_remote(): Requests to the same remote server share a pooled
+        session, and requests and errors are counted per server."""
+        d1_gmn.app.proxy.close_sessions()
+        responses.add(responses.GET, "https://a.example.org/obj", body=b"abc")
+        responses.add(responses.GET, "https://a.example.org/missing", status=404)
+        responses.add(responses.GET, "https://b.example.org/obj", body=b"def")
+        url = "https://a.example.org/obj"
+        assert b"".join(d1_gmn.app.proxy.get_sciobj_iter_remote(url)) == b"abc"
+        d1_gmn.app.proxy.get_sciobj_iter_remote("https://a.example.org/missing")
+        d1_gmn.app.proxy.get_sciobj_iter_remote("https://b.example.org/obj")
+        assert len(d1_gmn.app.proxy._session_dict) == 2
+        stats_dict = d1_gmn.app.proxy.get_stats()
+        assert stats_dict["https://a.example.org"]["request"] == 2
+        assert stats_dict["https://a.example.org"]["error"] == 1
+        assert stats_dict["https://b.example.org"]["error"] == 0
+        d1_gmn.app.proxy.close_sessions()
@@ -0,0 +1,87 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Regression tests for the number of database queries issued per API call.
+
+The number of queries required for generating a page of results must not depend on the
+number of items in the page.
+
+"""
+import logging
+import time
+
+import responses
+
+import django.db
+import django.test
+import django.test.utils
+
+import d1_gmn.tests.gmn_mock
+import d1_gmn.tests.gmn_test_case
+
+import d1_test.d1_test_case
+
+
+@d1_test.d1_test_case.reproducible_random_decorator("TestQueryCount")
+class TestQueryCount(d1_gmn.tests.gmn_test_case.GMNTestCase):
+    def _get_query_count(self, api_func, count_int):
+        """Call ``api_func`` with a slice of ``count_int`` items and return the number
+        of database queries that were issued."""
+        with django.test.utils.CaptureQueriesContext(django.db.connection) as ctx:
+            start_ts = time.time()
+            slice_pyxb = api_func(start=0, count=count_int)
+            logging.info(
+                "Query count benchmark: api={} items={} queries={} sec={:.3f}".format(
+                    api_func.__name__,
+                    slice_pyxb.count,
+                    len(ctx.captured_queries),
+                    time.time() - start_ts,
+                )
+            )
+        assert slice_pyxb.count == count_int
+        return len(ctx.captured_queries)
+
+    def _assert_constant_query_count(self, api_func):
+        # Disable the count cache so that both calls count the result set.
+        with django.test.override_settings(COUNT_CACHE_ENABLED=False):
+            with d1_gmn.tests.gmn_mock.disable_auth():
+                assert self._get_query_count(api_func, 1) == self._get_query_count(
+                    api_func, 100
+                )
+
+    @responses.activate
+    def test_1000(self, gmn_client_v1_v2):
+        """listObjects(): Query count does not depend on page size."""
+        self._assert_constant_query_count(gmn_client_v1_v2.listObjects)
+
+    @responses.activate
+    def test_1010(self, gmn_client_v1_v2):
+        """getLogRecords(): Query count does not depend on page size."""
+        self._assert_constant_query_count(gmn_client_v1_v2.getLogRecords)
+
+    @responses.activate
+    def test_1020(self, gmn_client_v1_v2):
+        """get(): The object is resolved once per call, and reused for authorization,
+        response headers and the Event Log."""
+        pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(gmn_client_v1_v2)
+        # Populate the dimension caches used by the Event Log.
+        self.call_d1_client(gmn_client_v1_v2.get, pid)
+        with django.test.utils.CaptureQueriesContext(django.db.connection) as ctx:
+            response = self.call_d1_client(gmn_client_v1_v2.get, pid)
+        assert response.content == sciobj_bytes
+        # Resolve the object, get the permission level and write the read event.
+        assert len(ctx.captured_queries) <= 3
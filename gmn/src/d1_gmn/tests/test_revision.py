@@ -25,10 +25,13 @@ import responses
 
 import d1_common.types.exceptions
 
+import django.test
+
 import d1_gmn.app.did
 import d1_gmn.app.model_util
 import d1_gmn.app.models
 import d1_gmn.app.revision
+import d1_gmn.app.sid_cache
 import d1_gmn.app.sysmeta
 import d1_gmn.tests.gmn_mock
 import d1_gmn.tests.gmn_test_case
@@ -235,3 +238,35 @@ class TestRevision(d1_gmn.tests.gmn_test_case.GMNTestCase):
         last_pid = b_chain_list[-1]
         sysmeta_pyxb = self.call_d1_client(gmn_client_v2.getSystemMetadata, a_sid)
         assert sysmeta_pyxb.identifier.value() == last_pid
+
+    @responses.activate
+    def test_1100(self, gmn_client_v2):
+        """A resolved SID is invalidated when the chain is updated, and resolves to
+        the new head."""
+        with django.test.override_settings(SID_CACHE_ENABLED=True):
+            sid, pid_chain_list = self.create_revision_chain(
+                gmn_client_v2, chain_len=3, sid=True
+            )
+            assert d1_gmn.app.revision.resolve_sid(sid) == pid_chain_list[-1]
+            assert d1_gmn.app.sid_cache.get(sid) == pid_chain_list[-1]
+            new_pid, sid, sciobj_bytes, sysmeta_pyxb = self.update_obj(
+                gmn_client_v2, old_pid=pid_chain_list[-1], sid=sid
+            )
+            assert d1_gmn.app.revision.resolve_sid(sid) == new_pid
+
+    @responses.activate
+    def test_1110(self, gmn_client_v2):
+        """The recursive query and the per-revision walk find the same head."""
+        sid, pid_chain_list = self.create_revision_chain(
+            gmn_client_v2, chain_len=5, sid=True
+        )
+        for pid in pid_chain_list + ["unknown_pid"]:
+            expected_pid = pid_chain_list[-1] if pid in pid_chain_list else None
+            assert (
+                d1_gmn.app.revision._find_head_or_latest_connected_cte(pid)
+                == expected_pid
+            )
+            assert (
+                d1_gmn.app.revision._find_head_or_latest_connected_iter(pid)
+                == expected_pid
+            )
@@ -0,0 +1,146 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test caching of subjects extracted from certificates and JWTs."""
+import datetime
+import logging
+import time
+import unittest.mock
+
+import freezegun
+
+import d1_common.cert.jwt
+import d1_common.cert.subjects
+import d1_common.cert.x509
+
+import django.test
+
+import d1_gmn.app.middleware.session_cache
+import d1_gmn.app.middleware.session_cert
+import d1_gmn.app.middleware.session_jwt
+import d1_gmn.tests.gmn_test_case
+
+import d1_test.test_files
+
+BENCHMARK_REQUEST_COUNT = 100
+
+
+class TestSessionCache(d1_gmn.tests.gmn_test_case.GMNTestCase):
+    cert_pem = d1_test.test_files.load_cert("cert_with_simple_subject_info.pem")
+
+    def _get_valid_dt(self):
+        """Return a time at which the test certificate is valid."""
+        cert_obj = d1_common.cert.x509.deserialize_pem(self.cert_pem)
+        return cert_obj.not_valid_after - datetime.timedelta(days=1)
+
+    def _get_jwt_subject_list(self):
+        request = unittest.mock.Mock(META={"Authorization": "header.claims.sig"})
+        with django.test.override_settings(STAND_ALONE=False):
+            return d1_gmn.app.middleware.session_jwt.validate_jwt_and_get_subject_list(
+                request
+            )
+
+    def test_1000(self):
+        """get_authenticated_subjects(): Subjects are extracted once, then returned from
+        the cache."""
+        with freezegun.freeze_time(self._get_valid_dt()):
+            with unittest.mock.patch.object(
+                d1_common.cert.subjects,
+                "extract_subjects",
+                wraps=d1_common.cert.subjects.extract_subjects,
+            ) as mock_extract:
+                first_tup = d1_gmn.app.middleware.session_cert.get_authenticated_subjects(
+                    self.cert_pem
+                )
+                second_tup = d1_gmn.app.middleware.session_cert.get_authenticated_subjects(
+                    self.cert_pem
+                )
+        assert first_tup == second_tup
+        assert mock_extract.call_count == 1
+        stats_dict = d1_gmn.app.middleware.session_cache.get_stats()
+        assert stats_dict["hit"] == 1
+        assert stats_dict["miss"] == 1
+
+    def test_1010(self):
+        """get_authenticated_subjects(): Cached subjects are not used after
+        SESSION_CACHE_MAX_AGE."""
+        with freezegun.freeze_time(self._get_valid_dt()) as frozen_time:
+            d1_gmn.app.middleware.session_cert.get_authenticated_subjects(self.cert_pem)
+            frozen_time.tick(datetime.timedelta(seconds=60 * 60 + 1))
+            d1_gmn.app.middleware.session_cert.get_authenticated_subjects(self.cert_pem)
+        stats_dict = d1_gmn.app.middleware.session_cache.get_stats()
+        assert stats_dict["hit"] == 0
+        assert stats_dict["expired"] == 1
+
+    @unittest.mock.patch.object(
+        d1_gmn.app.middleware.session_jwt, "_get_cn_cert", return_value=object()
+    )
+    def test_1020(self, mock_get_cn_cert):
+        """validate_jwt_and_get_subject_list(): The JWT signature is verified once, then
+        the subject is returned from the cache until the JWT expires."""
+        exp_ts = time.time() + 10
+        with unittest.mock.patch.object(
+            d1_common.cert.jwt,
+            "validate_and_decode",
+            return_value={"sub": "jwt_subj", "exp": exp_ts},
+        ) as mock_validate:
+            assert self._get_jwt_subject_list() == ["jwt_subj"]
+            assert self._get_jwt_subject_list() == ["jwt_subj"]
+            assert mock_validate.call_count == 1
+            with freezegun.freeze_time(datetime.datetime.utcfromtimestamp(exp_ts + 1)):
+                assert self._get_jwt_subject_list() == ["jwt_subj"]
+            assert mock_validate.call_count == 2
+
+    @unittest.mock.patch.object(
+        d1_gmn.app.middleware.session_jwt, "_get_cn_cert", return_value=object()
+    )
+    @unittest.mock.patch.object(d1_common.cert.jwt, "log_jwt_bu64_info")
+    def test_1030(self, mock_log, mock_get_cn_cert):
+        """validate_jwt_and_get_subject_list(): Invalid JWTs are not cached."""
+        with unittest.mock.patch.object(
+            d1_common.cert.jwt,
+            "validate_and_decode",
+            side_effect=d1_common.cert.jwt.JwtException("invalid"),
+        ) as mock_validate:
+            assert self._get_jwt_subject_list() == []
+            assert self._get_jwt_subject_list() == []
+            assert mock_validate.call_count == 2
+        assert d1_gmn.app.middleware.session_cache.get_stats()["size"] == 0
+
+    def test_1040(self):
+        """Benchmark: Per-request overhead of extracting subjects from a certificate,
+        with and without the session cache."""
+
+        def time_requests():
+            start_ts = time.perf_counter()
+            for _ in range(BENCHMARK_REQUEST_COUNT):
+                d1_gmn.app.middleware.session_cert.get_authenticated_subjects(
+                    self.cert_pem
+                )
+            return (time.perf_counter() - start_ts) / BENCHMARK_REQUEST_COUNT
+
+        with freezegun.freeze_time(self._get_valid_dt()):
+            with django.test.override_settings(SESSION_CACHE_ENABLED=False):
+                uncached_sec = time_requests()
+            cached_sec = time_requests()
+        logging.info(
+            "Session cache benchmark: requests={} uncached_ms={:.3f} "
+            "cached_ms={:.3f}".format(
+                BENCHMARK_REQUEST_COUNT, uncached_sec * 1000, cached_sec * 1000
+            )
+        )
+        assert cached_sec < uncached_sec
@@ -22,8 +22,10 @@ import logging
 import multiprocessing
 import random
 
+import pytest
 import responses
 
+import d1_common.types.exceptions
 import d1_common.xml
 
 import django.test
@@ -66,6 +68,21 @@ class TestSlice(d1_gmn.tests.gmn_test_case.GMNTestCase):
         else:
             return client.listObjects, "objectInfo"
 
+    def _get_token_slice(self, client, use_get_log_records, query_dict):
+        """Get a slice with a raw GET, so that the resumption token header is
+        available."""
+        if use_get_log_records:
+            rest_path, type_name, iterable_attr = "log", "Log", "logEntry"
+        else:
+            rest_path, type_name, iterable_attr = "object", "ObjectList", "objectInfo"
+        response = client.GET(rest_path, query=query_dict)
+        slice_pyxb = client._read_dataone_type_response(response, type_name)
+        return (
+            getattr(slice_pyxb, iterable_attr),
+            slice_pyxb,
+            response.headers.get("DataONE-GMN-ResumptionToken"),
+        )
+
     @responses.activate
     def test_1000(self, gmn_client_v1_v2, true_false):
         from_date = datetime.datetime(2000, 5, 6, 15, 16, 17, 18)
@@ -139,3 +156,42 @@ class TestSlice(d1_gmn.tests.gmn_test_case.GMNTestCase):
                 slice_pyxb = slicable_api_func(start=0, count=100)
                 iterable_pyxb = getattr(slice_pyxb, iterable_attr)
                 assert len(iterable_pyxb) == 5
+
+    @responses.activate
+    def test_1020(self, gmn_client_v1_v2, true_false):
+        """Retrieving a result set by following resumption tokens gives the same
+        result as retrieving everything in a single call without slicing."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            single_slice_list, single_slice_pyxb, token_str = self._get_token_slice(
+                gmn_client_v1_v2, true_false, {"start": 0, "count": 5000}
+            )
+            total_int = single_slice_pyxb.total
+            assert len(single_slice_list) == total_int
+            assert token_str is None
+            multi_slice_list = []
+            query_dict = {"start": 0, "count": total_int // SLICE_COUNT}
+            while True:
+                slice_list, slice_pyxb, token_str = self._get_token_slice(
+                    gmn_client_v1_v2, true_false, query_dict
+                )
+                assert slice_pyxb.start == len(multi_slice_list)
+                assert slice_pyxb.total == total_int
+                multi_slice_list.extend(slice_list)
+                if token_str is None:
+                    break
+                query_dict = {
+                    "resumptionToken": token_str,
+                    "count": total_int // SLICE_COUNT + random.randint(0, 2),
+                }
+            assert len(multi_slice_list) == total_int
+            for a_pyxb, b_pyxb in zip(single_slice_list, multi_slice_list):
+                _assert_pyxb_objects_are_equivalent((a_pyxb, b_pyxb, 0, 0))
+
+    @responses.activate
+    def test_1030(self, gmn_client_v1_v2, true_false):
+        """An invalid resumption token raises InvalidRequest."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            with pytest.raises(d1_common.types.exceptions.InvalidRequest):
+                self._get_token_slice(
+                    gmn_client_v1_v2, true_false, {"resumptionToken": "invalid"}
+                )
@@ -0,0 +1,117 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test the cache for serialized System Metadata."""
+import os
+
+import pytest
+import responses
+
+import django.core.exceptions
+import django.test
+
+import d1_gmn.app.models
+import d1_gmn.app.sysmeta_cache
+import d1_gmn.tests.gmn_mock
+import d1_gmn.tests.gmn_test_case
+
+import d1_test.d1_test_case
+
+
+@pytest.fixture(scope="function", params=["lru", "django", "file"])
+def sysmeta_cache_backend(request, tmpdir):
+    with django.test.override_settings(
+        SYSMETA_CACHE_BACKEND=request.param, SYSMETA_CACHE_FILE_PATH=str(tmpdir)
+    ):
+        d1_gmn.app.sysmeta_cache.clear()
+        yield request.param
+
+
+@d1_test.d1_test_case.reproducible_random_decorator("TestSysMetaCache")
+class TestSysMetaCache(d1_gmn.tests.gmn_test_case.GMNTestCase):
+    def _get_sysmeta_xml(self, client, pid):
+        return client.GET(["meta", pid]).content
+
+    @responses.activate
+    def test_1000(self, gmn_client_v1_v2, sysmeta_cache_backend):
+        """getSystemMetadata(): Second call is a cache hit and returns the same
+        document."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid = self.get_random_pid_sample(1)[0]
+            first_xml = self._get_sysmeta_xml(gmn_client_v1_v2, pid)
+            second_xml = self._get_sysmeta_xml(gmn_client_v1_v2, pid)
+            assert first_xml == second_xml
+            stats_dict = d1_gmn.app.sysmeta_cache.get_stats()
+            assert stats_dict["miss"] == 1
+            assert stats_dict["hit"] == 1
+
+    @responses.activate
+    def test_1010(self, sysmeta_cache_backend):
+        """getSystemMetadata(): v1 and v2 documents are cached separately."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid = self.get_random_pid_sample(1)[0]
+            v1_xml = self._get_sysmeta_xml(self.client_v1, pid)
+            v2_xml = self._get_sysmeta_xml(self.client_v2, pid)
+            assert v1_xml != v2_xml
+            assert d1_gmn.app.sysmeta_cache.get_stats()["miss"] == 2
+
+    @responses.activate
+    def test_1020(self, sysmeta_cache_backend):
+        """archive(): Invalidates the cached document."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(self.client_v2)
+            assert not self.client_v2.getSystemMetadata(pid).archived
+            self.client_v2.archive(pid)
+            assert self.client_v2.getSystemMetadata(pid).archived
+
+    @responses.activate
+    def test_1030(self, sysmeta_cache_backend):
+        """update(): Invalidates the cached document of the obsoleted object."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(self.client_v2)
+            assert self.client_v2.getSystemMetadata(pid).obsoletedBy is None
+            new_pid, sid, sciobj_bytes, sysmeta_pyxb = self.update_obj(
+                self.client_v2, pid
+            )
+            assert self.client_v2.getSystemMetadata(pid).obsoletedBy.value() == new_pid
+
+    def test_1040(self, tmpdir):
+        """File backend: Refuses to use a directory that is writable by others."""
+        cache_path = str(tmpdir.join("sysmeta_cache"))
+        os.mkdir(cache_path)
+        os.chmod(cache_path, 0o777)
+        with django.test.override_settings(
+            SYSMETA_CACHE_BACKEND="file", SYSMETA_CACHE_FILE_PATH=cache_path
+        ):
+            with pytest.raises(django.core.exceptions.ImproperlyConfigured):
+                d1_gmn.app.sysmeta_cache.check_backend()
+
+    @responses.activate
+    def test_1050(self, sysmeta_cache_backend):
+        """getSystemMetadata(): A cached document is not used after the revision chain
+        changes, even if the cache was not invalidated, e.g., because the change was
+        made in another process."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(self.client_v2)
+            new_pid, sid, sciobj_bytes, sysmeta_pyxb = self.update_obj(
+                self.client_v2, pid
+            )
+            assert self.client_v2.getSystemMetadata(pid).obsoletedBy.value() == new_pid
+            d1_gmn.app.models.ScienceObject.objects.filter(pid__did=pid).update(
+                obsoleted_by=None
+            )
+            assert self.client_v2.getSystemMetadata(pid).obsoletedBy is None
@@ -34,6 +34,7 @@ import d1_common.system_metadata
 import d1_common.types.exceptions
 import d1_common.xml
 
+import d1_gmn.app.models
 import d1_gmn.tests.gmn_mock
 import d1_gmn.tests.gmn_test_case
 
@@ -61,6 +62,13 @@ class TestUpdateSystemMetadata(d1_gmn.tests.gmn_test_case.GMNTestCase):
         ):
             self.client_v2.get(pid)
 
+    def _get_permission_id_set(self, pid):
+        return set(
+            d1_gmn.app.models.Permission.objects.filter(
+                sciobj__pid__did=pid
+            ).values_list("id", flat=True)
+        )
+
     @responses.activate
     def test_1000(self, gmn_client_v2):
         """updateSystemMetadata(): Access Policy adjustment.
@@ -242,3 +250,24 @@ class TestUpdateSystemMetadata(d1_gmn.tests.gmn_test_case.GMNTestCase):
             )  # d1_test.instance_generator.identifier.generate_sid()
             gmn_client_v2.updateSystemMetadata(pid, sysmeta_pyxb)
             # self.sample.assert_equals(sysmeta_pyxb, 'test')
+
+    @responses.activate
+    def test_1070(self, gmn_client_v2):
+        """MNStorage.updateSystemMetadata(): Only the Permission rows that differ are
+        written."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            pid, sid, sciobj_bytes, sysmeta_pyxb = self.create_obj(
+                gmn_client_v2,
+                permission_list=[(["usm_subj_1", "usm_subj_2"], ["read"])],
+            )
+            sysmeta_pyxb = gmn_client_v2.getSystemMetadata(pid)
+            permission_id_set = self._get_permission_id_set(pid)
+            sysmeta_pyxb.accessPolicy.allow[0].subject.append("usm_subj_3")
+            assert gmn_client_v2.updateSystemMetadata(pid, sysmeta_pyxb)
+            new_permission_id_set = self._get_permission_id_set(pid)
+            assert len(new_permission_id_set - permission_id_set) == 1
+            assert permission_id_set < new_permission_id_set
+            new_sysmeta_pyxb = gmn_client_v2.getSystemMetadata(pid)
+            assert d1_common.system_metadata.are_equivalent_pyxb(
+                sysmeta_pyxb, new_sysmeta_pyxb, ignore_timestamps=True
+            )
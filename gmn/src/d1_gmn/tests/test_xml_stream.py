@@ -0,0 +1,96 @@
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Test streaming of ObjectList and Log XML documents directly from database rows."""
+import datetime
+
+import pytest
+import responses
+
+import d1_common.date_time
+import d1_common.types.dataoneTypes_v2_0
+import d1_common.xml
+
+import django.urls.base
+
+import d1_gmn.app.xml_stream
+import d1_gmn.tests.gmn_mock
+import d1_gmn.tests.gmn_test_case
+
+import d1_test.d1_test_case
+
+
+@d1_test.d1_test_case.reproducible_random_decorator("TestXmlStream")
+class TestXmlStream(d1_gmn.tests.gmn_test_case.GMNTestCase):
+    def _assert_matches_pyxb(self, client, rest_path, type_name, query_dict):
+        """The streamed document is identical to the document created by
+        deserializing and reserializing it via PyXB."""
+        response = client.GET(rest_path, query=query_dict)
+        streamed_bytes = response.content
+        d1_type_pyxb = client._read_dataone_type_response(response, type_name)
+        assert streamed_bytes == d1_common.xml.serialize_for_transport(
+            d1_type_pyxb, xslt_url=django.urls.base.reverse("home_xslt")
+        )
+
+    @responses.activate
+    def test_1000(self, gmn_client_v1_v2):
+        """ObjectList: Streamed XML is byte compatible with PyXB."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            self._assert_matches_pyxb(
+                gmn_client_v1_v2, "object", "ObjectList", {"start": 0, "count": 50}
+            )
+
+    @responses.activate
+    def test_1010(self, gmn_client_v1_v2):
+        """Log: Streamed XML is byte compatible with PyXB."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            self._assert_matches_pyxb(
+                gmn_client_v1_v2, "log", "Log", {"start": 0, "count": 50}
+            )
+
+    @responses.activate
+    def test_1020(self, gmn_client_v1_v2):
+        """Empty ObjectList: Streamed XML is byte compatible with PyXB."""
+        with d1_gmn.tests.gmn_mock.disable_auth():
+            self._assert_matches_pyxb(
+                gmn_client_v1_v2, "object", "ObjectList", {"start": 0, "count": 0}
+            )
+
+    @pytest.mark.parametrize(
+        "us", [0, 1, 10, 120000, 999999], ids=["0", "1", "10", "120000", "999999"]
+    )
+    def test_1030(self, us):
+        """format_xsd_datetime(): Matches PyXB formatting of xs:dateTime."""
+        dt = datetime.datetime(2000, 1, 2, 3, 4, 5, us, d1_common.date_time.UTC())
+        log_entry_pyxb = d1_common.types.dataoneTypes_v2_0.LogEntry()
+        log_entry_pyxb.dateLogged = dt
+        assert d1_gmn.app.xml_stream.format_xsd_datetime(
+            dt
+        ) == log_entry_pyxb.dateLogged.xsdLiteral()
+
+    def test_1040(self):
+        """escape(): Matches PyXB escaping of character data."""
+        s = 'a&b<c>d"e\'f'
+        identifier_pyxb = d1_common.types.dataoneTypes_v2_0.identifier(s)
+        assert d1_common.xml.serialize_for_transport(
+            identifier_pyxb, strip_prolog=True
+        ) == (
+            '<ns1:identifier xmlns:ns1="http://ns.dataone.org/service/types/v1">'
+            "{}</ns1:identifier>".format(d1_gmn.app.xml_stream.escape(s))
+        ).encode(
+            "utf-8"
+        )
@@ -17,8 +17,11 @@
 # limitations under the License.
 
 # import logging
+import collections
+import functools
 
 import d1_common.const
+import d1_common.types.exceptions
 import d1_common.xml
 
 import d1_client.iter.base_multi
@@ -36,6 +39,11 @@ class SystemMetadataIteratorMulti(d1_client.iter.base_multi.MultiprocessedIterat
 
     This is a multiprocessed implementation. See :ref:`d1_client/ref/iterators:DataONE
     Iterators` for an overview of the available iterator types and implementations.
+
+    If ``use_bulk`` is True (default), the System Metadata for each page of objects is
+    retrieved with a single call to the GMN bulk System Metadata API. If the node does
+    not support the API, the iterator falls back to calling getSystemMetadata() for
+    each object.
     """
     def __init__(
         self,
@@ -48,11 +56,20 @@ class SystemMetadataIteratorMulti(d1_client.iter.base_multi.MultiprocessedIterat
         client_arg_dict=None,
         list_objects_arg_dict=None,
         get_system_metadata_arg_dict=None,
+        use_bulk=True,
     ):
+        if use_bulk:
+            page_func = functools.partial(
+                _bulk_page_func, vendor_specific=get_system_metadata_arg_dict
+            )
+            iter_func, item_proc_func = _bulk_iter_func, _bulk_item_proc_func
+        else:
+            page_func = _page_func
+            iter_func, item_proc_func = _iter_func, _item_proc_func
         super(SystemMetadataIteratorMulti, self).__init__(
             base_url, page_size, max_workers, max_result_queue_size,
             max_task_queue_size, api_major, client_arg_dict, list_objects_arg_dict,
-            get_system_metadata_arg_dict, _page_func, _iter_func, _item_proc_func
+            get_system_metadata_arg_dict, page_func, iter_func, item_proc_func
         )
 
 
@@ -66,6 +83,10 @@ def _iter_func(page_pyxb):
 
 def _item_proc_func(client, item_pyxb, get_system_metadata_arg_dict):
     pid = d1_common.xml.get_req_val(item_pyxb.identifier)
+    return _get_system_metadata(client, pid, get_system_metadata_arg_dict)
+
+
+def _get_system_metadata(client, pid, get_system_metadata_arg_dict):
     # logger.debug('Retrieving System Metadata. pid="{}"'.format(pid))
     try:
         return client.getSystemMetadata(pid, get_system_metadata_arg_dict)
@@ -76,3 +97,41 @@ def _item_proc_func(client, item_pyxb, get_system_metadata_arg_dict):
         #     )
         # )
         return {"pid": pid, "error": str(e)}
+
+
+# A page of objects, with the System Metadata retrieved in bulk. ``item_list`` holds a
+# (pid, result) tuple for each object, as returned by getSystemMetadataBulk(). If the
+# node does not support bulk retrieval, ``result`` is None.
+_BulkPage = collections.namedtuple("_BulkPage", ["total", "item_list"])
+
+
+def _bulk_page_func(client, vendor_specific=None):
+    def get_page(start, count, **list_objects_arg_dict):
+        object_list_pyxb = client.listObjects(
+            start=start, count=count, **list_objects_arg_dict
+        )
+        pid_list = [
+            d1_common.xml.get_req_val(v.identifier) for v in object_list_pyxb.objectInfo
+        ]
+        if not pid_list:
+            return _BulkPage(object_list_pyxb.total, [])
+        try:
+            item_list = list(client.getSystemMetadataBulk(pid_list, vendor_specific))
+        except Exception:
+            # E.g., the node is not a GMN, or is a GMN without the bulk API.
+            item_list = [(pid, None) for pid in pid_list]
+        return _BulkPage(object_list_pyxb.total, item_list)
+    return get_page
+
+
+def _bulk_iter_func(bulk_page):
+    return bulk_page.item_list
+
+
+def _bulk_item_proc_func(client, item_tup, get_system_metadata_arg_dict):
+    pid, result = item_tup
+    if result is None:
+        return _get_system_metadata(client, pid, get_system_metadata_arg_dict)
+    if isinstance(result, d1_common.types.exceptions.DataONEException):
+        return {"pid": pid, "error": result.name}
+    return result
@@ -18,10 +18,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import json
 import logging
 
 import d1_common.date_time
 import d1_common.type_conversions
+import d1_common.types.exceptions
+import d1_common.xml
 
 import d1_client.baseclient
 
@@ -187,3 +190,46 @@ class MemberNodeClient(d1_client.baseclient.DataONEBaseClient):
     def getReplica(self, pid, vendorSpecific=None):
         response = self.getReplicaResponse(pid, vendorSpecific)
         return self._read_stream_response(response)
+
+    # ============================================================================
+    # GMN vendor specific extensions
+    # ============================================================================
+
+    # gmn.getSystemMetadataBulk(session, pid ...) → SystemMetadataNdjson
+
+    def getSystemMetadataBulkResponse(self, pidList, vendorSpecific=None):
+        mmp_list = [("pid", pid.encode("utf-8")) for pid in pidList]
+        return self.POST(
+            ["gmn", "meta"], fields=mmp_list, headers=vendorSpecific, use_stream=True
+        )
+
+    def getSystemMetadataBulk(self, pidList, vendorSpecific=None):
+        """Retrieve the System Metadata for multiple objects in a single call.
+
+        This is a GMN specific API. On other nodes, the call raises a DataONEException.
+
+        Returns:
+            generator of (pid, result) tuples: One tuple per PID, in the same order as
+            ``pidList``. ``result`` is the SystemMetadata PyXB object for the object or,
+            if the System Metadata could not be retrieved, the DataONEException that
+            getSystemMetadata() would have raised.
+
+        """
+        response = self.getSystemMetadataBulkResponse(pidList, vendorSpecific)
+        return self._iter_sysmeta_ndjson(self._read_stream_response(response))
+
+    def _iter_sysmeta_ndjson(self, response):
+        for line_bytes in response.iter_lines():
+            if not line_bytes:
+                continue
+            item_dict = json.loads(line_bytes.decode("utf-8"))
+            pid = item_dict["pid"]
+            if "error" in item_dict:
+                result = d1_common.types.exceptions.create_exception_by_name(
+                    item_dict["error"],
+                    description=item_dict.get("description", ""),
+                    identifier=pid,
+                )
+            else:
+                result = d1_common.xml.deserialize(item_dict["sysmeta"].encode("utf-8"))
+            yield pid, result
@@ -35,7 +35,6 @@ import zipstream
 
 import d1_common.checksum
 import d1_common.date_time
-import d1_common.iter.bytes
 import d1_common.types.exceptions
 import d1_common.utils.filesystem
 import d1_common.utils.ulog
@@ -80,6 +79,10 @@ def validate_bagit_file(bagit_path):
 def create_bagit_stream(dir_name, payload_info_list):
     """Create a stream containing a BagIt zip archive.
 
+    The archive is generated while it is being streamed. Each payload file is read when
+    the stream reaches it, and the tag and manifest files, which describe the payload,
+    are generated after the last payload file has been streamed.
+
     Args:
         dir_name : str
             The name of the root directory in the zip file, under which all the files
@@ -89,17 +92,18 @@ def create_bagit_stream(dir_name, payload_info_list):
             List of payload_info_dict, each dict describing a file.
 
             - keys: pid, filename, iter, checksum, checksum_algorithm
+            - optional keys: compress
             - If the filename is None, the pid is used for the filename.
+            - If the checksum is None, it is calculated with the checksum_algorithm
+              while the file is streamed.
+            - If compress is False, the file is stored without compression. Use for
+              files that are already compressed, such as images and zip files.
 
     """
     zip_file = zipstream.ZipFile(mode="w", compression=zipstream.ZIP_DEFLATED)
     _add_path(dir_name, payload_info_list)
-    payload_byte_count, payload_file_count = _add_payload_files(
-        zip_file, payload_info_list
-    )
-    tag_info_list = _add_tag_files(
-        zip_file, dir_name, payload_info_list, payload_byte_count, payload_file_count
-    )
+    _add_payload_files(zip_file, payload_info_list)
+    tag_info_list = _add_tag_files(zip_file, dir_name, payload_info_list)
     _add_manifest_files(zip_file, dir_name, payload_info_list, tag_info_list)
     _add_tag_manifest_file(zip_file, dir_name, tag_info_list)
     return zip_file
@@ -214,108 +218,147 @@ def _add_path(dir_name, payload_info_list):
 
 def _add_payload_files(zip_file, payload_info_list):
     """Add the payload files to the zip."""
-    payload_byte_count = 0
-    payload_file_count = 0
     for payload_info_dict in payload_info_list:
-        zip_file.write_iter(payload_info_dict["path"], payload_info_dict["iter"])
-        payload_byte_count += payload_info_dict["iter"].size
-        payload_file_count += 1
-    return payload_byte_count, payload_file_count
+        zip_file.write_iter(
+            payload_info_dict["path"],
+            _gen_payload_iter(payload_info_dict),
+            zipstream.ZIP_DEFLATED
+            if payload_info_dict.get("compress", True)
+            else zipstream.ZIP_STORED,
+        )
 
 
-def _add_tag_files(
-    zip_file, dir_name, payload_info_list, payload_byte_count, payload_file_count
-):
-    """Generate the tag files and add them to the zip."""
+def _gen_payload_iter(payload_info_dict):
+    """Generate the bytes of a payload file.
+
+    The size of the file, and the checksum if not provided, are recorded in
+    payload_info_dict when the file has been streamed.
+
+    """
+    calculator = None
+    if payload_info_dict["checksum"] is None:
+        calculator = d1_common.checksum.get_checksum_calculator_by_dataone_designator(
+            payload_info_dict["checksum_algorithm"]
+        )
+    byte_count = 0
+    for chunk_bytes in payload_info_dict["iter"]:
+        byte_count += len(chunk_bytes)
+        if calculator is not None:
+            calculator.update(chunk_bytes)
+        yield chunk_bytes
+    payload_info_dict["size"] = byte_count
+    if calculator is not None:
+        payload_info_dict["checksum"] = calculator.hexdigest()
+
+
+def _add_tag_files(zip_file, dir_name, payload_info_list):
+    """Add the tag files to the zip."""
     tag_info_list = []
-    _add_tag_file(zip_file, dir_name, tag_info_list, _gen_bagit_text_file_tup())
+    _add_tag_file(zip_file, dir_name, tag_info_list, "bagit.txt", _gen_bagit_text_str)
     _add_tag_file(
         zip_file,
         dir_name,
         tag_info_list,
-        _gen_bag_info_file_tup(payload_byte_count, payload_file_count),
+        "bag-info.txt",
+        lambda: _gen_bag_info_str(payload_info_list),
     )
     _add_tag_file(
-        zip_file, dir_name, tag_info_list, _gen_pid_mapping_file_tup(payload_info_list)
+        zip_file,
+        dir_name,
+        tag_info_list,
+        "pid-mapping.txt",
+        lambda: _gen_pid_mapping_str(payload_info_list),
     )
     return tag_info_list
 
 
 def _add_manifest_files(zip_file, dir_name, payload_info_list, tag_info_list):
-    """Generate the manifest files and add them to the zip."""
+    """Add the manifest files to the zip."""
     for checksum_algorithm in _get_checksum_algorithm_set(payload_info_list):
         _add_tag_file(
             zip_file,
             dir_name,
             tag_info_list,
-            _gen_manifest_file_tup(payload_info_list, checksum_algorithm),
+            _gen_manifest_file_name(checksum_algorithm),
+            lambda a=checksum_algorithm: _gen_manifest_str(payload_info_list, a),
         )
 
 
 def _add_tag_manifest_file(zip_file, dir_name, tag_info_list):
-    """Generate the tag manifest file and add it to the zip."""
-    _add_tag_file(
-        zip_file, dir_name, tag_info_list, _gen_tag_manifest_file_tup(tag_info_list)
+    """Add the tag manifest file to the zip.
+
+    The tag manifest does not list itself, so it is not added to tag_info_list.
+
+    """
+    tag_path = d1_common.utils.filesystem.gen_safe_path(
+        dir_name,
+        "tagmanifest-{}.txt".format(TAG_CHECKSUM_ALGO.replace("-", "").lower()),
     )
+    zip_file.write_iter(
+        tag_path, _gen_tag_iter({}, lambda: _gen_tag_manifest_str(tag_info_list))
+    )
+
 
+def _add_tag_file(zip_file, dir_name, tag_info_list, tag_name, gen_tag_str_func):
+    """Add a tag file to zip_file and record info for the tag manifest file.
 
-def _add_tag_file(zip_file, dir_name, tag_info_list, tag_tup):
-    """Add a tag file to zip_file and record info for the tag manifest file."""
-    tag_name, tag_str = tag_tup
-    tag_path = d1_common.utils.filesystem.gen_safe_path(dir_name, tag_name)
-    tag_iter = _create_and_add_tag_iter(zip_file, tag_path, tag_str)
-    tag_info_list.append(
-        {
-            "path": tag_path,
-            "checksum": d1_common.checksum.calculate_checksum_on_iterator(
-                tag_iter, TAG_CHECKSUM_ALGO
-            ),
-        }
+    The contents of the tag file are generated by ``gen_tag_str_func()`` when the zip
+    stream reaches the file, so that they can describe the payload files, which are
+    streamed first. The checksum is recorded in the tag info at the same time.
+
+    """
+    tag_info_dict = {
+        "path": d1_common.utils.filesystem.gen_safe_path(dir_name, tag_name),
+        "checksum": None,
+    }
+    tag_info_list.append(tag_info_dict)
+    zip_file.write_iter(
+        tag_info_dict["path"], _gen_tag_iter(tag_info_dict, gen_tag_str_func)
     )
 
 
-def _create_and_add_tag_iter(zip_file, tag_path, tag_str):
-    tag_iter = d1_common.iter.bytes.BytesIterator(tag_str.encode(BAGIT_ENCODING))
-    zip_file.write_iter(tag_path, tag_iter)
-    return tag_iter
+def _gen_tag_iter(tag_info_dict, gen_tag_str_func):
+    tag_bytes = gen_tag_str_func().encode(BAGIT_ENCODING)
+    tag_info_dict["checksum"] = d1_common.checksum.calculate_checksum_on_bytes(
+        tag_bytes, TAG_CHECKSUM_ALGO
+    )
+    yield tag_bytes
 
 
-def _gen_bagit_text_file_tup():
+def _gen_bagit_text_str():
     return (
-        "bagit.txt",
-        (
-            "\n".join(
-                [
-                    "BagIt-Version: {}.{}".format(BAGIT_MAJOR_INT, BAGIT_MINOR_INT),
-                    "Tag-File-Character-Encoding: {}".format(BAGIT_ENCODING),
-                ]
-            )
-            + "\n"
-        ),
+        "\n".join(
+            [
+                "BagIt-Version: {}.{}".format(BAGIT_MAJOR_INT, BAGIT_MINOR_INT),
+                "Tag-File-Character-Encoding: {}".format(BAGIT_ENCODING),
+            ]
+        )
+        + "\n"
     )
 
 
-def _gen_bag_info_file_tup(payload_byte_count, payload_file_count):
+def _gen_bag_info_str(payload_info_list):
+    payload_byte_count = sum(d["size"] for d in payload_info_list)
     return (
-        "bag-info.txt",
-        (
-            "\n".join(
-                [
-                    "Payload-Oxum: {}.{}".format(
-                        payload_byte_count, payload_file_count
-                    ),
-                    "Bagging-Date: {}".format(d1_common.date_time.date_utc_now_iso()),
-                    "Bag-Size: {}".format(_gen_friendly_size(payload_byte_count)),
-                ]
-            )
-            + "\n"
-        ),
+        "\n".join(
+            [
+                "Payload-Oxum: {}.{}".format(
+                    payload_byte_count, len(payload_info_list)
+                ),
+                "Bagging-Date: {}".format(d1_common.date_time.date_utc_now_iso()),
+                "Bag-Size: {}".format(_gen_friendly_size(payload_byte_count)),
+            ]
+        )
+        + "\n"
     )
 
 
-def _gen_manifest_file_tup(payload_info_list, checksum_algorithm):
+def _gen_manifest_file_name(checksum_algorithm):
+    return "manifest-{}.txt".format(checksum_algorithm.replace("-", "").lower())
+
+
+def _gen_manifest_str(payload_info_list, checksum_algorithm):
     manifest_list = []
-    file_name = "manifest-{}.txt".format(checksum_algorithm.replace("-", "").lower())
     for payload_info_dict in payload_info_list:
         if payload_info_dict["checksum_algorithm"] == checksum_algorithm:
             manifest_list.append(
@@ -323,31 +366,20 @@ def _gen_manifest_file_tup(payload_info_list, checksum_algorithm):
                     payload_info_dict["checksum"], payload_info_dict["path"]
                 )
             )
-    return file_name, ("\n".join(manifest_list) + "\n")
+    return "\n".join(manifest_list) + "\n"
 
 
-# TODO: Fix this formatting issue (.style.yapf)
-# flake8: noqa: W503
-def _gen_pid_mapping_file_tup(payload_info_list):
+def _gen_pid_mapping_str(payload_info_list):
     return (
-        "pid-mapping.txt",
-        (
-            "\n".join(["{}\t{}".format(d["pid"], d["path"]) for d in payload_info_list])
-            + "\n"
-        ),
+        "\n".join(["{}\t{}".format(d["pid"], d["path"]) for d in payload_info_list])
+        + "\n"
     )
 
 
-def _gen_tag_manifest_file_tup(tag_info_list):
-    file_name = "tagmanifest-{}.txt".format(TAG_CHECKSUM_ALGO.replace("-", "").lower())
+def _gen_tag_manifest_str(tag_info_list):
     return (
-        file_name,
-        (
-            "\n".join(
-                ["{}\t{}".format(d["checksum"], d["path"]) for d in tag_info_list]
-            )
-            + "\n"
-        ),
+        "\n".join(["{}\t{}".format(d["checksum"], d["path"]) for d in tag_info_list])
+        + "\n"
     )
 
 
@@ -57,6 +57,7 @@ DEFAULT_NUMBER_OF_REPLICAS = 3
 # MIME types
 CONTENT_TYPE_HTML = "text/html"
 CONTENT_TYPE_JSON = "application/json"
+CONTENT_TYPE_NDJSON = "application/x-ndjson"
 CONTENT_TYPE_OCTET_STREAM = "application/octet-stream"
 CONTENT_TYPE_TEXT = "text/plain"
 CONTENT_TYPE_XHTML = "text/html"
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+
+# This work was created by participants in the DataONE project, and is
+# jointly copyrighted by participating institutions in DataONE. For
+# more information on DataONE, see our web site at http://dataone.org.
+#
+#   Copyright 2009-2019 DataONE
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Validate many Science Metadata XML files in parallel.
+
+Each file is validated against the schema for the given formatId. The files are
+distributed over a pool of worker processes, each of which compiles the schema once.
+
+One JSON object is written per file, one per line, as the files are validated. E.g.:
+
+  {"path": "a.xml", "format_id": "eml://...", "is_valid": false, "error": "...",
+  "sec": 0.012}
+
+A summary with the total number of files, the number of invalid files and the
+throughput is logged to stderr when done.
+
+Files can also be read from a manifest, with one "<formatId><tab><path>" line per
+file. This allows validating files of different formats in one run.
+
+"""
+import argparse
+import fnmatch
+import json
+import logging
+import os
+import sys
+import time
+
+import d1_scimeta.validate
+
+log = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "path", nargs="*", help="Paths to XML files or dirs of XML files to validate"
+    )
+    parser.add_argument("--format-id", help="FormatId of all the XML files")
+    parser.add_argument(
+        "--manifest", help='File with "<formatId><tab><path>" line for each XML file'
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=None,
+        help="Glob for files to include when searching dirs (default: *.xml)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--output", default="-", help="File to write JSON lines to (default: stdout)"
+    )
+    parser.add_argument("--debug", action="store_true", help="Debug level logging")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        format="%(levelname)-8s %(message)s",
+        level=logging.DEBUG if args.debug else logging.INFO,
+        stream=sys.stderr,
+    )
+
+    if args.path and not args.format_id:
+        parser.error("--format-id is required when validating paths")
+    if not args.path and not args.manifest:
+        parser.error("Specify paths to validate or --manifest")
+
+    item_iter = _iter_items(args)
+
+    if args.output == "-":
+        return _validate(item_iter, args.workers, sys.stdout)
+    with open(args.output, "w") as out_file:
+        return _validate(item_iter, args.workers, out_file)
+
+
+def write_json_lines(result_iter, out_file, get_extra_dict=None):
+    """Write ValidationResults as JSON lines and return counts and throughput.
+
+    Args:
+        result_iter: iterable of d1_scimeta.validate.ValidationResult
+        out_file: file-like object open for writing text
+        get_extra_dict: func(ValidationResult) -> dict
+            Optional. Called for each result. The returned values are added to the
+            JSON object for the result.
+
+    Returns:
+        dict: ``count``, ``invalid_count``, ``sec`` and ``per_sec``.
+
+    """
+    start_sec = time.perf_counter()
+    count = invalid_count = 0
+    for result in result_iter:
+        count += 1
+        if not result.is_valid:
+            invalid_count += 1
+        result_dict = get_extra_dict(result) if get_extra_dict else {}
+        result_dict.update(
+            {
+                "path": result.path,
+                "format_id": result.format_id,
+                "is_valid": result.is_valid,
+                "error": result.error,
+                "sec": round(result.sec, 6),
+            }
+        )
+        out_file.write(json.dumps(result_dict) + "\n")
+        out_file.flush()
+    total_sec = time.perf_counter() - start_sec
+    return {
+        "count": count,
+        "invalid_count": invalid_count,
+        "sec": total_sec,
+        "per_sec": count / total_sec if total_sec else 0.0,
+    }
+
+
+def log_summary(summary_dict):
+    log.info(
+        "Validated {count} files in {sec:.2f} seconds ({per_sec:.1f} files/sec). "
+        "Invalid: {invalid_count}".format(**summary_dict)
+    )
+
+
+# Private
+
+
+def _validate(item_iter, worker_count, out_file):
+    summary_dict = write_json_lines(
+        d1_scimeta.validate.validate_many(item_iter, worker_count), out_file
+    )
+    log_summary(summary_dict)
+    return 1 if summary_dict["invalid_count"] else 0
+
+
+def _iter_items(args):
+    if args.manifest:
+        with open(args.manifest) as manifest_file:
+            for line_str in manifest_file:
+                line_str = line_str.strip()
+                if not line_str or line_str.startswith("#"):
+                    continue
+                format_id, xml_path = line_str.split("\t", 1)
+                yield format_id, xml_path
+    for xml_path in _iter_paths(args.path, args.include or ["*.xml"]):
+        yield args.format_id, xml_path
+
+
+def _iter_paths(path_list, include_glob_list):
+    for path in path_list:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for dir_path, dir_list, file_list in os.walk(path):
+            dir_list.sort()
+            for file_name in sorted(file_list):
+                if any(fnmatch.fnmatch(file_name, g) for g in include_glob_list):
+                    yield os.path.join(dir_path, file_name)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -110,3 +110,70 @@ class TestSciMetaValidate(d1_test.d1_test_case.D1TestCase):
         """SciMeta.assert_valid(): Valid ISO/TC 211"""
         xml_str = self.test_files.load_xml_to_bytes(os.path.join("isotc211", xml_doc))
         d1_scimeta.validate.assert_valid("http://www.isotc211.org/2005/gmd", xml_str)
+
+    def test_1100(self):
+        """get_schema_cache_entry(): Schema is compiled once and shared by formatIds
+        that use the same schema."""
+        d1_scimeta.validate.clear_schema_cache()
+        entry = d1_scimeta.validate.get_schema_cache_entry(
+            "http://datacite.org/schema/kernel-3.0"
+        )
+        assert (
+            d1_scimeta.validate.get_schema_cache_entry(
+                "http://datacite.org/schema/kernel-3.1"
+            )
+            is entry
+        )
+        assert list(d1_scimeta.validate.get_schema_cache_stats()) == ["dc"]
+
+    def test_1110(self):
+        """assert_valid(): Validation timings are recorded for valid and invalid
+        documents."""
+        d1_scimeta.validate.clear_schema_cache()
+        format_id = "eml://ecoinformatics.org/eml-2.1.1"
+        d1_scimeta.validate.assert_valid(
+            format_id, self.test_files.load_bin("xml/scimeta_eml_valid.xml")
+        )
+        with pytest.raises(d1_scimeta.util.SciMetaError):
+            d1_scimeta.validate.assert_valid(
+                format_id, self.test_files.load_bin("xml/scimeta_eml_invalid_1.xml")
+            )
+        stats_dict = d1_scimeta.validate.get_schema_cache_stats()["eml-2.1.1"]
+        assert stats_dict["validate_count"] == 2
+        assert stats_dict["compile_sec"] > 0
+
+    def test_1120(self):
+        """warm_up(): Compiles schemas for the given formatIds and returns errors."""
+        d1_scimeta.validate.clear_schema_cache()
+        error_dict = d1_scimeta.validate.warm_up(
+            ["http://ns.dataone.org/metadata/schema/onedcx/v1.0", "unknown_format_id"]
+        )
+        assert list(error_dict) == ["unknown_format_id"]
+        assert list(d1_scimeta.validate.get_schema_cache_stats()) == ["onedcx"]
+
+    def test_1130(self):
+        """validate_many(): Results are returned in input order, in the current
+        process."""
+        self._check_validate_many(worker_count=1)
+
+    def test_1140(self):
+        """validate_many(): Results are returned in input order, from a pool of worker
+        processes."""
+        self._check_validate_many(worker_count=2)
+
+    def _check_validate_many(self, worker_count):
+        format_id = "eml://ecoinformatics.org/eml-2.1.1"
+        item_list = [
+            (format_id, self.test_files.load_bin("xml/scimeta_eml_valid.xml")),
+            (format_id, self.test_files.load_bin("xml/scimeta_eml_invalid_1.xml")),
+            ("unknown_format_id", b"<a/>"),
+        ] * 2
+        result_list = list(
+            d1_scimeta.validate.validate_many(
+                iter(item_list), worker_count=worker_count, max_pending_count=2
+            )
+        )
+        assert [r.index for r in result_list] == list(range(len(item_list)))
+        assert [r.is_valid for r in result_list] == [True, False, False] * 2
+        assert result_list[0].error is None
+        assert "unknown_format_id" in result_list[2].error
@@ -565,6 +565,11 @@ def remove_empty_elements(xml_tree):
 
 
 def apply_xslt_transform(xml_tree, xslt_path):
+    return apply_xslt_obj(get_xslt_transform(xslt_path), xml_tree)
+
+
+def get_xslt_transform(xslt_path):
+    """Get a compiled XSLT transform, compiling and caching it on first use."""
     abs_xslt_path = d1_common.utils.filesystem.abs_path(xslt_path)
     if abs_xslt_path not in XSLT_TRANSFORM_DICT:
         try:
@@ -575,16 +580,17 @@ def apply_xslt_transform(xml_tree, xslt_path):
             raise SciMetaError(
                 "Unable to create XSLT processor: {}: {}".format(xslt_path, str(e))
             )
+    return XSLT_TRANSFORM_DICT[abs_xslt_path]
 
+
+def apply_xslt_obj(xslt_obj, xml_tree):
     try:
-        transformed_tree = XSLT_TRANSFORM_DICT[abs_xslt_path](xml_tree)
+        transformed_tree = xslt_obj(xml_tree)
     except lxml.etree.XSLTError as e:
         raise SciMetaError(
-            "Unable to apply XSLT processor from file: {}: {}".format(
-                abs_xslt_path, get_error_log_as_str(e)
-            )
+            "Unable to apply XSLT processor: {}".format(get_error_log_as_str(e))
         )
-    if XSLT_TRANSFORM_DICT[abs_xslt_path].error_log:
+    if xslt_obj.error_log:
         log.warning(get_error_log_as_str(transformed_tree))
     return transformed_tree
 
@@ -28,9 +28,20 @@ Usage:
     except d1_scimeta.util.SciMetaError as e:
         log.error(e)
 
+Compiling the XSD for a format, which may import hundreds of other XSD files, usually
+takes much longer than validating a document. The compiled schema and the XSLT
+adaptation transform for each format are cached for the lifetime of the process.
+Several formatIds may share the same schema, so the cache is keyed by schema name.
+To avoid compiling the schemas while handling the first validation for each format,
+call warm_up() when starting a long running process.
+
 """
+import collections
+import concurrent.futures
 import logging
 import os
+import threading
+import time
 
 import lxml.etree
 
@@ -38,6 +49,23 @@ import d1_scimeta.util
 
 log = logging.getLogger(__name__)
 
+# Compiled schema and XSLT adaptation transform for a schema name. xslt_obj is None
+# if the schema does not have an adaptation transform.
+SchemaCacheEntry = collections.namedtuple(
+    "SchemaCacheEntry", ["xsd_schema_obj", "xslt_obj", "compile_sec"]
+)
+
+# Result of validating one document with validate_many(). ``path`` is None for documents
+# passed as bytes. ``error`` is None for valid documents.
+ValidationResult = collections.namedtuple(
+    "ValidationResult", ["index", "format_id", "path", "is_valid", "error", "sec"]
+)
+
+_schema_cache_lock = threading.Lock()
+_schema_cache_dict = {}
+_validate_count_dict = collections.Counter()
+_validate_sec_dict = collections.Counter()
+
 
 def assert_valid(format_id, xml):
     """Validate an Science Metadata XML file.
@@ -87,6 +115,50 @@ def validate_path(format_id, xml_path):
     _assert_valid(format_id, d1_scimeta.util.load_xml_file_to_tree(xml_path))
 
 
+def validate_many(item_iter, worker_count=None, max_pending_count=None):
+    """Validate many Science Metadata documents in parallel.
+
+    The documents are distributed over a pool of worker processes. Each worker compiles
+    and caches the schemas it needs, so the cost of compiling a schema is paid at most
+    once per worker.
+
+    Args:
+        item_iter: iterable of (format_id, xml)
+            ``xml`` is a path to an XML file or the UTF-8 encoded bytes of an XML
+            document. Items are read from the iterable as workers become available, so
+            it can be a generator over a large corpus.
+
+        worker_count: int
+            Number of worker processes. By default, the number of CPUs. If 1, the
+            documents are validated in the current process.
+
+        max_pending_count: int
+            Maximum number of documents submitted to the pool but not yet yielded.
+            Bounds memory usage when documents are passed as bytes. By default, 4 times
+            the number of workers.
+
+    Yields:
+        ValidationResult: One for each item, in the order of ``item_iter``.
+
+    """
+    worker_count = worker_count or os.cpu_count() or 1
+    if worker_count == 1:
+        for index, (format_id, xml) in enumerate(item_iter):
+            yield _validate_item(index, format_id, xml)
+        return
+    max_pending_count = max_pending_count or 4 * worker_count
+    with concurrent.futures.ProcessPoolExecutor(worker_count) as executor:
+        pending_deque = collections.deque()
+        for index, (format_id, xml) in enumerate(item_iter):
+            pending_deque.append(
+                executor.submit(_validate_item, index, format_id, xml)
+            )
+            if len(pending_deque) >= max_pending_count:
+                yield pending_deque.popleft().result()
+        while pending_deque:
+            yield pending_deque.popleft().result()
+
+
 def apply_xerces_adaption_schema_transform(root_xsd_path, xml_tree):
     xslt_path = os.path.splitext(root_xsd_path)[0] + ".xslt"
     if os.path.exists(xslt_path):
@@ -94,24 +166,146 @@ def apply_xerces_adaption_schema_transform(root_xsd_path, xml_tree):
     return xml_tree
 
 
-def _assert_valid(format_id, xml_tree):
-    root_xsd_path = d1_scimeta.util.get_abs_root_xsd_path(format_id)
-    xsd_tree = d1_scimeta.util.load_xml_file_to_tree(root_xsd_path)
-    stripped_xml_tree = d1_scimeta.util.strip_whitespace(xml_tree)
-    adapted_tree = apply_xerces_adaption_schema_transform(
-        root_xsd_path, stripped_xml_tree
+def get_schema_cache_entry(format_id):
+    """Get the compiled schema and XSLT adaptation transform for a formatId.
+
+    The schema is compiled on first use and cached for the lifetime of the process.
+
+    Raises:
+        d1_scimeta.util.SciMetaError: formatId is not supported or the schema could
+        not be compiled.
+
+    Returns:
+        SchemaCacheEntry
+
+    """
+    schema_name = d1_scimeta.util.get_schema_name(format_id)
+    try:
+        return _schema_cache_dict[schema_name]
+    except KeyError:
+        pass
+    # Compiling is slow, so hold the lock to prevent other threads from compiling the
+    # same schema concurrently.
+    with _schema_cache_lock:
+        if schema_name not in _schema_cache_dict:
+            _schema_cache_dict[schema_name] = _compile_schema(format_id)
+        return _schema_cache_dict[schema_name]
+
+
+def warm_up(format_id_list=None):
+    """Compile and cache the schemas for a list of formatIds.
+
+    Args:
+        format_id_list: list of str
+            formatIds for which to compile schemas. By default, all supported
+            formatIds.
+
+    Returns:
+        dict: formatId -> error message for formatIds for which the schema could not
+        be compiled.
+
+    """
+    error_dict = {}
+    for format_id in format_id_list or d1_scimeta.util.get_supported_format_id_list():
+        try:
+            get_schema_cache_entry(format_id)
+        except d1_scimeta.util.SciMetaError as e:
+            log.error(
+                'Unable to compile schema. format_id="{}": {}'.format(format_id, e)
+            )
+            error_dict[format_id] = str(e)
+    return error_dict
+
+
+def get_schema_cache_stats():
+    """Get timings for the cached schemas.
+
+    Returns:
+        dict: schema name -> dict with the number of seconds used for compiling the
+        schema, and the number of documents validated against it and the total number
+        of seconds used for validating them.
+
+    """
+    with _schema_cache_lock:
+        return {
+            schema_name: {
+                "compile_sec": entry.compile_sec,
+                "validate_count": _validate_count_dict[schema_name],
+                "validate_sec": _validate_sec_dict[schema_name],
+            }
+            for schema_name, entry in _schema_cache_dict.items()
+        }
+
+
+def clear_schema_cache():
+    with _schema_cache_lock:
+        _schema_cache_dict.clear()
+        _validate_count_dict.clear()
+        _validate_sec_dict.clear()
+
+
+def _validate_item(index, format_id, xml):
+    start_sec = time.perf_counter()
+    try:
+        assert_valid(format_id, xml)
+    except (d1_scimeta.util.SciMetaError, EnvironmentError) as e:
+        error_str = str(e)
+    else:
+        error_str = None
+    return ValidationResult(
+        index,
+        format_id,
+        xml if isinstance(xml, str) else None,
+        error_str is None,
+        error_str,
+        time.perf_counter() - start_sec,
     )
-    # d1_scimeta.util.dump_pretty_tree(adapted_tree, 'Final tree to be validated')
-    _assert_valid_tree(xsd_tree, adapted_tree)
 
 
-def _assert_valid_tree(xsd_tree, xml_tree):
+def _compile_schema(format_id):
+    start_sec = time.perf_counter()
+    root_xsd_path = d1_scimeta.util.get_abs_root_xsd_path(format_id)
+    xsd_tree = d1_scimeta.util.load_xml_file_to_tree(root_xsd_path)
     try:
-        validator = d1_scimeta.util.create_lxml_obj(xsd_tree, lxml.etree.XMLSchema)
+        xsd_schema_obj = d1_scimeta.util.create_lxml_obj(
+            xsd_tree, lxml.etree.XMLSchema
+        )
     except d1_scimeta.util.SciMetaError as e:
         raise d1_scimeta.util.SciMetaError(
             "Unable to create lxml schema validator: {}".format(str(e))
         )
+    xslt_path = os.path.splitext(root_xsd_path)[0] + ".xslt"
+    xslt_obj = (
+        d1_scimeta.util.get_xslt_transform(xslt_path)
+        if os.path.exists(xslt_path)
+        else None
+    )
+    compile_sec = time.perf_counter() - start_sec
+    log.debug(
+        'Compiled schema. format_id="{}" sec={:.3f}'.format(format_id, compile_sec)
+    )
+    return SchemaCacheEntry(xsd_schema_obj, xslt_obj, compile_sec)
+
+
+def _assert_valid(format_id, xml_tree):
+    entry = get_schema_cache_entry(format_id)
+    start_sec = time.perf_counter()
+    stripped_xml_tree = d1_scimeta.util.strip_whitespace(xml_tree)
+    if entry.xslt_obj is None:
+        adapted_tree = stripped_xml_tree
+    else:
+        adapted_tree = d1_scimeta.util.apply_xslt_obj(entry.xslt_obj, stripped_xml_tree)
+    # d1_scimeta.util.dump_pretty_tree(adapted_tree, 'Final tree to be validated')
+    try:
+        _assert_valid_tree(entry.xsd_schema_obj, adapted_tree)
+    finally:
+        schema_name = d1_scimeta.util.get_schema_name(format_id)
+        with _schema_cache_lock:
+            _validate_count_dict[schema_name] += 1
+            _validate_sec_dict[schema_name] += time.perf_counter() - start_sec
+
+
+def _assert_valid_tree(validator, xml_tree):
     try:
         validator.assertValid(xml_tree)
     except lxml.etree.DocumentInvalid as e: